@@ -269,9 +269,15 @@ class AnonymizeConfig(BaseModel):
     worker_threads: int = Field(32, ge=1)
     audit_export: AuditExportConfig = Field(default_factory=AuditExportConfig)
     preserve_uids: bool = True
+    # Parse only the header and copy pixel data (and trailing elements) byte-for-byte
+    header_only_rewrite: bool = True
     rename_patient_folders: bool = False
     resume: bool = False
     audit_resume_per_leaf: bool = True
+    # Completed-leaf audits are written in batches; a crash loses at most this
+    # many leaves or seconds of completed work, which resume redoes
+    audit_flush_leaves: int = Field(500, ge=1)
+    audit_flush_seconds: float = Field(30.0, gt=0)
     total_subjects: Optional[int] = None
 
     cohort_name: Optional[str] = None
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import csv
+import errno
 import hashlib
 import logging
 import os
@@ -17,6 +18,7 @@ from enum import Enum
 from pathlib import Path
 from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+import polars as pl
 import pydicom
 from dateutil.relativedelta import relativedelta
 from pydicom.datadict import dictionary_description
@@ -47,10 +49,12 @@ from .config import (
     SequentialDiscoveryMode,
     SequentialIdConfig,
 )
-from .exporter import StudyAuditAggregator, export_csv, export_encrypted_excel
+from .exporter import AUDIT_EVENT_SCHEMA, StudyAuditAggregator, export_csv, export_encrypted_excel
 from .store import (
-    load_leaf_summaries_for_cohort,
+    iter_leaf_summaries_for_cohort,
+    load_completed_study_uids,
     mark_study_audit_complete,
+    record_completed_leaves,
     record_leaf_audit_summary,
     study_audit_exists,
 )
@@ -71,6 +75,9 @@ PATIENT_ID_TAG = (0x0010, 0x0020)
 STUDY_DATE_TAG = (0x0008, 0x0020)
 STUDY_INSTANCE_UID_TAG = (0x0020, 0x000D)
 
+# First pixel data element (Float/Double Float/Pixel Data); header-only reads stop here
+FIRST_PIXEL_DATA_TAG = (0x7FE0, 0x0008)
+
 MANDATORY_TAGS: Tuple[Tuple[int, int], ...] = (
     (0x0008, 0x0016),
     (0x0008, 0x0018),
@@ -783,7 +790,104 @@ def _light_read_pid_date(path: Path) -> Optional[tuple[str, datetime]]:
     return str(pid), parsed
 
 
-def _discover_pids_by_top_folder(root: Path) -> List[str]:
+@dataclass(frozen=True)
+class _HeaderRecord:
+    """Header fields of one source file, as read by the header index pre-pass."""
+    path: Path
+    size: int
+    patient_id: Optional[str]
+    study_uid: Optional[str]
+    study_date: Optional[str]
+
+
+def _light_read_header(path: Path) -> _HeaderRecord:
+    tags = [Tag(PATIENT_ID_TAG), Tag(STUDY_INSTANCE_UID_TAG), Tag(STUDY_DATE_TAG)]
+    try:
+        size = os.stat(path).st_size
+    except OSError:
+        size = 0
+    try:
+        ds = pydicom.dcmread(str(path), specific_tags=tags, stop_before_pixels=True, force=False)
+    except Exception:
+        return _HeaderRecord(path, size, None, None, None)
+    values = [getattr(ds.get(tag), "value", "") for tag in tags]
+    pid, uid, study_date = (str(value).strip() or None for value in values)
+    return _HeaderRecord(path, size, pid, uid, study_date)
+
+
+class _HeaderIndex:
+    """
+    PatientID, StudyInstanceUID, StudyDate and size of every source file.
+
+    Built by one parallel walk + header read of the source tree; ID discovery,
+    timepoint mapping and leaf grouping all read from it instead of walking
+    and re-reading the tree themselves. Records keep the walk order.
+    """
+
+    def __init__(self, records: Sequence[_HeaderRecord]):
+        self.records = list(records)
+
+    @classmethod
+    def build(cls, root: Path, max_workers: int = 16) -> "_HeaderIndex":
+        paths = list(iter_dicom_files(root, max_workers=max_workers))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            records = list(executor.map(_light_read_header, paths))
+        logger.info("Header index: %d files under %s", len(records), root)
+        return cls(records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def first_dates(self) -> Dict[str, datetime]:
+        """Earliest StudyDate per PatientID."""
+        first_dates: Dict[str, datetime] = {}
+        for record in self.records:
+            if not record.patient_id or not record.study_date:
+                continue
+            try:
+                study = datetime.strptime(record.study_date, "%Y%m%d")
+            except ValueError:
+                continue
+            pid = record.patient_id
+            if pid not in first_dates or study < first_dates[pid]:
+                first_dates[pid] = study
+        return first_dates
+
+    def pids_all(self) -> List[str]:
+        return sorted({record.patient_id for record in self.records if record.patient_id})
+
+    def pids_one_per_study(self) -> List[str]:
+        seen: Set[str] = set()
+        ordered: List[str] = []
+        for record in self.records:
+            if record.study_uid and record.patient_id and record.study_uid not in seen:
+                seen.add(record.study_uid)
+                ordered.append(record.patient_id)
+        return _dedupe(ordered)
+
+    def by_top_folder(self, root: Path) -> Dict[str, List[_HeaderRecord]]:
+        """Records grouped by the name of their top-level folder under *root*."""
+        grouped: Dict[str, List[_HeaderRecord]] = defaultdict(list)
+        for record in self.records:
+            top = _top_level_name(record.path, root)
+            if top is not None and record.path.parent != root:
+                grouped[top].append(record)
+        return grouped
+
+    def pids_by_top_folder(self, root: Path) -> List[str]:
+        """First PatientID found in each top-level folder, folders in name order."""
+        grouped = self.by_top_folder(root)
+        discovered: List[str] = []
+        for name in sorted(grouped):
+            pid = next((record.patient_id for record in grouped[name] if record.patient_id), None)
+            if pid:
+                discovered.append(pid)
+        return _dedupe(discovered)
+
+
+def _discover_pids_by_top_folder(root: Path, index: Optional[_HeaderIndex] = None) -> List[str]:
+    if index is not None:
+        return index.pids_by_top_folder(root)
     top_dirs = [path for path in root.iterdir() if path.is_dir()]
     top_dirs.sort(key=lambda p: p.name)
 
@@ -798,7 +902,9 @@ def _discover_pids_by_top_folder(root: Path) -> List[str]:
     return _dedupe(discovered)
 
 
-def _discover_pids_one_per_study(root: Path, max_workers: int = 16) -> List[str]:
+def _discover_pids_one_per_study(root: Path, max_workers: int = 16, index: Optional[_HeaderIndex] = None) -> List[str]:
+    if index is not None:
+        return index.pids_one_per_study()
     paths = list(iter_dicom_files(root, max_workers=max_workers))
     seen: Set[str] = set()
     ordered: List[str] = []
@@ -815,7 +921,9 @@ def _discover_pids_one_per_study(root: Path, max_workers: int = 16) -> List[str]
     return _dedupe(ordered)
 
 
-def _discover_pids_all(root: Path, max_workers: int = 16) -> List[str]:
+def _discover_pids_all(root: Path, max_workers: int = 16, index: Optional[_HeaderIndex] = None) -> List[str]:
+    if index is not None:
+        return index.pids_all()
     paths = list(iter_dicom_files(root, max_workers=max_workers))
     observed: Set[str] = set()
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -954,7 +1062,11 @@ class CSVPlusDeterministicFallback(IDStrategy):
         return self._mapping.items()
 
 
-def _build_id_strategy(config: AnonymizeConfig, files: Sequence[Path], max_workers: int = 16) -> IDStrategy:
+def _build_id_strategy(
+    config: AnonymizeConfig,
+    index: Optional[_HeaderIndex] = None,
+    max_workers: int = 16,
+) -> IDStrategy:
     pid_config: PatientIdConfig = config.patient_id
     if not pid_config.enabled:
         return IDStrategy()
@@ -987,7 +1099,7 @@ def _build_id_strategy(config: AnonymizeConfig, files: Sequence[Path], max_worke
         if csv_cfg.missing_mode == CsvMissingMode.HASH:
             return CSVPlusDeterministicFallback(mapping, csv_cfg.missing_pattern, csv_cfg.missing_salt)
 
-        fallback_ids = _discover_pids_by_top_folder(config.source_root)
+        fallback_ids = _discover_pids_by_top_folder(config.source_root, index)
         if not csv_cfg.preserve_top_folder_order:
             fallback_ids = sorted(set(fallback_ids))
 
@@ -1007,11 +1119,11 @@ def _build_id_strategy(config: AnonymizeConfig, files: Sequence[Path], max_worke
         seq: SequentialIdConfig = pid_config.sequential
         discovered: List[str]
         if seq.discovery == SequentialDiscoveryMode.PER_TOP_FOLDER:
-            discovered = _discover_pids_by_top_folder(config.source_root)
+            discovered = _discover_pids_by_top_folder(config.source_root, index)
         elif seq.discovery == SequentialDiscoveryMode.ONE_PER_STUDY:
-            discovered = _discover_pids_one_per_study(config.source_root, max_workers)
+            discovered = _discover_pids_one_per_study(config.source_root, max_workers, index)
         else:
-            discovered = _discover_pids_all(config.source_root, max_workers)
+            discovered = _discover_pids_all(config.source_root, max_workers, index)
         mapping = {
             pid: _id_from_pattern(seq.pattern, index)
             for index, pid in enumerate(discovered, start=seq.starting_number)
@@ -1026,9 +1138,11 @@ def _build_id_strategy(config: AnonymizeConfig, files: Sequence[Path], max_worke
 # ---------------------------------------------------------------------------
 
 
-def _collect_first_dates(config: AnonymizeConfig, files: Iterable[Path]) -> Dict[str, datetime]:
+def _collect_first_dates(config: AnonymizeConfig, files: Iterable[Path] | _HeaderIndex) -> Dict[str, datetime]:
     if not config.study_dates.enabled:
         return {}
+    if isinstance(files, _HeaderIndex):
+        return files.first_dates()
 
     first_dates: Dict[str, datetime] = {}
     for path in files:
@@ -1063,6 +1177,7 @@ class _Options:
     map_timepoints: bool
     preserve_uids: bool
     rename_patient_folders: bool
+    header_only_rewrite: bool = False
     resume: bool = False
     audit_resume_per_leaf: bool = False
     cohort_name: Optional[str] = None
@@ -1105,14 +1220,23 @@ class _ResumeMetrics:
 
 
 @dataclass
-class PatientProgressResult:
-    """Result from processing a partition of patient folders with progress tracking."""
+class _LeafWorkUnit:
+    """All files of one leaf (StudyInstanceUID) inside one patient folder."""
+    patient: str
+    study_uid: str
+    files: List[Path] = field(default_factory=list)
+    size: int = 0
+
+
+@dataclass
+class LeafProgressResult:
+    """Result from processing one leaf work unit."""
+    patient: str     # Patient folder name, for patient-level progress
     total_files: int
     updated_files: int
     skipped_files: int
     errors: List[str]
-    completed_patients: List[str]  # Patient folder names for logging
-    patient_count: int             # Number of patients processed
+    audit: Optional[dict] = None  # Leaf audit record, persisted by the parent
 
 
 def _merge_leaf_audit_event(state: _LeafState, event: dict) -> None:
@@ -1158,26 +1282,23 @@ def _build_leaf_audit_payload(state: _LeafState) -> Optional[dict]:
     }
 
 
-def _events_from_summaries(summaries: Iterable[dict]) -> List[dict]:
-    events: List[dict] = []
+def _audit_frame_from_summaries(summaries: Iterable[dict]) -> pl.DataFrame:
+    """Audit events of persisted leaf summaries as one columnar batch (``AUDIT_EVENT_SCHEMA``)."""
+    columns: Dict[str, List[Optional[str]]] = {name: [] for name in AUDIT_EVENT_SCHEMA}
     for row in summaries:
         summary_payload = row.get("summary") or {}
         audit = summary_payload.get("audit") or {}
         rel_path = audit.get("anchor_rel_path") or row.get("leaf_rel_path")
-        tags = audit.get("tags") or []
-        for tag in tags:
-            events.append(
-                {
-                    "study_uid": row.get("study_uid"),
-                    "rel_path": rel_path,
-                    "tag": tag.get("tag"),
-                    "tag_name": tag.get("tag_name"),
-                    "action": tag.get("action"),
-                    "old_value": tag.get("old_value"),
-                    "new_value": tag.get("new_value"),
-                }
-            )
-    return events
+        for tag in audit.get("tags") or []:
+            columns["study_uid"].append(row.get("study_uid"))
+            columns["rel_path"].append(rel_path)
+            for name in ("tag", "tag_name", "action", "old_value", "new_value"):
+                columns[name].append(tag.get(name))
+    return pl.DataFrame(columns, schema=AUDIT_EVENT_SCHEMA)
+
+
+def _events_from_summaries(summaries: Iterable[dict]) -> List[dict]:
+    return _audit_frame_from_summaries(summaries).to_dicts()
 
 
 _WORKER_OPTIONS: Optional["_Options"] = None
@@ -1185,219 +1306,184 @@ _WORKER_PID_STRATEGY: Optional["IDStrategy"] = None
 _WORKER_FIRST_DATES: Dict[str, datetime] = {}
 
 
-def _is_dicom_candidate_from_path(path: Path) -> bool:
-    """Check if path looks like a DICOM file without filesystem call."""
-    name = path.name.lower()
-    if name.endswith(".dcm"):
-        return True
-    if not path.suffix:  # Extensionless
-        return True
-    return False
-
-
-def _persist_aggregated_leaf_audit(
-    leaf_uid: str,
-    leaf_files: List[Path],
-    leaf_results: List[Tuple[Path, Dict[str, object]]],
-    leaf_errors: List[str],
-    options: _Options,
-) -> int:
+class _LeafAuditAccumulator:
     """
-    Persist audit summary for entire leaf based on processing all files.
+    Per-leaf audit state folded in file by file inside the worker.
     
-    Returns: Number of successfully processed files
+    Slices of one study repeat the same tag events, so only the first event per
+    tag is kept and per-file results are dropped as soon as they are folded in.
+    Only the compact leaf record leaves the worker.
     """
-    # Aggregate audit events from all files
-    all_audit_events = []
-    files_written = 0
-    files_reused = 0
-    files_with_errors = 0
-    patient_ids = set()
-    
-    for file_path, result in leaf_results:
+
+    def __init__(self, leaf_uid: str):
+        self.leaf_uid = leaf_uid
+        self.files_processed = 0
+        self.files_written = 0
+        self.files_reused = 0
+        self.files_with_errors = 0
+        self.errors: List[str] = []
+        self.tags: Dict[str, dict] = {}
+        self.anchor_rel_path: Optional[str] = None
+        self.patient_id_original: Optional[str] = None
+        self.patient_id_updated: Optional[str] = None
+
+    def add_result(self, file_path: Path, result: Dict[str, object]) -> None:
+        self.files_processed += 1
         if result.get("error"):
-            files_with_errors += 1
-            continue
-            
-        # Count output files
+            self.files_with_errors += 1
+            self.errors.append(f"{file_path}: {result['error']}")
+            return
+        
         if result.get("wrote_output"):
-            files_written += 1
-        elif result.get("output_preexisting"):  
-            files_reused += 1
-            
-        # Collect audit events
-        audit_events = result.get("audit_events", [])
-        all_audit_events.extend(audit_events)
+            self.files_written += 1
+        elif result.get("output_preexisting"):
+            self.files_reused += 1
         
-        # Collect patient IDs
-        if result.get("patient_id_original"):
-            patient_ids.add(result["patient_id_original"])
-    
-    # Build aggregated audit payload
-    audit_tags = {}
-    for event in all_audit_events:
-        tag_code = event.get("tag")
-        if tag_code and tag_code not in audit_tags:  # Avoid duplicates
-            audit_tags[tag_code] = event
-    
-    # Use first successful result for representative data
-    representative_result = next((r for _, r in leaf_results if not r.get("error")), {})
-    
-    audit_payload = {
-        "anchor_rel_path": representative_result.get("rel_path"),
-        "tags": list(audit_tags.values()),
-        "files_processed": len(leaf_results) - files_with_errors,
-    }
-    
-    # Write to DB
-    leaf_rel_path = _leaf_relative_path(leaf_files[0].parent, options.source_root)
-    
-    record_leaf_audit_summary(
-        leaf_uid,
-        cohort_name=options.cohort_name,
-        leaf_rel_path=leaf_rel_path,
-        files_total=len(leaf_files),
-        files_written=files_written,
-        files_reused=files_reused,
-        files_with_errors=files_with_errors,
-        patient_id_original=list(patient_ids)[0] if patient_ids else None,
-        patient_id_updated=representative_result.get("patient_id_updated"),
-        errors=leaf_errors[:10],  # Limit error list size
-        audit_payload=audit_payload,
-    )
-    
-    mark_study_audit_complete(
-        leaf_uid,
-        leaf_rel_path=leaf_rel_path,
-        cohort_name=options.cohort_name,
-    )
+        for event in result.get("audit_events", []):
+            tag_code = event.get("tag")
+            if tag_code and tag_code not in self.tags:
+                self.tags[tag_code] = event
+        
+        # First successful result provides the representative data
+        if self.anchor_rel_path is None:
+            self.anchor_rel_path = result.get("rel_path")
+            self.patient_id_updated = result.get("patient_id_updated")
+        if self.patient_id_original is None:
+            self.patient_id_original = result.get("patient_id_original")
+
+    def add_error(self, file_path: Path, exc: Exception) -> None:
+        self.errors.append(f"{file_path}: {exc}")
+
+    @property
+    def success_count(self) -> int:
+        return self.files_processed - self.files_with_errors
+
+    def record(self, leaf_files: List[Path], options: _Options) -> dict:
+        """
+        The audit record for the leaf: ``study_uid`` plus the fields of
+        ``record_leaf_audit_summary``, persisted by ``_LeafAuditBuffer`` in the parent.
+        """
+        return {
+            "study_uid": self.leaf_uid,
+            "cohort_name": options.cohort_name,
+            "leaf_rel_path": _leaf_relative_path(leaf_files[0].parent, options.source_root),
+            "files_total": len(leaf_files),
+            "files_written": self.files_written,
+            "files_reused": self.files_reused,
+            "files_with_errors": self.files_with_errors,
+            "patient_id_original": self.patient_id_original,
+            "patient_id_updated": self.patient_id_updated,
+            "errors": self.errors[:10],  # Limit error list size
+            "audit_payload": {
+                "anchor_rel_path": self.anchor_rel_path,
+                "tags": list(self.tags.values()),
+                "files_processed": self.success_count,
+            },
+        }
+
+
+class _LeafAuditBuffer:
+    """
+    Completed-leaf audits waiting to be written in one batched upsert.
     
-    return len(leaf_results) - files_with_errors  # Successfully processed files
+    Crash-safety window: a leaf's outputs are on disk before its audit is
+    buffered, and a leaf counts as done for resume only once its audit is
+    flushed. A crash therefore loses at most ``max_leaves`` leaves or
+    ``max_seconds`` of completed work, whose outputs resume rewrites; it can
+    never mark a leaf complete whose outputs are missing.
+    """
+
+    def __init__(self, max_leaves: int, max_seconds: float):
+        self.max_leaves = max_leaves
+        self.max_seconds = max_seconds
+        self.records: List[dict] = []
+        self.flushed = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, record: dict) -> None:
+        self.records.append(record)
+        if len(self.records) >= self.max_leaves or time.monotonic() - self._last_flush >= self.max_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self.records:
+            return
+        records, self.records = self.records, []
+        self.flushed += record_completed_leaves(records)
+        logger.debug(f"Flushed audit for {len(records)} leaves")
 
 
-def _process_patient_partition(
-    patient_folder: Path,
+def _process_leaf(
+    leaf_uid: str,
+    leaf_files: List[Path],
     options: _Options,
     pid_strategy: "IDStrategy",
     first_dates: Dict[str, datetime],
-) -> Tuple[int, int, int, List[str]]:
+) -> Tuple[int, int, List[str], Optional[dict]]:
     """
-    Process all files in ONE patient folder.
+    Process ALL files of one leaf (StudyInstanceUID) and build its audit record.
     
-    NEW APPROACH: Group files by leaf, then process ALL files in each leaf.
-    Each worker owns exclusive patient folders - no race conditions.
-    DB is single source of truth for leaf processing status.
+    Completed leaves are filtered out by the caller before dispatch.
     
-    Returns: (total_files, updated_files, skipped_files, errors)
+    Returns: (updated_files, skipped_files, errors, audit record)
     """
-    total_files = 0
-    updated_files = 0
-    skipped_files = 0
-    errors: List[str] = []
-    
-    # Phase 1: Group files by leaf (StudyInstanceUID)
-    files_by_leaf: Dict[str, List[Path]] = defaultdict(list)
-    
-    for file_path in patient_folder.rglob("*"):
-        if not file_path.is_file():
-            continue
-        if not _is_dicom_candidate_from_path(file_path):
-            continue
-        
-        total_files += 1
-        
-        # Extract leaf identifier (StudyUID)
-        try:
-            leaf_uid, _ = _light_read_uid_and_pid(file_path)
-            if leaf_uid:
-                files_by_leaf[leaf_uid].append(file_path)
-            else:
-                skipped_files += 1
-        except Exception:
-            skipped_files += 1
-            continue
+    accumulator = _LeafAuditAccumulator(leaf_uid)
     
-    # Phase 2: Process each leaf as a unit
-    for leaf_uid, leaf_files in files_by_leaf.items():
-        # Skip if already processed (DB check)
-        if study_audit_exists(leaf_uid):
-            skipped_files += len(leaf_files)
-            logger.debug(f"Skipping leaf {leaf_uid} (already in DB): {len(leaf_files)} files")
-            continue
-            
-        # Process ALL files in this leaf
-        leaf_results = []
-        leaf_errors = []
-        
-        for file_path in leaf_files:
-            try:
-                result = _process_single_file(file_path, options, pid_strategy, first_dates)
-                leaf_results.append((file_path, result))
-                
-                if result.get("error"):
-                    leaf_errors.append(f"{file_path}: {result['error']}")
-            except Exception as exc:
-                leaf_errors.append(f"{file_path}: {exc}")
-        
-        # Phase 3: Aggregate and persist audit for entire leaf
+    for file_path in leaf_files:
         try:
-            success_count = _persist_aggregated_leaf_audit(
-                leaf_uid, 
-                leaf_files, 
-                leaf_results, 
-                leaf_errors, 
-                options
-            )
-            
-            updated_files += success_count
-            skipped_files += (len(leaf_files) - success_count)
-            errors.extend(leaf_errors)
-            
-            logger.debug(f"Processed leaf {leaf_uid} from {patient_folder.name}: {success_count}/{len(leaf_files)} files successful")
-            
+            accumulator.add_result(file_path, _process_single_file(file_path, options, pid_strategy, first_dates))
         except Exception as exc:
-            error_msg = f"Failed to persist audit for leaf {leaf_uid}: {exc}"
-            errors.append(error_msg)
-            skipped_files += len(leaf_files)
-            logger.error(error_msg)
+            accumulator.add_error(file_path, exc)
     
-    return total_files, updated_files, skipped_files, errors
+    success_count = accumulator.success_count
+    logger.debug(f"Processed leaf {leaf_uid}: {success_count}/{len(leaf_files)} files successful")
+    return success_count, len(leaf_files) - success_count, accumulator.errors, accumulator.record(leaf_files, options)
 
 
-def _partition_patients(
+def _plan_leaf_work_units(
     source_root: Path,
-    num_workers: int,
-) -> List[List[Path]]:
+    header_index: _HeaderIndex,
+) -> Tuple[List[_LeafWorkUnit], Dict[str, int], int]:
     """
-    Partition top-level patient folders across workers.
+    Split every top-level patient folder into one work unit per leaf (StudyInstanceUID).
     
-    Returns: List of lists, one per worker, containing patient folders.
+    Units are ordered largest-first by the summed file sizes from the header index,
+    so the biggest studies start early and small ones fill the tail of the run.
+    
+    Returns: (work units, unit count per patient folder, files without a StudyUID)
     """
-    # Get all top-level folders
     try:
-        patient_folders = [p for p in source_root.iterdir() if p.is_dir()]
+        patient_names = sorted(p.name for p in source_root.iterdir() if p.is_dir())
     except Exception as exc:
         logger.error(f"Failed to list patient folders: {exc}")
-        return [[] for _ in range(num_workers)]
-    
-    patient_folders.sort()  # Deterministic order
+        return [], {}, 0
     
-    if not patient_folders:
+    if not patient_names:
         logger.warning(f"No patient folders found in {source_root}")
-        return [[] for _ in range(num_workers)]
+        return [], {}, 0
     
-    # Round-robin distribution for load balancing
-    partitions: List[List[Path]] = [[] for _ in range(num_workers)]
-    for idx, folder in enumerate(patient_folders):
-        worker_idx = idx % num_workers
-        partitions[worker_idx].append(folder)
-    
-    logger.info(f"Partitioned {len(patient_folders)} patients across {num_workers} workers")
-    for i, partition in enumerate(partitions):
-        if partition:
-            logger.debug(f"  Worker {i}: {len(partition)} patients")
+    folder_records = header_index.by_top_folder(source_root)
+    units: List[_LeafWorkUnit] = []
+    units_per_patient: Dict[str, int] = {}
+    unassigned = 0
+    for name in patient_names:
+        leaves: Dict[str, _LeafWorkUnit] = {}
+        for record in folder_records.get(name, ()):
+            if not record.study_uid:
+                unassigned += 1
+                continue
+            unit = leaves.get(record.study_uid)
+            if unit is None:
+                unit = leaves[record.study_uid] = _LeafWorkUnit(name, record.study_uid)
+            unit.files.append(record.path)
+            unit.size += record.size
+        units.extend(leaves.values())
+        units_per_patient[name] = len(leaves)
     
-    return partitions
+    units.sort(key=lambda unit: (-unit.size, unit.patient, unit.study_uid))
+    logger.info(f"Planned {len(units)} leaf work units across {len(patient_names)} patients")
+    return units, units_per_patient, unassigned
 
 
 def _process_single_file(
@@ -1413,8 +1499,12 @@ def _process_single_file(
     date_tag = Tag(STUDY_DATE_TAG)
     uid_tag = Tag(STUDY_INSTANCE_UID_TAG)
 
+    pixel_offset: Optional[int] = None
     try:
-        ds = pydicom.dcmread(str(path), force=True, stop_before_pixels=False)
+        if options.header_only_rewrite:
+            ds, pixel_offset = _read_header(path)
+        else:
+            ds = pydicom.dcmread(str(path), force=True, stop_before_pixels=False)
     except Exception as exc:
         error_message = str(exc)
         return {
@@ -1519,7 +1609,13 @@ def _process_single_file(
     error_message: Optional[str]
     if not skip_write:
         try:
-            _save_dataset(ds, path, options, mapped_pid=new_pid if options.rename_patient_folders else None)
+            _save_dataset(
+                ds,
+                path,
+                options,
+                mapped_pid=new_pid if options.rename_patient_folders else None,
+                pixel_offset=pixel_offset,
+            )
         except Exception as exc:  # pragma: no cover - defensive
             error_message = str(exc)
         else:
@@ -1583,17 +1679,6 @@ def _accumulate_worker_output(
     return (1 if result.get("wrote_output") else 0), 0
 
 
-def _should_cache_files(config: AnonymizeConfig) -> bool:
-    return config.study_dates.enabled or (
-        config.patient_id.enabled
-        and config.patient_id.strategy
-        in {
-            PatientIdStrategyType.SEQUENTIAL,
-            PatientIdStrategyType.FOLDER,
-        }
-    )
-
-
 def _process_files_streaming(
     file_iterator: Iterable[Path],
     options: _Options,
@@ -2003,16 +2088,80 @@ def _outputs_exist_for_leaf_file(
     return False
 
 
+def _read_header(path: Path) -> Tuple[pydicom.Dataset, Optional[int]]:
+    """
+    Read a file up to its pixel data and return the dataset with the pixel data offset.
+
+    The offset is where the raw bytes to copy start (EOF without pixel data). It
+    is None, and the dataset fully read, when those bytes cannot be appended to
+    a rewritten header as-is: deflated data sets, and files whose data set
+    encoding does not match the transfer syntax in their file meta.
+    """
+    with open(path, "rb") as fp:
+        ds = pydicom.dcmread(fp, force=True, stop_before_pixels=True)
+        offset = fp.tell()
+
+    transfer_syntax = getattr(getattr(ds, "file_meta", None), "TransferSyntaxUID", None)
+    if (
+        transfer_syntax is not None
+        and transfer_syntax.is_transfer_syntax
+        and not transfer_syntax.is_deflated
+        and ds.original_encoding == (transfer_syntax.is_implicit_VR, transfer_syntax.is_little_endian)
+    ):
+        return ds, offset
+    return pydicom.dcmread(str(path), force=True, stop_before_pixels=False), None
+
+
+# copy_file_range/sendfile failures that mean "not supported here", not I/O errors
+_KERNEL_COPY_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK}
+
+
+def _kernel_copy(in_fd: int, out_fd: int, offset: int, count: int) -> int:
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            return copy_file_range(in_fd, out_fd, count, offset)
+        except OSError as exc:
+            if exc.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+    if not hasattr(os, "sendfile"):
+        raise OSError(errno.ENOSYS, "sendfile is not available")
+    return os.sendfile(out_fd, in_fd, offset, count)
+
+
+def _copy_file_tail(source: Path, out_fd: int, offset: int) -> None:
+    """Append the bytes of *source* from *offset* on to *out_fd*, in the kernel where possible."""
+    with open(source, "rb") as src:
+        in_fd = src.fileno()
+        position = offset
+        end = os.fstat(in_fd).st_size
+        try:
+            while position < end:
+                sent = _kernel_copy(in_fd, out_fd, position, end - position)
+                if not sent:
+                    break
+                position += sent
+        except OSError as exc:
+            if exc.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+        src.seek(position)
+        while chunk := src.read(1 << 20):
+            os.write(out_fd, chunk)
+
+
 def _save_dataset(
     ds: pydicom.Dataset,
     input_path: Path,
     opts: _Options,
     mapped_pid: Optional[str] = None,
+    pixel_offset: Optional[int] = None,
 ) -> Path:
     """
     Save dataset to output, using the active directory (renamed if it exists, original otherwise).
     
     This handles resume scenarios where folders may have been renamed in a previous run.
+    With a pixel_offset (header-only rewrite) only the header is encoded; the
+    source bytes from that offset on are appended unchanged.
     """
     target = _target_path(input_path, opts)
     
@@ -2030,7 +2179,13 @@ def _save_dataset(
     
     target.parent.mkdir(parents=True, exist_ok=True)
     temp = target.with_suffix(target.suffix + ".tmp")
-    ds.save_as(str(temp), enforce_file_format=not opts.preserve_uids)
+    if pixel_offset is None:
+        ds.save_as(str(temp), enforce_file_format=not opts.preserve_uids)
+    else:
+        with open(temp, "wb") as out:
+            ds.save_as(out, enforce_file_format=not opts.preserve_uids)
+            out.flush()
+            _copy_file_tail(input_path, out.fileno(), pixel_offset)
     os.replace(str(temp), str(target))
     return target
 
@@ -2076,48 +2231,31 @@ def _scrub_dataset(
     return removed
 
 
-def _process_partition_worker(patient_folders: List[Path]) -> PatientProgressResult:
+def _process_leaf_worker(unit: _LeafWorkUnit) -> LeafProgressResult:
     """
-    Worker function to process a partition of patient folders.
+    Worker function to process one leaf work unit.
     
     Must be module-level (not nested) for pickle serialization in multiprocessing.
     Uses worker-initialized globals (_WORKER_OPTIONS, etc.) set by _worker_init.
-    
-    Returns PatientProgressResult for smooth progress tracking.
     """
-    total = 0
-    updated = 0
-    skipped = 0
-    all_errors = []
-    completed_patient_names = []
-    
     # Use worker-initialized globals (set by ProcessPoolExecutor initializer)
     if _WORKER_OPTIONS is None or _WORKER_PID_STRATEGY is None:
         raise RuntimeError("Worker not initialized - globals not set")
     
-    for folder in patient_folders:
-        t, u, s, errs = _process_patient_partition(
-            folder,
-            _WORKER_OPTIONS,
-            _WORKER_PID_STRATEGY,
-            _WORKER_FIRST_DATES,
-        )
-        total += t
-        updated += u
-        skipped += s
-        all_errors.extend(errs)
-        
-        # Track patient completion for progress reporting
-        completed_patient_names.append(folder.name)
-        logger.info(f"Completed patient {folder.name}: {u} leaves processed, {s} skipped, {t} files total")
-    
-    return PatientProgressResult(
-        total_files=total,
+    updated, skipped, errors, audit = _process_leaf(
+        unit.study_uid,
+        unit.files,
+        _WORKER_OPTIONS,
+        _WORKER_PID_STRATEGY,
+        _WORKER_FIRST_DATES,
+    )
+    return LeafProgressResult(
+        patient=unit.patient,
+        total_files=len(unit.files),
         updated_files=updated,
         skipped_files=skipped,
-        errors=all_errors,
-        completed_patients=completed_patient_names,
-        patient_count=len(patient_folders),
+        errors=errors,
+        audit=audit,
     )
 
 
@@ -2127,93 +2265,94 @@ def _run_partitioned_processing(
     pid_strategy: "IDStrategy",
     first_dates: Dict[str, datetime],
     progress: Optional[ProgressCallback],
+    header_index: _HeaderIndex,
 ) -> Tuple[int, int, int, List[str]]:
     """
-    Partition patients and process in parallel.
+    Process leaf work units in parallel, largest first.
     
-    Each worker gets exclusive patient folders - no race conditions.
-    DB is single source of truth.
+    The executor's shared queue hands the next unit to whichever worker is idle,
+    so one large longitudinal patient is spread over all workers instead of
+    pinning one. Each leaf is owned by exactly one unit - no race conditions.
+    Results are handled in completion order; folder renaming runs after all
+    units finish and reads the DB, so no per-patient ordering is kept.
+    DB is single source of truth: completed StudyUIDs are loaded in bulk once,
+    and finished leaves are written back in batches (see ``_LeafAuditBuffer``).
     """
+    units, units_per_patient, unassigned = _plan_leaf_work_units(config.source_root, header_index)
+    total_patients = len(units_per_patient)
+    logger.info(f"Found {total_patients} patient folders to process")
     
-    # Count patients upfront for smooth progress reporting
-    total_patients = 0
-    try:
-        patient_folders = [p for p in config.source_root.iterdir() if p.is_dir()]
-        total_patients = len(patient_folders)
-        logger.info(f"Found {total_patients} patient folders to process")
-    except Exception as exc:
-        logger.warning(f"Could not count patient folders: {exc}")
-        total_patients = 0
+    completed_uids = load_completed_study_uids(unit.study_uid for unit in units)
+    done_units = [unit for unit in units if unit.study_uid in completed_uids]
+    units = [unit for unit in units if unit.study_uid not in completed_uids]
+    if done_units:
+        logger.info(f"Skipping {len(done_units)} leaves already completed in DB")
+    audit_buffer = _LeafAuditBuffer(config.audit_flush_leaves, config.audit_flush_seconds)
     
-    # Partition work across workers
-    partitions = _partition_patients(
-        config.source_root,
-        config.concurrent_processes,
-    )
-    
-    # Execute in parallel with patient-level progress tracking
-    total_files = 0
+    total_files = unassigned
     updated_files = 0
-    skipped_files = 0
+    skipped_files = unassigned
     all_errors: List[str] = []
-    completed_patients = 0
+    remaining_units = dict(units_per_patient)
+    # Patients without any leaf have nothing left to wait for
+    completed_patients = sum(1 for count in remaining_units.values() if count == 0)
     
-    if config.concurrent_processes > 1:
-        logger.info(f"Starting parallel processing with {config.concurrent_processes} workers")
-        with ProcessPoolExecutor(
-            max_workers=config.concurrent_processes,
-            initializer=_worker_init,
-            initargs=(options, pid_strategy, first_dates),
-        ) as pool:
-            # Submit all partitions for processing
-            futures = [pool.submit(_process_partition_worker, partition) for partition in partitions]
-            
-            # Process results as they complete (enables real-time patient-level progress updates)
-            for future in as_completed(futures):
-                result = future.result()  # PatientProgressResult
-                total_files += result.total_files
-                updated_files += result.updated_files
-                skipped_files += result.skipped_files
-                all_errors.extend(result.errors)
-                
-                # Update patient progress
-                completed_patients += result.patient_count
-                
-                if progress and total_patients > 0:
-                    # Smooth per-patient progress!
-                    progress(completed_patients, total_patients, completed_patients)
-                    logger.debug(f"Progress: {completed_patients}/{total_patients} patients ({100*completed_patients/total_patients:.1f}%)")
-                elif progress:
-                    # Fallback to file-based progress if patient count unavailable
-                    progress(updated_files + skipped_files, total_files, updated_files)
-    else:
-        # Single-threaded mode (no worker init needed)
-        logger.info("Starting single-threaded processing")
-        # Set globals for single-threaded mode
-        global _WORKER_OPTIONS, _WORKER_PID_STRATEGY, _WORKER_FIRST_DATES
-        _WORKER_OPTIONS = options
-        _WORKER_PID_STRATEGY = pid_strategy
-        _WORKER_FIRST_DATES = first_dates
+    def _handle_result(result: LeafProgressResult) -> None:
+        nonlocal total_files, updated_files, skipped_files, completed_patients
+        total_files += result.total_files
+        updated_files += result.updated_files
+        skipped_files += result.skipped_files
+        all_errors.extend(result.errors)
+        if result.audit is not None:
+            try:
+                audit_buffer.add(result.audit)
+            except Exception as exc:
+                error_msg = f"Failed to persist leaf audits: {exc}"
+                all_errors.append(error_msg)
+                logger.error(error_msg)
         
-        for partition in partitions:
-            result = _process_partition_worker(partition)  # PatientProgressResult
-            total_files += result.total_files
-            updated_files += result.updated_files
-            skipped_files += result.skipped_files
-            all_errors.extend(result.errors)
-            
-            # Update patient progress
-            completed_patients += result.patient_count
+        remaining_units[result.patient] -= 1
+        if remaining_units[result.patient] == 0:
+            completed_patients += 1
+            logger.info(f"Completed patient {result.patient}")
+        
+        if progress and total_patients > 0:
+            progress(completed_patients, total_patients, completed_patients)
+            logger.debug(f"Progress: {completed_patients}/{total_patients} patients ({100*completed_patients/total_patients:.1f}%)")
+        elif progress:
+            # Fallback to file-based progress if patient count unavailable
+            progress(updated_files + skipped_files, total_files, updated_files)
+    
+    for unit in done_units:
+        _handle_result(LeafProgressResult(unit.patient, len(unit.files), 0, len(unit.files), []))
+    
+    try:
+        if config.concurrent_processes > 1:
+            logger.info(f"Starting parallel processing with {config.concurrent_processes} workers")
+            with ProcessPoolExecutor(
+                max_workers=config.concurrent_processes,
+                initializer=_worker_init,
+                initargs=(options, pid_strategy, first_dates),
+            ) as pool:
+                futures = [pool.submit(_process_leaf_worker, unit) for unit in units]
+                for future in as_completed(futures):
+                    _handle_result(future.result())
+        else:
+            # Single-threaded mode (no worker init needed)
+            logger.info("Starting single-threaded processing")
+            # Set globals for single-threaded mode
+            global _WORKER_OPTIONS, _WORKER_PID_STRATEGY, _WORKER_FIRST_DATES
+            _WORKER_OPTIONS = options
+            _WORKER_PID_STRATEGY = pid_strategy
+            _WORKER_FIRST_DATES = first_dates
             
-            if progress and total_patients > 0:
-                # Smooth per-patient progress!
-                progress(completed_patients, total_patients, completed_patients)
-                logger.debug(f"Progress: {completed_patients}/{total_patients} patients ({100*completed_patients/total_patients:.1f}%)")
-            elif progress:
-                # Fallback to file-based progress if patient count unavailable
-                progress(updated_files + skipped_files, total_files, updated_files)
+            for unit in units:
+                _handle_result(_process_leaf_worker(unit))
+    finally:
+        # Leaves finished before an error are still recorded for resume
+        audit_buffer.flush()
     
-    logger.info(f"Processing complete: {updated_files} leaves processed, {skipped_files} skipped, {total_files} files total")
+    logger.info(f"Processing complete: {updated_files} files processed, {skipped_files} skipped, {total_files} files total")
     
     return total_files, updated_files, skipped_files, all_errors
 
@@ -2239,16 +2378,10 @@ def run_anonymization(
 
     exclude_tags = {tag for tag_str in config.scrub_exclude_tags if (tag := _parse_tag(tag_str))}
 
-    # For strategies that need full file discovery upfront (sequential, folder-based)
-    need_cached_files = _should_cache_files(config)
-    if need_cached_files:
-        # Collect files for ID strategy discovery only
-        files = list(iter_dicom_files(config.source_root, max_workers=config.worker_threads))
-        first_dates = _collect_first_dates(config, files) if config.study_dates.enabled else {}
-        pid_strategy = _build_id_strategy(config, files, max_workers=config.worker_threads)
-    else:
-        first_dates = {}
-        pid_strategy = _build_id_strategy(config, [], max_workers=config.worker_threads)
+    # One walk + header read serves ID discovery, timepoints and leaf grouping
+    header_index = _HeaderIndex.build(config.source_root, max_workers=config.worker_threads)
+    first_dates = _collect_first_dates(config, header_index)
+    pid_strategy = _build_id_strategy(config, header_index, max_workers=config.worker_threads)
 
     options = _Options(
         source_root=config.source_root,
@@ -2259,6 +2392,9 @@ def run_anonymization(
         map_timepoints=config.study_dates.enabled,
         preserve_uids=config.preserve_uids,
         rename_patient_folders=config.rename_patient_folders,
+        # Elements from the pixel data on are copied verbatim, so none may be scrubbed
+        header_only_rewrite=config.header_only_rewrite
+        and all(tag < Tag(FIRST_PIXEL_DATA_TAG) for tag in scrub_tags),
         resume=config.resume,
         audit_resume_per_leaf=config.audit_resume_per_leaf,
         cohort_name=config.cohort_name,
@@ -2271,11 +2407,20 @@ def run_anonymization(
         pid_strategy,
         first_dates,
         progress,
+        header_index,
     )
 
+    # One batched pass over the persisted summaries feeds the audit export and the ID manifest
     aggregator_db = StudyAuditAggregator(config.source_root, config.cohort_name or "cohort")
-    persisted_summaries = load_leaf_summaries_for_cohort(config.cohort_name)
-    aggregator_db.add_events(_events_from_summaries(persisted_summaries))
+    id_manifest: Dict[str, str] = {}
+    for summaries in iter_leaf_summaries_for_cohort(config.cohort_name):
+        aggregator_db.add_frame(_audit_frame_from_summaries(summaries))
+        for summary in summaries:
+            summary_data = summary.get("summary") or {}
+            orig = summary_data.get("patient_id_original")
+            updated = summary_data.get("patient_id_updated")
+            if orig and updated and orig != updated:
+                id_manifest[orig] = updated
     aggregated_df = aggregator_db.build_dataframe()
 
     export_path: Optional[Path] = None
@@ -2298,16 +2443,6 @@ def run_anonymization(
     # Rename patient folders if configured
     if config.rename_patient_folders:
         try:
-            # Build ID mapping from DB summaries
-            id_manifest: Dict[str, str] = {}
-            summaries = load_leaf_summaries_for_cohort(config.cohort_name)
-            for summary in summaries:
-                summary_data = summary.get("summary") or {}
-                orig = summary_data.get("patient_id_original")
-                updated = summary_data.get("patient_id_updated")
-                if orig and updated and orig != updated:
-                    id_manifest[orig] = updated
-            
             rename_errors = _rename_patient_folders(config.output_root, pid_strategy, id_manifest, max_workers=config.worker_threads)
             errors.extend(rename_errors)
         except Exception as exc:  # pragma: no cover - defensive logging
@@ -12,6 +12,18 @@ from openpyxl import Workbook
 import msoffcrypto
 
 
+# Columnar audit event batch; repeated tag codes, names and actions are interned
+AUDIT_EVENT_SCHEMA: Dict[str, pl.DataType] = {
+    "study_uid": pl.Utf8,
+    "rel_path": pl.Utf8,
+    "tag": pl.Categorical,
+    "tag_name": pl.Categorical,
+    "action": pl.Categorical,
+    "old_value": pl.Utf8,
+    "new_value": pl.Utf8,
+}
+
+
 class StudyAuditAggregator:
     """Incrementally aggregate per-tag audit events by study."""
 
@@ -22,7 +34,8 @@ class StudyAuditAggregator:
         self._cohort_name = cohort_name or "cohort"
         self._session_meta: Dict[str, Dict[str, Optional[str]]] = {}
         self._tag_changes: DefaultDict[str, Dict[str, Dict[str, Optional[str]]]] = DefaultDict(dict)
-        self._all_tags: Set[Tuple[str, str]] = set()
+        # Column label per tag code: the first non-empty tag name seen in any event
+        self._tag_names: Dict[str, str] = {}
 
     # ------------------------------------------------------------------
     # Public API
@@ -49,10 +62,7 @@ class StudyAuditAggregator:
             meta["rel_path"] = rel_path
 
         tag_entries = self._tag_changes.setdefault(key, {})
-        entry = tag_entries.setdefault(
-            tag_code,
-            {"tag_name": tag_name, "old_value": None, "new_value": None},
-        )
+        entry = tag_entries.setdefault(tag_code, {"old_value": None, "new_value": None})
 
         if action == "removed":
             if old_value:
@@ -66,15 +76,68 @@ class StudyAuditAggregator:
             if old_value and not entry.get("old_value"):
                 entry["old_value"] = old_value
 
-        if not entry.get("tag_name") and tag_name:
-            entry["tag_name"] = tag_name
-
-        self._all_tags.add((tag_code, entry["tag_name"] or tag_name))
+        self._note_tag_name(tag_code, tag_name)
 
     def add_events(self, events: Iterable[dict]) -> None:
         for event in events:
             self.add_event(event)
 
+    def add_frame(self, frame: pl.DataFrame) -> None:
+        """Merge a columnar event batch (``AUDIT_EVENT_SCHEMA``).
+
+        The batch is grouped by study and tag in Polars with the same rules as
+        ``add_event`` (first old value, last new value), so only one row per
+        study and tag is merged into the aggregate. Either way a tag's columns
+        are labelled by the first non-empty tag name seen for it.
+        """
+        events = frame.with_columns(pl.col("tag", "tag_name", "action").cast(pl.Utf8)).filter(
+            pl.col("tag").fill_null("") != ""
+        )
+        if events.is_empty():
+            return
+
+        raw_values = pl.concat([events["old_value"], events["new_value"]]).drop_nulls().unique()
+        normalized = {value: self._normalize_value(value) for value in raw_values.to_list()}
+        study_uid = pl.col("study_uid").fill_null("")
+        rel_path = pl.col("rel_path").fill_null("")
+        events = events.with_columns(
+            pl.when(study_uid != "")
+            .then(study_uid)
+            .otherwise(pl.lit("__no_uid__::") + rel_path)
+            .alias("key"),
+            pl.when(pl.col("action").is_in(["removed", "replaced", "added", "retained"]))
+            .then(pl.col("old_value").replace_strict(normalized, default=None, return_dtype=pl.Utf8))
+            .alias("old_value"),
+            pl.when(pl.col("action").is_in(["replaced", "added"]))
+            .then(pl.col("new_value").replace_strict(normalized, default=None, return_dtype=pl.Utf8))
+            .alias("new_value"),
+        )
+
+        sessions = events.group_by("key", maintain_order=True).agg(
+            study_uid=study_uid.filter(study_uid != "").first(),
+            rel_path=rel_path.filter(rel_path != "").first(),
+        )
+        for key, uid, path in sessions.iter_rows():
+            meta = self._session_meta.setdefault(key, {"study_uid": uid, "rel_path": path})
+            if not meta.get("rel_path") and path:
+                meta["rel_path"] = path
+
+        tag_name = pl.col("tag_name").fill_null("")
+        names = events.group_by("tag", maintain_order=True).agg(tag_name.filter(tag_name != "").first())
+        for tag_code, name in names.iter_rows():
+            self._note_tag_name(tag_code, name)
+
+        changes = events.group_by("key", "tag", maintain_order=True).agg(
+            old_value=pl.col("old_value").drop_nulls().first(),
+            new_value=pl.col("new_value").drop_nulls().last(),
+        )
+        for key, tag_code, old_value, new_value in changes.iter_rows():
+            entry = self._tag_changes[key].setdefault(tag_code, {"old_value": None, "new_value": None})
+            if old_value and not entry.get("old_value"):
+                entry["old_value"] = old_value
+            if new_value:
+                entry["new_value"] = new_value
+
     def is_empty(self) -> bool:
         return not self._session_meta
 
@@ -82,17 +145,14 @@ class StudyAuditAggregator:
         if not self._session_meta:
             return pl.DataFrame([])
 
-        ordered_tags = sorted(
-            self._all_tags,
-            key=lambda item: (item[0], self._sanitize_label(item[1] or "")),
-        )
+        ordered_tags = sorted(self._tag_names.items())
 
         static_columns = ["study_uid", "rel_path", "DataFolder", "ParentFolder", "SubFolder"]
         dynamic_columns: List[str] = []
         tag_to_columns: Dict[str, List[str]] = {}
 
         for tag_code, tag_name in ordered_tags:
-            prefix = self._tag_column_prefix(tag_code, tag_name or "")
+            prefix = self._tag_column_prefix(tag_code, tag_name)
             if tag_code in self._TRACKED_VALUE_TAGS:
                 cols = [f"{prefix}_old_value", f"{prefix}_new_value"]
             else:
@@ -156,6 +216,10 @@ class StudyAuditAggregator:
     # Helpers
     # ------------------------------------------------------------------
 
+    def _note_tag_name(self, tag_code: str, tag_name: Optional[str]) -> None:
+        if not self._tag_names.get(tag_code):
+            self._tag_names[tag_code] = tag_name or ""
+
     @property
     def _data_folder(self) -> str:
         return self._source_root.name or self._source_root.parent.name
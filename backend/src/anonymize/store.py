@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Sequence
 
-from sqlalchemy import JSON, DateTime, Integer, String, Text, func
+from sqlalchemy import JSON, DateTime, Integer, String, Text, func, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Mapped, mapped_column
 
 from db.session import engine, session_scope
@@ -42,6 +43,15 @@ class AnonymizeLeafSummary(Base):
 
 _tables_initialized = False
 
+# StudyUIDs per IN (...) lookup when bulk-loading completed studies
+LOOKUP_CHUNK_SIZE = 10_000
+
+# Leaf summary rows fetched per batch when streaming a cohort's summaries
+SUMMARY_BATCH_SIZE = 5_000
+
+# Dialects with INSERT ... ON CONFLICT, used for batched audit upserts
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
 
 def _ensure_tables() -> None:
     """Initialize anonymization audit tables if not already done."""
@@ -106,13 +116,7 @@ def record_leaf_audit_summary(
     if not study_uid:
         return
 
-    summary_payload = {
-        "patient_id_original": patient_id_original,
-        "patient_id_updated": patient_id_updated,
-        "errors": errors,
-    }
-    if audit_payload:
-        summary_payload["audit"] = audit_payload
+    summary_payload = _summary_payload(patient_id_original, patient_id_updated, errors, audit_payload)
 
     _ensure_tables()
     with session_scope() as session:
@@ -146,21 +150,138 @@ def record_leaf_audit_summary(
         )
 
 
-def load_leaf_summaries_for_cohort(cohort_name: Optional[str]) -> list[dict]:
+def _summary_payload(
+    patient_id_original: Optional[str],
+    patient_id_updated: Optional[str],
+    errors: list[str],
+    audit_payload: Optional[dict],
+) -> dict:
+    summary_payload = {
+        "patient_id_original": patient_id_original,
+        "patient_id_updated": patient_id_updated,
+        "errors": errors,
+    }
+    if audit_payload:
+        summary_payload["audit"] = audit_payload
+    return summary_payload
+
+
+def load_completed_study_uids(study_uids: Iterable[str]) -> set[str]:
+    """Return the subset of *study_uids* already marked complete, in chunked IN lookups."""
     _ensure_tables()
+    pending = sorted({uid for uid in study_uids if uid})
+    completed: set[str] = set()
     with session_scope() as session:
-        query = session.query(AnonymizeLeafSummary)
-        if cohort_name is None:
-            query = query.filter(AnonymizeLeafSummary.cohort_name.is_(None))
-        else:
-            query = query.filter(AnonymizeLeafSummary.cohort_name == cohort_name)
-        rows = query.order_by(AnonymizeLeafSummary.study_instance_uid).all()
-
-    return [
-        {
-            "study_uid": row.study_instance_uid,
-            "leaf_rel_path": row.leaf_rel_path,
-            "summary": row.summary or {},
+        for start in range(0, len(pending), LOOKUP_CHUNK_SIZE):
+            chunk = pending[start : start + LOOKUP_CHUNK_SIZE]
+            completed.update(
+                session.scalars(
+                    select(AnonymizeStudyAudit.study_instance_uid).where(
+                        AnonymizeStudyAudit.study_instance_uid.in_(chunk)
+                    )
+                )
+            )
+    return completed
+
+
+def record_completed_leaves(leaves: Sequence[dict]) -> int:
+    """
+    Upsert the leaf summaries of *leaves* and mark their studies complete in one transaction.
+
+    Each entry carries ``study_uid`` plus the keyword arguments of
+    :func:`record_leaf_audit_summary`. Summaries overwrite existing rows, study
+    markers keep the first completion. Dialects without ``ON CONFLICT`` fall back
+    to the per-leaf helpers.
+
+    Returns:
+        Number of leaves written
+    """
+    leaves = [leaf for leaf in leaves if leaf.get("study_uid")]
+    if not leaves:
+        return 0
+    _ensure_tables()
+
+    insert = _UPSERT_INSERTS.get(engine.dialect.name)
+    if insert is None:
+        for leaf in leaves:
+            record_leaf_audit_summary(leaf["study_uid"], **{k: v for k, v in leaf.items() if k != "study_uid"})
+            mark_study_audit_complete(
+                leaf["study_uid"], leaf_rel_path=leaf["leaf_rel_path"], cohort_name=leaf["cohort_name"]
+            )
+        return len(leaves)
+
+    # A study listed twice in one flush keeps its last summary
+    summaries = {
+        leaf["study_uid"]: {
+            "study_instance_uid": leaf["study_uid"],
+            "cohort_name": leaf["cohort_name"],
+            "leaf_rel_path": leaf["leaf_rel_path"],
+            "files_total": leaf["files_total"],
+            "files_written": leaf["files_written"],
+            "files_reused": leaf["files_reused"],
+            "files_with_errors": leaf["files_with_errors"],
+            "summary": _summary_payload(
+                leaf["patient_id_original"],
+                leaf["patient_id_updated"],
+                leaf["errors"],
+                leaf.get("audit_payload"),
+            ),
         }
-        for row in rows
+        for leaf in leaves
+    }
+    markers = [
+        {"study_instance_uid": uid, "cohort_name": row["cohort_name"], "leaf_rel_path": row["leaf_rel_path"]}
+        for uid, row in summaries.items()
     ]
+
+    summary_stmt = insert(AnonymizeLeafSummary)
+    summary_stmt = summary_stmt.on_conflict_do_update(
+        index_elements=[AnonymizeLeafSummary.study_instance_uid],
+        set_={
+            column: summary_stmt.excluded[column]
+            for column in (
+                "cohort_name",
+                "leaf_rel_path",
+                "files_total",
+                "files_written",
+                "files_reused",
+                "files_with_errors",
+                "summary",
+            )
+        }
+        | {"updated_at": func.now()},
+    )
+    marker_stmt = insert(AnonymizeStudyAudit).on_conflict_do_nothing(
+        index_elements=[AnonymizeStudyAudit.study_instance_uid]
+    )
+    with session_scope() as session:
+        session.execute(summary_stmt, list(summaries.values()))
+        session.execute(marker_stmt, markers)
+    return len(summaries)
+
+
+def iter_leaf_summaries_for_cohort(
+    cohort_name: Optional[str], batch_size: int = SUMMARY_BATCH_SIZE
+) -> Iterator[list[dict]]:
+    """Yield the cohort's leaf summaries in StudyUID order, *batch_size* rows at a time."""
+    _ensure_tables()
+    with session_scope() as session:
+        stmt = select(AnonymizeLeafSummary)
+        if cohort_name is None:
+            stmt = stmt.where(AnonymizeLeafSummary.cohort_name.is_(None))
+        else:
+            stmt = stmt.where(AnonymizeLeafSummary.cohort_name == cohort_name)
+        stmt = stmt.order_by(AnonymizeLeafSummary.study_instance_uid).execution_options(yield_per=batch_size)
+        for rows in session.scalars(stmt).partitions():
+            yield [
+                {
+                    "study_uid": row.study_instance_uid,
+                    "leaf_rel_path": row.leaf_rel_path,
+                    "summary": row.summary or {},
+                }
+                for row in rows
+            ]
+
+
+def load_leaf_summaries_for_cohort(cohort_name: Optional[str]) -> list[dict]:
+    return [row for batch in iter_leaf_summaries_for_cohort(cohort_name) for row in batch]
@@ -8,6 +8,9 @@ Core data structures for classification.
 
 from .context import (
     ClassificationContext,
+    FrozenFlags,
+    clear_parser_caches,
+    parser_cache_stats,
     parse_image_type,
     parse_scanning_sequence,
     parse_sequence_variant,
@@ -38,6 +41,9 @@ from .output import (
 __all__ = [
     # Context
     "ClassificationContext",
+    "FrozenFlags",
+    "clear_parser_caches",
+    "parser_cache_stats",
     "parse_image_type",
     "parse_scanning_sequence",
     "parse_sequence_variant",
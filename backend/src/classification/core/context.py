@@ -4,9 +4,12 @@ Classification Context Module
 Encapsulates all information needed to classify a single series stack.
 Provides cached parsing of DICOM tags into structured boolean flags.
 
-Version: 3.3.0
+Version: 3.4.0
 
 Changelog:
+- 3.4.0: Parsers are memoized process-wide per raw string (bounded LRU) and
+         return read-only FrozenFlags; unified_flags is computed once per
+         context. parser_cache_stats() reports hit rates.
 - 3.3.0: Added branch-specific unified_flags for SWI, SyMRI, and Dixon
          New flags: is_swi_magnitude, is_swi_processed, has_qsm, is_epi_swi,
                    is_symri_source, has_pd_map, has_b1_map, has_fat_fraction,
@@ -18,9 +21,98 @@ Changelog:
 
 from __future__ import annotations
 
+import functools
 import re
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional, Set
+from typing import Any, Callable, Dict, Optional, Set
+
+
+# =============================================================================
+# Parser Memoization
+# =============================================================================
+
+# Distinct raw values kept per parser. A cohort has a few hundred distinct
+# ImageType / ScanningSequence / SequenceName strings, so this bounds memory
+# without evicting in practice.
+PARSER_CACHE_SIZE = 4096
+
+
+class FrozenFlags(dict):
+    """
+    Read-only dict of parsed flags.
+
+    Memoized parser results are shared by every context with the same raw
+    value, and unified_flags by every detector, so writes are rejected.
+    Use copy() for a mutable dict.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("parsed flags are shared and read-only; use copy() for a mutable dict")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __reduce__(self):
+        return (FrozenFlags, (dict(self),))
+
+
+def _freeze(parsed: Dict[str, Any]) -> FrozenFlags:
+    if isinstance(parsed.get("all_tokens"), set):
+        parsed["all_tokens"] = frozenset(parsed["all_tokens"])
+    return FrozenFlags(parsed)
+
+
+_PARSER_CACHES: Dict[str, Any] = {}
+
+
+def _memoized_parser(func: Callable[[str], Dict[str, Any]]) -> Callable[[str], FrozenFlags]:
+    """Memoize a tag parser by raw value in a bounded LRU; results are frozen."""
+    cached = functools.lru_cache(maxsize=PARSER_CACHE_SIZE)(lambda raw: _freeze(func(raw)))
+
+    @functools.wraps(func)
+    def wrapper(raw: str) -> FrozenFlags:
+        try:
+            hash(raw)
+        except TypeError:
+            return _freeze(func(raw))
+        return cached(raw)
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    _PARSER_CACHES[func.__name__] = cached
+    return wrapper
+
+
+def parser_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Hit/miss counters of the memoized parsers in this process.
+
+    Returns:
+        Dict per parser name with hits, misses, size, maxsize and hit_rate
+    """
+    stats = {}
+    for name, cached in _PARSER_CACHES.items():
+        info = cached.cache_info()
+        calls = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": info.hits / calls if calls else 0.0,
+        }
+    return stats
+
+
+def clear_parser_caches() -> None:
+    """Empty the memoized parser caches and reset their counters."""
+    for cached in _PARSER_CACHES.values():
+        cached.cache_clear()
 
 
 # =============================================================================
@@ -28,6 +120,7 @@ from typing import Any, Dict, Optional, Set
 # =============================================================================
 
 
+@_memoized_parser
 def parse_image_type(image_type: str) -> Dict[str, Any]:
     """
     Parse ImageType (0008,0008) into boolean flags using token search.
@@ -216,6 +309,7 @@ def parse_image_type(image_type: str) -> Dict[str, Any]:
     }
 
 
+@_memoized_parser
 def parse_scanning_sequence(seq: str) -> Dict[str, Any]:
     """
     Parse ScanningSequence (0018,0020) into boolean flags.
@@ -252,6 +346,7 @@ def parse_scanning_sequence(seq: str) -> Dict[str, Any]:
     }
 
 
+@_memoized_parser
 def parse_sequence_variant(variant: str) -> Dict[str, Any]:
     """
     Parse SequenceVariant (0018,0021) into boolean flags.
@@ -285,6 +380,7 @@ def parse_sequence_variant(variant: str) -> Dict[str, Any]:
     }
 
 
+@_memoized_parser
 def parse_scan_options(options: str) -> Dict[str, Any]:
     """
     Parse ScanOptions (0018,0022) into boolean flags.
@@ -369,6 +465,7 @@ def parse_scan_options(options: str) -> Dict[str, Any]:
     }
 
 
+@_memoized_parser
 def parse_sequence_name(name: str) -> Dict[str, Any]:
     """
     Parse SequenceName (0018,0024) using pattern matching.
@@ -559,6 +656,7 @@ class ClassificationContext:
     _parsed_sequence_variant: Optional[Dict[str, Any]] = field(default=None, repr=False)
     _parsed_scan_options: Optional[Dict[str, Any]] = field(default=None, repr=False)
     _parsed_sequence_name: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    _unified_flags: Optional[Dict[str, bool]] = field(default=None, repr=False)
     
     # =========================================================================
     # Cached Properties
@@ -630,6 +728,21 @@ class ClassificationContext:
         """
         Unified high-value flags aggregated from all parsers.
         
+        Computed on first access and cached for the lifetime of the context;
+        detectors and branches read it many times per stack. The returned
+        dict is read-only (FrozenFlags).
+        
+        Returns:
+            Dict of unified boolean flags
+        """
+        if self._unified_flags is None:
+            self._unified_flags = FrozenFlags(self._build_unified_flags())
+        return self._unified_flags
+    
+    def _build_unified_flags(self) -> Dict[str, bool]:
+        """
+        Build the unified flags from all parsers.
+        
         Each flag combines evidence from multiple sources (vendor-agnostic).
         This is the PRIMARY interface for technique detection.
         
@@ -24,7 +24,7 @@ from ..core.evidence import (
     EvidenceSource,
     EVIDENCE_WEIGHTS,
 )
-from ..utils import match_any_keyword
+from ..utils import KeywordMatcher
 from .base_detector import BaseDetector
 
 
@@ -112,6 +112,12 @@ class BaseContrastDetector(BaseDetector):
         self._physics_rules: Dict[str, Any] = self.config.get("physics_rules", {})
         self._rules: Dict[str, Any] = self.config.get("rules", {})
         self._priority_order: List[str] = self._rules.get("priority_order", [])
+
+        # All base keyword pools, matched in one scan per stack; shared by
+        # the keyword tier and the text conflict check
+        self._keyword_matcher = KeywordMatcher(
+            {base_id: config.get("keywords", []) for base_id, config in self._bases.items()}
+        )
     
     @property
     def axis_name(self) -> str:
@@ -282,8 +288,8 @@ class BaseContrastDetector(BaseDetector):
             return None  # Unknown base, can't check conflict
 
         # Check if predicted base keywords are in text (if so, no conflict)
-        predicted_keywords = self._bases[predicted_base_id].get("keywords", [])
-        if any(kw in text_blob for kw in predicted_keywords):
+        matches = self._keyword_matcher.scan(text_blob)
+        if predicted_base_id in matches:
             return None  # Our prediction is mentioned, no conflict
 
         # Check if any OTHER base keywords are in text
@@ -293,8 +299,7 @@ class BaseContrastDetector(BaseDetector):
             if base_id == "Unknown":
                 continue  # Skip Unknown base
 
-            keywords = base_config.get("keywords", [])
-            if any(kw in text_blob for kw in keywords):
+            if base_id in matches:
                 return base_config.get("name", base_id)  # Found conflicting base
 
         return None
@@ -772,18 +777,15 @@ class BaseContrastDetector(BaseDetector):
         Returns:
             BaseContrastResult if keyword match found, None otherwise
         """
+        matches = self._keyword_matcher.scan(text_blob)
+
         # Check in priority order
         for base_id in self._priority_order:
             if base_id not in self._bases:
                 continue
             
             base_config = self._bases[base_id]
-            keywords = base_config.get("keywords", [])
-            
-            if not keywords:
-                continue
-            
-            matched = match_any_keyword(text_blob, keywords)
+            matched = matches.get(base_id)
             if matched:
                 # Use the 'name' field from config (e.g., "T2*w") not the dict key (e.g., "T2starw")
                 base_name = base_config.get("name", base_id)
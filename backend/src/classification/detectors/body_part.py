@@ -29,6 +29,7 @@ from ..core.evidence import (
     Evidence,
     EvidenceSource,
 )
+from ..utils import KeywordMatcher
 from .base_detector import BaseDetector
 
 
@@ -167,6 +168,12 @@ class BodyPartDetector(BaseDetector):
         self._positive_keywords: List[str] = self.config.get("positive_keywords", [])
         self._brain_only_keywords: List[str] = self.config.get("brain_only_keywords", [])
 
+        # Both pools matched as written (YAML keywords are lowercase) in one scan
+        self._keyword_matcher = KeywordMatcher(
+            {"spine": self._positive_keywords, "brain": self._brain_only_keywords},
+            ignore_case=False,
+        )
+
         # Detection rules
         detection_config = self.config.get("detection", {})
         self._spine_triggers_review = detection_config.get("spine_triggers_review", True)
@@ -238,8 +245,9 @@ class BodyPartDetector(BaseDetector):
         text_lower = text_blob.lower()
 
         # Check for both spine and brain keywords
-        spine_match = self._match_keywords(text_lower, self._positive_keywords)
-        brain_match = self._match_keywords(text_lower, self._brain_only_keywords)
+        matches = self._keyword_matcher.scan(text_lower)
+        spine_match = matches.get("spine")
+        brain_match = matches.get("brain")
 
         # Case 1: Both spine AND brain keywords match → conflict
         # This often happens when body_part_examined is incorrectly set to SPINE
@@ -393,27 +401,6 @@ class BodyPartDetector(BaseDetector):
 
         return None
 
-    def _match_keywords(
-        self,
-        text: str,
-        keywords: List[str]
-    ) -> Optional[str]:
-        """
-        Match keywords against text.
-        
-        Args:
-            text: Lowercase text to search
-            keywords: List of keywords to match
-        
-        Returns:
-            First matched keyword, or None if no match
-        """
-        for keyword in keywords:
-            # Keywords in YAML are already lowercase
-            if keyword in text:
-                return keyword
-        return None
-    
     # =========================================================================
     # Convenience Methods
     # =========================================================================
@@ -24,6 +24,7 @@ from typing import Dict, List, Optional, Any
 
 from ..core.context import ClassificationContext
 from ..core.evidence import Evidence, EvidenceSource
+from ..utils import KeywordMatcher
 from .base_detector import BaseDetector
 
 
@@ -127,6 +128,12 @@ class ConstructDetector(BaseDetector):
         self._rules: Dict[str, Any] = self.config.get("rules", {})
         self._priority_order: List[str] = self._rules.get("priority_order", [])
 
+        # All construct keyword pools, matched as written in one scan per stack
+        self._keyword_matcher = KeywordMatcher(
+            {name: config.get("keywords", []) for name, config in self._constructs.items()},
+            ignore_case=False,
+        )
+
         # Load confidence thresholds from YAML or use defaults
         yaml_confidence = self._rules.get("confidence_thresholds", {})
         self._confidence = {
@@ -232,23 +239,23 @@ class ConstructDetector(BaseDetector):
             )
 
         # Priority 2: Keyword matching
-        for kw in keywords:
-            if kw in text_blob:
-                evidence = Evidence(
-                    source=EvidenceSource.TEXT_SEARCH,
-                    field="text_search_blob",
-                    value=kw,
-                    target=display_name,
-                    weight=self._confidence["keywords"],
-                    description=f"Keyword match: {kw}",
-                )
-                return ConstructMatch(
-                    name=display_name,
-                    category=category,
-                    confidence=self._confidence["keywords"],
-                    detection_method="keyword",
-                    evidence=[evidence],
-                )
+        kw = self._keyword_matcher.scan(text_blob).get(name) if keywords else None
+        if kw:
+            evidence = Evidence(
+                source=EvidenceSource.TEXT_SEARCH,
+                field="text_search_blob",
+                value=kw,
+                target=display_name,
+                weight=self._confidence["keywords"],
+                description=f"Keyword match: {kw}",
+            )
+            return ConstructMatch(
+                name=display_name,
+                category=category,
+                confidence=self._confidence["keywords"],
+                detection_method="keyword",
+                evidence=[evidence],
+            )
 
         # Priority 3: Combination of flags
         if combination:
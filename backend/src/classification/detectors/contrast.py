@@ -29,6 +29,7 @@ from ..core.evidence import (
     Evidence,
     EvidenceSource,
 )
+from ..utils import KeywordMatcher
 from .base_detector import BaseDetector
 
 
@@ -142,6 +143,12 @@ class ContrastDetector(BaseDetector):
         # Load keywords from config
         self._negative_keywords: List[str] = self.config.get("negative_keywords", [])
         self._positive_keywords: List[str] = self.config.get("positive_keywords", [])
+
+        # Both pools matched as written (YAML keywords are lowercase) in one scan
+        self._keyword_matcher = KeywordMatcher(
+            {"negative": self._negative_keywords, "positive": self._positive_keywords},
+            ignore_case=False,
+        )
         
         # Detection rules
         detection_config = self.config.get("detection", {})
@@ -220,7 +227,8 @@ class ContrastDetector(BaseDetector):
         text_lower = text_blob.lower()
         
         # Check NEGATIVE keywords FIRST (they override positive)
-        negative_match = self._match_keywords(text_lower, self._negative_keywords)
+        matches = self._keyword_matcher.scan(text_lower)
+        negative_match = matches.get("negative")
         if negative_match:
             return ContrastResult(
                 post_contrast=0,
@@ -238,7 +246,7 @@ class ContrastDetector(BaseDetector):
             )
         
         # Check POSITIVE keywords
-        positive_match = self._match_keywords(text_lower, self._positive_keywords)
+        positive_match = matches.get("positive")
         if positive_match:
             return ContrastResult(
                 post_contrast=1,
@@ -264,27 +272,6 @@ class ContrastDetector(BaseDetector):
             evidence=[],
         )
     
-    def _match_keywords(
-        self,
-        text: str,
-        keywords: List[str]
-    ) -> Optional[str]:
-        """
-        Match keywords against text.
-        
-        Args:
-            text: Lowercase text to search
-            keywords: List of keywords to match
-        
-        Returns:
-            First matched keyword, or None if no match
-        """
-        for keyword in keywords:
-            # Keywords in YAML are already lowercase
-            if keyword in text:
-                return keyword
-        return None
-    
     # =========================================================================
     # Convenience Methods
     # =========================================================================
@@ -28,7 +28,7 @@ from ..core.evidence import (
     Evidence,
     EvidenceSource,
 )
-from ..utils import match_any_keyword, list_to_csv
+from ..utils import KeywordMatcher, list_to_csv
 from .base_detector import BaseDetector
 
 
@@ -134,6 +134,11 @@ class ModifierDetector(BaseDetector):
         self._modifiers: Dict[str, Dict[str, Any]] = self.config.get("modifiers", {})
         self._exclusion_groups: Dict[str, Dict[str, Any]] = self.config.get("exclusion_groups", {})
         self._priority_order: List[str] = self.config.get("rules", {}).get("priority_order", [])
+
+        # All modifier keyword pools, matched in one scan per stack
+        self._keyword_matcher = KeywordMatcher(
+            {mod_id: config.get("keywords", []) for mod_id, config in self._modifiers.items()}
+        )
         
         # Build group membership map
         self._group_members: Dict[str, List[str]] = {}
@@ -272,7 +277,7 @@ class ModifierDetector(BaseDetector):
         
         # --- TIER 2: Keywords Match ---
         if keywords and text_blob:
-            matched_kw = match_any_keyword(text_blob, keywords)
+            matched_kw = self._keyword_matcher.scan(text_blob).get(mod_id)
             if matched_kw:
                 return ModifierMatch(
                     modifier=mod_id,
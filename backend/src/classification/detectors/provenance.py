@@ -31,7 +31,7 @@ from typing import Any, Dict, List, Optional
 
 from ..core.context import ClassificationContext
 from ..core.evidence import Evidence, EvidenceSource, AxisResult
-from ..utils import match_any_keyword
+from ..utils import KeywordMatcher
 from .base_detector import BaseDetector
 
 
@@ -118,6 +118,13 @@ class ProvenanceDetector(BaseDetector):
         self._priority_order: List[str] = self._rules.get("priority_order", [])
         self._default_provenance: str = self._rules.get("default_provenance", "RawRecon")
 
+        # All provenance keyword pools, matched in one scan per stack
+        self._keyword_matcher = KeywordMatcher({
+            name: config["detection"].get("keywords", [])
+            for name, config in self._provenances.items()
+            if isinstance(config.get("detection"), dict)
+        })
+
         # Load confidence thresholds from YAML or use defaults
         yaml_confidence = self._rules.get("confidence_thresholds", {})
         self._confidence = {
@@ -264,7 +271,7 @@ class ProvenanceDetector(BaseDetector):
         # TIER 3: KEYWORDS
         # =================================================================
         if keywords:
-            matched_kw = match_any_keyword(text_blob, keywords)
+            matched_kw = self._keyword_matcher.scan(text_blob).get(name)
             if matched_kw:
                 evidence = Evidence(
                     source=EvidenceSource.TEXT_SEARCH,
@@ -29,7 +29,7 @@ from ..core.evidence import (
     EvidenceSource,
     EVIDENCE_WEIGHTS,
 )
-from ..utils import match_any_keyword
+from ..utils import KeywordMatcher
 from .base_detector import BaseDetector
 
 
@@ -130,6 +130,11 @@ class TechniqueDetector(BaseDetector):
         self._techniques: List[Tuple[str, Dict[str, Any]]] = []
         self._priority_order: List[str] = []
         self._build_technique_list()
+
+        # All technique keyword pools, matched in one scan per stack
+        self._keyword_matcher = KeywordMatcher(
+            {tech_id: config.get("keywords", []) for tech_id, config in self._techniques}
+        )
     
     @property
     def axis_name(self) -> str:
@@ -268,7 +273,7 @@ class TechniqueDetector(BaseDetector):
         
         # --- TIER 2: Keywords Match ---
         if keywords and text_blob:
-            matched_kw = match_any_keyword(text_blob, keywords)
+            matched_kw = self._keyword_matcher.scan(text_blob).get(tech_id)
             if matched_kw:
                 return TechniqueResult(
                     technique=tech_id,
@@ -0,0 +1,125 @@
+"""
+Tests for parser memoization and the cached unified_flags.
+
+Tests:
+- Memoized parsers return the same read-only result per raw value
+- Results match the undecorated parsers
+- Hit/miss counters are reported by parser_cache_stats()
+- unified_flags is computed once per context
+
+Version: 1.0.0
+"""
+
+import pickle
+
+import pytest
+
+from ..core.context import (
+    ClassificationContext,
+    FrozenFlags,
+    clear_parser_caches,
+    parse_image_type,
+    parse_scan_options,
+    parse_scanning_sequence,
+    parse_sequence_name,
+    parse_sequence_variant,
+    parser_cache_stats,
+)
+
+
+PARSERS = [
+    (parse_image_type, "ORIGINAL\\PRIMARY\\M\\ND\\NORM"),
+    (parse_scanning_sequence, "['GR', 'IR']"),
+    (parse_sequence_variant, "SK\\SP\\MP"),
+    (parse_scan_options, "IR\\PFP\\FS"),
+    (parse_sequence_name, "*tfl3d1_16ns"),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    clear_parser_caches()
+    yield
+    clear_parser_caches()
+
+
+class TestMemoizedParsers:
+    """Test memoized tag parsers."""
+
+    @pytest.mark.parametrize("parser,raw", PARSERS)
+    def test_result_matches_uncached_parser(self, parser, raw):
+        result = parser(raw)
+        expected = parser.__wrapped__(raw)
+        assert isinstance(result, dict)
+        assert result == expected
+        assert parser(raw) is result
+
+    @pytest.mark.parametrize("parser,raw", PARSERS)
+    def test_results_are_read_only(self, parser, raw):
+        result = parser(raw)
+        with pytest.raises(TypeError):
+            result["is_derived"] = True
+        with pytest.raises(TypeError):
+            result.update({"is_derived": True})
+        with pytest.raises(TypeError):
+            del result[next(iter(result))]
+        if "all_tokens" in result:
+            assert isinstance(result["all_tokens"], frozenset)
+
+        mutable = result.copy()
+        mutable["is_derived"] = True
+        assert type(mutable) is dict
+
+    def test_frozen_flags_pickle(self):
+        result = parse_image_type("DERIVED\\PRIMARY\\ADC")
+        restored = pickle.loads(pickle.dumps(result))
+        assert isinstance(restored, FrozenFlags)
+        assert restored == result
+
+    def test_stats_count_hits_and_misses(self):
+        for _ in range(3):
+            parse_image_type("ORIGINAL\\PRIMARY\\M\\ND")
+        parse_image_type("DERIVED\\PRIMARY\\ADC")
+
+        stats = parser_cache_stats()["parse_image_type"]
+        assert stats["misses"] == 2
+        assert stats["hits"] == 2
+        assert stats["size"] == 2
+        assert stats["hit_rate"] == pytest.approx(0.5)
+        assert parser_cache_stats()["parse_scan_options"]["hit_rate"] == 0.0
+
+    @pytest.mark.parametrize("parser,raw", PARSERS)
+    def test_missing_values(self, parser, raw):
+        assert parser(None) == parser.__wrapped__(None)
+        assert parser("") == parser.__wrapped__("")
+
+
+class TestUnifiedFlagsCache:
+    """Test per-context caching of unified_flags."""
+
+    def test_unified_flags_computed_once(self, monkeypatch):
+        ctx = ClassificationContext(
+            image_type="ORIGINAL\\PRIMARY\\M\\ND",
+            scanning_sequence="GR\\IR",
+            stack_sequence_name="*tfl3d1",
+        )
+        calls = []
+        original = ClassificationContext._build_unified_flags
+
+        def counting(self):
+            calls.append(1)
+            return original(self)
+
+        monkeypatch.setattr(ClassificationContext, "_build_unified_flags", counting)
+        flags = ctx.unified_flags
+        assert ctx.unified_flags is flags
+        assert len(calls) == 1
+        assert isinstance(flags, FrozenFlags)
+        assert flags == original(ctx)
+
+    def test_contexts_share_parsed_results(self):
+        first = ClassificationContext(image_type="ORIGINAL\\PRIMARY\\M\\ND")
+        second = ClassificationContext(image_type="ORIGINAL\\PRIMARY\\M\\ND")
+        assert first.parsed_image_type is second.parsed_image_type
+        assert first.unified_flags == second.unified_flags
+        assert first.unified_flags is not second.unified_flags
@@ -0,0 +1,149 @@
+"""
+Unit tests for KeywordMatcher
+
+Tests that the compiled matcher keeps the semantics of the per-keyword loop:
+- Every pool reports its first matching keyword in list order
+- Overlapping keywords and keywords that are prefixes of others all match
+- Case handling matches match_semantic_keyword / plain substring checks
+
+Also contains a microbenchmark of the detector keyword pools per stack,
+skipped unless RUN_BENCHMARKS is set.
+
+Version: 1.0.0
+"""
+
+import os
+import random
+import time
+
+import pytest
+
+from ..pipeline import ClassificationPipeline
+from ..utils import KeywordMatcher, match_any_keyword
+
+
+def _loop_scan(pools, text):
+    """Reference: the per-keyword loop the detectors used before."""
+    result = {}
+    for group, keywords in pools.items():
+        matched = match_any_keyword(text, keywords)
+        if matched:
+            result[group] = matched
+    return result
+
+
+# =============================================================================
+# Matching Semantics
+# =============================================================================
+
+class TestKeywordMatcher:
+    """Test first-match-wins semantics against the per-keyword loop."""
+
+    def test_first_keyword_in_list_order_wins(self):
+        matcher = KeywordMatcher({"FLAIR": ["dark fluid", "flair"], "T2w": ["t2w", "t2"]})
+        assert matcher.scan("t2 flair dark fluid") == {"FLAIR": "dark fluid", "T2w": "t2"}
+
+    def test_prefix_and_overlapping_keywords(self):
+        matcher = KeywordMatcher({"a": ["t2 flair"], "b": ["t2"], "c": ["flair tra"], "d": ["2 f"]})
+        assert matcher.scan("t2 flair tra") == {"a": "t2 flair", "b": "t2", "c": "flair tra", "d": "2 f"}
+
+    def test_result_follows_group_priority(self):
+        matcher = KeywordMatcher({"low": ["b"], "high": ["a"]})
+        assert list(matcher.scan("a b")) == ["low", "high"]
+        assert matcher.first("a b") == ("low", "b")
+        assert matcher.first("a") == ("high", "a")
+        assert matcher.first("zzz") is None
+
+    def test_ignore_case(self):
+        matcher = KeywordMatcher({"g": ["MPRAGE"]})
+        assert matcher.scan("T1 mprage") == {"g": "MPRAGE"}
+
+        exact = KeywordMatcher({"g": ["MPRAGE", "mprage"]}, ignore_case=False)
+        assert exact.scan("t1 mprage") == {"g": "mprage"}
+
+    def test_empty_inputs(self):
+        matcher = KeywordMatcher({"g": ["", "x"], "none": None, "empty": []})
+        assert matcher.scan("") == {}
+        assert matcher.scan(None) == {}
+        assert matcher.scan("abc") == {}
+        assert KeywordMatcher({}).scan("abc") == {}
+
+    def test_special_characters(self):
+        matcher = KeywordMatcher({"g": ["t2*", "+c", "(gd)"]})
+        assert matcher.scan("t2* swi") == {"g": "t2*"}
+        assert matcher.scan("t1 (gd)") == {"g": "(gd)"}
+
+    def test_randomized_against_loop(self):
+        rng = random.Random(7)
+        alphabet = "ab t2-+*."
+        for _ in range(500):
+            pools = {
+                f"g{i}": ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(0, 5))]
+                for i in range(rng.randint(1, 5))
+            }
+            text = "".join(rng.choice(alphabet + "AB") for _ in range(rng.randint(0, 20)))
+            expected = _loop_scan(pools, text)
+            result = KeywordMatcher(pools).scan(text)
+            assert result == expected
+            assert list(result) == list(expected)
+
+
+# =============================================================================
+# Microbenchmark
+# =============================================================================
+
+@pytest.fixture(scope="module")
+def detector_pools():
+    """Keyword pools of the priority-ordered detectors, with their compiled matchers."""
+    pipeline = ClassificationPipeline()
+    detectors = [
+        pipeline.technique_detector,
+        pipeline.modifier_detector,
+        pipeline.provenance_detector,
+        pipeline.base_detector,
+    ]
+    pools = []
+    for detector in detectors:
+        matcher = detector._keyword_matcher
+        groups = {group: [] for group in matcher._groups}
+        for entries in matcher._entries.values():
+            for group_idx, rank, keyword in entries:
+                groups[matcher._groups[group_idx]].append((rank, keyword))
+        pools.append(({g: [kw for _, kw in sorted(kws)] for g, kws in groups.items()}, matcher))
+    return pools
+
+
+def _detector_blobs(detector_pools, count=500):
+    rng = random.Random(0)
+    keywords = sorted({kw for pools, _ in detector_pools for kws in pools.values() for kw in kws})
+    return [" ".join(rng.sample(keywords, 3) + ["tra", "brain", f"series {i}"]) for i in range(count)]
+
+
+def test_matcher_agrees_with_loop_on_detector_pools(detector_pools):
+    """The compiled detector matchers report what the per-keyword loop did."""
+    for blob in _detector_blobs(detector_pools):
+        assert [matcher.scan(blob) for _, matcher in detector_pools] == [
+            _loop_scan(pools, blob) for pools, _ in detector_pools
+        ]
+
+
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to time keyword matching")
+def test_keyword_matching_microbenchmark(detector_pools):
+    """Time one scan per axis against one substring scan per keyword."""
+    blobs = _detector_blobs(detector_pools)
+
+    start = time.perf_counter()
+    for blob in blobs:
+        [_loop_scan(pools, blob) for pools, _ in detector_pools]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for blob in blobs:
+        [matcher.scan(blob) for _, matcher in detector_pools]
+    matcher_time = time.perf_counter() - start
+
+    print(
+        f"\nkeyword matching per stack: loop {loop_time / len(blobs) * 1e6:.1f} µs, "
+        f"matcher {matcher_time / len(blobs) * 1e6:.1f} µs "
+        f"({loop_time / matcher_time:.1f}x)"
+    )
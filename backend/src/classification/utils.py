@@ -5,7 +5,7 @@ Shared helper functions for semantic text matching, normalization, etc.
 """
 
 import re
-from typing import List, Optional
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
 
 def match_semantic_keyword(text: str, keyword: str) -> bool:
@@ -68,6 +68,121 @@ def match_any_keyword(
     return None
 
 
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """
+    Build a regex alternation from a character trie.
+
+    The key "" marks the end of a keyword. Children are tried before the end
+    marker, so the pattern matches the longest keyword at a position and
+    fails after a single character check where nothing starts.
+    """
+    terminal = "" in node
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if terminal else body
+
+
+class KeywordMatcher:
+    """
+    Match ordered keyword pools against a text in one scan.
+
+    Detectors check their YAML keyword lists in priority order and keep the
+    first keyword that matches. Doing that with ``match_any_keyword`` means
+    one substring scan (and one lowercase copy of the text) per keyword; a
+    stack runs through several hundred of them per axis. KeywordMatcher
+    compiles every pool of a detector into a single trie-shaped regex at
+    ``__init__``. One scan finds the longest keyword starting at each
+    position; the keywords that are prefixes of it match there as well, so
+    the scan yields every matching keyword. Each pool then reports its
+    first matching keyword in list order, exactly as the per-keyword loop
+    did.
+
+    Example:
+        matcher = KeywordMatcher({"FLAIR": ["flair", "dark fluid"], "T2w": ["t2"]})
+        matcher.scan("t2 flair tra")  → {"FLAIR": "flair", "T2w": "t2"}
+        matcher.first("t2 flair tra") → ("FLAIR", "flair")
+
+    Args:
+        pools: Keyword lists by group ID, in priority order
+        ignore_case: Lowercase text and keywords (``match_semantic_keyword``
+            semantics). When False, keywords are matched as written against
+            the text as given, like a plain ``kw in text`` loop.
+    """
+
+    def __init__(self, pools: Mapping[str, Sequence[str]], ignore_case: bool = True):
+        self.ignore_case = ignore_case
+        self._groups: List[str] = list(pools)
+
+        # Keyword → [(group index, rank within group, keyword as written)]
+        self._entries: Dict[str, List[Tuple[int, int, str]]] = {}
+        for group_idx, group in enumerate(self._groups):
+            for rank, kw in enumerate(pools[group] or []):
+                if not kw:
+                    continue  # match_semantic_keyword never matches an empty keyword
+                key = kw.lower() if ignore_case else kw
+                self._entries.setdefault(key, []).append((group_idx, rank, kw))
+
+        # Every keyword that is a prefix of another also matches wherever that one does
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            key: tuple(key[:n] for n in range(1, len(key) + 1) if key[:n] in self._entries)
+            for key in self._entries
+        }
+
+        trie: Dict[str, dict] = {}
+        for key in self._entries:
+            node = trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        pattern = _trie_pattern(trie)
+        self._regex = re.compile("(?=(" + pattern + "))", re.DOTALL) if pattern else None
+        self._last: Tuple[Optional[str], Dict[str, str]] = (None, {})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def matched_keywords(self, text: str) -> Set[str]:
+        """Return every keyword (normalized as matched) found in text."""
+        if not text or self._regex is None:
+            return set()
+        if self.ignore_case:
+            text = text.lower()
+        found: Set[str] = set()
+        for longest in set(self._regex.findall(text)):
+            found.update(self._prefixes[longest])
+        return found
+
+    def scan(self, text: str) -> Dict[str, str]:
+        """
+        Return the first matching keyword of every group that matched.
+
+        The result is ordered by group priority. The last text scanned is
+        remembered, so detectors can consult the matches from several tiers
+        without scanning twice.
+        """
+        last_text, last_result = self._last
+        if text == last_text:
+            return last_result
+
+        best: Dict[int, Tuple[int, str]] = {}
+        for key in self.matched_keywords(text):
+            for group_idx, rank, kw in self._entries[key]:
+                current = best.get(group_idx)
+                if current is None or rank < current[0]:
+                    best[group_idx] = (rank, kw)
+        result = {self._groups[idx]: best[idx][1] for idx in sorted(best)}
+        self._last = (text, result)
+        return result
+
+    def first(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return (group, keyword) for the highest-priority group that matched."""
+        for group, kw in self.scan(text).items():
+            return group, kw
+        return None
+
+
 def normalize_text(text: str) -> str:
     """
     Normalize text for matching.
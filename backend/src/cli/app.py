@@ -23,6 +23,7 @@ from compress.config import CompressionConfig
 from compress.engine import run_compression, build_chunk_plan, bytes_to_human
 from cohorts.service import cohort_service
 from extract import DuplicatePolicy, ExtensionMode, ExtractionConfig, run_extraction
+from extract.checkpoint_journal import CheckpointJournal, default_journal_dir
 from extract.progress import ExtractionProgressTracker
 from extract.subject_mapping import load_subject_code_csv
 from jobs.runner import run_anonymize_job, run_compress_job
@@ -749,6 +750,144 @@ def metadata_ingest(
     typer.echo("Metadata ingestion completed successfully.")
 
 
+def _open_checkpoint_journal(cohort_id: int, journal_dir: Optional[Path]) -> CheckpointJournal:
+    if journal_dir is not None:
+        return CheckpointJournal(journal_dir.resolve())
+    cohort = cohort_service.get_cohort(cohort_id)
+    if not cohort:
+        typer.echo(f"Cohort {cohort_id} not found", err=True)
+        raise typer.Exit(code=1)
+    return CheckpointJournal(default_journal_dir(cohort.id))
+
+
+@metadata_app.command("journal-compact")
+def metadata_journal_compact(
+    cohort_id: int = typer.Argument(..., help="Cohort identifier"),
+    journal_dir: Optional[Path] = typer.Option(None, help="Override the checkpoint journal directory"),
+) -> None:
+    """Merge the extraction checkpoint journal into one deduplicated segment."""
+    journal = _open_checkpoint_journal(cohort_id, journal_dir)
+    stats = journal.compact()
+    typer.echo(
+        f"Compacted {stats['segments_before']} segment(s) into {stats['files']} files "
+        f"for {stats['subjects']} subjects ({journal.directory})"
+    )
+
+
+@metadata_app.command("journal-check")
+def metadata_journal_check(
+    cohort_id: int = typer.Argument(..., help="Cohort identifier"),
+    journal_dir: Optional[Path] = typer.Option(None, help="Override the checkpoint journal directory"),
+) -> None:
+    """Compare the extraction checkpoint journal with the paths stored in the metadata DB."""
+    journal = _open_checkpoint_journal(cohort_id, journal_dir)
+    check = journal.check_against_db(cohort_id)
+    typer.echo(f"Journal files: {check.journal_files}, database files: {check.db_files}")
+    if check.consistent:
+        typer.echo("Journal is consistent with the metadata database.")
+        return
+    table = Table(title="Subjects with differing file counts")
+    table.add_column("Subject")
+    table.add_column("Journal", justify="right")
+    table.add_column("Database", justify="right")
+    for subject_key, (journal_count, db_count) in check.mismatched_subjects.items():
+        table.add_row(subject_key, str(journal_count), str(db_count))
+    rprint(table)
+    raise typer.Exit(code=1)
+
+
+def _int_list(value: str, option: str) -> list[int]:
+    try:
+        values = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise typer.BadParameter(f"{option} expects a comma-separated list of integers") from None
+    if not values or min(values) < 1:
+        raise typer.BadParameter(f"{option} expects positive integers")
+    return values
+
+
+@metadata_app.command("bench-extract")
+def metadata_bench_extract(
+    workdir: Path = typer.Option(Path("bench-extract"), help="Directory for the synthetic archive and SQLite run databases"),
+    output: Optional[Path] = typer.Option(None, help="Write the JSON report here (defaults to <workdir>/report.json)"),
+    subjects: int = typer.Option(4, min=1, help="Synthetic subjects"),
+    studies: int = typer.Option(1, min=1, help="Studies per subject"),
+    series: int = typer.Option(3, min=1, help="Series per study"),
+    instances: int = typer.Option(20, min=1, help="Instances per series"),
+    modalities: str = typer.Option("MR,CT,PT", help="Comma-separated modalities, cycled over the series"),
+    enhanced_series: int = typer.Option(1, min=0, help="Enhanced multi-frame series per study"),
+    frames: int = typer.Option(8, min=1, help="Frames per enhanced instance"),
+    junk: int = typer.Option(1, min=0, help="Non-DICOM files per series"),
+    private_tags: int = typer.Option(10, min=0, help="Private tags per instance"),
+    seed: int = typer.Option(0, help="Seed for UIDs and patient IDs"),
+    max_workers: str = typer.Option("4", help="Comma-separated worker counts to benchmark"),
+    writers: str = typer.Option("1", help="Comma-separated DB writer pool sizes to benchmark"),
+    batch_size: str = typer.Option("100", help="Comma-separated writer batch sizes to benchmark"),
+    database_url: Optional[str] = typer.Option(
+        None, help="Metadata database to write to (defaults to a fresh SQLite file per run)"
+    ),
+    reset_database: bool = typer.Option(
+        False, help="Truncate the extraction tables before each run (PostgreSQL; destroys existing metadata)"
+    ),
+    repeat: int = typer.Option(1, min=1, max=20, help="Run every configuration this many times"),
+) -> None:
+    """Benchmark extraction throughput on a generated DICOM archive."""
+    from extract.bench import ArchiveSpec, expand_runs, run_benchmark, save_report
+
+    spec = ArchiveSpec(
+        subjects=subjects,
+        studies_per_subject=studies,
+        series_per_study=series,
+        instances_per_series=instances,
+        modalities=tuple(part.strip().upper() for part in modalities.split(",") if part.strip()),
+        enhanced_series_per_study=enhanced_series,
+        frames_per_enhanced=frames,
+        junk_files_per_series=junk,
+        private_tags=private_tags,
+        seed=seed,
+    )
+    runs = expand_runs(
+        _int_list(max_workers, "--max-workers"),
+        _int_list(writers, "--writers"),
+        _int_list(batch_size, "--batch-size"),
+    )
+    try:
+        report = run_benchmark(
+            workdir.resolve(),
+            spec,
+            runs,
+            database_url=database_url,
+            reset_database=reset_database,
+            repeat=repeat,
+        )
+    except RuntimeError as exc:
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(code=1)
+
+    report_path = output or workdir / "report.json"
+    save_report(report, report_path)
+
+    archive = report["archive"]
+    table = Table(title=f"Extraction benchmark ({archive['files']} files, {archive['instances']} instances)")
+    for column in ("Run", "Files/s", "Instances/s", "Parse s", "Write s", "Queue s", "Peak RSS MB", "DB size"):
+        table.add_column(column, justify="left" if column == "Run" else "right")
+    for result in report["runs"]:
+        timings = result["timings"]
+        db_size = result.get("db_size_bytes")
+        table.add_row(
+            result["label"],
+            f"{result['files_per_second'] or 0:.1f}",
+            f"{result['instances_per_second'] or 0:.1f}",
+            f"{timings['parse_seconds']:.2f}",
+            f"{timings['write_seconds'] + timings['commit_seconds']:.2f}",
+            f"{timings['queue_put_seconds'] + timings['queue_get_seconds']:.2f}",
+            f"{result['peak_rss_mb']:.1f}",
+            bytes_to_human(db_size) if db_size is not None else "-",
+        )
+    rprint(table)
+    typer.echo(f"Report written to {report_path}")
+
+
 @anonymize_app.command("run")
 def anonymize_run(config_path: Path, job_name: Optional[str] = None, no_job: bool = False) -> None:
     """Run anonymization using the unified engine."""
@@ -0,0 +1,496 @@
+"""Extraction throughput benchmark with a synthetic DICOM archive generator.
+
+``generate_archive`` writes a deterministic archive of configurable shape
+(subjects x studies x series x instances, MR/CT/PET, enhanced multi-frame
+MR, junk files, private tags). ``run_benchmark`` runs ``run_extraction`` on
+that archive for every combination of the given writer settings and
+returns a JSON-serialisable report that can be compared across commits.
+
+Each run happens in a fresh interpreter (``python -m extract.bench``).
+This keeps peak RSS and OS caches of runs apart and lets every run point
+``METADATA_DATABASE_URL`` at its own database. Without a database URL each
+run gets a new SQLite file. A PostgreSQL database must be empty, or must
+be reset explicitly with ``reset_database`` because the runs truncate the
+extraction tables.
+
+Usage:
+    neuro-backend metadata bench-extract --subjects 8 --max-workers 2,4,8
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+
+_RESULT_MARKER = "NILS_BENCH_RESULT "
+_SPEC_FILE = "archive-spec.json"
+
+_SOP_CLASSES = {
+    "MR": "1.2.840.10008.5.1.4.1.1.4",
+    "CT": "1.2.840.10008.5.1.4.1.1.2",
+    "PT": "1.2.840.10008.5.1.4.1.1.128",
+}
+_ENHANCED_MR_SOP_CLASS = "1.2.840.10008.5.1.4.1.1.4.1"
+
+# Tables written by extraction, children first
+_EXTRACTION_TABLES = (
+    "instance",
+    "series_stack",
+    "mri_series_details",
+    "ct_series_details",
+    "pet_series_details",
+    "series",
+    "study",
+    "subject_other_identifiers",
+    "subject_cohorts",
+    "subject",
+    "ingest_conflicts",
+)
+
+
+@dataclass
+class ArchiveSpec:
+    """Shape of a synthetic archive."""
+
+    subjects: int = 4
+    studies_per_subject: int = 1
+    series_per_study: int = 3
+    instances_per_series: int = 20
+    # Series modalities are assigned round-robin from this list
+    modalities: tuple[str, ...] = ("MR", "CT", "PT")
+    enhanced_series_per_study: int = 0
+    frames_per_enhanced: int = 30
+    junk_files_per_series: int = 0
+    private_tags: int = 0
+    rows: int = 64
+    columns: int = 64
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self.modalities = tuple(m.strip().upper() for m in self.modalities if m.strip())
+        unknown = [m for m in self.modalities if m not in _SOP_CLASSES]
+        if unknown or not self.modalities:
+            raise ValueError(f"Unsupported modalities {unknown or 'none'}; choose from {sorted(_SOP_CLASSES)}")
+
+
+@dataclass
+class BenchRun:
+    """Writer settings of one benchmark run."""
+
+    max_workers: int = 4
+    db_writer_pool_size: int = 1
+    batch_size: int = 100
+    extra: dict = field(default_factory=dict)
+
+    def label(self) -> str:
+        return f"workers={self.max_workers} writers={self.db_writer_pool_size} batch={self.batch_size}"
+
+
+def _uid(seed: int, *parts) -> str:
+    from pydicom.uid import generate_uid
+
+    return generate_uid(entropy_srcs=[str(seed), *map(str, parts)])
+
+
+def _base_dataset(path: Path, sop_class: str, sop_uid: str):
+    from pydicom.dataset import FileDataset, FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian
+
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = sop_class
+    file_meta.MediaStorageSOPInstanceUID = sop_uid
+    file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds = FileDataset(str(path), {}, file_meta=file_meta, preamble=b"\0" * 128)
+    ds.SOPClassUID = sop_class
+    ds.SOPInstanceUID = sop_uid
+    return ds
+
+
+def _add_image(ds, spec: ArchiveSpec, frames: int = 1) -> None:
+    ds.Rows = spec.rows
+    ds.Columns = spec.columns
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = 12
+    ds.HighBit = 11
+    ds.PixelRepresentation = 0
+    ds.PixelSpacing = [0.9, 0.9]
+    ds.PixelData = bytes(spec.rows * spec.columns * 2 * frames)
+
+
+def _add_private_tags(ds, spec: ArchiveSpec) -> None:
+    if not spec.private_tags:
+        return
+    block = ds.private_block(0x0029, "NILS BENCH", create=True)
+    for offset in range(min(spec.private_tags, 0xFF)):
+        block.add_new(offset, "LO", f"private value {offset}")
+
+
+def _write_instance(path: Path, spec: ArchiveSpec, modality: str, ids: dict, index: int) -> None:
+    ds = _base_dataset(path, _SOP_CLASSES[modality], ids["sop"])
+    ds.PatientID = ids["patient"]
+    ds.PatientName = f"Bench^{ids['patient']}"
+    ds.StudyInstanceUID = ids["study"]
+    ds.SeriesInstanceUID = ids["series"]
+    ds.StudyDate = "20240101"
+    ds.SeriesDate = "20240101"
+    ds.AcquisitionDate = "20240101"
+    ds.Modality = modality
+    ds.SeriesNumber = ids["series_number"]
+    ds.SeriesDescription = f"{modality} bench series {ids['series_number']}"
+    ds.InstanceNumber = index + 1
+    ds.ImageType = ["ORIGINAL", "PRIMARY", "AXIAL"]
+    ds.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+    ds.ImagePositionPatient = [0, 0, float(index)]
+    ds.SliceThickness = 1.0
+    ds.Manufacturer = "NILS"
+    if modality == "MR":
+        ds.EchoTime = 4.5 + (ids["series_number"] % 3)
+        ds.RepetitionTime = 2000.0
+        ds.FlipAngle = 9.0
+        ds.MagneticFieldStrength = 3.0
+        ds.ScanningSequence = "GR"
+        ds.SequenceVariant = "SP"
+    elif modality == "CT":
+        ds.KVP = 120
+        ds.XRayTubeCurrent = 200
+        ds.ConvolutionKernel = "STANDARD"
+    else:
+        ds.Units = "BQML"
+        ds.DecayCorrection = "START"
+    _add_image(ds, spec)
+    _add_private_tags(ds, spec)
+    ds.save_as(path, enforce_file_format=True)
+
+
+def _write_enhanced(path: Path, spec: ArchiveSpec, ids: dict) -> None:
+    from pydicom.dataset import Dataset
+    from pydicom.sequence import Sequence
+
+    ds = _base_dataset(path, _ENHANCED_MR_SOP_CLASS, ids["sop"])
+    ds.PatientID = ids["patient"]
+    ds.PatientName = f"Bench^{ids['patient']}"
+    ds.StudyInstanceUID = ids["study"]
+    ds.SeriesInstanceUID = ids["series"]
+    ds.StudyDate = "20240101"
+    ds.Modality = "MR"
+    ds.SeriesNumber = ids["series_number"]
+    ds.SeriesDescription = f"Enhanced MR bench series {ids['series_number']}"
+    ds.InstanceNumber = 1
+    ds.ImageType = ["ORIGINAL", "PRIMARY", "M", "NONE"]
+    ds.NumberOfFrames = spec.frames_per_enhanced
+    frames = []
+    for frame in range(spec.frames_per_enhanced):
+        position = Dataset()
+        position.ImagePositionPatient = [0, 0, float(frame)]
+        orientation = Dataset()
+        orientation.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+        item = Dataset()
+        item.PlanePositionSequence = Sequence([position])
+        item.PlaneOrientationSequence = Sequence([orientation])
+        frames.append(item)
+    ds.PerFrameFunctionalGroupsSequence = Sequence(frames)
+    _add_image(ds, spec, frames=spec.frames_per_enhanced)
+    _add_private_tags(ds, spec)
+    ds.save_as(path, enforce_file_format=True)
+
+
+def generate_archive(root: Path, spec: ArchiveSpec) -> dict:
+    """Write a synthetic archive under *root* and return its file counts.
+
+    The layout is ``sub-XXXX/study-YY/series-ZZ/IMGnnnnn.dcm``. Junk files
+    (non-DICOM bytes with a .dcm extension and a text file) go next to the
+    images of a series.
+    """
+    root = Path(root)
+    stats = {"files": 0, "instances": 0, "junk_files": 0, "bytes": 0}
+    for subject in range(spec.subjects):
+        patient = f"BENCH{subject:05d}"
+        for study in range(spec.studies_per_subject):
+            study_uid = _uid(spec.seed, patient, study)
+            series_total = spec.series_per_study + spec.enhanced_series_per_study
+            for series in range(series_total):
+                series_dir = root / f"sub-{subject:04d}" / f"study-{study:02d}" / f"series-{series:02d}"
+                series_dir.mkdir(parents=True, exist_ok=True)
+                ids = {
+                    "patient": patient,
+                    "study": study_uid,
+                    "series": _uid(spec.seed, patient, study, series),
+                    "series_number": series + 1,
+                }
+                if series < spec.series_per_study:
+                    modality = spec.modalities[series % len(spec.modalities)]
+                    for index in range(spec.instances_per_series):
+                        path = series_dir / f"IMG{index:05d}.dcm"
+                        ids["sop"] = _uid(spec.seed, patient, study, series, index)
+                        _write_instance(path, spec, modality, ids, index)
+                        stats["instances"] += 1
+                        stats["bytes"] += path.stat().st_size
+                else:
+                    path = series_dir / "ENHANCED.dcm"
+                    ids["sop"] = _uid(spec.seed, patient, study, series, "enhanced")
+                    _write_enhanced(path, spec, ids)
+                    stats["instances"] += 1
+                    stats["bytes"] += path.stat().st_size
+                for junk in range(spec.junk_files_per_series):
+                    path = series_dir / (f"junk-{junk:03d}.dcm" if junk % 2 == 0 else f"notes-{junk:03d}.txt")
+                    path.write_bytes(b"not a DICOM file\n" * (junk + 1))
+                    stats["junk_files"] += 1
+                    stats["bytes"] += path.stat().st_size
+    stats["files"] = stats["instances"] + stats["junk_files"]
+    return stats
+
+
+def prepare_archive(workdir: Path, spec: ArchiveSpec) -> tuple[Path, dict]:
+    """Return the archive for *spec* under *workdir*, generating it unless it already exists."""
+    workdir = Path(workdir)
+    archive_root = workdir / "archive"
+    spec_path = workdir / _SPEC_FILE
+    if spec_path.is_file() and archive_root.is_dir():
+        stored = json.loads(spec_path.read_text())
+        if stored.get("spec") == json.loads(json.dumps(asdict(spec))):
+            return archive_root, stored["stats"]
+    if archive_root.exists():
+        import shutil
+
+        shutil.rmtree(archive_root)
+    start = time.perf_counter()
+    stats = generate_archive(archive_root, spec)
+    logger.info("Generated benchmark archive %s files=%d in %.1fs", archive_root, stats["files"], time.perf_counter() - start)
+    spec_path.write_text(json.dumps({"spec": asdict(spec), "stats": stats}, indent=2))
+    return archive_root, stats
+
+
+def expand_runs(
+    max_workers: Sequence[int],
+    db_writer_pool_sizes: Sequence[int],
+    batch_sizes: Sequence[int],
+    extra: Optional[dict] = None,
+) -> list[BenchRun]:
+    """Every combination of the given settings."""
+    return [
+        BenchRun(max_workers=w, db_writer_pool_size=p, batch_size=b, extra=dict(extra or {}))
+        for w, p, b in itertools.product(max_workers, db_writer_pool_sizes, batch_sizes)
+    ]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS; children are the worker processes
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) * scale / (1024 * 1024), 1)
+
+
+def _database_size(url: str) -> Optional[int]:
+    if url.startswith("sqlite"):
+        path = Path(url.split("///", 1)[-1])
+        return path.stat().st_size if path.is_file() else None
+    from sqlalchemy import text
+
+    from metadata_db.session import engine
+
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT pg_database_size(current_database())")).scalar_one()
+
+
+def _reset_database() -> None:
+    from sqlalchemy import text
+
+    from metadata_db.session import engine
+
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {', '.join(_EXTRACTION_TABLES)} RESTART IDENTITY CASCADE"))
+
+
+def _ensure_empty_database() -> None:
+    from sqlalchemy import func, select
+
+    from metadata_db.schema import Instance
+    from metadata_db.session import SessionLocal
+
+    with SessionLocal() as session:
+        if session.execute(select(func.count()).select_from(Instance)).scalar_one():
+            raise RuntimeError("Benchmark database already holds instances; pass reset_database to truncate it")
+
+
+def _run_child(params: dict) -> dict:
+    """Body of one benchmark run (executed in a fresh interpreter)."""
+    from . import writer as writer_module
+    from .config import ExtractionConfig
+    from .core import run_extraction
+
+    url = os.environ.get("METADATA_DATABASE_URL", "")
+    if url.startswith("sqlite"):
+        # The metadata migrations are PostgreSQL-only; create the plain schema
+        # instead, with temporal columns as text since SQLite's DATE/TIME types
+        # reject the raw DICOM strings PostgreSQL casts on insert
+        from sqlalchemy import Date, DateTime, String, Time
+
+        from metadata_db.schema import Base
+        from metadata_db.session import engine
+
+        for table in Base.metadata.tables.values():
+            for column in table.columns:
+                if isinstance(column.type, (Date, DateTime, Time)):
+                    column.type = String()
+        Base.metadata.create_all(engine)
+        writer_module.bootstrap = lambda auto_restore=None: None
+    else:
+        from metadata_db.lifecycle import bootstrap
+
+        bootstrap(auto_restore=False)
+        if params["reset_database"]:
+            _reset_database()
+    _ensure_empty_database()
+
+    run = params["run"]
+    config = ExtractionConfig(
+        cohort_id=1,
+        cohort_name="bench",
+        raw_root=Path(params["raw_root"]),
+        max_workers=run["max_workers"],
+        db_writer_pool_size=run["db_writer_pool_size"],
+        batch_size=run["batch_size"],
+        resume=False,
+        **run["extra"],
+    )
+    start = time.perf_counter()
+    result = run_extraction(config)
+    wall = time.perf_counter() - start
+
+    metrics = dict(result.metrics)
+    performance = metrics.pop("performance", {})
+    operations = performance.get("operations", {})
+
+    def seconds(*names: str) -> float:
+        return round(sum(operations.get(name, {}).get("total_seconds", 0.0) for name in names), 3)
+
+    instances = metrics.get("instances", 0)
+    return {
+        "wall_seconds": round(wall, 3),
+        "files_per_second": round(params["files"] / wall, 1) if wall else None,
+        "instances_per_second": round(instances / wall, 1) if wall else None,
+        "instances": instances,
+        "timings": {
+            "parse_seconds": seconds("worker_parse", "dicom_parsing"),
+            "write_seconds": seconds("db_write_batch"),
+            "commit_seconds": seconds("db_commit", "db_commit_final"),
+            "queue_put_seconds": seconds("queue_put"),
+            "queue_get_seconds": seconds("queue_get"),
+            "discovery_seconds": seconds("subject_discovery"),
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+        "db_size_bytes": _database_size(url),
+        "metrics": metrics,
+        "performance": performance,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def run_benchmark(
+    workdir: Path,
+    spec: ArchiveSpec,
+    runs: Iterable[BenchRun],
+    *,
+    database_url: Optional[str] = None,
+    reset_database: bool = False,
+    repeat: int = 1,
+) -> dict:
+    """Generate (or reuse) the archive for *spec* and time every run.
+
+    Returns the report; ``save_report`` writes it as JSON.
+    """
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    raw_root, archive_stats = prepare_archive(workdir, spec)
+    if database_url and not database_url.startswith("sqlite") and not reset_database:
+        logger.warning("Benchmark runs on %s will fail unless the database is empty", database_url)
+
+    results = []
+    for number, run in enumerate(list(runs) * max(1, repeat)):
+        url = database_url or f"sqlite+pysqlite:///{workdir / f'run-{number:03d}.db'}"
+        if url.startswith("sqlite"):
+            Path(url.split("///", 1)[-1]).unlink(missing_ok=True)
+        params = {
+            "raw_root": str(raw_root),
+            "files": archive_stats["files"],
+            "run": asdict(run),
+            "reset_database": reset_database,
+        }
+        env = dict(os.environ, METADATA_DATABASE_URL=url, METADATA_AUTO_RESTORE="false")
+        src_root = str(Path(__file__).resolve().parents[1])
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_root, env.get("PYTHONPATH")]))
+        logger.info("Benchmark run %d: %s", number + 1, run.label())
+        completed = subprocess.run(
+            [sys.executable, "-m", "extract.bench", json.dumps(params)],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith(_RESULT_MARKER)]
+        if completed.returncode != 0 or not lines:
+            raise RuntimeError(
+                f"Benchmark run {run.label()} failed (exit {completed.returncode}):\n{completed.stderr[-4000:]}"
+            )
+        result = json.loads(lines[-1][len(_RESULT_MARKER):])
+        result["label"] = run.label()
+        result["config"] = asdict(run)
+        results.append(result)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": "postgresql" if database_url and not database_url.startswith("sqlite") else "sqlite",
+        "archive": {"spec": asdict(spec), **archive_stats},
+        "runs": results,
+    }
+
+
+def save_report(report: dict, path: Path) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(report, indent=2, default=str))
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.WARNING)
+    result = _run_child(json.loads(argv[0]))
+    print(_RESULT_MARKER + json.dumps(result, default=str), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Durable local journal of committed extraction batches.
+
+The writer appends one record per subject and batch after each successful
+commit. A record holds the subject key, the batch's leaf directories and the
+file names written in each one. On restart the journal rebuilds the
+resume-by-path ``ExistingPathIndex`` without streaming every
+``Instance.dicom_file_path`` out of the database.
+
+The journal is a directory of append-only segment files, by default one per
+cohort under ``CHECKPOINT_JOURNAL_ROOT`` so nothing is written into the
+(often read-only) archive. Each line is
+``<crc32 hex> <json>``. A line whose checksum does not match (a torn write
+from a crash) is skipped. Records are only appended after the database
+commit. A crash between the commit and the append therefore loses journal
+records but never adds false ones; those files are simply extracted again
+and skipped by the writer's duplicate handling.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .resume_index import ExistingPathIndex, iter_existing_paths, split_subject_relative
+
+
+logger = logging.getLogger(__name__)
+
+
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".log"
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+CHECKPOINT_JOURNAL_ROOT = Path(os.getenv("CHECKPOINT_JOURNAL_DIR", "resource/journal")).resolve()
+
+
+def default_journal_dir(cohort_id: int) -> Path:
+    """Return the default journal directory for a cohort, outside the archive."""
+    return CHECKPOINT_JOURNAL_ROOT / f"cohort-{cohort_id}"
+
+
+def _encode(record: dict) -> bytes:
+    payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+
+def _decode(line: bytes) -> Optional[dict]:
+    if len(line) < 10 or line[8:9] != b" ":
+        return None
+    payload = line[9:].rstrip(b"\n")
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def _split_leaf(subject_relative: str) -> Tuple[str, str]:
+    leaf_dir, _, name = subject_relative.rpartition("/")
+    return leaf_dir, name
+
+
+@dataclass
+class JournalCheck:
+    """Result of comparing the journal with the metadata database."""
+
+    journal_files: int
+    db_files: int
+    # subject_key -> (journal count, db count) for subjects that differ
+    mismatched_subjects: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+    @property
+    def consistent(self) -> bool:
+        return not self.mismatched_subjects
+
+
+class CheckpointJournal:
+    """Segmented append-only journal for one cohort."""
+
+    def __init__(self, directory: Path, *, segment_bytes: int = DEFAULT_SEGMENT_BYTES, fsync: bool = True) -> None:
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.corrupt_records = 0
+        self.seed_chunk_size = 50_000
+        self._fd: Optional[int] = None
+        self._fd_size = 0
+        self._pending: List[str] = []
+
+    # -- segments -----------------------------------------------------------
+
+    def _segments(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            path
+            for path in self.directory.iterdir()
+            if path.name.startswith(_SEGMENT_PREFIX) and path.name.endswith(_SEGMENT_SUFFIX)
+        )
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"{_SEGMENT_PREFIX}{number:08d}{_SEGMENT_SUFFIX}"
+
+    def _next_segment_number(self) -> int:
+        segments = self._segments()
+        if not segments:
+            return 1
+        return int(segments[-1].name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]) + 1
+
+    def _open_segment(self) -> int:
+        if self._fd is not None and self._fd_size < self.segment_bytes:
+            return self._fd
+        self.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        if segments and segments[-1].stat().st_size < self.segment_bytes:
+            path = segments[-1]
+        else:
+            path = self._segment_path(self._next_segment_number())
+        self._fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._fd_size = os.fstat(self._fd).st_size
+        if self._fd_size and os.pread(self._fd, 1, self._fd_size - 1) != b"\n":
+            # Terminate a torn last line so the next record starts cleanly
+            self._fd_size += os.write(self._fd, b"\n")
+        return self._fd
+
+    def close(self) -> None:
+        self.flush()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def is_empty(self) -> bool:
+        return not any(path.stat().st_size for path in self._segments())
+
+    def reset(self) -> None:
+        """Delete all segments."""
+        self._pending = []
+        self.close()
+        for path in self._segments():
+            path.unlink(missing_ok=True)
+
+    # -- writing ------------------------------------------------------------
+
+    def append_paths(self, file_paths: Iterable[str]) -> int:
+        """Append raw_root-relative file paths, one record per subject.
+
+        Returns the number of paths written.
+        """
+        grouped: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        count = 0
+        for file_path in file_paths:
+            subject_key, subject_relative = split_subject_relative(file_path)
+            if not subject_key:
+                continue
+            leaf_dir, name = _split_leaf(subject_relative)
+            grouped[subject_key][leaf_dir].append(name)
+            count += 1
+        if not grouped:
+            return 0
+
+        data = b"".join(
+            _encode({"s": subject_key, "n": sum(len(names) for names in dirs.values()), "d": dirs})
+            for subject_key, dirs in grouped.items()
+        )
+        fd = self._open_segment()
+        os.write(fd, data)
+        if self.fsync:
+            os.fsync(fd)
+        self._fd_size += len(data)
+        return count
+
+    def add_path(self, file_path: str) -> None:
+        """Buffer one path for a chunked append (used to seed the journal from the database)."""
+        self._pending.append(file_path)
+        if len(self._pending) >= self.seed_chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append paths buffered by add_path()."""
+        if self._pending:
+            pending, self._pending = self._pending, []
+            self.append_paths(pending)
+
+    # -- reading ------------------------------------------------------------
+
+    def iter_records(self) -> Iterator[dict]:
+        """Yield valid records from all segments, skipping torn or corrupt lines."""
+        self.corrupt_records = 0
+        for path in self._segments():
+            with path.open("rb") as handle:
+                for line in handle:
+                    record = _decode(line)
+                    if record is None:
+                        self.corrupt_records += 1
+                        continue
+                    yield record
+        if self.corrupt_records:
+            logger.warning("Skipped %d corrupt journal records in %s", self.corrupt_records, self.directory)
+
+    def _subject_paths(self) -> Dict[str, Dict[str, set]]:
+        subjects: Dict[str, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+        for record in self.iter_records():
+            dirs = subjects[record["s"]]
+            for leaf_dir, names in record["d"].items():
+                dirs[leaf_dir].update(names)
+        return subjects
+
+    def build_index(self, subject_keys: Optional[Iterable[str]] = None) -> ExistingPathIndex:
+        """Rebuild the resume-by-path index from the journal."""
+        key_filter = set(subject_keys) if subject_keys is not None else None
+        index = ExistingPathIndex()
+        for record in self.iter_records():
+            subject_key = record["s"]
+            if key_filter is not None and subject_key not in key_filter:
+                continue
+            for leaf_dir, names in record["d"].items():
+                prefix = f"{leaf_dir}/" if leaf_dir else ""
+                for name in names:
+                    index.add(subject_key, prefix + name)
+        logger.info("Rebuilt resume index from journal %s paths=%d", self.directory, index.total_paths)
+        return index
+
+    def subject_counts(self) -> Dict[str, int]:
+        """Distinct journaled files per subject."""
+        return {
+            subject_key: sum(len(names) for names in dirs.values())
+            for subject_key, dirs in self._subject_paths().items()
+        }
+
+    # -- maintenance --------------------------------------------------------
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite the journal as one deduplicated record per subject.
+
+        The compacted segment is written under a new number and renamed into
+        place before the old segments are deleted, so a crash at any point
+        leaves a readable (at worst duplicated) journal.
+        """
+        old_segments = self._segments()
+        subjects = self._subject_paths()
+        self.close()
+        files = 0
+        if subjects:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            target = self._segment_path(self._next_segment_number())
+            tmp_path = target.with_name(target.name + ".tmp")
+            with tmp_path.open("wb") as handle:
+                for subject_key in sorted(subjects):
+                    dirs = {leaf_dir: sorted(names) for leaf_dir, names in sorted(subjects[subject_key].items())}
+                    count = sum(len(names) for names in dirs.values())
+                    handle.write(_encode({"s": subject_key, "n": count, "d": dirs}))
+                    files += count
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, target)
+        for path in old_segments:
+            path.unlink(missing_ok=True)
+        return {"segments_before": len(old_segments), "subjects": len(subjects), "files": files}
+
+    def check_against_db(self, cohort_id: int) -> JournalCheck:
+        """Compare journaled file counts per subject with the paths stored in the database.
+
+        Files the writer skipped as duplicate SOP instances are journaled but
+        not stored under their own path, so they show up as differences.
+        """
+        journal_counts = self.subject_counts()
+        db_counts: Dict[str, int] = defaultdict(int)
+        for raw_path in iter_existing_paths(cohort_id):
+            subject_key, _ = split_subject_relative(raw_path)
+            if subject_key:
+                db_counts[subject_key] += 1
+
+        mismatched = {
+            subject_key: (journal_counts.get(subject_key, 0), db_counts.get(subject_key, 0))
+            for subject_key in set(journal_counts) | set(db_counts)
+            if journal_counts.get(subject_key, 0) != db_counts.get(subject_key, 0)
+        }
+        return JournalCheck(
+            journal_files=sum(journal_counts.values()),
+            db_files=sum(db_counts.values()),
+            mismatched_subjects=dict(sorted(mismatched.items())),
+        )
@@ -42,12 +42,33 @@ class ExtractionConfig(BaseModel):
         default=False,
         description="Skip files whose relative path already exists in metadata.instance (requires stable paths)",
     )
+    use_checkpoint_journal: bool = Field(
+        default=False,
+        description="Append committed batches to a local journal and rebuild the resume-by-path index "
+        "from it instead of reading every stored path from the database",
+    )
+    checkpoint_journal_dir: Optional[Path] = Field(
+        default=None,
+        description="Journal directory (defaults to a per-cohort directory under CHECKPOINT_JOURNAL_DIR, "
+        "outside the archive)",
+    )
     series_workers_per_subject: int = Field(default=1, ge=1, le=16)
     adaptive_batching_enabled: bool = False
     target_tx_ms: int = Field(default=200, ge=50, le=2000)
     min_batch_size: int = Field(default=50, ge=10, le=10000)
     max_batch_size: int = Field(default=1000, ge=50, le=20000)
     use_specific_tags: bool = Field(default=True)
+    use_prefix_reader: bool = Field(
+        default=False,
+        description="Parse the extraction tags from a bounded prefix of each file and stop after the last "
+        "needed tag instead of walking the header up to the pixel data",
+    )
+    header_prefix_bytes: int = Field(
+        default=64 * 1024,
+        ge=4096,
+        le=16 * 1024 * 1024,
+        description="Initial prefix size read by the prefix reader (grown automatically for larger headers)",
+    )
     use_process_pool: bool = Field(
         default=True,
         description="Use ProcessPoolExecutor for true CPU parallelism (recommended)",
@@ -58,12 +79,65 @@ class ExtractionConfig(BaseModel):
         le=128,
         description="Number of worker processes (defaults to max_workers if None)",
     )
+    stream_worker_batches: bool = Field(
+        default=True,
+        description="Stream batches from worker processes as they are parsed instead of once per subject",
+    )
+    worker_stream_queue_size: int = Field(
+        default=32,
+        ge=1,
+        le=1024,
+        description="Maximum batches buffered between worker processes and the writers (backpressure bound)",
+    )
+    work_unit_depth: int = Field(
+        default=0,
+        ge=0,
+        le=8,
+        description="Split subjects into work units at this directory depth (1 = study folders, "
+        "2 = series folders) so idle worker processes can take over parts of large subjects; "
+        "0 keeps one unit per subject (streaming mode only)",
+    )
     db_writer_pool_size: int = Field(
         default=1,
         ge=1,
         le=16,
         description="Number of concurrent database writers (1-16, use 2-4 for best results)",
     )
+    incremental_discovery: bool = Field(
+        default=False,
+        description="Only list directories whose mtime changed since the last run's discovery snapshot and "
+        "extract just the new or changed files",
+    )
+    discovery_snapshot_path: Optional[Path] = Field(
+        default=None,
+        description="Discovery snapshot file (defaults to a per-cohort file under DISCOVERY_SNAPSHOT_DIR, "
+        "outside the archive)",
+    )
+    use_header_cache: bool = Field(
+        default=False,
+        description="Reuse headers extracted by earlier runs for files whose size and mtime are unchanged",
+    )
+    header_cache_dir: Optional[Path] = Field(
+        default=None,
+        description="Directory for header cache files (defaults to a per-cohort directory under HEADER_CACHE_DIR, "
+        "outside the archive)",
+    )
+    use_copy_ingest: bool = Field(
+        default=False,
+        description="Write study/series/stack/instance rows via COPY into a staging table and INSERT ... SELECT "
+        "(PostgreSQL only; other databases use multi-row INSERT)",
+    )
+    writer_cache_max_entries: int = Field(
+        default=100_000,
+        ge=1,
+        description="Entry limit of each writer ID cache (subjects, studies, series, stacks); "
+        "entries of finished subjects are evicted first",
+    )
+    pipelined_writes: bool = Field(
+        default=False,
+        description="Look up the parents of the next queued batch on a second connection while the current batch "
+        "is written (hides round-trip latency to a remote database)",
+    )
     subject_id_type_id: Optional[int] = None
     subject_code_map: dict[str, str] = Field(default_factory=dict, exclude=True)
     subject_code_seed: Optional[str] = None
@@ -0,0 +1,149 @@
+"""Staged COPY ingest helpers for the extraction writer.
+
+Rows are streamed into a per-connection temp table with PostgreSQL COPY and
+moved into the real table with a single ``INSERT ... SELECT ... ON CONFLICT``.
+Unlike multi-row ``INSERT ... VALUES`` this is not bound by the 65k bind
+parameter limit and skips SQLAlchemy statement compilation entirely, the same
+pattern Step 2 uses in ``sort.fingerprint_polars.bulk_upsert_fingerprints``.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Mapping, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger(__name__)
+
+
+_STAGING_PREFIX = "nils_stage_"
+
+
+def staging_table_name(table: str) -> str:
+    """Return the temp table name used to stage rows for *table*."""
+    return f"{_STAGING_PREFIX}{table}"
+
+
+def collect_columns(rows: Sequence[Mapping[str, Any]]) -> list[str]:
+    """Return the union of row keys, preserving first-seen order."""
+    columns: dict[str, None] = {}
+    for row in rows:
+        for key in row.keys():
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def group_rows_by_columns(rows: Sequence[Mapping[str, Any]]) -> list[tuple[list[str], list[Mapping[str, Any]]]]:
+    """Split *rows* into groups that share the same key set, in first-seen order.
+
+    A column missing from a row must take the server default, as it does with
+    ``INSERT ... VALUES``; COPY would store NULL for it, so every group is
+    copied with its own column list.
+    """
+    groups: dict[frozenset, tuple[list[str], list[Mapping[str, Any]]]] = {}
+    for row in rows:
+        group = groups.get(frozenset(row))
+        if group is None:
+            group = groups[frozenset(row)] = (list(row), [])
+        group[1].append(row)
+    return list(groups.values())
+
+
+def _quote(identifier: str) -> str:
+    # Instance has columns such as "rows"/"columns" that collide with SQL keywords
+    return f'"{identifier}"'
+
+
+def build_staged_insert_sql(
+    table: str,
+    columns: Sequence[str],
+    *,
+    conflict_columns: Optional[Sequence[str]] = None,
+    update_columns: Optional[Sequence[str]] = None,
+    returning: Optional[Sequence[str]] = None,
+) -> str:
+    """Build the ``INSERT ... SELECT`` that moves staged rows into *table*.
+
+    Without *update_columns* conflicting rows are skipped (``DO NOTHING``);
+    with them the conflicting row is overwritten from ``EXCLUDED``, which
+    requires *conflict_columns*.
+    """
+    column_list = ", ".join(_quote(column) for column in columns)
+    sql = f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging_table_name(table)}"
+    target = f" ({', '.join(_quote(column) for column in conflict_columns)})" if conflict_columns else ""
+    if update_columns:
+        if not conflict_columns:
+            raise ValueError("conflict_columns are required when update_columns are given")
+        update_set = ", ".join(f"{_quote(column)} = EXCLUDED.{_quote(column)}" for column in update_columns)
+        sql += f" ON CONFLICT{target} DO UPDATE SET {update_set}"
+    else:
+        sql += f" ON CONFLICT{target} DO NOTHING"
+    if returning:
+        sql += f" RETURNING {', '.join(_quote(column) for column in returning)}"
+    return sql
+
+
+def copy_insert_rows(
+    session: Session,
+    table: str,
+    rows: Sequence[Mapping[str, Any]],
+    *,
+    conflict_columns: Optional[Sequence[str]] = None,
+    update_columns: Optional[Sequence[str]] = None,
+    returning: Optional[Sequence[str]] = None,
+) -> list[tuple]:
+    """COPY *rows* into a staging table and upsert them into *table*.
+
+    Runs on the session's current connection, so the rows become part of the
+    caller's transaction and roll back with it. The staging table is created
+    once per connection and emptied before every use. Rows with different key
+    sets are copied in separate groups so omitted columns keep their server
+    default; *update_columns* is narrowed to the columns of each group.
+
+    Returns:
+        The ``RETURNING`` rows (empty list if *returning* is not given)
+    """
+    if not rows:
+        return []
+
+    staging = staging_table_name(table)
+
+    raw = session.connection().connection
+    dbapi_conn = getattr(raw, "driver_connection", raw)
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute(
+            # CREATE TABLE AS copies no constraints or defaults, so staging never
+            # consumes the real table's id sequence.
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+            f"AS SELECT * FROM {table} WITH NO DATA"
+        )
+        returned: list[tuple] = []
+        for columns, group in group_rows_by_columns(rows):
+            cursor.execute(f"TRUNCATE {staging}")
+
+            column_list = ", ".join(_quote(column) for column in columns)
+            # Text format: binary COPY needs every value dumped as the column's exact
+            # type (int2/int4/int8, float4/float8, json), while text lets the server
+            # cast. write_row escapes tabs, newlines and backslashes and sends None
+            # as NULL, so empty strings stay distinct from NULL.
+            with cursor.copy(f"COPY {staging} ({column_list}) FROM STDIN") as copy:
+                for row in group:
+                    copy.write_row([row[column] for column in columns])
+
+            cursor.execute(
+                build_staged_insert_sql(
+                    table,
+                    columns,
+                    conflict_columns=conflict_columns,
+                    update_columns=[column for column in update_columns if column in columns] if update_columns else None,
+                    returning=returning,
+                )
+            )
+            if returning:
+                returned.extend(cursor.fetchall())
+        return returned
+    finally:
+        cursor.close()
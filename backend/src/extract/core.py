@@ -7,6 +7,7 @@ import contextlib
 import logging
 import time
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Awaitable, Callable, Optional
 
 
@@ -27,14 +28,22 @@ def _metric_summary(metrics: dict) -> str:
     return ", ".join(parts) if parts else f"metrics_keys={','.join(sorted(str(k) for k in metrics.keys()))}"
 
 from .batching import BatchSizeController, BatchSizeSettings
+from .checkpoint_journal import CheckpointJournal, default_journal_dir
 from .config import ExtractionConfig
+from .discovery_snapshot import DirectorySnapshot, DiscoveryDelta, default_snapshot_path, scan_incremental
 from .limits import calculate_safe_instance_batch_rows
-from .process_pool import extract_subjects_parallel, SubjectBatchResult
-from .resume_index import ExistingPathIndex, SubjectPathEntry, build_existing_path_index
+from .process_pool import extract_subjects_parallel, extract_subjects_streaming, SubjectBatchResult
+from .resume_index import (
+    ExistingPathIndex,
+    SubjectPathEntry,
+    build_existing_path_index,
+    cohort_has_instances,
+    iter_existing_paths,
+)
 from .profiler import ExtractionProfiler, set_global_profiler
-from .scanner import SubjectFolder, discover_subjects
+from .scanner import SubjectFolder, discover_subjects, subjects_from_delta
 from .subject_mapping import SubjectResolver
-from .worker import extract_subject_batches, plan_subject_series
+from .worker import _matches_extension, extract_subject_batches, plan_subject_series
 from .writer import Writer
 from .writer_pool import WriterPool
 from jobs.control import JobControl
@@ -55,6 +64,106 @@ class ExtractionResult:
 _QUEUE_TIMEOUT_SECONDS = 0.5
 
 
+@dataclass
+class _Discovery:
+    subjects: list[SubjectFolder]
+    snapshot: Optional[DirectorySnapshot] = None
+    snapshot_path: Optional[Path] = None
+    delta: Optional[DiscoveryDelta] = None
+
+
+def _discover(config: ExtractionConfig, job_tag: str) -> _Discovery:
+    """Discover subjects, either by listing raw_root or incrementally from the snapshot."""
+    if not config.incremental_discovery:
+        return _Discovery(subjects=list(discover_subjects(config.raw_root)))
+
+    snapshot_path = config.discovery_snapshot_path or default_snapshot_path(config.raw_root, config.cohort_id)
+    previous = DirectorySnapshot.load(snapshot_path)
+    snapshot, delta = scan_incremental(config.raw_root.resolve(), previous)
+    mode = config.extension_mode.value
+    subjects = subjects_from_delta(config.raw_root, delta, lambda name: _matches_extension(name, mode))
+    logger.info(
+        "Extraction incremental discovery %s snapshot=%s new=%d changed=%d removed=%d "
+        "dirs_listed=%d dirs_reused=%d subjects=%d",
+        job_tag,
+        "loaded" if previous is not None else "none",
+        len(delta.new),
+        len(delta.changed),
+        len(delta.removed),
+        delta.dirs_listed,
+        delta.dirs_reused,
+        len(subjects),
+    )
+    if delta.removed:
+        logger.info(
+            "%s files removed since last snapshot (metadata rows are kept): %s%s",
+            job_tag,
+            ", ".join(delta.removed[:5]),
+            " ..." if len(delta.removed) > 5 else "",
+        )
+    return _Discovery(subjects=subjects, snapshot=snapshot, snapshot_path=snapshot_path, delta=delta)
+
+
+def _save_discovery_snapshot(discovery: _Discovery, failed_subjects: set[str], metrics: dict) -> None:
+    """Persist the snapshot after a successful run.
+
+    Subjects that reported errors are left out so the next run lists them again.
+    """
+    if discovery.snapshot is None or discovery.snapshot_path is None:
+        return
+    for subject_key in failed_subjects:
+        discovery.snapshot.forget_subtree(subject_key)
+    discovery.snapshot.save(discovery.snapshot_path)
+    if discovery.delta is not None:
+        metrics["discovery"] = discovery.delta.summary()
+
+
+def _open_journal(config: ExtractionConfig, job_tag: str) -> Optional[CheckpointJournal]:
+    """Open the checkpoint journal, seeding a new one from already stored paths.
+
+    With resume-by-path the seeding happens while the resume index is loaded
+    (see _load_resume_index) so the database is only scanned once.
+    """
+    if not config.use_checkpoint_journal:
+        return None
+    journal = CheckpointJournal(config.checkpoint_journal_dir or default_journal_dir(config.cohort_id))
+    if journal.is_empty() and not (config.resume and config.resume_by_path) and cohort_has_instances(config.cohort_id):
+        for raw_path in iter_existing_paths(config.cohort_id):
+            journal.add_path(raw_path)
+        journal.flush()
+        logger.info("%s seeded checkpoint journal dir=%s", job_tag, journal.directory)
+    return journal
+
+
+def _load_resume_index(
+    config: ExtractionConfig,
+    subject_keys: list[str],
+    journal: Optional[CheckpointJournal],
+    job_tag: str,
+) -> ExistingPathIndex:
+    """Build the resume-by-path index from the journal, or from the database.
+
+    A journal is discarded when the cohort has no stored instances (the
+    metadata DB was reset). Loading from the database seeds an empty journal
+    so the next run can skip the database scan.
+    """
+    if journal is not None and not journal.is_empty():
+        if cohort_has_instances(config.cohort_id):
+            logger.info("%s resume_paths source=journal dir=%s", job_tag, journal.directory)
+            return journal.build_index(subject_keys)
+        logger.warning("%s discarding checkpoint journal %s: cohort has no stored instances", job_tag, journal.directory)
+        journal.reset()
+
+    if journal is None:
+        return build_existing_path_index(config.cohort_id, subject_keys)
+    # Seed with every stored path, not only the discovered subjects, so the
+    # journal stays complete when later runs discover other subjects.
+    index = build_existing_path_index(config.cohort_id, None, on_path=journal.add_path)
+    journal.flush()
+    logger.info("%s resume_paths source=database seeded journal dir=%s", job_tag, journal.directory)
+    return index
+
+
 async def _control_checkpoint(control: Optional[JobControl], job_id: Optional[int]) -> None:
     if control is None:
         return
@@ -111,18 +220,21 @@ async def _run_async_process_pool(
     
     # Phase 1: Subject Discovery
     discovery_start = time.perf_counter()
-    subjects = list(discover_subjects(config.raw_root))
+    discovery = _discover(config, job_tag)
+    subjects = discovery.subjects
     profiler.record("subject_discovery", time.perf_counter() - discovery_start)
     
     total_subjects = len(subjects)
     logger.info("Extraction discovery %s subjects=%d", job_tag, total_subjects)
     processed_subjects = 0
     resume_index: ExistingPathIndex | None = None
+    journal = _open_journal(config, job_tag)
     resume_subject_filters: dict[str, SubjectPathEntry] | None = None
+    failed_subjects: set[str] = set()
 
     if config.resume and config.resume_by_path and subjects:
         subject_keys = [subject.subject_key for subject in subjects]
-        resume_index = build_existing_path_index(config.cohort_id, subject_keys)
+        resume_index = _load_resume_index(config, subject_keys, journal, job_tag)
         resume_subject_filters = {
             key: entry
             for key in subject_keys
@@ -191,6 +303,7 @@ async def _run_async_process_pool(
             batch_controller=batch_controller,
             control=control,
             path_index=resume_index,
+            journal=journal,
         )
         writer = None
         queue = None
@@ -206,6 +319,7 @@ async def _run_async_process_pool(
             batch_controller=batch_controller,
             control=control,
             path_index=resume_index,
+            journal=journal,
         )
         writer_pool = None
     
@@ -227,93 +341,128 @@ async def _run_async_process_pool(
                 """Process subjects using ProcessPoolExecutor with true result streaming.
                 
                 Results are sent to the queue as each worker completes, allowing
-                DB writes to happen in parallel with DICOM parsing.
+                DB writes to happen in parallel with DICOM parsing. With
+                ``stream_worker_batches`` enabled, individual batches are forwarded
+                while the subject is still being parsed.
                 """
                 import queue as queue_module
-                from threading import Thread
+                from threading import Event, Thread
                 
                 # Build resume tokens (empty for now, will be implemented properly)
                 resume_tokens: dict[str, str] = {}
                 
-                # Create a thread-safe queue for streaming results from process pool
-                result_queue: queue_module.Queue = queue_module.Queue()
+                # Bounded thread-safe queue between the pool thread and the event loop
+                result_queue: queue_module.Queue = queue_module.Queue(maxsize=config.queue_size)
+                stop_streaming = Event()
+                
+                def put_result(item) -> bool:
+                    """Put into result_queue, giving up if streaming was stopped."""
+                    while not stop_streaming.is_set():
+                        try:
+                            result_queue.put(item, timeout=_QUEUE_TIMEOUT_SECONDS)
+                            return True
+                        except queue_module.Full:
+                            continue
+                    return False
                 
                 def run_pool_and_stream():
                     """Run ProcessPoolExecutor and stream results to queue."""
                     try:
-                        # Extract subjects in parallel, results yield as they complete
-                        for result in extract_subjects_parallel(
-                            subjects=subjects,
-                            config=config,
-                            resolver=subject_resolver,
-                            max_workers=num_workers,
-                            resume_tokens=resume_tokens,
-                            resume_paths=resume_subject_filters,
-                        ):
-                            result_queue.put(("result", result))
+                        if config.stream_worker_batches:
+                            events = extract_subjects_streaming(
+                                subjects=subjects,
+                                config=config,
+                                resolver=subject_resolver,
+                                max_workers=num_workers,
+                                resume_tokens=resume_tokens,
+                                resume_paths=resume_subject_filters,
+                                max_pending_batches=config.worker_stream_queue_size,
+                            )
+                            for event in events:
+                                if not put_result(("event", event)):
+                                    events.close()
+                                    break
+                        else:
+                            # Extract subjects in parallel, results yield as they complete
+                            for result in extract_subjects_parallel(
+                                subjects=subjects,
+                                config=config,
+                                resolver=subject_resolver,
+                                max_workers=num_workers,
+                                resume_tokens=resume_tokens,
+                                resume_paths=resume_subject_filters,
+                            ):
+                                if not put_result(("result", result)):
+                                    break
                     except Exception as e:
-                        result_queue.put(("error", e))
+                        put_result(("error", e))
                     finally:
-                        result_queue.put(("done", None))
+                        put_result(("done", None))
+                
+                async def send_batch(subject_key: str, batch, last_uid) -> None:
+                    if writer_pool:
+                        await writer_pool.put_batch(subject_key, None, batch, last_uid, False)
+                    else:
+                        await _queue_put(queue, (subject_key, None, batch, last_uid, False), control, job_id)
+                
+                async def complete_subject(
+                    subject_key: str,
+                    errors: list[str],
+                    files_processed: int,
+                    parse_time: float,
+                ) -> None:
+                    nonlocal processed_subjects
+                    # Parsing runs in worker processes; fold their totals into this profiler
+                    profiler.record("worker_parse", parse_time)
+                    profiler.increment_files(files_processed)
+                    if errors:
+                        failed_subjects.add(subject_key)
+                    if writer_pool:
+                        await writer_pool.put_batch(subject_key, None, None, None, True)
+                    else:
+                        await _queue_put(queue, (subject_key, None, None, None, True), control, job_id)
+                    processed_subjects += 1
+                    if progress:
+                        await _maybe_await(progress(processed_subjects, total_subjects))
                 
                 # Start process pool in background thread
-                logger.info("Extraction streaming %s starting process pool", job_tag)
+                logger.info(
+                    "Extraction streaming %s starting process pool stream_batches=%s",
+                    job_tag,
+                    config.stream_worker_batches,
+                )
                 pool_thread = Thread(target=run_pool_and_stream, daemon=True)
                 pool_thread.start()
                 
-                # Stream results to async queue as they arrive
-                while True:
-                    # Get result from thread-safe queue (non-blocking via run_in_executor)
-                    msg_type, data = await loop.run_in_executor(None, result_queue.get)
-                    
-                    if msg_type == "done":
-                        break
-                    elif msg_type == "error":
-                        raise data
-                    elif msg_type == "result":
-                        result = data
-                        await _control_checkpoint(control, job_id)
+                try:
+                    # Stream results to async queue as they arrive
+                    while True:
+                        # Get result from thread-safe queue (non-blocking via run_in_executor)
+                        msg_type, data = await loop.run_in_executor(None, result_queue.get)
                         
-                        # Send each batch to the writer pool or single writer
-                        for batch, last_uid in result.batches:
-                            if writer_pool:
-                                await writer_pool.put_batch(
-                                    result.subject_key,
-                                    None,
-                                    batch,
-                                    last_uid,
-                                    False,
-                                )
+                        if msg_type == "done":
+                            break
+                        elif msg_type == "error":
+                            raise data
+                        elif msg_type == "event":
+                            await _control_checkpoint(control, job_id)
+                            if data.completed:
+                                await complete_subject(data.subject_key, data.errors, data.files_processed, data.parse_time)
                             else:
-                                await _queue_put(
-                                    queue,
-                                    (result.subject_key, None, batch, last_uid, False),
-                                    control,
-                                    job_id,
-                                )
-                        
-                        # Mark subject complete
-                        if writer_pool:
-                            await writer_pool.put_batch(
-                                result.subject_key,
-                                None,
-                                None,
-                                None,
-                                True,
-                            )
-                        else:
-                            await _queue_put(
-                                queue,
-                                (result.subject_key, None, None, None, True),
-                                control,
-                                job_id,
-                            )
-                        
-                        # Update progress
-                        nonlocal processed_subjects
-                        processed_subjects += 1
-                        if progress:
-                            await _maybe_await(progress(processed_subjects, total_subjects))
+                                await send_batch(data.subject_key, data.batch, data.last_uid)
+                        elif msg_type == "result":
+                            result = data
+                            await _control_checkpoint(control, job_id)
+                            
+                            # Send each batch to the writer pool or single writer
+                            for batch, last_uid in result.batches:
+                                await send_batch(result.subject_key, batch, last_uid)
+                            
+                            # Mark subject complete and update progress
+                            await complete_subject(result.subject_key, result.errors, result.files_processed, result.parse_time)
+                finally:
+                    # Unblocks the pool thread (and stops workers) if we exit early
+                    stop_streaming.set()
                 
                 # Wait for thread to finish
                 await loop.run_in_executor(None, pool_thread.join)
@@ -358,6 +507,7 @@ async def _run_async_process_pool(
         metrics = writer_pool.aggregate_metrics()
     else:
         metrics = writer.snapshot_metrics()
+    _save_discovery_snapshot(discovery, failed_subjects, metrics)
     
     # Stop profiler and log results
     profiler.stop()
@@ -403,7 +553,8 @@ async def _run_async(
     
     # Phase 1: Subject Discovery
     discovery_start = time.perf_counter()
-    subjects = list(discover_subjects(config.raw_root))
+    discovery = _discover(config, job_tag)
+    subjects = discovery.subjects
     profiler.record("subject_discovery", time.perf_counter() - discovery_start)
     
     total_subjects = len(subjects)
@@ -411,10 +562,11 @@ async def _run_async(
     processed_subjects = 0
     baseline_completed = 0
     resume_index: ExistingPathIndex | None = None
+    journal = _open_journal(config, job_tag)
 
     if config.resume and config.resume_by_path and subjects:
         subject_keys = [subject.subject_key for subject in subjects]
-        resume_index = build_existing_path_index(config.cohort_id, subject_keys)
+        resume_index = _load_resume_index(config, subject_keys, journal, job_tag)
         entries = {
             key: resume_index.entry_for(key)
             for key in subject_keys
@@ -467,6 +619,7 @@ async def _run_async(
         batch_controller=batch_controller,
         control=control,
         path_index=resume_index,
+        journal=journal,
     )
 
     async with writer:
@@ -527,6 +680,7 @@ async def _run_async(
             await _shutdown_tasks(exc)
 
     metrics = writer.snapshot_metrics()
+    _save_discovery_snapshot(discovery, set(), metrics)
     
     # Stop profiler and log results
     profiler.stop()
@@ -559,6 +713,7 @@ async def _process_subject(
     job_id: Optional[int],
     path_filter: SubjectPathEntry | None,
 ) -> None:
+    prefix_bytes = config.header_prefix_bytes if config.use_prefix_reader else None
     if config.series_workers_per_subject <= 1:
         resume_token = None
         last_instance = None
@@ -571,6 +726,7 @@ async def _process_subject(
             use_specific_tags=config.use_specific_tags,
             batch_controller=batch_controller,
             path_filter=path_filter,
+            prefix_bytes=prefix_bytes,
         ):
             await _control_checkpoint(control, job_id)
             await _queue_put(queue, (subject.subject_key, None, batch, last_instance, False), control, job_id)
@@ -604,6 +760,7 @@ async def _process_subject(
                 batch_controller=batch_controller,
                 paths=plan.paths,
                 path_filter=path_filter,
+                prefix_bytes=prefix_bytes,
             ):
                 await _queue_put(queue, (subject.subject_key, plan.series_uid, batch, last_instance, False), control, job_id)
 
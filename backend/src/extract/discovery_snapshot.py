@@ -0,0 +1,323 @@
+"""Persisted directory snapshot for incremental filesystem discovery.
+
+A snapshot records, for every directory below the cohort root, its mtime,
+its file count and its immediate sub-directories. The name, size and mtime
+of every file are kept apart in one columnar Polars frame, so an archive of
+tens of millions of files does not turn into as many Python objects. An
+incremental scan ``stat()``s each known directory and only lists
+(``scandir``) the ones whose mtime changed since the snapshot; unchanged
+directories reuse their recorded files and sub-directories. The listings are
+compared with the recorded files in a few joins. Adding, removing or renaming
+an entry updates the mtime of its parent directory, so new and removed files
+are always found.
+
+Snapshots live outside the archive, under ``DISCOVERY_SNAPSHOT_ROOT``:
+archives are often mounted read-only, and writing into the cohort root would
+change the very mtime the next scan compares.
+
+Files rewritten in place inside an unchanged directory are not detected; the
+archive is assumed to be append-only apart from whole-file replacement.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import polars as pl
+
+
+logger = logging.getLogger(__name__)
+
+
+# Files written into the archive by earlier versions of the extractor
+_INTERNAL_PREFIX = ".nils_"
+# Directories modified this close to the scan are re-listed next run, since a
+# later change within the same mtime tick would otherwise go unnoticed.
+_RACY_WINDOW_NS = 2_000_000_000
+_SCAN_MAX_WORKERS = 8
+
+_SNAPSHOT_SCHEMA = {
+    "rel_dir": pl.Utf8,
+    "mtime_ns": pl.Int64,
+    "file_count": pl.Int64,
+    "subdirs": pl.List(pl.Utf8),
+    "file_names": pl.List(pl.Utf8),
+    "file_sizes": pl.List(pl.Int64),
+    "file_mtimes": pl.List(pl.Int64),
+}
+
+# One row per file: directory, name, size and mtime
+_FILES_SCHEMA = {
+    "rel_dir": pl.Utf8,
+    "name": pl.Utf8,
+    "size": pl.Int64,
+    "mtime_ns": pl.Int64,
+}
+
+DISCOVERY_SNAPSHOT_ROOT = Path(os.getenv("DISCOVERY_SNAPSHOT_DIR", "resource/cache/discovery")).resolve()
+
+
+def default_snapshot_path(raw_root: Path, cohort_id: int) -> Path:
+    """Return the default snapshot location for a cohort, outside the archive.
+
+    The name includes a digest of the resolved cohort root, so moving a
+    cohort to another root starts from a fresh snapshot.
+    """
+    root_digest = hashlib.sha1(os.fsencode(Path(raw_root).resolve())).hexdigest()[:12]
+    return DISCOVERY_SNAPSHOT_ROOT / f"discovery_snapshot-{cohort_id}-{root_digest}.parquet"
+
+
+def _empty_files() -> pl.DataFrame:
+    return pl.DataFrame(schema=_FILES_SCHEMA)
+
+
+@dataclass
+class DirectoryState:
+    """Recorded state of one directory."""
+
+    mtime_ns: int
+    subdirs: Tuple[str, ...] = ()
+    file_count: int = 0
+
+
+class DirectorySnapshot:
+    """Directory states keyed by root-relative POSIX path ("" is the root).
+
+    *files* holds one row per file (``rel_dir``, ``name``, ``size``,
+    ``mtime_ns``) for all directories together.
+    """
+
+    def __init__(
+        self,
+        directories: Optional[Dict[str, DirectoryState]] = None,
+        files: Optional[pl.DataFrame] = None,
+    ) -> None:
+        self.directories: Dict[str, DirectoryState] = directories or {}
+        self.files: pl.DataFrame = files if files is not None else _empty_files()
+
+    def __len__(self) -> int:
+        return len(self.directories)
+
+    @property
+    def file_count(self) -> int:
+        return self.files.height
+
+    def get(self, rel_dir: str) -> Optional[DirectoryState]:
+        return self.directories.get(rel_dir)
+
+    def forget_subtree(self, rel_dir: str) -> None:
+        """Drop *rel_dir* and everything below it so the next scan re-lists it as new."""
+        prefix = f"{rel_dir}/"
+        self.directories = {
+            key: state
+            for key, state in self.directories.items()
+            if key != rel_dir and not key.startswith(prefix)
+        }
+        self.files = self.files.filter(
+            (pl.col("rel_dir") != rel_dir) & ~pl.col("rel_dir").str.starts_with(prefix)
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["DirectorySnapshot"]:
+        """Load a snapshot, returning None if it is missing or unreadable."""
+        if not path.is_file():
+            return None
+        try:
+            frame = pl.read_parquet(path)
+        except Exception as exc:
+            logger.warning("Ignoring unreadable discovery snapshot %s: %s", path, exc)
+            return None
+        directories = {
+            rel_dir: DirectoryState(mtime_ns=mtime_ns, subdirs=tuple(subdirs), file_count=file_count)
+            for rel_dir, mtime_ns, subdirs, file_count in frame.select(
+                "rel_dir", "mtime_ns", "subdirs", "file_count"
+            ).iter_rows()
+        }
+        files = (
+            frame.select(
+                "rel_dir",
+                name="file_names",
+                size="file_sizes",
+                mtime_ns="file_mtimes",
+            )
+            .explode("name", "size", "mtime_ns")
+            .drop_nulls("name")
+        )
+        return cls(directories, files)
+
+    def save(self, path: Path) -> bool:
+        """Write the snapshot atomically. Failures are logged, never raised."""
+        directories = pl.DataFrame(
+            {
+                "rel_dir": list(self.directories),
+                "mtime_ns": [state.mtime_ns for state in self.directories.values()],
+                "file_count": [state.file_count for state in self.directories.values()],
+                "subdirs": [list(state.subdirs) for state in self.directories.values()],
+            },
+            schema={name: _SNAPSHOT_SCHEMA[name] for name in ("rel_dir", "mtime_ns", "file_count", "subdirs")},
+        )
+        files = self.files.group_by("rel_dir").agg(
+            file_names=pl.col("name"),
+            file_sizes=pl.col("size"),
+            file_mtimes=pl.col("mtime_ns"),
+        )
+        frame = (
+            directories.join(files, on="rel_dir", how="left")
+            .with_columns(pl.col("file_names", "file_sizes", "file_mtimes").fill_null([]))
+            .select(list(_SNAPSHOT_SCHEMA))
+            .cast(_SNAPSHOT_SCHEMA)
+        )
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            frame.write_parquet(tmp_path)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as exc:
+            logger.warning("Could not write discovery snapshot %s: %s", path, exc)
+            tmp_path.unlink(missing_ok=True)
+            return False
+
+
+@dataclass
+class DiscoveryDelta:
+    """Files that differ from the previous snapshot (root-relative POSIX paths)."""
+
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    dirs_listed: int = 0
+    dirs_reused: int = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "new_files": len(self.new),
+            "changed_files": len(self.changed),
+            "removed_files": len(self.removed),
+            "dirs_listed": self.dirs_listed,
+            "dirs_reused": self.dirs_reused,
+        }
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def _list_directory(path: Path) -> Tuple[List[str], List[Tuple[str, int, int]]]:
+    subdirs: List[str] = []
+    files: List[Tuple[str, int, int]] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name.startswith(_INTERNAL_PREFIX):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    stat_result = entry.stat()
+                    files.append((entry.name, stat_result.st_size, stat_result.st_mtime_ns))
+            except FileNotFoundError:
+                # Race: entry vanished after scandir listed it.
+                continue
+    subdirs.sort()
+    return subdirs, files
+
+
+def _paths(frame: pl.DataFrame) -> List[str]:
+    """Root-relative POSIX paths of the (rel_dir, name) rows of *frame*."""
+    if frame.is_empty():
+        return []
+    return (
+        frame.select(
+            pl.when(pl.col("rel_dir") == "")
+            .then(pl.col("name"))
+            .otherwise(pl.col("rel_dir") + "/" + pl.col("name"))
+        )
+        .to_series()
+        .sort()
+        .to_list()
+    )
+
+
+def scan_incremental(
+    root: Path,
+    previous: Optional[DirectorySnapshot] = None,
+    *,
+    max_workers: int = _SCAN_MAX_WORKERS,
+) -> Tuple[DirectorySnapshot, DiscoveryDelta]:
+    """Scan *root* against *previous* and return the new snapshot and the delta.
+
+    Without a previous snapshot every file is reported as new. Directories
+    are stat()ed in a thread pool, which hides per-call latency on network
+    filesystems.
+    """
+    root = Path(root)
+    previous = previous or DirectorySnapshot()
+    scan_started_ns = time.time_ns()
+    directories: Dict[str, DirectoryState] = {}
+    listed_dirs: List[str] = []
+    listed: Dict[str, list] = {name: [] for name in _FILES_SCHEMA}
+    delta = DiscoveryDelta()
+
+    def visit(rel_dir: str) -> Tuple[str, Optional[DirectoryState], Optional[List[Tuple[str, int, int]]]]:
+        path = root / rel_dir if rel_dir else root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return rel_dir, None, None
+        prior = previous.get(rel_dir)
+        if prior is not None and prior.mtime_ns == mtime_ns:
+            return rel_dir, prior, None
+        try:
+            subdirs, files = _list_directory(path)
+        except FileNotFoundError:
+            return rel_dir, None, None
+        if mtime_ns >= scan_started_ns - _RACY_WINDOW_NS:
+            mtime_ns = 0
+        return rel_dir, DirectoryState(mtime_ns=mtime_ns, subdirs=tuple(subdirs), file_count=len(files)), files
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(visit, "")]
+        while futures:
+            rel_dir, state, files = futures.pop().result()
+            if state is None:
+                continue
+            directories[rel_dir] = state
+            if files is None:
+                delta.dirs_reused += 1
+            else:
+                delta.dirs_listed += 1
+                listed_dirs.append(rel_dir)
+                for name, size, mtime_ns in files:
+                    listed["rel_dir"].append(rel_dir)
+                    listed["name"].append(name)
+                    listed["size"].append(size)
+                    listed["mtime_ns"].append(mtime_ns)
+            for name in state.subdirs:
+                futures.append(executor.submit(visit, _join(rel_dir, name)))
+
+    current = pl.DataFrame(listed, schema=_FILES_SCHEMA)
+    # Recorded files of re-listed directories are compared with the listing;
+    # those of directories that disappeared are all removed
+    rel_dir = pl.col("rel_dir")
+    compared = rel_dir.is_in(listed_dirs) | ~rel_dir.is_in(list(directories))
+    prior = previous.files.filter(compared)
+    kept = previous.files.filter(~compared)
+
+    keys = ["rel_dir", "name"]
+    delta.new = _paths(current.join(prior, on=keys, how="anti"))
+    delta.removed = _paths(prior.join(current, on=keys, how="anti"))
+    delta.changed = _paths(
+        current.join(prior, on=keys, how="inner", suffix="_prior").filter(
+            (pl.col("size") != pl.col("size_prior")) | (pl.col("mtime_ns") != pl.col("mtime_ns_prior"))
+        )
+    )
+    return DirectorySnapshot(directories, pl.concat([kept, current])), delta
@@ -0,0 +1,290 @@
+"""Persistent per-subject cache of extracted DICOM headers.
+
+Re-extractions of an unchanged archive only need to ``stat()`` each file:
+headers already extracted by a previous run are reused when the file's
+relative path, size and mtime still match. Each subject gets one Parquet
+file holding the raw UIDs, patient identifiers and the extracted field dicts
+(stored as JSON strings).
+
+Cache files live outside the archive (``HEADER_CACHE_ROOT`` unless
+``header_cache_dir`` is set): archives are often read-only, and writing into
+them would bump the directory mtimes the incremental discovery snapshot
+compares, so every cache refresh would force a rescan.
+
+Subject-code resolution, resume filtering and modality checks are *not*
+cached; they are applied to cached headers exactly as to freshly parsed
+ones, so mapping changes take effect without invalidating the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import polars as pl
+
+from .dicom_mappings import (
+    CT_SERIES_FIELD_MAP,
+    EXTRACT_SPECIFIC_TAGS,
+    INSTANCE_FIELD_MAP,
+    MRI_SERIES_FIELD_MAP,
+    PET_SERIES_FIELD_MAP,
+    SERIES_FIELD_MAP,
+    STUDY_FIELD_MAP,
+    extract_fields,
+)
+from .worker import ALLOWED_SOP_CLASS_UIDS, normalize_modality
+
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the cached columns or their meaning change
+_CACHE_FORMAT_VERSION = 1
+_CACHE_FILE_PREFIX = ".nils_header_cache-"
+
+_FIELD_COLUMNS = (
+    "study_fields",
+    "series_fields",
+    "instance_fields",
+    "mri_fields",
+    "ct_fields",
+    "pet_fields",
+)
+_SCALAR_COLUMNS = (
+    "study_uid",
+    "series_uid",
+    "sop_uid",
+    "sop_class_uid",
+    "modality_raw",
+    "patient_id",
+    "patient_name",
+)
+_CACHE_SCHEMA = {
+    "rel_path": pl.Utf8,
+    "size": pl.Int64,
+    "mtime_ns": pl.Int64,
+    **{column: pl.Utf8 for column in _SCALAR_COLUMNS},
+    **{column: pl.Utf8 for column in _FIELD_COLUMNS},
+}
+
+
+def _mapping_fingerprint() -> str:
+    """Hash the field maps so cache files written by other mappings are ignored."""
+    parts: list[str] = [f"v{_CACHE_FORMAT_VERSION}", ",".join(str(tag) for tag in EXTRACT_SPECIFIC_TAGS)]
+    for name, mapping in (
+        ("study", STUDY_FIELD_MAP),
+        ("series", SERIES_FIELD_MAP),
+        ("instance", INSTANCE_FIELD_MAP),
+        ("mri", MRI_SERIES_FIELD_MAP),
+        ("ct", CT_SERIES_FIELD_MAP),
+        ("pet", PET_SERIES_FIELD_MAP),
+    ):
+        for column, field in sorted(mapping.items()):
+            parts.append(f"{name}.{column}={field.keyword}:{getattr(field.converter, '__name__', '?')}")
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=6).hexdigest()
+
+
+MAPPING_FINGERPRINT = _mapping_fingerprint()
+CACHE_FILE_NAME = f"{_CACHE_FILE_PREFIX}{MAPPING_FINGERPRINT}.parquet"
+
+HEADER_CACHE_ROOT = Path(os.getenv("HEADER_CACHE_DIR", "resource/cache/header")).resolve()
+
+# Directory of per-unit caches below a subject's cache directory; root-level
+# files of a split subject (unit "") get their own directory beside it
+_UNITS_DIR = "units"
+_ROOT_UNIT_DIR = "root-files"
+
+
+def default_cache_dir(cohort_id: int) -> Path:
+    """Return the default header cache directory for a cohort (outside the archive)."""
+    return HEADER_CACHE_ROOT / f"cohort-{cohort_id}"
+
+
+@dataclass
+class CachedHeader:
+    """Header values extracted from one DICOM file.
+
+    Field dicts are ``None`` when the file was rejected before field
+    extraction (missing UIDs or an unsupported SOP class).
+    """
+
+    study_uid: Optional[str]
+    series_uid: Optional[str]
+    sop_uid: Optional[str]
+    sop_class_uid: Optional[str]
+    modality_raw: Optional[str]
+    patient_id: Optional[str]
+    patient_name: Optional[str]
+    study_fields: Optional[dict] = None
+    series_fields: Optional[dict] = None
+    instance_fields: Optional[dict] = None
+    mri_fields: Optional[dict] = None
+    ct_fields: Optional[dict] = None
+    pet_fields: Optional[dict] = None
+
+    @property
+    def has_fields(self) -> bool:
+        return self.study_fields is not None
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def read_header(dataset) -> CachedHeader:
+    """Build a CachedHeader from a parsed dataset.
+
+    Field dicts are only extracted for files that carry all required UIDs and
+    an allowed SOP class; others are cached as rejected.
+    """
+    study_uid = getattr(dataset, "StudyInstanceUID", None)
+    series_uid = getattr(dataset, "SeriesInstanceUID", None)
+    sop_uid = getattr(dataset, "SOPInstanceUID", None)
+    sop_class_uid = getattr(dataset, "SOPClassUID", None)
+    if sop_class_uid is None and getattr(dataset, "file_meta", None) is not None:
+        sop_class_uid = getattr(dataset.file_meta, "MediaStorageSOPClassUID", None)
+
+    header = CachedHeader(
+        study_uid=_optional_str(study_uid),
+        series_uid=_optional_str(series_uid),
+        sop_uid=_optional_str(sop_uid),
+        sop_class_uid=_optional_str(sop_class_uid),
+        modality_raw=_optional_str(getattr(dataset, "Modality", None)),
+        patient_id=_optional_str(getattr(dataset, "PatientID", None)),
+        patient_name=_optional_str(getattr(dataset, "PatientName", None)),
+    )
+    if not (header.study_uid and header.series_uid and header.sop_uid and header.sop_class_uid):
+        return header
+    if header.sop_class_uid not in ALLOWED_SOP_CLASS_UIDS:
+        return header
+
+    header.study_fields = extract_fields(dataset, STUDY_FIELD_MAP)
+    header.series_fields = extract_fields(dataset, SERIES_FIELD_MAP)
+    header.instance_fields = extract_fields(dataset, INSTANCE_FIELD_MAP)
+    modality = normalize_modality(header.modality_raw) or normalize_modality(header.series_fields.get("modality"))
+    header.mri_fields = extract_fields(dataset, MRI_SERIES_FIELD_MAP) if modality == "MR" else {}
+    header.ct_fields = extract_fields(dataset, CT_SERIES_FIELD_MAP) if modality == "CT" else {}
+    header.pet_fields = extract_fields(dataset, PET_SERIES_FIELD_MAP) if modality in {"PT", "PET"} else {}
+    return header
+
+
+class SubjectHeaderCache:
+    """Header cache for a single subject folder.
+
+    Entries are loaded once on open and written back with save(). Only
+    entries for files seen during this run are kept when the walk finished,
+    so deleted files drop out of the cache.
+    """
+
+    def __init__(self, cache_path: Path) -> None:
+        self.cache_path = cache_path
+        self._entries: dict[str, tuple[int, int, CachedHeader]] = {}
+        self._seen: set[str] = set()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @classmethod
+    def for_subject(
+        cls,
+        subject_key: str,
+        cache_dir: Path,
+        unit: Optional[str] = None,
+    ) -> "SubjectHeaderCache":
+        """Open the cache for a subject below *cache_dir*.
+
+        Work units of a split subject each keep their own cache under
+        ``<subject_key>/units/<unit>`` (root-level files under
+        ``<subject_key>/root-files``), so concurrent units never write the
+        same file and no unit shares the whole-subject cache.
+        """
+        base = Path(cache_dir) / subject_key
+        if unit is not None:
+            base = base / _UNITS_DIR / unit if unit else base / _ROOT_UNIT_DIR
+        return cls(base / CACHE_FILE_NAME)
+
+    def _load(self) -> None:
+        if not self.cache_path.is_file():
+            return
+        try:
+            frame = pl.read_parquet(self.cache_path)
+        except Exception as exc:
+            logger.warning("Ignoring unreadable header cache %s: %s", self.cache_path, exc)
+            return
+        for row in frame.iter_rows(named=True):
+            fields = {
+                column: json.loads(row[column]) if row[column] is not None else None
+                for column in _FIELD_COLUMNS
+            }
+            header = CachedHeader(**{column: row[column] for column in _SCALAR_COLUMNS}, **fields)
+            self._entries[row["rel_path"]] = (row["size"], row["mtime_ns"], header)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, rel_path: str, stat_result: os.stat_result) -> Optional[CachedHeader]:
+        """Return the cached header if the file's size and mtime are unchanged."""
+        entry = self._entries.get(rel_path)
+        if entry is not None and entry[0] == stat_result.st_size and entry[1] == stat_result.st_mtime_ns:
+            self._seen.add(rel_path)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def store(self, rel_path: str, stat_result: os.stat_result, header: CachedHeader) -> None:
+        self._entries[rel_path] = (stat_result.st_size, stat_result.st_mtime_ns, header)
+        self._seen.add(rel_path)
+        self._dirty = True
+
+    def retain(self, rel_path: str) -> None:
+        """Keep an existing entry for a file skipped without being looked up."""
+        if rel_path in self._entries:
+            self._seen.add(rel_path)
+
+    def save(self, *, walk_complete: bool) -> None:
+        """Persist the cache atomically.
+
+        When *walk_complete* is True, entries for files not seen this run are
+        dropped. Failures (e.g. read-only archives) are logged, never raised.
+        """
+        if walk_complete and len(self._seen) != len(self._entries):
+            self._entries = {key: value for key, value in self._entries.items() if key in self._seen}
+            self._dirty = True
+        if not self._dirty:
+            return
+
+        columns: dict[str, list] = {name: [] for name in _CACHE_SCHEMA}
+        for rel_path, (size, mtime_ns, header) in self._entries.items():
+            columns["rel_path"].append(rel_path)
+            columns["size"].append(size)
+            columns["mtime_ns"].append(mtime_ns)
+            for column in _SCALAR_COLUMNS:
+                columns[column].append(getattr(header, column))
+            for column in _FIELD_COLUMNS:
+                value = getattr(header, column)
+                columns[column].append(json.dumps(value) if value is not None else None)
+
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            pl.DataFrame(columns, schema=_CACHE_SCHEMA).write_parquet(tmp_path)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+            self._remove_stale_files()
+        except OSError as exc:
+            logger.warning("Could not write header cache %s: %s", self.cache_path, exc)
+            tmp_path.unlink(missing_ok=True)
+
+    def _remove_stale_files(self) -> None:
+        """Delete cache files written for other field mappings."""
+        for stale in self.cache_path.parent.glob(f"{_CACHE_FILE_PREFIX}*.parquet"):
+            if stale.name != self.cache_path.name:
+                stale.unlink(missing_ok=True)
@@ -0,0 +1,180 @@
+"""Read-only parent lookups for the pipelined extraction writer.
+
+``Writer._write_batch`` resolves the subject/study/series/stack hierarchy of a
+batch with a chain of SELECTs before it inserts anything. With pipelined
+writes the lookups for the *next* batch run on a second connection while the
+current batch is being inserted and committed; the writer then merges the
+result into its ID caches and only the INSERTs of genuinely new parents are
+left in the write transaction.
+
+The prefetch never writes. It only reports IDs of rows that were already
+committed, which stay valid whatever happens to the in-flight batch, so the
+parents-first, single-transaction guarantee of ``_write_batch`` (no orphan
+parents) is unchanged. Rows the in-flight batch creates are not visible yet;
+those are cache misses that the writer resolves as before.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import select
+
+from metadata_db.schema import Instance, Series, SeriesStack, Study, Subject, SubjectOtherIdentifier
+
+from .stack_utils import compute_stack_signature, signature_from_stack_record
+from .subject_mapping import subject_code_gen
+from .worker import InstancePayload
+
+
+_SOP_CHUNK = 1000
+
+
+def stack_signature(payload: InstancePayload) -> tuple:
+    """Return the payload's stack signature, computing it if the worker did not."""
+    return payload.stack_signature or compute_stack_signature(payload.series_uid, payload.instance_fields)
+
+
+def stack_record_signature(stack: SeriesStack, series_uid: str) -> tuple:
+    """Rebuild the stack signature of a stored ``series_stack`` row."""
+    return signature_from_stack_record(
+        series_uid,
+        stack.stack_echo_time,
+        stack.stack_inversion_time,
+        stack.stack_echo_numbers,
+        stack.stack_echo_train_length,
+        stack.stack_repetition_time,
+        stack.stack_flip_angle,
+        stack.stack_receive_coil_name,
+        stack.stack_xray_exposure,
+        stack.stack_kvp,
+        stack.stack_tube_current,
+        stack.stack_pet_bed_index,
+        stack.stack_pet_frame_type,
+        stack.stack_image_orientation,
+        stack.stack_image_type,
+    )
+
+
+@dataclass
+class ParentPrefetch:
+    """Committed parent IDs for one batch.
+
+    Studies and series are only included when their stored links agree with
+    the batch (same subject / study), so the writer's re-linking of moved
+    studies and series still happens on the regular path.
+    """
+
+    existing_sops: set[str] = field(default_factory=set)
+    # patient_id -> subject_id
+    subjects: dict[str, int] = field(default_factory=dict)
+    # study_uid -> (study_id, subject_id)
+    studies: dict[str, tuple[int, int]] = field(default_factory=dict)
+    # series_uid -> (series_id, study_id)
+    series: dict[str, tuple[int, int]] = field(default_factory=dict)
+    # stack signature -> (series_stack_id, series_id)
+    stacks: dict[tuple, tuple[int, int]] = field(default_factory=dict)
+    # series_uid -> next free stack_index
+    stack_counters: dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+def prefetch_parents(
+    session,
+    batch: list[InstancePayload],
+    *,
+    cohort_name: str,
+    subject_id_type_id: Optional[int],
+) -> ParentPrefetch:
+    """Look up the already stored SOPs and parents of *batch*.
+
+    Ends the session's read transaction before returning so the connection
+    does not sit idle in a transaction between batches.
+    """
+    start = time.perf_counter()
+    result = ParentPrefetch()
+    try:
+        sops = list({payload.sop_uid for payload in batch})
+        for i in range(0, len(sops), _SOP_CHUNK):
+            stmt = select(Instance.sop_instance_uid).where(Instance.sop_instance_uid.in_(sops[i:i + _SOP_CHUNK]))
+            result.existing_sops.update(row[0] for row in session.execute(stmt))
+
+        new_batch = [payload for payload in batch if payload.sop_uid not in result.existing_sops]
+        if new_batch:
+            _prefetch_hierarchy(session, new_batch, result, cohort_name, subject_id_type_id)
+    finally:
+        session.rollback()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _prefetch_hierarchy(
+    session,
+    batch: list[InstancePayload],
+    result: ParentPrefetch,
+    cohort_name: str,
+    subject_id_type_id: Optional[int],
+) -> None:
+    # First payload per key, matching how the writer picks representatives
+    by_patient: dict[str, InstancePayload] = {}
+    by_study: dict[str, InstancePayload] = {}
+    by_series: dict[str, InstancePayload] = {}
+    for payload in batch:
+        if payload.patient_id:
+            by_patient.setdefault(payload.patient_id, payload)
+        by_study.setdefault(payload.study_uid, payload)
+        by_series.setdefault(payload.series_uid, payload)
+
+    if by_patient and subject_id_type_id is not None:
+        stmt = (
+            select(SubjectOtherIdentifier.other_identifier, SubjectOtherIdentifier.subject_id)
+            .where(SubjectOtherIdentifier.id_type_id == subject_id_type_id)
+            .where(SubjectOtherIdentifier.other_identifier.in_(list(by_patient)))
+        )
+        for row in session.execute(stmt):
+            result.subjects[row.other_identifier] = row.subject_id
+
+    code_to_patient = {
+        payload.subject_code or subject_code_gen(patient_id, cohort_name): patient_id
+        for patient_id, payload in by_patient.items()
+        if patient_id not in result.subjects
+    }
+    if code_to_patient:
+        stmt = select(Subject.subject_code, Subject.subject_id).where(Subject.subject_code.in_(list(code_to_patient)))
+        for row in session.execute(stmt):
+            result.subjects[code_to_patient[row.subject_code]] = row.subject_id
+
+    stmt = select(Study.study_instance_uid, Study.study_id, Study.subject_id).where(
+        Study.study_instance_uid.in_(list(by_study))
+    )
+    for row in session.execute(stmt):
+        patient_id = by_study[row.study_instance_uid].patient_id
+        if result.subjects.get(patient_id) == row.subject_id:
+            result.studies[row.study_instance_uid] = (row.study_id, row.subject_id)
+
+    stmt = select(Series.series_instance_uid, Series.series_id, Series.study_id, Series.subject_id).where(
+        Series.series_instance_uid.in_(list(by_series))
+    )
+    for row in session.execute(stmt):
+        study = result.studies.get(by_series[row.series_instance_uid].study_uid)
+        if study is not None and study == (row.study_id, row.subject_id):
+            result.series[row.series_instance_uid] = (row.series_id, row.study_id)
+
+    if not result.series:
+        return
+    wanted = {stack_signature(payload) for payload in batch if payload.series_uid in result.series}
+    series_ids = {series_id for series_id, _ in result.series.values()}
+    stmt = (
+        select(SeriesStack, Series.series_instance_uid)
+        .join(Series, SeriesStack.series_id == Series.series_id)
+        .where(SeriesStack.series_id.in_(series_ids))
+    )
+    for stack, series_uid in session.execute(stmt):
+        next_index = stack.stack_index + 1
+        if next_index > result.stack_counters.get(series_uid, 0):
+            result.stack_counters[series_uid] = next_index
+        signature = stack_record_signature(stack, series_uid)
+        if signature in wanted:
+            result.stacks.setdefault(signature, (stack.series_stack_id, stack.series_id))
@@ -7,34 +7,29 @@ ProcessPoolExecutor, bypassing Python's GIL limitation.
 from __future__ import annotations
 
 import logging
+import multiprocessing
+import os
+import queue as queue_module
+import threading
 import time
+from collections import deque
 from concurrent.futures import ProcessPoolExecutor, Future, as_completed
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Iterator, List, Optional, Tuple
 
-import pydicom
-
 from .batching import BatchSizeController
 from .config import ExtractionConfig
-from .dicom_mappings import (
-    CT_SERIES_FIELD_MAP,
-    EXTRACT_SPECIFIC_TAGS,
-    INSTANCE_FIELD_MAP,
-    MRI_SERIES_FIELD_MAP,
-    PET_SERIES_FIELD_MAP,
-    SERIES_FIELD_MAP,
-    STUDY_FIELD_MAP,
-    extract_fields,
-)
+from .header_cache import CachedHeader, SubjectHeaderCache, default_cache_dir, read_header
+from .prefix_reader import read_extraction_header
 from .scanner import SubjectFolder
 from .resume_index import SubjectPathEntry
+from .stack_utils import compute_stack_signature
 from .subject_mapping import SubjectResolver
 from .worker import (
     ALLOWED_MODALITIES,
-    ALLOWED_SOP_CLASS_UIDS,
     InstancePayload,
-    _iter_dicom_files,
+    _iter_subject_files,
     _matches_extension,
     _relative_within_subject,
     normalize_modality,
@@ -48,18 +43,36 @@ logger = logging.getLogger(__name__)
 _WORKER_CONFIG: Optional[ExtractionConfig] = None
 _WORKER_RESOLVER: Optional[SubjectResolver] = None
 _WORKER_BATCH_SIZE: int = 100
+_WORKER_STREAM_QUEUE = None
+_WORKER_STOP_EVENT = None
+
+# Poll interval used by the parent while waiting on the shared stream queue
+_STREAM_POLL_SECONDS = 0.5
 
 
-def _worker_init(config: ExtractionConfig, resolver: Optional[SubjectResolver], batch_size: int) -> None:
+def _worker_init(
+    config: ExtractionConfig,
+    resolver: Optional[SubjectResolver],
+    batch_size: int,
+    stream_queue=None,
+    stop_event=None,
+) -> None:
     """Initialize worker process with shared configuration.
     
     This function is called once per worker process at startup.
     It sets up global state to avoid re-pickling large objects.
+    The stream queue and stop event are only set in streaming mode.
     """
-    global _WORKER_CONFIG, _WORKER_RESOLVER, _WORKER_BATCH_SIZE
+    global _WORKER_CONFIG, _WORKER_RESOLVER, _WORKER_BATCH_SIZE, _WORKER_STREAM_QUEUE, _WORKER_STOP_EVENT
     _WORKER_CONFIG = config
     _WORKER_RESOLVER = resolver
     _WORKER_BATCH_SIZE = batch_size
+    _WORKER_STREAM_QUEUE = stream_queue
+    _WORKER_STOP_EVENT = stop_event
+    if stream_queue is not None:
+        # Never block worker exit on flushing batches nobody will read
+        # (the parent consumes everything before a normal shutdown).
+        stream_queue.cancel_join_thread()
 
 
 @dataclass
@@ -72,88 +85,99 @@ class SubjectBatchResult:
     errors: List[str]
 
 
-def _process_subject_worker(
+@dataclass
+class SubjectStreamEvent:
+    """A single message streamed from a worker process.
+
+    Batch events carry ``batch``/``last_uid``; the final event for a subject
+    has ``completed=True`` and carries the subject's totals and errors.
+    """
+    subject_key: str
+    batch: Optional[List[InstancePayload]] = None
+    last_uid: Optional[str] = None
+    completed: bool = False
+    files_processed: int = 0
+    parse_time: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+def _iter_subject_worker_batches(
     subject: SubjectFolder,
     resume_instance: Optional[str],
     path_filter: SubjectPathEntry | None,
-) -> SubjectBatchResult:
-    """Worker function to process a single subject's DICOM files.
-    
-    This function runs in a separate process and must be picklable.
-    It uses global worker state initialized by _worker_init.
-    
-    Args:
-        subject: Subject folder to process
-        resume_instance: Last processed SOP Instance UID (for resume)
-    
-    Returns:
-        SubjectBatchResult with all batches and metadata
+    errors: List[str],
+) -> Iterator[Tuple[List[InstancePayload], str]]:
+    """Parse a subject's DICOM files and yield ``(batch, last_uid)`` tuples.
+
+    Shared by the whole-subject and streaming worker entry points. Per-file
+    errors are appended to *errors* instead of aborting the subject. With
+    ``use_header_cache`` enabled, files whose size and mtime match the
+    subject's header cache are not parsed again.
     """
     if _WORKER_CONFIG is None:
         raise RuntimeError("Worker not initialized - config not set")
-    
+
     config = _WORKER_CONFIG
     resolver = _WORKER_RESOLVER
     batch_size = _WORKER_BATCH_SIZE
-    
-    batches: List[Tuple[List[InstancePayload], str]] = []
+
     batch: List[InstancePayload] = []
     last_uid: str = ""
-    files_processed = 0
-    errors: List[str] = []
-    
-    start_time = time.perf_counter()
-    
+
+    header_cache: SubjectHeaderCache | None = None
+    if config.use_header_cache:
+        header_cache = SubjectHeaderCache.for_subject(
+            subject.subject_key,
+            config.header_cache_dir or default_cache_dir(config.cohort_id),
+            subject.unit,
+        )
+
+    walk_complete = False
     try:
-        file_iter = _iter_dicom_files(subject.path, config.extension_mode.value)
-        
+        file_iter = _iter_subject_files(subject, config.extension_mode.value)
+
         for path in file_iter:
             relative_path = _relative_within_subject(path, subject)
             if path_filter and path_filter.contains(relative_path):
                 logger.debug("[worker] Resume-by-path skipping %s/%s", subject.subject_key, relative_path)
+                if header_cache is not None:
+                    header_cache.retain(relative_path)
                 continue
             try:
-                # Parse DICOM file
-                if config.use_specific_tags:
-                    dataset = pydicom.dcmread(
+                header: CachedHeader | None = None
+                stat_result = None
+                if header_cache is not None:
+                    stat_result = os.stat(path)
+                    header = header_cache.lookup(relative_path, stat_result)
+
+                if header is None:
+                    # Parse DICOM file
+                    dataset = read_extraction_header(
                         path,
-                        force=True,
-                        stop_before_pixels=True,
-                        specific_tags=EXTRACT_SPECIFIC_TAGS,
+                        use_specific_tags=config.use_specific_tags,
+                        prefix_bytes=config.header_prefix_bytes if config.use_prefix_reader else None,
                     )
-                else:
-                    dataset = pydicom.dcmread(path, force=True, stop_before_pixels=True)
-                
-                # Extract required UIDs
-                study_uid = getattr(dataset, "StudyInstanceUID", None)
-                series_uid = getattr(dataset, "SeriesInstanceUID", None)
-                sop_uid = getattr(dataset, "SOPInstanceUID", None)
-                sop_class_uid = getattr(dataset, "SOPClassUID", None)
-                
-                if sop_class_uid is None and getattr(dataset, "file_meta", None) is not None:
-                    sop_class_uid = getattr(dataset.file_meta, "MediaStorageSOPClassUID", None)
-                
-                sop_class_uid_str = str(sop_class_uid) if sop_class_uid is not None else None
-                
-                # Validate required fields
-                if not (study_uid and series_uid and sop_uid and sop_class_uid_str):
-                    continue
-                
-                if sop_class_uid_str not in ALLOWED_SOP_CLASS_UIDS:
+                    header = read_header(dataset)
+                    if header_cache is not None:
+                        header_cache.store(relative_path, stat_result, header)
+
+                study_uid = header.study_uid
+                series_uid = header.series_uid
+                sop_uid = header.sop_uid
+
+                # Validate required fields (rejected files carry no field dicts)
+                if not header.has_fields:
                     continue
-                
+
                 # Skip if resuming and already processed
                 if resume_instance and sop_uid <= resume_instance:
                     continue
-                
+
                 # Extract metadata
-                modality_raw = getattr(dataset, "Modality", None)
-                relative_path = str(path.relative_to(subject.path.parent))
-                patient_id_raw = getattr(dataset, "PatientID", None)
-                patient_name_raw = getattr(dataset, "PatientName", None)
-                patient_id = str(patient_id_raw) if patient_id_raw is not None else None
-                patient_name = str(patient_name_raw) if patient_name_raw is not None else None
-                
+                file_path = str(path.relative_to(subject.path.parent))
+                patient_id = header.patient_id
+                patient_name = header.patient_name
+
                 # Resolve subject code
                 if resolver:
                     resolution = resolver.resolve(
@@ -168,24 +192,19 @@ def _process_subject_worker(
                 else:
                     subject_code = subject.subject_key
                     subject_source = "folder"
-                
-                # Extract fields
-                study_fields = extract_fields(dataset, STUDY_FIELD_MAP)
-                series_fields = extract_fields(dataset, SERIES_FIELD_MAP)
-                modality = normalize_modality(modality_raw) or normalize_modality(series_fields.get("modality"))
+
+                # Copy field dicts: cached headers are shared across lookups
+                series_fields = dict(header.series_fields)
+                modality = normalize_modality(header.modality_raw) or normalize_modality(series_fields.get("modality"))
                 if not modality:
-                    logger.debug("[worker] Skipping %s due to missing modality", relative_path)
+                    logger.debug("[worker] Skipping %s due to missing modality", file_path)
                     continue
                 if modality not in ALLOWED_MODALITIES:
-                    logger.debug("[worker] Skipping %s because modality %s is not allowed", relative_path, modality)
+                    logger.debug("[worker] Skipping %s because modality %s is not allowed", file_path, modality)
                     continue
                 series_fields["modality"] = modality
-                instance_fields = extract_fields(dataset, INSTANCE_FIELD_MAP)
-                
-                mri_fields = extract_fields(dataset, MRI_SERIES_FIELD_MAP) if modality == "MR" else {}
-                ct_fields = extract_fields(dataset, CT_SERIES_FIELD_MAP) if modality == "CT" else {}
-                pet_fields = extract_fields(dataset, PET_SERIES_FIELD_MAP) if modality in {"PT", "PET"} else {}
-                
+                instance_fields = dict(header.instance_fields)
+
                 # Create payload
                 payload = InstancePayload(
                     subject_key=subject.subject_key,
@@ -194,35 +213,75 @@ def _process_subject_worker(
                     series_uid=series_uid,
                     sop_uid=sop_uid,
                     modality=modality,
-                    file_path=relative_path,
-                    study_fields=study_fields,
+                    file_path=file_path,
+                    study_fields=dict(header.study_fields),
                     series_fields=series_fields,
                     instance_fields=instance_fields,
-                    mri_fields=mri_fields,
-                    ct_fields=ct_fields,
-                    pet_fields=pet_fields,
+                    mri_fields=dict(header.mri_fields),
+                    ct_fields=dict(header.ct_fields),
+                    pet_fields=dict(header.pet_fields),
                     patient_id=patient_id,
                     patient_name=patient_name,
                     subject_resolution_source=subject_source,
+                    stack_signature=compute_stack_signature(series_uid, instance_fields),
                 )
-                
+
                 batch.append(payload)
                 last_uid = sop_uid
-                files_processed += 1
-                
+
                 # Yield batch when size reached
                 if len(batch) >= batch_size:
-                    batches.append((batch, last_uid))
+                    yield batch, last_uid
                     batch = []
-            
+
             except Exception as e:
                 errors.append(f"Error processing {path}: {e}")
                 continue
-        
-        # Add final batch if any
+
+        # A discovery file list covers only part of the folder: keep other entries
+        walk_complete = subject.files is None
+        # Yield final batch if any
         if batch:
-            batches.append((batch, last_uid or ""))
+            yield batch, last_uid or ""
+    finally:
+        if header_cache is not None:
+            header_cache.save(walk_complete=walk_complete)
+            logger.debug(
+                "[worker] Header cache %s hits=%d misses=%d entries=%d",
+                subject.subject_key,
+                header_cache.hits,
+                header_cache.misses,
+                len(header_cache),
+            )
+
+
+def _process_subject_worker(
+    subject: SubjectFolder,
+    resume_instance: Optional[str],
+    path_filter: SubjectPathEntry | None,
+) -> SubjectBatchResult:
+    """Worker function to process a single subject's DICOM files.
+    
+    This function runs in a separate process and must be picklable.
+    It uses global worker state initialized by _worker_init.
+    
+    Args:
+        subject: Subject folder to process
+        resume_instance: Last processed SOP Instance UID (for resume)
+    
+    Returns:
+        SubjectBatchResult with all batches and metadata
+    """
+    batches: List[Tuple[List[InstancePayload], str]] = []
+    files_processed = 0
+    errors: List[str] = []
+    
+    start_time = time.perf_counter()
     
+    try:
+        for batch, last_uid in _iter_subject_worker_batches(subject, resume_instance, path_filter, errors):
+            batches.append((batch, last_uid))
+            files_processed += len(batch)
     except Exception as e:
         errors.append(f"Error processing subject {subject.subject_key}: {e}")
     
@@ -237,6 +296,56 @@ def _process_subject_worker(
     )
 
 
+def _stream_subject_worker(
+    subject: SubjectFolder,
+    resume_instance: Optional[str],
+    path_filter: SubjectPathEntry | None,
+) -> int:
+    """Worker function that streams a subject's batches as they are produced.
+
+    Each batch is put on the shared bounded queue set up by _worker_init, so
+    a full queue blocks the worker (backpressure) instead of growing memory in
+    the parent. A final ``completed`` event is always sent, even on errors.
+
+    Returns:
+        Number of instances sent for the subject
+    """
+    stream_queue = _WORKER_STREAM_QUEUE
+    if stream_queue is None:
+        raise RuntimeError("Worker not initialized - stream queue not set")
+
+    files_processed = 0
+    errors: List[str] = []
+    blocked_time = 0.0
+
+    start_time = time.perf_counter()
+
+    try:
+        for batch, last_uid in _iter_subject_worker_batches(subject, resume_instance, path_filter, errors):
+            if _WORKER_STOP_EVENT is not None and _WORKER_STOP_EVENT.is_set():
+                errors.append(f"Subject {subject.subject_key} aborted: extraction stopped")
+                break
+            files_processed += len(batch)
+            put_start = time.perf_counter()
+            stream_queue.put(SubjectStreamEvent(subject_key=subject.subject_key, batch=batch, last_uid=last_uid))
+            blocked_time += time.perf_counter() - put_start
+    except Exception as e:
+        errors.append(f"Error processing subject {subject.subject_key}: {e}")
+
+    parse_time = time.perf_counter() - start_time - blocked_time
+
+    stream_queue.put(
+        SubjectStreamEvent(
+            subject_key=subject.subject_key,
+            completed=True,
+            files_processed=files_processed,
+            parse_time=parse_time,
+            errors=errors,
+        )
+    )
+    return files_processed
+
+
 def extract_subjects_parallel(
     subjects: List[SubjectFolder],
     config: ExtractionConfig,
@@ -293,3 +402,238 @@ def extract_subjects_parallel(
                     parse_time=0.0,
                     errors=[str(e)],
                 )
+
+
+def plan_work_units(subject: SubjectFolder, extension_mode: str, depth: int) -> List[SubjectFolder]:
+    """Split a subject into work units that can be parsed independently.
+
+    Each directory *depth* levels below the subject folder (1 = study
+    folders, 2 = series folders in a subject/study/series layout) becomes one
+    unit; files found above that depth form one more unit. A subject that
+    already carries a file list is split by grouping the files the same way.
+    Only the top *depth* levels are listed here, the units themselves are
+    walked by the workers.
+
+    Returns ``[subject]`` unchanged when splitting is disabled or would give
+    a single unit.
+    """
+    if depth <= 0:
+        return [subject]
+
+    if subject.files is not None:
+        groups: Dict[str, List[str]] = {}
+        for relative in subject.files:
+            parts = relative.split("/")
+            key = "/".join(parts[:depth]) if len(parts) > depth else ""
+            groups.setdefault(key, []).append(relative)
+        if len(groups) <= 1:
+            return [subject]
+        return [
+            SubjectFolder(subject.subject_key, subject.path, files=tuple(groups[key]), unit=key)
+            for key in sorted(groups)
+        ]
+
+    shallow_files: List[str] = []
+    level = [""]
+    for _ in range(depth):
+        next_level: List[str] = []
+        for relative_dir in level:
+            try:
+                with os.scandir(subject.path / relative_dir if relative_dir else subject.path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                relative = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                try:
+                    if entry.is_file():
+                        if _matches_extension(entry.name, extension_mode):
+                            shallow_files.append(relative)
+                    elif entry.is_dir():
+                        next_level.append(relative)
+                except FileNotFoundError:
+                    continue
+        level = next_level
+
+    units = [SubjectFolder(subject.subject_key, subject.path, unit=relative) for relative in level]
+    if shallow_files:
+        units.append(SubjectFolder(subject.subject_key, subject.path, files=tuple(shallow_files), unit=""))
+    if len(units) <= 1:
+        return [subject]
+    return units
+
+
+def extract_subjects_streaming(
+    subjects: List[SubjectFolder],
+    config: ExtractionConfig,
+    resolver: Optional[SubjectResolver],
+    max_workers: int = 4,
+    resume_tokens: Optional[Dict[str, str]] = None,
+    resume_paths: Optional[Dict[str, SubjectPathEntry]] = None,
+    max_pending_batches: int = 32,
+) -> Iterator[SubjectStreamEvent]:
+    """Extract DICOM metadata from subjects, streaming batches as they are parsed.
+
+    Unlike extract_subjects_parallel, workers do not accumulate a whole
+    subject before returning. Every batch travels through one bounded queue
+    shared by all workers, so at most *max_pending_batches* batches are held
+    between the workers and the consumer regardless of subject size.
+
+    Batches of one subject are yielded in production order, followed by a
+    single ``completed`` event for that subject. Batches of different
+    subjects may interleave. With ``config.work_unit_depth`` set, subjects
+    are split into work units (see plan_work_units) parsed by any idle
+    worker; batches of different units of a subject may then interleave too,
+    and the subject's ``completed`` event follows the last of its units.
+
+    Closing the generator early stops the workers and drains the queue so
+    the pool can shut down.
+
+    Args:
+        subjects: List of subject folders to process
+        config: Extraction configuration
+        resolver: Subject code resolver (optional)
+        max_workers: Number of worker processes
+        resume_tokens: Dict of subject_key -> last_processed_sop_uid
+        resume_paths: Dict of subject_key -> resume-by-path filter
+        max_pending_batches: Capacity of the shared worker -> parent queue
+
+    Yields:
+        SubjectStreamEvent for each batch and each completed subject
+    """
+    resume_tokens = resume_tokens or {}
+    unit_depth = config.work_unit_depth
+
+    logger.info(
+        f"Starting streaming extraction with {max_workers} worker processes "
+        f"(max_pending_batches={max_pending_batches}, work_unit_depth={unit_depth})"
+    )
+
+    ctx = multiprocessing.get_context()
+    stream_queue = ctx.Queue(maxsize=max(1, max_pending_batches))
+    stop_event = ctx.Event()
+    # Units whose worker raised before it could send its completed event
+    failed: deque = deque()
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=ctx,
+        initializer=_worker_init,
+        initargs=(config, resolver, config.batch_size, stream_queue, stop_event),
+    ) as executor:
+        futures: Dict[Future, SubjectFolder] = {}
+        # Units still running per subject; the subject completes at zero
+        pending_units: Dict[str, int] = {}
+        totals: Dict[str, SubjectStreamEvent] = {}
+        lock = threading.Lock()
+        planning_done = threading.Event()
+        planner_errors: List[BaseException] = []
+
+        def _on_done(future: Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                failed.append((futures[future], future.exception()))
+
+        def submit_units() -> None:
+            """Plan and submit work units; runs beside the consumer loop.
+
+            The executor hands units to whichever worker is idle, so a large
+            subject split into many units is spread over all workers instead
+            of holding up one of them.
+            """
+            try:
+                for subject in subjects:
+                    if stop_event.is_set():
+                        break
+                    try:
+                        units = plan_work_units(subject, config.extension_mode.value, unit_depth)
+                    except OSError as exc:
+                        logger.warning(f"Could not split subject {subject.subject_key}: {exc}")
+                        units = [subject]
+                    if len(units) > 1:
+                        logger.debug(f"Split subject {subject.subject_key} into {len(units)} work units")
+                    resume_instance = resume_tokens.get(subject.subject_key)
+                    subject_filter = resume_paths.get(subject.subject_key) if resume_paths else None
+                    with lock:
+                        pending_units[subject.subject_key] = len(units)
+                        totals[subject.subject_key] = SubjectStreamEvent(subject_key=subject.subject_key, completed=True)
+                        for unit in units:
+                            future = executor.submit(_stream_subject_worker, unit, resume_instance, subject_filter)
+                            futures[future] = unit
+                            future.add_done_callback(_on_done)
+            except BaseException as exc:
+                planner_errors.append(exc)
+            finally:
+                planning_done.set()
+
+        def is_pending(subject_key: str) -> bool:
+            with lock:
+                return subject_key in pending_units
+
+        def finish_unit(subject_key: str, files_processed: int, parse_time: float, errors: List[str]):
+            """Record a finished unit; return the subject's completed event once all units are done.
+
+            Units of subjects that are no longer pending are ignored. The check
+            and the decrement happen under the planner's lock.
+            """
+            with lock:
+                if subject_key not in pending_units:
+                    return None
+                total = totals[subject_key]
+                total.files_processed += files_processed
+                total.parse_time += parse_time
+                total.errors.extend(errors)
+                pending_units[subject_key] -= 1
+                if pending_units[subject_key] > 0:
+                    return None
+                del pending_units[subject_key]
+                del totals[subject_key]
+            for error in total.errors:
+                logger.warning(error)
+            return total
+
+        planner = threading.Thread(target=submit_units, name="extract-unit-planner", daemon=True)
+        planner.start()
+
+        try:
+            while True:
+                if planner_errors:
+                    raise planner_errors[0]
+                with lock:
+                    if planning_done.is_set() and not pending_units:
+                        break
+
+                while failed:
+                    unit, exc = failed.popleft()
+                    logger.error(f"Failed to process subject {unit.subject_key}: {exc}")
+                    completed = finish_unit(unit.subject_key, 0, 0.0, [str(exc)])
+                    if completed is not None:
+                        # Completed event so progress tracking works
+                        yield completed
+
+                try:
+                    event = stream_queue.get(timeout=_STREAM_POLL_SECONDS)
+                except queue_module.Empty:
+                    continue
+
+                if event.completed:
+                    completed = finish_unit(event.subject_key, event.files_processed, event.parse_time, event.errors)
+                    if completed is not None:
+                        yield completed
+                    continue
+                if is_pending(event.subject_key):
+                    yield event
+        finally:
+            with lock:
+                stopped_early = not planning_done.is_set() or bool(pending_units)
+            if stopped_early:
+                # Consumer stopped early: tell workers to abort, then drain so
+                # any worker blocked on a full queue can finish and exit.
+                stop_event.set()
+                planner.join()
+                for future in futures:
+                    future.cancel()
+                while not all(future.done() for future in futures):
+                    try:
+                        stream_queue.get(timeout=_STREAM_POLL_SECONDS)
+                    except queue_module.Empty:
+                        continue
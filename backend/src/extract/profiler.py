@@ -62,6 +62,7 @@ class ExtractionProfiler:
     _start_time: Optional[float] = None
     _end_time: Optional[float] = None
     _files_processed: int = 0
+    _counters: Dict[str, Dict[str, int]] = field(default_factory=dict)
     
     def start(self) -> None:
         """Mark the start of the extraction process."""
@@ -78,6 +79,13 @@ class ExtractionProfiler:
                 self._stats[operation] = OperationStats()
             self._stats[operation].record(duration)
     
+    def add_counters(self, group: str, values: Dict[str, int]) -> None:
+        """Add event counts (e.g. cache hits/misses) to a named counter group."""
+        with self._lock:
+            counters = self._counters.setdefault(group, {})
+            for name, value in values.items():
+                counters[name] = counters.get(name, 0) + value
+    
     def increment_files(self, count: int = 1) -> None:
         """Increment the count of files processed."""
         with self._lock:
@@ -110,6 +118,7 @@ class ExtractionProfiler:
             start = self._start_time
             end = self._end_time or time.perf_counter()
             files = self._files_processed
+            counters = {group: dict(values) for group, values in self._counters.items()}
         
         total_duration = (end - start) if start else 0.0
         
@@ -124,6 +133,9 @@ class ExtractionProfiler:
         for operation, op_stats in stats.items():
             summary["operations"][operation] = op_stats.to_dict()
         
+        if counters:
+            summary["counters"] = counters
+        
         # Calculate time breakdown percentages
         if total_duration > 0:
             breakdown = {}
@@ -6,7 +6,7 @@ import hashlib
 import logging
 import math
 from dataclasses import dataclass
-from typing import Dict, Iterable, Iterator, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 from sqlalchemy import select
 
@@ -146,37 +146,71 @@ def split_subject_relative(file_path: str) -> Tuple[str, str]:
     return subject_key, remainder
 
 
-def build_existing_path_index(
+def _cohort_paths_stmt(cohort_id: int):
+    return (
+        select(Instance.dicom_file_path)
+        .join(Series, Series.series_id == Instance.series_id)
+        .join(Study, Study.study_id == Series.study_id)
+        .join(Subject, Subject.subject_id == Study.subject_id)
+        .join(SubjectCohort, SubjectCohort.subject_id == Subject.subject_id)
+        .where(SubjectCohort.cohort_id == cohort_id)
+    )
+
+
+def iter_existing_paths(
     cohort_id: int,
     subject_keys: Optional[Iterable[str]] = None,
     *,
     chunk_size: int = 5000,
-) -> ExistingPathIndex:
-    """Load existing DICOM paths for the cohort into an index."""
+) -> Iterator[str]:
+    """Stream the stored DICOM paths of a cohort (optionally limited to *subject_keys*)."""
 
     key_filter = set(subject_keys) if subject_keys is not None else None
     session = SessionLocal()
-    index = ExistingPathIndex()
     try:
-        stmt = (
-            select(Instance.dicom_file_path)
-            .join(Series, Series.series_id == Instance.series_id)
-            .join(Study, Study.study_id == Series.study_id)
-            .join(Subject, Subject.subject_id == Study.subject_id)
-            .join(SubjectCohort, SubjectCohort.subject_id == Subject.subject_id)
-            .where(SubjectCohort.cohort_id == cohort_id)
+        stream = session.execute(
+            _cohort_paths_stmt(cohort_id).execution_options(stream_results=True, yield_per=chunk_size)
         )
-        stream = session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
-        loaded = 0
         for (raw_path,) in stream:
             if not raw_path:
                 continue
-            subject_key, remainder = split_subject_relative(raw_path)
-            if key_filter and subject_key not in key_filter:
+            if key_filter and split_subject_relative(raw_path)[0] not in key_filter:
                 continue
-            index.add(subject_key, remainder)
-            loaded += 1
-        logger.info("Loaded %d existing DICOM paths for cohort %s", loaded, cohort_id)
-        return index
+            yield raw_path
+    finally:
+        session.close()
+
+
+def cohort_has_instances(cohort_id: int) -> bool:
+    """Return True if any instance is stored for the cohort."""
+
+    session = SessionLocal()
+    try:
+        return session.execute(_cohort_paths_stmt(cohort_id).limit(1)).first() is not None
     finally:
         session.close()
+
+
+def build_existing_path_index(
+    cohort_id: int,
+    subject_keys: Optional[Iterable[str]] = None,
+    *,
+    chunk_size: int = 5000,
+    on_path: Optional[Callable[[str], None]] = None,
+) -> ExistingPathIndex:
+    """Load existing DICOM paths for the cohort into an index.
+
+    *on_path* is called with every loaded path, e.g. to seed a checkpoint
+    journal while the paths stream past.
+    """
+
+    index = ExistingPathIndex()
+    loaded = 0
+    for raw_path in iter_existing_paths(cohort_id, subject_keys, chunk_size=chunk_size):
+        subject_key, remainder = split_subject_relative(raw_path)
+        index.add(subject_key, remainder)
+        if on_path is not None:
+            on_path(raw_path)
+        loaded += 1
+    logger.info("Loaded %d existing DICOM paths for cohort %s", loaded, cohort_id)
+    return index
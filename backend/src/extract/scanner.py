@@ -4,13 +4,21 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from .discovery_snapshot import DiscoveryDelta
 
 
 @dataclass(frozen=True)
 class SubjectFolder:
     subject_key: str
     path: Path
+    # Subject-relative files to process; None means walk the whole folder
+    # (or the whole unit directory, see below)
+    files: Optional[Tuple[str, ...]] = None
+    # Subject-relative directory covered by this work unit ("" for files
+    # directly under the subject); None when the folder is one unit
+    unit: Optional[str] = None
 
 
 def discover_subjects(raw_root: Path) -> Iterable[SubjectFolder]:
@@ -18,3 +26,27 @@ def discover_subjects(raw_root: Path) -> Iterable[SubjectFolder]:
     for entry in sorted(raw_root.iterdir()):
         if entry.is_dir():
             yield SubjectFolder(subject_key=entry.name, path=entry)
+
+
+def subjects_from_delta(
+    raw_root: Path,
+    delta: DiscoveryDelta,
+    include: Callable[[str], bool],
+) -> List[SubjectFolder]:
+    """Group a discovery delta's new and changed files into subject folders.
+
+    Only subjects with at least one file accepted by *include* (called with
+    the file name) are returned, each restricted to those files. Files
+    directly under *raw_root* belong to no subject and are ignored.
+    """
+    raw_root = raw_root.resolve()
+    grouped: dict[str, list[str]] = {}
+    for rel_path in (*delta.new, *delta.changed):
+        subject_key, sep, inner = rel_path.partition("/")
+        if not sep or not include(inner.rsplit("/", 1)[-1]):
+            continue
+        grouped.setdefault(subject_key, []).append(inner)
+    return [
+        SubjectFolder(subject_key=key, path=raw_root / key, files=tuple(sorted(grouped[key])))
+        for key in sorted(grouped)
+    ]
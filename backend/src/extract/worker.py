@@ -15,7 +15,6 @@ import pydicom
 from .batching import BatchSizeController
 from .dicom_mappings import (
     CT_SERIES_FIELD_MAP,
-    EXTRACT_SPECIFIC_TAGS,
     INSTANCE_FIELD_MAP,
     MRI_SERIES_FIELD_MAP,
     PET_SERIES_FIELD_MAP,
@@ -23,8 +22,10 @@ from .dicom_mappings import (
     STUDY_FIELD_MAP,
     extract_fields,
 )
+from .prefix_reader import read_extraction_header
 from .profiler import get_global_profiler
 from .resume_index import SubjectPathEntry
+from .stack_utils import compute_stack_signature
 from .subject_mapping import SubjectResolver
 
 
@@ -83,6 +84,8 @@ class InstancePayload:
     patient_id: str | None
     patient_name: str | None
     subject_resolution_source: str
+    # Computed by the worker so the writer does not redo it for every lookup
+    stack_signature: tuple | None = None
 
 
 
@@ -124,6 +127,17 @@ def _iter_dicom_files(root: Path, extension_mode: str) -> Iterator[Path]:
                 futures.append(executor.submit(walk, dir_path))
 
 
+def _iter_subject_files(subject, extension_mode: str) -> Iterator[Path]:
+    """Yield the subject's files from its file list, or walk its folder or work unit."""
+    files = getattr(subject, "files", None)
+    if files is not None:
+        return (subject.path / relative for relative in files)
+    unit = getattr(subject, "unit", None)
+    if unit:
+        return _iter_dicom_files(subject.path / unit, extension_mode)
+    return _iter_dicom_files(subject.path, extension_mode)
+
+
 def _matches_extension(name: str, mode: str) -> bool:
     if mode == "dcm":
         return name.endswith(".dcm")
@@ -154,7 +168,7 @@ def plan_subject_series(
 ) -> List[SeriesPlan]:
     legacy_token = resume_tokens.get("__legacy__")
     plan: Dict[str, _SeriesPlanBuilder] = {}
-    file_iter = _iter_dicom_files(subject.path, extension_mode)
+    file_iter = _iter_subject_files(subject, extension_mode)
     profiler = get_global_profiler()
     
     for path in file_iter:
@@ -216,6 +230,7 @@ def extract_subject_batches(
     batch_controller: BatchSizeController | None = None,
     paths: Optional[Sequence[Path]] = None,
     path_filter: SubjectPathEntry | None = None,
+    prefix_bytes: Optional[int] = None,
 ) -> Iterable[Tuple[List[InstancePayload], str]]:
     batch: list[InstancePayload] = []
     last_uid: str | None = None
@@ -225,7 +240,7 @@ def extract_subject_batches(
     if paths is not None:
         file_iter = paths
     else:
-        file_iter = _iter_dicom_files(subject.path, extension_mode)
+        file_iter = _iter_subject_files(subject, extension_mode)
     
     for path in file_iter:
         relative_path = _relative_within_subject(path, subject)
@@ -233,15 +248,7 @@ def extract_subject_batches(
             logger.debug("Resume-by-path skipping %s/%s", subject.subject_key, relative_path)
             continue
         start_parse = time.perf_counter()
-        if use_specific_tags:
-            dataset = pydicom.dcmread(
-                path,
-                force=True,
-                stop_before_pixels=True,
-                specific_tags=EXTRACT_SPECIFIC_TAGS,
-            )
-        else:
-            dataset = pydicom.dcmread(path, force=True, stop_before_pixels=True)
+        dataset = read_extraction_header(path, use_specific_tags=use_specific_tags, prefix_bytes=prefix_bytes)
         parse_duration = time.perf_counter() - start_parse
         
         if profiler:
@@ -323,6 +330,7 @@ def extract_subject_batches(
             patient_id=patient_id,
             patient_name=patient_name,
             subject_resolution_source=subject_source,
+            stack_signature=compute_stack_signature(series_uid, instance_fields),
         )
         batch.append(payload)
         last_uid = sop_uid
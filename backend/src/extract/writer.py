@@ -6,12 +6,14 @@ import asyncio
 import logging
 import time
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import AbstractAsyncContextManager
 from typing import Awaitable, Callable, Optional
 
 from sqlalchemy import func, select, update
 from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.pool import StaticPool
 
 from metadata_db import bootstrap
 from metadata_db.schema import (
@@ -29,17 +31,21 @@ from metadata_db.schema import (
     SubjectOtherIdentifier,
 )
 
-from .stack_utils import compute_stack_signature, build_stack_row, signature_from_stack_record
+from .stack_utils import build_stack_row
 from .dicom_mappings import STACK_DEFINING_FIELDS
 from metadata_db.session import SessionLocal
 
 from .batching import BatchSizeController
+from .checkpoint_journal import CheckpointJournal
 from .config import DuplicatePolicy, ExtractionConfig
+from .copy_ingest import collect_columns, copy_insert_rows
 from .limits import build_parameter_chunk_plan, calculate_safe_instance_batch_rows
+from .parent_prefetch import ParentPrefetch, prefetch_parents, stack_record_signature, stack_signature
 from .resume_index import ExistingPathIndex, split_subject_relative
 from .profiler import get_global_profiler
 from .subject_mapping import subject_code_gen
 from .worker import InstancePayload, normalize_modality
+from .writer_cache import WriterCaches
 from jobs.control import JobControl
 
 
@@ -56,6 +62,9 @@ _MAX_RETRY_DELAY_SECONDS = 120.0  # Cap backoff at 2 minutes
 _RETRY_BACKOFF_MULTIPLIER = 2.0
 _MIN_SUB_BATCH_SIZE = 10  # Minimum sub-batch size during retries
 
+# Marks "no item held back" for pipelined writes (None is the queue's end sentinel)
+_NO_ITEM = object()
+
 
 class Writer(AbstractAsyncContextManager["Writer"]):
     def __init__(
@@ -68,6 +77,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
         batch_controller: BatchSizeController,
         control: Optional[JobControl] = None,
         path_index: Optional[ExistingPathIndex] = None,
+        journal: Optional[CheckpointJournal] = None,
     ) -> None:
         self.config = config
         self.queue = queue
@@ -76,21 +86,30 @@ class Writer(AbstractAsyncContextManager["Writer"]):
         self._batch_controller = batch_controller
         self._control = control
         self._path_index = path_index
+        self._journal = journal
         self._session = None
         self._cohort_id: Optional[int] = None
         self._normalized_cohort_name = (config.cohort_name or "").strip().lower()
-        self._subject_cache: dict[tuple[str, str], int] = {}
-        self._study_cache: dict[str, int] = {}
-        self._series_cache: dict[str, int] = {}
+        # Bounded LRU caches; entries of finished subjects are evicted first
+        self._caches = WriterCaches(config.writer_cache_max_entries)
+        self._subject_cache = self._caches["subjects"]  # (patient_id, cohort) -> subject_id
+        self._study_cache = self._caches["studies"]  # study_instance_uid -> study_id
+        self._series_cache = self._caches["series"]  # series_instance_uid -> series_id
         # Stack caches: keyed by series_instance_uid for stable lookups
-        self._stack_cache: dict[tuple, int] = {}  # signature -> series_stack_id
-        self._series_stack_counter: dict[str, int] = {}  # series_instance_uid -> next stack_index
-        self._subject_identifier_cache: set[int] = set()
-        # Memory management: periodic cache pruning for long-running extractions
+        self._stack_cache = self._caches["stacks"]  # signature -> series_stack_id
+        self._series_stack_counter = self._caches["stack_counters"]  # series_instance_uid -> next stack_index
+        self._subject_identifier_cache = self._caches["subject_identifiers"]  # subject_ids with identifier ensured
         self._subjects_completed = 0
-        self._PRUNE_INTERVAL_SUBJECTS = 100  # Prune caches and update metrics every N subjects
+        self._METRICS_INTERVAL_SUBJECTS = 100  # Save job metrics every N subjects
         self._modality_fallback_logged: set[str] = set()
         self._subject_id_type_id = config.subject_id_type_id
+        # Resolved in __aenter__ once the database dialect is known
+        self._copy_ingest = False
+        # Pipelined writes: second session for parent lookups, used by one thread
+        self._prefetch_session = None
+        self._prefetch_executor: Optional[ThreadPoolExecutor] = None
+        # SOP UIDs of the last batch that was written and committed
+        self._committed_sops: set[str] = set()
         bootstrap()
         self._reported_safe_batch_rows = calculate_safe_instance_batch_rows()
         self._subjects_inserted = 0
@@ -101,6 +120,22 @@ class Writer(AbstractAsyncContextManager["Writer"]):
 
     async def __aenter__(self) -> "Writer":
         self._session = SessionLocal()
+        bind = self._session.get_bind()
+        dialect_name = bind.dialect.name if bind is not None else ""
+        self._copy_ingest = self.config.use_copy_ingest and dialect_name == "postgresql"
+        if self.config.use_copy_ingest and not self._copy_ingest:
+            logger.info(
+                "COPY ingest requested but database dialect is %s; using multi-row INSERT job_id=%s",
+                dialect_name or "unknown",
+                self.job_id,
+            )
+        if self.config.pipelined_writes:
+            if bind is not None and isinstance(bind.pool, StaticPool):
+                # A single shared connection cannot serve a second concurrent session
+                logger.info("Pipelined writes need a connection pool; writing sequentially job_id=%s", self.job_id)
+            else:
+                self._prefetch_session = SessionLocal()
+                self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer-prefetch")
         self._cohort_id = self._ensure_cohort(self._session)
         # Commit the cohort creation/lookup to release any row locks
         # This allows multiple writers to initialize concurrently
@@ -112,35 +147,61 @@ class Writer(AbstractAsyncContextManager["Writer"]):
             if exc:
                 self._session.rollback()
             self._session.close()
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=True)
+            self._prefetch_executor = None
+        if self._prefetch_session is not None:
+            self._prefetch_session.close()
+            self._prefetch_session = None
+        profiler = get_global_profiler()
+        if profiler:
+            for name, stats in self._caches.stats().items():
+                profiler.add_counters(f"writer_cache.{name}", stats)
+        if self._journal is not None:
+            self._journal.close()
 
     async def consume(self, total_subjects: int) -> None:
         assert self._session is not None
         session = self._session
         profiler = get_global_profiler()
+        # Pipelined writes: next item taken off the queue early and the pending
+        # lookup of its parents, as (future, SOP UIDs of the batch written meanwhile)
+        lookahead = _NO_ITEM
+        prefetch: Optional[tuple[Future, set[str]]] = None
         
         while True:
             await self._checkpoint()
-            queue_start = time.perf_counter()
-            try:
-                item = await asyncio.wait_for(self.queue.get(), timeout=_CONTROL_POLL_SECONDS)
-                if profiler:
-                    profiler.record("queue_get", time.perf_counter() - queue_start)
-            except asyncio.TimeoutError:
-                continue
+            if lookahead is not _NO_ITEM:
+                item, lookahead = lookahead, _NO_ITEM
+            else:
+                queue_start = time.perf_counter()
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=_CONTROL_POLL_SECONDS)
+                    if profiler:
+                        profiler.record("queue_get", time.perf_counter() - queue_start)
+                except asyncio.TimeoutError:
+                    continue
             if item is None:
                 break
             subject_key, series_uid, batch, last_instance, completed = item
             if batch:
                 await self._checkpoint()
+                existing_sops = await self._apply_prefetch(batch, prefetch) if prefetch else None
+                lookahead, prefetch = self._start_prefetch(batch)
+                self._committed_sops = set()
                 start = time.perf_counter()
                 # Use retry wrapper to handle transient errors (OOM, timeouts)
-                await self._write_batch_with_retry(session, batch)
-                self._update_path_index(batch)
+                written = await self._write_batch_with_retry(session, batch, existing_sops)
+                if written:
+                    self._update_path_index(batch)
                 write_duration = time.perf_counter() - start
                 
                 commit_start = time.perf_counter()
                 session.commit()
                 commit_duration = time.perf_counter() - commit_start
+                if written:
+                    self._committed_sops = {payload.sop_uid for payload in batch}
+                    self._journal_batch(batch)
                 
                 total_duration = time.perf_counter() - start
                 self._batch_controller.record(len(batch), total_duration)
@@ -154,23 +215,97 @@ class Writer(AbstractAsyncContextManager["Writer"]):
                 session.commit()
                 if profiler:
                     profiler.record("db_commit_final", time.perf_counter() - commit_start)
-                self._prune_caches_if_needed()
+                self._on_subject_completed(subject_key)
 
-    def _prune_caches_if_needed(self) -> None:
-        """Prune lookup caches periodically to prevent unbounded memory growth.
-        
-        Called after each subject completion. Pruning is subject-based (not batch
-        or entry-count based) to maintain cache efficiency during subject processing.
+    def _start_prefetch(self, batch: list[InstancePayload]):
+        """Take the next queued item and look up its parents while *batch* is written.
+
+        Only items that are already waiting are taken, so pipelining kicks in
+        exactly when the writer is the bottleneck. Returns (lookahead, prefetch).
+        """
+        if self._prefetch_executor is None:
+            return _NO_ITEM, None
+        try:
+            item = self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return _NO_ITEM, None
+        if item is None or not item[2]:
+            return item, None
+        future = self._prefetch_executor.submit(
+            prefetch_parents,
+            self._prefetch_session,
+            item[2],
+            cohort_name=self._normalized_cohort_name,
+            subject_id_type_id=self._subject_id_type_id,
+        )
+        return item, (future, {payload.sop_uid for payload in batch})
+
+    async def _apply_prefetch(
+        self,
+        batch: list[InstancePayload],
+        prefetch: tuple[Future, set[str]],
+    ) -> Optional[set[str]]:
+        """Merge the looked-up parent IDs into the caches and return the batch's existing SOPs.
+
+        Entries that disagree with what the caches already hold are dropped,
+        together with the studies, series and stacks below them; those are
+        resolved by the regular lookups in _write_batch.
+
+        If the batch written meanwhile was not committed, the result is thrown
+        away and None is returned, so _write_batch queries existing SOPs again
+        instead of skipping SOPs that never reached the database.
+        """
+        future, inflight_sops = prefetch
+        self._caches.current_subject = batch[0].subject_key
+        wait_start = time.perf_counter()
+        result: ParentPrefetch = await asyncio.wrap_future(future)
+        profiler = get_global_profiler()
+        if profiler:
+            profiler.record("parent_prefetch_wait", time.perf_counter() - wait_start)
+            profiler.record("parent_prefetch", result.elapsed)
+        if not inflight_sops <= self._committed_sops:
+            logger.debug("Discarding parent prefetch: the batch written meanwhile was not committed")
+            return None
+
+        subjects = {
+            subject_id
+            for patient_id, subject_id in result.subjects.items()
+            if self._subject_cache.setdefault((patient_id, self._normalized_cohort_name), subject_id) == subject_id
+        }
+        studies = {
+            study_id
+            for uid, (study_id, subject_id) in result.studies.items()
+            if subject_id in subjects and self._study_cache.setdefault(uid, study_id) == study_id
+        }
+        series = {
+            series_id
+            for uid, (series_id, study_id) in result.series.items()
+            if study_id in studies and self._series_cache.setdefault(uid, series_id) == series_id
+        }
+        for signature, (stack_id, series_id) in result.stacks.items():
+            if series_id in series:
+                self._stack_cache.setdefault(signature, stack_id)
+        for series_uid, next_index in result.stack_counters.items():
+            if next_index > self._series_stack_counter.get(series_uid, 0):
+                self._series_stack_counter[series_uid] = next_index
+
+        # The lookup could not see SOPs of the batch that was being written
+        return result.existing_sops | {payload.sop_uid for payload in batch if payload.sop_uid in inflight_sops}
+
+    def _on_subject_completed(self, subject_key: str) -> None:
+        """Retire a finished subject's cache entries and periodically save job metrics.
         
-        For long-running extractions (days, millions of files), caches can grow to
-        several GB. This method caps memory usage by clearing caches periodically,
-        accepting the trade-off of occasional cache misses requiring DB lookups.
+        Routing never sends a finished subject back to this writer, so its
+        entries become the first candidates for eviction once a cache is full.
+        Nothing is cleared outright: memory stays capped by the LRU bounds
+        without a burst of cache-miss queries after every prune.
         
-        Also saves current metrics to the job record, so frontend polling gets
+        Saving current metrics to the job record lets frontend polling get
         accurate counts without running expensive COUNT(*) queries on the metadata DB.
         """
+        self._caches.finish_subject(subject_key)
         self._subjects_completed += 1
-        if self._subjects_completed < self._PRUNE_INTERVAL_SUBJECTS:
+        if self._subjects_completed < self._METRICS_INTERVAL_SUBJECTS:
             return
         
         # Save metrics to job record - eliminates need for COUNT(*) queries during polling
@@ -185,23 +320,11 @@ class Writer(AbstractAsyncContextManager["Writer"]):
                 logger.warning("Failed to update job metrics: %s", exc)
         
         logger.info(
-            "Pruning caches after %d subjects: stacks=%d, series=%d, studies=%d, subjects=%d, counters=%d",
+            "Writer caches after %d subjects: %s",
             self._subjects_completed,
-            len(self._stack_cache),
-            len(self._series_cache),
-            len(self._study_cache),
-            len(self._subject_cache),
-            len(self._series_stack_counter),
+            ", ".join(f"{name}={size}" for name, size in self._caches.sizes().items()),
         )
         
-        # Clear all lookup caches - they will be rebuilt from DB on cache miss
-        self._subject_cache.clear()
-        self._study_cache.clear()
-        self._series_cache.clear()
-        self._stack_cache.clear()
-        self._series_stack_counter.clear()
-        self._subject_identifier_cache.clear()
-        
         self._subjects_completed = 0
 
     def _invalidate_caches_for_batch(self, batch: list[InstancePayload]) -> None:
@@ -222,11 +345,10 @@ class Writer(AbstractAsyncContextManager["Writer"]):
             self._study_cache.pop(payload.study_uid, None)
             
             # Clear stack cache entry
-            sig = compute_stack_signature(payload.series_uid, payload.instance_fields)
-            self._stack_cache.pop(sig, None)
+            self._stack_cache.pop(stack_signature(payload), None)
             
             # Clear subject cache entry
-            subject_key = (payload.patient_id, self._cohort_name)
+            subject_key = (payload.patient_id, self._normalized_cohort_name)
             self._subject_cache.pop(subject_key, None)
         
         logger.debug(
@@ -235,7 +357,12 @@ class Writer(AbstractAsyncContextManager["Writer"]):
             self.job_id,
         )
 
-    async def _write_batch_with_retry(self, session, batch: list[InstancePayload]) -> bool:
+    async def _write_batch_with_retry(
+        self,
+        session,
+        batch: list[InstancePayload],
+        existing_sops: Optional[set[str]] = None,
+    ) -> bool:
         """Write a batch with retry logic and adaptive batch size reduction.
         
         When transient errors occur (e.g., PostgreSQL OOM due to system memory pressure),
@@ -249,7 +376,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
         """
         # Try writing the full batch first
         try:
-            self._write_batch(session, batch)
+            self._write_batch(session, batch, existing_sops)
             return True
         except OperationalError as exc:
             # Check if it's a transient error worth retrying
@@ -386,7 +513,12 @@ class Writer(AbstractAsyncContextManager["Writer"]):
         )
         return True
 
-    def _write_batch(self, session, batch: list[InstancePayload]) -> None:
+    def _write_batch(
+        self,
+        session,
+        batch: list[InstancePayload],
+        existing_sops: Optional[set[str]] = None,
+    ) -> None:
         """Write a batch of instances using parents-first pattern for efficiency.
         
         This method uses a parents-first insertion pattern within a single transaction:
@@ -401,12 +533,18 @@ class Writer(AbstractAsyncContextManager["Writer"]):
         
         This is safe for single-writer mode (db_writer_pool_size=1) which is the
         recommended configuration for large extractions.
+        
+        *existing_sops* comes from a pipelined prefetch; when given, the
+        existing-SOP query is skipped.
         """
         if not batch:
             return
+        # Cache entries created or used from here on belong to this subject
+        self._caches.current_subject = batch[0].subject_key
         
         # Step 1: Pre-filter to only new SOPs (no INSERT yet)
-        existing_sops = self._get_existing_sops(session, batch)
+        if existing_sops is None:
+            existing_sops = self._get_existing_sops(session, batch)
         new_batch = [p for p in batch if p.sop_uid not in existing_sops]
         
         if not new_batch:
@@ -436,6 +574,16 @@ class Writer(AbstractAsyncContextManager["Writer"]):
             if subject_key:
                 self._path_index.add(subject_key, subject_relative)
 
+    def _journal_batch(self, batch: list[InstancePayload]) -> None:
+        # Only after the commit: the journal may miss batches, never claim uncommitted ones
+        if self._journal is None:
+            return
+        start = time.perf_counter()
+        self._journal.append_paths(payload.file_path for payload in batch)
+        profiler = get_global_profiler()
+        if profiler:
+            profiler.record("journal_append", time.perf_counter() - start)
+
     def _ensure_cohort(self, session) -> int:
         desired_path = str(self.config.raw_root)
         # Use case-insensitive lookup to match existing cohorts regardless of stored case
@@ -698,16 +846,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
                 values = {"study_instance_uid": uid, "subject_id": entry["subject_id"]}
                 values.update(entry["payload"].study_fields)
                 rows.append(values)
-            inserted = (
-                session.execute(
-                    insert(Study)
-                    .values(rows)
-                    .on_conflict_do_nothing()
-                    .returning(Study.study_instance_uid, Study.study_id)
-                )
-                .mappings()
-                .all()
-            )
+            inserted = self._insert_returning(session, Study, rows, (Study.study_instance_uid, Study.study_id))
             self._studies_inserted += len(inserted)
             inserted_map = {row["study_instance_uid"]: row["study_id"] for row in inserted}
             remaining = [uid for uid in pending.keys() if uid not in inserted_map]
@@ -799,16 +938,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
                         continue
                     values[key] = value
                 rows.append(values)
-            inserted = (
-                session.execute(
-                    insert(Series)
-                    .values(rows)
-                    .on_conflict_do_nothing()
-                    .returning(Series.series_instance_uid, Series.series_id)
-                )
-                .mappings()
-                .all()
-            )
+            inserted = self._insert_returning(session, Series, rows, (Series.series_instance_uid, Series.series_id))
             self._series_inserted += len(inserted)
             inserted_map = {row["series_instance_uid"]: row["series_id"] for row in inserted}
             remaining = [uid for uid in pending.keys() if uid not in inserted_map]
@@ -842,6 +972,22 @@ class Writer(AbstractAsyncContextManager["Writer"]):
 
         return series_ids
 
+    def _insert_returning(self, session, model, rows: list[dict], returning: tuple) -> list:
+        """Insert parent rows with ON CONFLICT DO NOTHING and return the inserted keys.
+
+        Uses the staged COPY path when enabled, otherwise a multi-row INSERT.
+        Both return mapping-like rows keyed by the *returning* column names.
+        """
+        if self._copy_ingest:
+            names = [column.key for column in returning]
+            fetched = copy_insert_rows(session, model.__tablename__, rows, returning=names)
+            return [dict(zip(names, row)) for row in fetched]
+        return (
+            session.execute(insert(model).values(rows).on_conflict_do_nothing().returning(*returning))
+            .mappings()
+            .all()
+        )
+
     def _resolve_series_modality(self, payload: InstancePayload) -> str:
         normalized = normalize_modality(payload.modality) or normalize_modality(payload.series_fields.get("modality"))
         if normalized:
@@ -879,7 +1025,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
         
         # 1. Check cache first
         for idx, (payload, series_id) in enumerate(zip(batch, series_ids)):
-            sig = compute_stack_signature(payload.series_uid, payload.instance_fields)
+            sig = stack_signature(payload)
             
             cached = self._stack_cache.get(sig)
             if cached:
@@ -907,30 +1053,16 @@ class Writer(AbstractAsyncContextManager["Writer"]):
             
             for existing, series_uid in session.execute(stmt):
                 # Reconstruct signature from DB record using series_uid from JOIN
-                db_sig = signature_from_stack_record(
-                    series_uid,
-                    existing.stack_echo_time,
-                    existing.stack_inversion_time,
-                    existing.stack_echo_numbers,
-                    existing.stack_echo_train_length,
-                    existing.stack_repetition_time,
-                    existing.stack_flip_angle,
-                    existing.stack_receive_coil_name,
-                    existing.stack_xray_exposure,
-                    existing.stack_kvp,
-                    existing.stack_tube_current,
-                    existing.stack_pet_bed_index,
-                    existing.stack_pet_frame_type,
-                    existing.stack_image_orientation,
-                    existing.stack_image_type,
-                )
+                db_sig = stack_record_signature(existing, series_uid)
+                
+                # Keep the counter past every stored stack, also when the
+                # counter was evicted from the cache
+                current_max = self._series_stack_counter.get(series_uid, 0)
+                if existing.stack_index >= current_max:
+                    self._series_stack_counter[series_uid] = existing.stack_index + 1
                 
                 if db_sig in pending:
                     self._stack_cache[db_sig] = existing.series_stack_id
-                    # Also update the counter if we found a higher index
-                    current_max = self._series_stack_counter.get(series_uid, 0)
-                    if existing.stack_index >= current_max:
-                        self._series_stack_counter[series_uid] = existing.stack_index + 1
                     
                     for idx in pending[db_sig]["indices"]:
                         stack_ids[idx] = existing.series_stack_id
@@ -960,15 +1092,11 @@ class Writer(AbstractAsyncContextManager["Writer"]):
                 sig_to_stack_key[sig] = (series_id, stack_index)
             
             # Insert with ON CONFLICT DO NOTHING, return IDs
-            inserted = (
-                session.execute(
-                    insert(SeriesStack)
-                    .values(rows)
-                    .on_conflict_do_nothing()
-                    .returning(SeriesStack.series_stack_id, SeriesStack.series_id, SeriesStack.stack_index)
-                )
-                .mappings()
-                .all()
+            inserted = self._insert_returning(
+                session,
+                SeriesStack,
+                rows,
+                (SeriesStack.series_stack_id, SeriesStack.series_id, SeriesStack.stack_index),
             )
             self._stacks_inserted += len(inserted)
             
@@ -998,23 +1126,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
                 )
                 
                 for existing, series_uid in session.execute(stmt):
-                    db_sig = signature_from_stack_record(
-                        series_uid,
-                        existing.stack_echo_time,
-                        existing.stack_inversion_time,
-                        existing.stack_echo_numbers,
-                        existing.stack_echo_train_length,
-                        existing.stack_repetition_time,
-                        existing.stack_flip_angle,
-                        existing.stack_receive_coil_name,
-                        existing.stack_xray_exposure,
-                        existing.stack_kvp,
-                        existing.stack_tube_current,
-                        existing.stack_pet_bed_index,
-                        existing.stack_pet_frame_type,
-                        existing.stack_image_orientation,
-                        existing.stack_image_type,
-                    )
+                    db_sig = stack_record_signature(existing, series_uid)
                     
                     if db_sig in pending and db_sig not in self._stack_cache:
                         self._stack_cache[db_sig] = existing.series_stack_id
@@ -1118,6 +1230,21 @@ class Writer(AbstractAsyncContextManager["Writer"]):
                     values[key] = value
             rows.append(values)
 
+        if self._copy_ingest:
+            # Single COPY + INSERT ... SELECT: no parameter budget, no chunking
+            update_columns = None
+            if self.config.duplicate_policy == DuplicatePolicy.OVERWRITE:
+                update_columns = collect_columns(rows)
+            copy_insert_rows(
+                session,
+                Instance.__tablename__,
+                rows,
+                conflict_columns=["sop_instance_uid"],
+                update_columns=update_columns,
+            )
+            self._instances_inserted += len(batch)
+            return
+
         chunks, params_per_row, chunk_limit = build_parameter_chunk_plan(rows)
         
         if len(chunks) > 1:
@@ -1297,7 +1424,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
         )
         session.execute(stmt)
 
-    def snapshot_metrics(self) -> dict[str, int]:
+    def snapshot_metrics(self) -> dict:
         return {
             "subjects": self._subjects_inserted,
             "studies": self._studies_inserted,
@@ -1305,6 +1432,7 @@ class Writer(AbstractAsyncContextManager["Writer"]):
             "stacks": self._stacks_inserted,
             "instances": self._instances_inserted,
             "safe_batch_rows": self._reported_safe_batch_rows,
+            "caches": self._caches.stats(),
         }
 
     async def _checkpoint(self) -> None:
@@ -0,0 +1,155 @@
+"""Bounded ID caches for the extraction writer.
+
+The writer caches the database IDs of subjects, studies, series and stacks it
+has resolved. Each cache is an LRU capped at a fixed number of entries. Every
+entry remembers the subject (folder) whose batch last used it. Subject
+routing sends all of a subject's batches to the same writer and never sends
+a finished subject again, so entries owned by finished subjects are evicted
+first, oldest subject first; only when none are left does the cache fall back
+to plain LRU eviction. A miss only costs a lookup query, never correctness.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class SubjectScopedLRU:
+    """Size-bounded LRU mapping whose entries are owned by subjects."""
+
+    def __init__(self, name: str, max_entries: int, group: "WriterCaches") -> None:
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self._group = group
+        self._data: "OrderedDict[Hashable, tuple[Any, Optional[str]]]" = OrderedDict()
+        self._by_owner: Dict[Optional[str], set] = {}
+        self._finished: deque = deque()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.finished_evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (counting a hit) or *default* (counting a miss)."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        value, owner = entry
+        if owner != self._group.current_subject:
+            self._set_owner(key, value, owner)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            self._data.move_to_end(key)
+            self._set_owner(key, value, entry[1])
+            return
+        owner = self._group.current_subject
+        self._data[key] = (value, owner)
+        self._by_owner.setdefault(owner, set()).add(key)
+        if len(self._data) > self.max_entries:
+            self._evict()
+
+    def add(self, key: Hashable) -> None:
+        """Set-style insert for caches that only record membership."""
+        self[key] = True
+
+    def setdefault(self, key: Hashable, value: Any) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            return entry[0]
+        self[key] = value
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        self._discard_owner(key, entry[1])
+        return entry[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._by_owner.clear()
+        self._finished.clear()
+
+    def finish_subject(self, subject_key: str) -> None:
+        if subject_key in self._by_owner:
+            self._finished.append(subject_key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "finished_evictions": self.finished_evictions,
+        }
+
+    def _set_owner(self, key: Hashable, value: Any, old_owner: Optional[str]) -> None:
+        owner = self._group.current_subject
+        self._data[key] = (value, owner)
+        if owner != old_owner:
+            self._discard_owner(key, old_owner)
+            self._by_owner.setdefault(owner, set()).add(key)
+
+    def _discard_owner(self, key: Hashable, owner: Optional[str]) -> None:
+        keys = self._by_owner.get(owner)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_owner[owner]
+
+    def _evict(self) -> None:
+        # Whole finished subjects first: their entries cannot be asked for again
+        while self._finished and len(self._data) > self.max_entries:
+            keys = self._by_owner.pop(self._finished.popleft(), ())
+            for key in keys:
+                del self._data[key]
+            self.evictions += len(keys)
+            self.finished_evictions += len(keys)
+        while len(self._data) > self.max_entries:
+            key, (_, owner) = self._data.popitem(last=False)
+            self._discard_owner(key, owner)
+            self.evictions += 1
+
+
+class WriterCaches:
+    """The writer's ID caches, sharing one notion of the subject being written."""
+
+    NAMES = ("subjects", "subject_identifiers", "studies", "series", "stacks", "stack_counters")
+
+    def __init__(self, max_entries: int) -> None:
+        self.current_subject: Optional[str] = None
+        self._caches = {name: SubjectScopedLRU(name, max_entries, self) for name in self.NAMES}
+
+    def __getitem__(self, name: str) -> SubjectScopedLRU:
+        return self._caches[name]
+
+    def finish_subject(self, subject_key: str) -> None:
+        """Mark a subject as done so its entries are evicted before any others."""
+        for cache in self._caches.values():
+            cache.finish_subject(subject_key)
+        if self.current_subject == subject_key:
+            self.current_subject = None
+
+    def sizes(self) -> Dict[str, int]:
+        return {name: len(cache) for name, cache in self._caches.items()}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: cache.stats() for name, cache in self._caches.items()}
@@ -11,6 +11,7 @@ import logging
 from typing import Dict, List, Optional
 
 from .batching import BatchSizeController
+from .checkpoint_journal import CheckpointJournal
 from .config import ExtractionConfig
 from .resume_index import ExistingPathIndex
 from .writer import Writer, ProgressCallback
@@ -37,6 +38,7 @@ class WriterPool:
         batch_controller: BatchSizeController,
         control: Optional[JobControl] = None,
         path_index: Optional[ExistingPathIndex] = None,
+        journal: Optional[CheckpointJournal] = None,
     ):
         self.config = config
         self.num_writers = num_writers
@@ -45,6 +47,7 @@ class WriterPool:
         self.batch_controller = batch_controller
         self.control = control
         self.path_index = path_index
+        self.journal = journal
         
         # Create queues and writers
         self.queues: List[asyncio.Queue] = []
@@ -72,6 +75,7 @@ class WriterPool:
                 batch_controller=self.batch_controller,
                 control=self.control,
                 path_index=self.path_index,
+                journal=self.journal,
             )
             self.writers.append(writer)
             
@@ -156,18 +160,25 @@ class WriterPool:
             "instances": 0,
         }
         safe_batch_limit: int | None = None
+        caches: dict[str, dict[str, int]] = {}
         
         for writer in self.writers:
             metrics = writer.snapshot_metrics()
             for key in aggregated:
                 if key in metrics:
                     aggregated[key] += metrics[key]
+            for name, stats in metrics.get("caches", {}).items():
+                totals = caches.setdefault(name, {})
+                for stat, value in stats.items():
+                    totals[stat] = totals.get(stat, 0) + value
             safe_value = metrics.get("safe_batch_rows")
             if safe_value is not None:
                 safe_batch_limit = safe_value if safe_batch_limit is None else min(safe_batch_limit, safe_value)
 
         if safe_batch_limit is not None:
             aggregated["safe_batch_rows"] = safe_batch_limit
+        if caches:
+            aggregated["caches"] = caches
         
         logger.info(
             f"Aggregated metrics: {aggregated['subjects']} subjects, "
@@ -240,6 +240,30 @@ def _run_performance_indexes_migration(connection) -> None:
         raise
 
 
+def _needs_incremental_sort_hashes_migration(connection) -> bool:
+    """Check if the incremental sorting hash columns need to be added."""
+    from .migrations.add_incremental_sort_hashes import _needs_migration
+    return _needs_migration(connection)
+
+
+def _run_incremental_sort_hashes_migration(connection) -> None:
+    """Run the migration adding the incremental sorting hash columns."""
+    from .migrations.add_incremental_sort_hashes import migrate
+
+    logger.info("Detected missing incremental sorting hash columns - running automatic migration...")
+    try:
+        results = migrate(engine, dry_run=False)
+        if results["success"]:
+            logger.info(
+                "Incremental sort hash migration completed: %s (%.1fs)",
+                ", ".join(results["changes_made"]),
+                results["elapsed_seconds"],
+            )
+    except Exception as exc:
+        logger.error("Incremental sort hash migration failed: %s", exc)
+        raise
+
+
 SCHEMA_VERSION = "1.2.0"
 SCHEMA_SQL_PATH = Path(__file__).resolve().parents[3] / "resource" / "sql" / "metadata_schema.sql"
 
@@ -515,6 +539,11 @@ def _apply_schema_upgrades() -> None:
         if _needs_performance_indexes_migration(connection):
             _run_performance_indexes_migration(connection)
 
+    # Add fingerprint hash / rules version columns for incremental sorting
+    with engine.connect() as connection:
+        if _needs_incremental_sort_hashes_migration(connection):
+            _run_incremental_sort_hashes_migration(connection)
+
 
 def ensure_schema() -> str:
     _drop_deprecated_tables()
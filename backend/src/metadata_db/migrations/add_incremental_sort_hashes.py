@@ -0,0 +1,104 @@
+"""
+Migration to add the incremental sorting hashes.
+
+Adds:
+- stack_fingerprint.source_hash: hash of the source row the fingerprint was
+  built from (Step 2)
+- stack_fingerprint.fingerprint_hash: content hash of the fingerprint row (Step 2)
+- series_classification_cache.fingerprint_hash: fingerprint hash the row was
+  classified from (Step 3)
+- series_classification_cache.rules_version: detection rules version the row
+  was classified with (Step 3)
+
+Rows written before this migration have NULL hashes, so an incremental sort
+treats them as dirty once and fills the hashes in.
+
+Usage:
+    Runs automatically on server startup via lifecycle.py
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# (table, column, SQL type)
+COLUMNS = [
+    ("stack_fingerprint", "source_hash", "VARCHAR(40)"),
+    ("stack_fingerprint", "fingerprint_hash", "VARCHAR(40)"),
+    ("series_classification_cache", "fingerprint_hash", "VARCHAR(40)"),
+    ("series_classification_cache", "rules_version", "VARCHAR(64)"),
+]
+
+
+def _missing_columns(conn: Connection) -> list[tuple[str, str, str]]:
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table, column, sql_type in COLUMNS:
+        if table not in tables:
+            # Table doesn't exist yet, will be created with correct schema
+            continue
+        if column not in {col["name"] for col in inspector.get_columns(table)}:
+            missing.append((table, column, sql_type))
+    return missing
+
+
+def _needs_migration(conn: Connection) -> bool:
+    """Check if the migration needs to be applied."""
+    return bool(_missing_columns(conn))
+
+
+def migrate(engine: Engine, dry_run: bool = False) -> dict:
+    """
+    Add the fingerprint hash and rules version columns.
+
+    Args:
+        engine: SQLAlchemy engine for metadata database
+        dry_run: If True, only check if migration is needed without applying
+
+    Returns:
+        Dict with migration results:
+        {
+            "success": bool,
+            "changes_made": list[str],
+            "elapsed_seconds": float
+        }
+    """
+    results = {
+        "success": False,
+        "changes_made": [],
+        "elapsed_seconds": 0.0
+    }
+
+    start_time = time.time()
+
+    with engine.begin() as conn:
+        missing = _missing_columns(conn)
+        if not missing:
+            logger.info("Incremental sort hash migration not needed (already applied)")
+            results["success"] = True
+            results["elapsed_seconds"] = time.time() - start_time
+            return results
+
+        if dry_run:
+            logger.info("DRY RUN: Would add %s", ", ".join(f"{t}.{c}" for t, c, _ in missing))
+            results["success"] = True
+            results["elapsed_seconds"] = time.time() - start_time
+            return results
+
+        for table, column, sql_type in missing:
+            logger.info("Adding column: %s.%s %s", table, column, sql_type)
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+            results["changes_made"].append(f"Added {table}.{column}")
+
+        logger.info("Incremental sort hash migration completed successfully")
+        results["success"] = True
+        results["elapsed_seconds"] = time.time() - start_time
+
+    return results
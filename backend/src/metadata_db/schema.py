@@ -774,6 +774,11 @@ class StackFingerprint(Base):
     # Number of slices in the stack - comes from series_stack table
     stack_n_instances: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # SHA-1 of the Step 2 source row and normalization version, set by Step 2
+    source_hash: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    # SHA-1 of the fingerprint content (all columns above), set by Step 2
+    fingerprint_hash: Mapped[str | None] = mapped_column(String(40), nullable=True)
+
     created_at: Mapped[str] = mapped_column(
         Text,
         nullable=False,
@@ -822,6 +827,33 @@ class SeriesClassificationCache(Base):
     subject_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     manual_review_required: Mapped[int | None] = mapped_column(Integer, nullable=True)
     manual_review_reasons_csv: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Fingerprint hash and detection rules version the row was classified from
+    fingerprint_hash: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    rules_version: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+
+class FingerprintNormalizationCache(Base):
+    """Cross-run cache of Step 2 normalization outputs (manufacturer, tracer, text blob, ...)."""
+    __tablename__ = "fingerprint_normalization_cache"
+
+    kind: Mapped[str] = mapped_column(String(32), primary_key=True)
+    # sha1 of input_value; raw inputs can be longer than a btree key allows
+    input_hash: Mapped[str] = mapped_column(String(40), primary_key=True)
+    input_value: Mapped[str] = mapped_column(Text, nullable=False)
+    output_value: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Hash of the normalization logic/config that produced output_value
+    normalizer_version: Mapped[str] = mapped_column(String(64), nullable=False)
+
+
+class ClassificationResultCache(Base):
+    """Step 3 results keyed by the hash of the exact classification inputs."""
+    __tablename__ = "classification_result_cache"
+
+    signature_hash: Mapped[str] = mapped_column(String(40), primary_key=True)
+    # Hash of the classification package version and the detection YAML files
+    pipeline_version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # JSON array of the persisted ClassificationResult fields
+    result_json: Mapped[str] = mapped_column(Text, nullable=False)
 
 
 class IngestConflict(Base):
@@ -0,0 +1,162 @@
+"""COPY-based bulk writes for the sorting steps.
+
+Steps 3 and 4 write one row per stack. Instead of executemany batches of
+parameter dicts, the rows are built as a Polars DataFrame, written to a temp
+table with PostgreSQL COPY (Polars renders the CSV in native code) and moved
+into the real table with one ``INSERT ... ON CONFLICT`` or ``UPDATE ... FROM``,
+the same pattern ``fingerprint_polars.bulk_upsert_fingerprints`` uses.
+
+Unlike ``bulk_upsert_fingerprints`` these helpers do not commit: the rows
+become part of the caller's transaction. On other dialects (SQLite in tests)
+the same statements run row-wise through SQLAlchemy.
+"""
+
+from __future__ import annotations
+
+import logging
+from io import BytesIO
+from typing import Optional, Sequence
+
+import polars as pl
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+_STAGING_PREFIX = "sort_stage_"
+
+# Rows per executemany batch on the non-PostgreSQL fallback
+FALLBACK_BATCH_SIZE = 10_000
+
+
+def build_upsert_sql(
+    table: str,
+    columns: Sequence[str],
+    conflict_column: str,
+    source: Optional[str] = None,
+) -> str:
+    """``INSERT`` every column, overwriting all but *conflict_column* on conflict.
+
+    Reads from the *source* table when given, otherwise from bind parameters.
+    """
+    column_list = ", ".join(columns)
+    if source:
+        rows = f"SELECT {column_list} FROM {source}"
+    else:
+        rows = f"VALUES ({', '.join(f':{column}' for column in columns)})"
+    update_set = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != conflict_column)
+    return (
+        f"INSERT INTO {table} ({column_list}) {rows} "
+        f"ON CONFLICT ({conflict_column}) DO UPDATE SET {update_set}"
+    )
+
+
+def build_update_sql(
+    table: str,
+    columns: Sequence[str],
+    key_column: str,
+    source: Optional[str] = None,
+    constants: Optional[dict[str, str]] = None,
+) -> str:
+    """``UPDATE`` every column but *key_column*, matching rows on *key_column*.
+
+    *constants* maps further columns to SQL literals set on every matched row.
+    Reads from the *source* table (``UPDATE ... FROM``) when given, otherwise
+    from bind parameters.
+    """
+    value = (lambda column: f"s.{column}") if source else (lambda column: f":{column}")
+    assignments = [f"{column} = {value(column)}" for column in columns if column != key_column]
+    assignments += [f"{column} = {literal}" for column, literal in (constants or {}).items()]
+    sql = f"UPDATE {table} SET {', '.join(assignments)}"
+    if source:
+        return f"{sql} FROM {source} s WHERE {table}.{key_column} = s.{key_column}"
+    return f"{sql} WHERE {key_column} = :{key_column}"
+
+
+def _copy_to_staging(conn: Connection, table: str, df: pl.DataFrame) -> str:
+    """Create a temp table shaped like *table* and COPY *df* into it; returns its name."""
+    staging = f"{_STAGING_PREFIX}{table}"
+    column_list = ", ".join(df.columns)
+
+    # Empty strings are written quoted, so only unquoted empty fields become NULL
+    csv_buffer = BytesIO()
+    df.write_csv(csv_buffer, include_header=False, null_value="")
+
+    raw = conn.connection
+    dbapi_conn = getattr(raw, "driver_connection", raw)
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table} WITH NO DATA"
+        )
+        with cursor.copy(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT CSV, NULL '')") as copy:
+            copy.write(csv_buffer.getbuffer())
+    finally:
+        cursor.close()
+    return staging
+
+
+def _execute_staged(conn: Connection, sql: str, staging: str) -> None:
+    raw = conn.connection
+    dbapi_conn = getattr(raw, "driver_connection", raw)
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute(sql)
+        cursor.execute(f"DROP TABLE {staging}")
+    finally:
+        cursor.close()
+
+
+def _execute_rowwise(conn: Connection, sql: str, df: pl.DataFrame) -> None:
+    statement = text(sql)
+    for batch in df.iter_slices(FALLBACK_BATCH_SIZE):
+        conn.execute(statement, batch.to_dicts())
+
+
+def copy_upsert(conn: Connection, table: str, df: pl.DataFrame, conflict_column: str) -> int:
+    """Upsert the rows of *df* into *table* in the caller's transaction.
+
+    Every column of *df* is inserted; on a *conflict_column* clash all other
+    columns are overwritten.
+
+    Returns:
+        Number of rows written
+    """
+    if df.height == 0:
+        return 0
+    if conn.dialect.name != "postgresql":
+        _execute_rowwise(conn, build_upsert_sql(table, df.columns, conflict_column), df)
+        return df.height
+
+    staging = _copy_to_staging(conn, table, df)
+    _execute_staged(conn, build_upsert_sql(table, df.columns, conflict_column, source=staging), staging)
+    return df.height
+
+
+def copy_update(
+    conn: Connection,
+    table: str,
+    df: pl.DataFrame,
+    key_column: str,
+    constants: Optional[dict[str, str]] = None,
+) -> int:
+    """Update the rows of *table* matching *df* on *key_column*, in the caller's transaction.
+
+    Returns:
+        Number of rows in *df*
+    """
+    if df.height == 0:
+        return 0
+    if conn.dialect.name != "postgresql":
+        _execute_rowwise(conn, build_update_sql(table, df.columns, key_column, constants=constants), df)
+        return df.height
+
+    staging = _copy_to_staging(conn, table, df)
+    _execute_staged(
+        conn,
+        build_update_sql(table, df.columns, key_column, source=staging, constants=constants),
+        staging,
+    )
+    return df.height
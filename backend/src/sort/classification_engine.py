@@ -0,0 +1,348 @@
+"""Process-pool classification engine for Step 3.
+
+``ClassificationPipeline.classify`` is pure Python, so running it on the
+default thread pool keeps the whole step on one core. The engine hands
+batches of compact fingerprint rows (tuples in ``FINGERPRINT_FIELDS`` order)
+to worker processes; each worker builds its own ``ClassificationPipeline``
+once and returns compact result rows (tuples in ``RESULT_FIELDS`` order).
+Batches are yielded in submission order, with a bounded number in flight, so
+callers can report progress batch by batch exactly as before.
+
+With one worker (or a single batch) classification runs in-process on a
+thread, which avoids the pool start-up cost for small cohorts.
+
+Classification is a pure function of the fingerprint row, so stacks with
+identical rows (the same protocol run over and over) share one result:
+``deduplicate_rows`` reduces the rows to unique signatures before they are
+classified. ``ResultCache`` persists results per signature hash in
+``classification_result_cache`` under a version derived from the
+classification package version and the detection YAML files, so editing a
+YAML file invalidates every cached result.
+
+Workers report the hit counters of their memoized tag parsers with every
+batch; ``ClassificationEngine.parser_cache_stats`` sums them per parser.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+
+import classification
+from classification.core.context import ClassificationContext, parser_cache_stats
+from classification.core.output import ClassificationResult
+from classification.pipeline import ClassificationPipeline
+from metadata_db.schema import ClassificationResultCache
+
+logger = logging.getLogger(__name__)
+
+# Fingerprint fields read by ClassificationContext.from_fingerprint
+FINGERPRINT_FIELDS = (
+    "image_type",
+    "scanning_sequence",
+    "sequence_variant",
+    "scan_options",
+    "stack_sequence_name",
+    "text_search_blob",
+    "contrast_search_blob",
+    "manufacturer",
+    "mr_tr",
+    "mr_te",
+    "mr_ti",
+    "mr_flip_angle",
+    "mr_echo_train_length",
+    "mr_diffusion_b_value",
+    "stack_orientation",
+    "fov_x",
+    "fov_y",
+    "aspect_ratio",
+    "stack_n_instances",
+    "mr_acquisition_type",
+    "stack_key",
+)
+
+# Persisted ClassificationResult fields
+RESULT_FIELDS = (
+    "base",
+    "technique",
+    "modifier_csv",
+    "construct_csv",
+    "provenance",
+    "acceleration_csv",
+    "directory_type",
+    "post_contrast",
+    "localizer",
+    "spinal_cord",
+    "manual_review_required",
+    "manual_review_reasons_csv",
+)
+
+# Detection YAML files Step 3 classifies with; Step 2 hashes the same files
+DETECTION_YAML_DIR = Path(classification.__file__).parent / "detection_yaml"
+
+# Upper bound for the automatic worker count
+MAX_AUTO_WORKERS = 16
+
+_CACHE_CHUNK = 1000
+
+
+def default_classification_workers() -> int:
+    """Worker processes to use when SortingConfig leaves the count unset."""
+    return max(1, min((os.cpu_count() or 1) - 1, MAX_AUTO_WORKERS))
+
+
+def fingerprint_row(fp: dict[str, Any]) -> tuple:
+    """Compact a fingerprint dict into the tuple sent to the workers."""
+    return tuple(fp.get(name) for name in FINGERPRINT_FIELDS)
+
+
+def result_row(result: ClassificationResult) -> tuple:
+    return tuple(getattr(result, name) for name in RESULT_FIELDS)
+
+
+def result_from_row(row: Sequence[Any]) -> ClassificationResult:
+    return ClassificationResult(**dict(zip(RESULT_FIELDS, row)))
+
+
+def error_result() -> ClassificationResult:
+    """Result recorded for a fingerprint whose classification raised."""
+    result = ClassificationResult(directory_type="misc", manual_review_required=1)
+    result.add_review_reason("classification:error")
+    return result
+
+
+def deduplicate_rows(rows: Iterable[tuple]) -> tuple[list[tuple], list[int]]:
+    """Return the unique rows (first-seen order) and, per input row, its index among them."""
+    index: dict[tuple, int] = {}
+    slots = [index.setdefault(row, len(index)) for row in rows]
+    return list(index), slots
+
+
+def signature_hash(row: tuple) -> str:
+    """Stable hash of a fingerprint row (exact values, no rounding)."""
+    payload = json.dumps(row, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def classification_cache_version(detection_yaml_dir: Optional[str] = None) -> str:
+    """Hash of the classification package version, the row layout and the detection YAML files."""
+    yaml_dir = Path(detection_yaml_dir) if detection_yaml_dir else DETECTION_YAML_DIR
+    digest = hashlib.sha256()
+    digest.update(classification.__version__.encode())
+    digest.update(repr((FINGERPRINT_FIELDS, RESULT_FIELDS)).encode())
+    for path in sorted(yaml_dir.glob("*.yaml")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:32]
+
+
+class ResultCache:
+    """Result rows keyed by signature hash, loaded from and saved to ``classification_result_cache``."""
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+        self.entries: dict[str, tuple] = {}
+        self.new_entries: dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[tuple]:
+        return self.entries.get(key)
+
+    def add(self, key: str, row: tuple) -> None:
+        self.entries[key] = row
+        self.new_entries[key] = row
+
+    def load(self, conn: Connection, keys: Sequence[str]) -> int:
+        """Read cached results for *keys*; returns the number found."""
+        table = ClassificationResultCache
+        found = 0
+        for start in range(0, len(keys), _CACHE_CHUNK):
+            stmt = select(table.signature_hash, table.result_json).where(
+                table.pipeline_version == self.version,
+                table.signature_hash.in_(keys[start:start + _CACHE_CHUNK]),
+            )
+            for row in conn.execute(stmt):
+                self.entries[row.signature_hash] = tuple(json.loads(row.result_json))
+                found += 1
+        return found
+
+    def save(self, conn: Connection) -> int:
+        """Upsert results added since the last save and drop rows of other versions."""
+        rows = [
+            {"signature_hash": key, "pipeline_version": self.version, "result_json": json.dumps(list(row))}
+            for key, row in self.new_entries.items()
+        ]
+        if not rows:
+            return 0
+        table = ClassificationResultCache
+        conn.execute(delete(table).where(table.pipeline_version != self.version))
+        for start in range(0, len(rows), _CACHE_CHUNK):
+            stmt = pg_insert(table).values(rows[start:start + _CACHE_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.signature_hash, table.pipeline_version],
+                set_={"result_json": stmt.excluded.result_json},
+            )
+            conn.execute(stmt)
+        self.new_entries = {}
+        return len(rows)
+
+
+def load_result_cache(conn: Connection, version: str, keys: Sequence[str]) -> ResultCache:
+    """Load cached results for *keys*, falling back to an empty cache.
+
+    Runs in a savepoint so a missing table does not abort the step's transaction.
+    """
+    cache = ResultCache(version)
+    try:
+        with conn.begin_nested():
+            cache.load(conn, keys)
+    except Exception as exc:
+        logger.warning("Could not load classification result cache: %s", exc)
+        return ResultCache(version)
+    return cache
+
+
+def save_result_cache(conn: Connection, cache: ResultCache) -> int:
+    """Persist new results; failures are logged and ignored."""
+    try:
+        with conn.begin_nested():
+            return cache.save(conn)
+    except Exception as exc:
+        logger.warning("Could not save classification result cache: %s", exc)
+        return 0
+
+
+def classify_rows(pipeline: ClassificationPipeline, rows: Iterable[tuple]) -> list[tuple]:
+    """Classify fingerprint rows; a failing row yields the error result instead of raising."""
+    results = []
+    for row in rows:
+        try:
+            ctx = ClassificationContext.from_fingerprint(dict(zip(FINGERPRINT_FIELDS, row)))
+            result = pipeline.classify(ctx)
+        except Exception as exc:
+            logger.warning("Failed to classify fingerprint: %s", exc)
+            result = error_result()
+        results.append(result_row(result))
+    return results
+
+
+# Per-process pipeline, built once by the pool initializer
+_worker_pipeline: Optional[ClassificationPipeline] = None
+# Parser counters at start-up (forked workers inherit the parent's caches)
+_worker_stats_baseline: dict = {}
+
+
+def _worker_init(detection_yaml_dir: Optional[str]) -> None:
+    global _worker_pipeline, _worker_stats_baseline
+    _worker_pipeline = ClassificationPipeline(detection_yaml_dir)
+    _worker_stats_baseline = parser_cache_stats()
+
+
+def _worker_classify(rows: list[tuple]) -> tuple[list[tuple], int, dict]:
+    results = classify_rows(_worker_pipeline, rows)
+    return results, os.getpid(), _stats_delta(_worker_stats_baseline, parser_cache_stats())
+
+
+def merge_parser_stats(snapshots: Iterable[dict]) -> dict[str, dict[str, Any]]:
+    """Sum parser cache counters over several processes (or runs)."""
+    merged: dict[str, dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, stats in snapshot.items():
+            total = merged.setdefault(name, {"hits": 0, "misses": 0, "size": 0})
+            for key in total:
+                total[key] += stats[key]
+    for total in merged.values():
+        calls = total["hits"] + total["misses"]
+        total["hit_rate"] = total["hits"] / calls if calls else 0.0
+    return merged
+
+
+def _stats_delta(before: dict, after: dict) -> dict:
+    """Counters accumulated between two snapshots of this process."""
+    return {
+        name: {
+            "hits": stats["hits"] - before.get(name, {}).get("hits", 0),
+            "misses": stats["misses"] - before.get(name, {}).get("misses", 0),
+            "size": stats["size"],
+        }
+        for name, stats in after.items()
+    }
+
+
+class ClassificationEngine:
+    """Classify fingerprint row batches on a process pool, yielding results in order."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pipeline: Optional[ClassificationPipeline] = None,
+        detection_yaml_dir: Optional[str] = None,
+    ) -> None:
+        self.workers = workers or default_classification_workers()
+        # Workers build their own pipeline, so they need the YAML dir of the given one
+        if detection_yaml_dir is None and pipeline is not None:
+            detection_yaml_dir = str(pipeline.yaml_dir)
+        self.detection_yaml_dir = detection_yaml_dir
+        self._pipeline = pipeline
+        self._parser_stats: dict[Any, dict] = {}
+
+    @property
+    def pipeline(self) -> ClassificationPipeline:
+        """In-process pipeline for the single-worker path."""
+        if self._pipeline is None:
+            self._pipeline = ClassificationPipeline(self.detection_yaml_dir)
+        return self._pipeline
+
+    def parser_cache_stats(self) -> dict[str, dict[str, Any]]:
+        """Tag parser cache counters for the batches classified so far, summed over processes."""
+        return merge_parser_stats(self._parser_stats.values())
+
+    async def classify_batches(self, batches: Sequence[list[tuple]]) -> AsyncIterator[list[tuple]]:
+        """Yield the result rows of every batch, in the order of *batches*."""
+        loop = asyncio.get_running_loop()
+        if self.workers <= 1 or len(batches) <= 1:
+            before = parser_cache_stats()
+            for batch in batches:
+                rows = await loop.run_in_executor(None, classify_rows, self.pipeline, batch)
+                self._parser_stats["local"] = _stats_delta(before, parser_cache_stats())
+                yield rows
+            return
+
+        workers = min(self.workers, len(batches))
+        logger.info("Classifying %d batches on %d worker processes", len(batches), workers)
+        max_pending = workers * 2
+        pending: deque[Future] = deque()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_worker_init,
+            initargs=(self.detection_yaml_dir,),
+        ) as pool:
+            try:
+                for batch in batches:
+                    pending.append(pool.submit(_worker_classify, batch))
+                    if len(pending) >= max_pending:
+                        yield self._collect(await asyncio.wrap_future(pending.popleft()))
+                while pending:
+                    yield self._collect(await asyncio.wrap_future(pending.popleft()))
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _collect(self, output: tuple[list[tuple], int, dict]) -> list[tuple]:
+        rows, pid, stats = output
+        # Each snapshot holds the worker's counters since start-up
+        self._parser_stats[pid] = stats
+        return rows
@@ -9,25 +9,32 @@ Performance improvements over row-by-row approach:
 - Vectorized transformations (10-100x faster than Python loops)
 - Bulk COPY + UPSERT instead of individual INSERT statements
 - Batched commits to prevent PostgreSQL OOM
+- Streaming chunks (load → transform → COPY) so peak memory is bounded by
+  the chunk size, with the next chunk loading while the current one is written
 
 Expected performance: ~45-60 seconds for 450K stacks (vs OOM with old approach)
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import re
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from tempfile import NamedTemporaryFile
 from pathlib import Path
 from typing import Any, Callable
 
 import polars as pl
 from rapidfuzz import fuzz, process
-from sqlalchemy import text
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.engine import Connection
 
-from .semantic_normalizer import normalize_text_blob
+from metadata_db.schema import FingerprintNormalizationCache, SeriesClassificationCache, StackFingerprint
+
+from .semantic_normalizer import SemanticNormalizer, normalize_text_blob
 
 logger = logging.getLogger(__name__)
 
@@ -170,8 +177,18 @@ FINGERPRINT_OUTPUT_SCHEMA = {
     "pet_radionuclide_total_dose": pl.Float64,
     "pet_radionuclide_half_life": pl.Float64,
     "stack_n_instances": pl.Int32,
+    # Hash of the source row the fingerprint was built from (see source_hashes)
+    "source_hash": pl.Utf8,
+    # Content hash of the columns above (see fingerprint_hashes)
+    "fingerprint_hash": pl.Utf8,
 }
 
+# Output columns that are not part of the fingerprint content
+_HASH_EXCLUDED_COLUMNS = ("series_stack_id", "source_hash", "fingerprint_hash")
+
+# Stack ids per stored-hash lookup
+_HASH_LOOKUP_CHUNK = 10_000
+
 
 # =============================================================================
 # SQL Query - Single JOIN to gather all data
@@ -438,11 +455,274 @@ def _build_contrast_blob(
     return " ".join(parts).lower() if parts else None
 
 
+# =============================================================================
+# Distinct-value memoization
+# =============================================================================
+
+# Columns holding the six text fields of the text search blob, in blob order
+TEXT_BLOB_COLUMNS = [
+    "series_description",
+    "protocol_name",
+    "sequence_name",
+    "body_part_examined",
+    "series_comments",
+    "image_comments",
+]
+
+# Bump whenever one of the normalization functions above, or the rest of the
+# transform, changes its output; it salts the source hashes of "changed" mode
+NORMALIZATION_LOGIC_VERSION = 1
+
+_CACHE_CHUNK = 1000
+
+
+def normalization_version() -> str:
+    """Hash of everything that determines the normalization outputs.
+
+    Covers the logic version, the canonical vocabularies and thresholds and
+    the semantic token map, so cached outputs are ignored as soon as any of
+    them changes.
+    """
+    digest = hashlib.sha256()
+    digest.update(str(NORMALIZATION_LOGIC_VERSION).encode())
+    digest.update(repr((CANONICAL_MANUFACTURERS, MANUFACTURER_MATCH_THRESHOLD)).encode())
+    digest.update(repr((CANONICAL_TRACERS, TRACER_MATCH_THRESHOLD)).encode())
+    token_map = Path(__file__).resolve().parent / SemanticNormalizer.YAML_FILENAME
+    if token_map.exists():
+        digest.update(token_map.read_bytes())
+    return digest.hexdigest()[:32]
+
+
+def _input_hash(value: str) -> str:
+    """Primary key of a raw input in ``fingerprint_normalization_cache``."""
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+class NormalizationCache:
+    """Normalization outputs keyed by kind (manufacturer, text_blob, ...) and raw input.
+
+    ``transform_fingerprints`` fills it as it goes, so one instance can be
+    reused across calls. Bound to a connection (see ``load``), it reads the
+    outputs persisted in ``fingerprint_normalization_cache`` for the values it
+    has not seen yet, so re-sorts skip known values without reading the whole
+    table; ``save`` persists the new ones.
+    """
+
+    def __init__(self, version: str | None = None, conn: Connection | None = None) -> None:
+        self.version = version or normalization_version()
+        self.conn = conn
+        self.entries: dict[str, dict[str, str | None]] = {}
+        self.new_entries: dict[str, dict[str, str | None]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(len(values) for values in self.entries.values())
+
+    def resolve(self, kind: str, values: list[str], func: Callable[[str], str | None]) -> dict[str, str | None]:
+        """Return ``{value: func(value)}``, calling *func* only for unseen values."""
+        known = self.entries.setdefault(kind, {})
+        fresh = self.new_entries.setdefault(kind, {})
+        unseen = [value for value in values if value not in known]
+        if unseen and self.conn is not None:
+            known.update(self._lookup(kind, unseen))
+        mapping: dict[str, str | None] = {}
+        for value in values:
+            if value in known:
+                self.hits += 1
+                mapping[value] = known[value]
+                continue
+            self.misses += 1
+            result = func(value)
+            known[value] = fresh[value] = mapping[value] = result
+        return mapping
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+    def _lookup(self, kind: str, values: list[str]) -> dict[str, str | None]:
+        """Read the persisted outputs of *values*; a failed read unbinds the connection.
+
+        Runs in a savepoint so a failure does not abort the step's transaction.
+        """
+        table = FingerprintNormalizationCache
+        by_hash = {_input_hash(value): value for value in values}
+        hashes = list(by_hash)
+        found: dict[str, str | None] = {}
+        try:
+            with self.conn.begin_nested():
+                for start in range(0, len(hashes), _CACHE_CHUNK):
+                    stmt = select(table.input_hash, table.output_value).where(
+                        table.normalizer_version == self.version,
+                        table.kind == kind,
+                        table.input_hash.in_(hashes[start:start + _CACHE_CHUNK]),
+                    )
+                    for row in self.conn.execute(stmt):
+                        found[by_hash[row.input_hash]] = row.output_value
+        except Exception as exc:
+            logger.warning("Could not read fingerprint normalization cache: %s", exc)
+            self.conn = None
+            return {}
+        return found
+
+    @classmethod
+    def load(cls, conn: Connection) -> "NormalizationCache":
+        """Bind a cache of the current normalization version to *conn*.
+
+        Nothing is read up front; ``resolve`` looks up each chunk's unseen
+        values. Raises if the cache table cannot be read.
+        """
+        conn.execute(select(FingerprintNormalizationCache.kind).limit(1)).all()
+        return cls(conn=conn)
+
+    def save(self, conn: Connection) -> int:
+        """Upsert outputs computed since the last load/save; returns the number of rows written.
+
+        Rows of older normalization versions are dropped at the same time.
+        """
+        rows = [
+            {
+                "kind": kind,
+                "input_hash": _input_hash(value),
+                "input_value": value,
+                "output_value": output,
+                "normalizer_version": self.version,
+            }
+            for kind, values in self.new_entries.items()
+            for value, output in values.items()
+        ]
+        if not rows:
+            return 0
+        table = FingerprintNormalizationCache
+        conn.execute(delete(table).where(table.normalizer_version != self.version))
+        for start in range(0, len(rows), _CACHE_CHUNK):
+            stmt = pg_insert(table).values(rows[start:start + _CACHE_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.kind, table.input_hash],
+                set_={
+                    "input_value": stmt.excluded.input_value,
+                    "output_value": stmt.excluded.output_value,
+                    "normalizer_version": stmt.excluded.normalizer_version,
+                },
+            )
+            conn.execute(stmt)
+        self.new_entries = {}
+        return len(rows)
+
+
+def load_normalization_cache(
+    conn: Connection,
+    log_callback: Callable[[str], None] | None = None,
+) -> NormalizationCache:
+    """Bind the persistent normalization cache, falling back to an unbound one.
+
+    Runs in a savepoint so a missing table does not abort the step's transaction.
+    """
+    try:
+        with conn.begin_nested():
+            cache = NormalizationCache.load(conn)
+    except Exception as exc:
+        logger.warning("Could not load fingerprint normalization cache: %s", exc)
+        return NormalizationCache()
+    if log_callback:
+        log_callback("Reading cached normalization outputs per chunk")
+    return cache
+
+
+def save_normalization_cache(
+    conn: Connection,
+    cache: NormalizationCache,
+    log_callback: Callable[[str], None] | None = None,
+) -> int:
+    """Persist new normalization outputs; failures are logged and ignored."""
+    try:
+        with conn.begin_nested():
+            written = cache.save(conn)
+    except Exception as exc:
+        logger.warning("Could not save fingerprint normalization cache: %s", exc)
+        return 0
+    if log_callback and written:
+        log_callback(f"Stored {written:,} new normalization outputs")
+    return written
+
+
+def _map_distinct(
+    df: pl.DataFrame,
+    column: str,
+    func: Callable[[str], str | None],
+    alias: str,
+    cache: NormalizationCache,
+    kind: str | None = None,
+) -> tuple[pl.DataFrame, int]:
+    """Apply *func* once per distinct non-null value of *column* and map the results back.
+
+    Every normalization function returns None for missing input, so nulls map
+    to null without a call. Returns the new frame and the number of distinct
+    values.
+    """
+    values = df.get_column(column).drop_nulls().unique().to_list()
+    mapping = cache.resolve(kind or column, values, func)
+    mapped = pl.col(column).replace_strict(
+        list(mapping), list(mapping.values()), default=None, return_dtype=pl.Utf8
+    )
+    return df.with_columns(mapped.alias(alias)), len(values)
+
+
+def _map_distinct_rows(
+    df: pl.DataFrame,
+    columns: list[str],
+    func: Callable[..., str | None],
+    alias: str,
+) -> tuple[pl.DataFrame, int]:
+    """Apply *func* once per distinct combination of *columns* and map the results back.
+
+    Grouping (rather than joining) keeps null keys together and the row order intact.
+    """
+    groups = df.select(columns).with_row_index("_row").group_by(columns).agg(pl.col("_row"))
+    values = [func(*row) for row in groups.select(columns).iter_rows()]
+    mapped = (
+        groups.select("_row", pl.Series(alias, values, dtype=pl.Utf8))
+        .explode("_row")
+        .sort("_row")
+    )
+    return df.with_columns(mapped.get_column(alias)), groups.height
+
+
+def _raw_text_blob_expr() -> pl.Expr:
+    """The space-joined, non-empty text fields that ``_build_text_blob`` normalizes."""
+    parts = [
+        pl.when(pl.col(name) == "").then(None).otherwise(pl.col(name))
+        for name in TEXT_BLOB_COLUMNS
+    ]
+    return pl.concat_str(parts, separator=" ", ignore_nulls=True)
+
+
 # =============================================================================
 # Main Pipeline Functions
 # =============================================================================
 
 
+# Stacks per load → transform → COPY chunk of the streaming pipeline
+FINGERPRINT_CHUNK_SIZE = 50_000
+
+
+def _rows_to_frame(rows: list, columns: list[str]) -> pl.DataFrame:
+    """Build the source DataFrame straight from row tuples (no per-row dicts)."""
+    schema = [(name, FINGERPRINT_SOURCE_SCHEMA.get(name, pl.Utf8)) for name in columns]
+    if not rows:
+        return pl.DataFrame(schema=FINGERPRINT_SOURCE_SCHEMA)
+    return pl.DataFrame(rows, schema=schema, orient="row")
+
+
+def _load_source_chunk(conn: Connection, series_stack_ids: list[int]) -> pl.DataFrame:
+    result = conn.execute(
+        text(QUERY_FINGERPRINT_ALL_DATA),
+        {"series_stack_ids": series_stack_ids}
+    )
+    columns = list(result.keys())
+    return _rows_to_frame(result.fetchall(), columns)
+
+
 def load_fingerprint_source_data(
     conn: Connection,
     series_stack_ids: list[int],
@@ -462,28 +742,7 @@ def load_fingerprint_source_data(
     if log_callback:
         log_callback(f"Loading source data for {len(series_stack_ids):,} stacks...")
     
-    # Execute query
-    result = conn.execute(
-        text(QUERY_FINGERPRINT_ALL_DATA),
-        {"series_stack_ids": series_stack_ids}
-    )
-    
-    # Fetch all rows
-    rows = result.fetchall()
-    columns = result.keys()
-    
-    if log_callback:
-        log_callback(f"Fetched {len(rows):,} rows from database")
-    
-    if not rows:
-        # Return empty DataFrame with schema
-        return pl.DataFrame(schema=FINGERPRINT_SOURCE_SCHEMA)
-    
-    # Convert to list of dicts
-    data = [dict(zip(columns, row)) for row in rows]
-    
-    # Create DataFrame with explicit schema
-    df = pl.DataFrame(data, schema_overrides=FINGERPRINT_SOURCE_SCHEMA)
+    df = _load_source_chunk(conn, series_stack_ids)
     
     if log_callback:
         log_callback(f"Created DataFrame: {df.height:,} rows, {df.estimated_size('mb'):.1f} MB")
@@ -494,13 +753,20 @@ def load_fingerprint_source_data(
 def transform_fingerprints(
     df: pl.DataFrame,
     log_callback: Callable[[str], None] | None = None,
+    normalization_cache: NormalizationCache | None = None,
 ) -> pl.DataFrame:
     """
     Apply all fingerprint transformations using vectorized Polars operations.
     
+    The Python normalizers (fuzzy manufacturer/tracer matching, MR flags and
+    the semantic text blob) run once per distinct input value, so their cost
+    scales with the vocabulary of the cohort rather than with the stack count.
+    
     Args:
         df: Source DataFrame
         log_callback: Optional callback for logging
+        normalization_cache: Outputs of earlier runs to reuse; filled with the
+            newly computed ones
         
     Returns:
         Transformed DataFrame ready for insert
@@ -511,34 +777,26 @@ def transform_fingerprints(
     if log_callback:
         log_callback("Applying transformations...")
     
+    cache = normalization_cache if normalization_cache is not None else NormalizationCache()
+    if "source_hash" not in df.columns:
+        df = df.with_columns(pl.Series("source_hash", source_hashes(df, cache.version), dtype=pl.Utf8))
+    
     # =========================================================================
-    # Normalize manufacturer (using map_elements for fuzzy matching)
+    # Normalize manufacturer (fuzzy matching, once per distinct value)
     # =========================================================================
-    df = df.with_columns(
-        pl.col("manufacturer")
-        .map_elements(_normalize_manufacturer, return_dtype=pl.Utf8)
-        .alias("manufacturer_normalized")
-    )
+    df, distinct = _map_distinct(df, "manufacturer", _normalize_manufacturer, "manufacturer_normalized", cache)
     
     if log_callback:
-        log_callback("  - Normalized manufacturers")
+        log_callback(f"  - Normalized manufacturers ({distinct:,} distinct)")
     
     # =========================================================================
     # Normalize MR fields
     # =========================================================================
-    df = df.with_columns([
-        pl.col("mr_acquisition_type")
-        .map_elements(_normalize_mr_acquisition_type, return_dtype=pl.Utf8)
-        .alias("mr_acquisition_type_normalized"),
-        
-        pl.col("angio_flag")
-        .map_elements(_normalize_yes_no_flag, return_dtype=pl.Utf8)
-        .alias("mr_angio_flag_normalized"),
-        
-        pl.col("phase_contrast")
-        .map_elements(_normalize_yes_no_flag, return_dtype=pl.Utf8)
-        .alias("mr_phase_contrast_normalized"),
-    ])
+    df, _ = _map_distinct(
+        df, "mr_acquisition_type", _normalize_mr_acquisition_type, "mr_acquisition_type_normalized", cache
+    )
+    df, _ = _map_distinct(df, "angio_flag", _normalize_yes_no_flag, "mr_angio_flag_normalized", cache, "yes_no")
+    df, _ = _map_distinct(df, "phase_contrast", _normalize_yes_no_flag, "mr_phase_contrast_normalized", cache, "yes_no")
     
     if log_callback:
         log_callback("  - Normalized MR fields")
@@ -546,14 +804,10 @@ def transform_fingerprints(
     # =========================================================================
     # Normalize PET tracer
     # =========================================================================
-    df = df.with_columns(
-        pl.col("radiopharmaceutical")
-        .map_elements(_normalize_pet_tracer, return_dtype=pl.Utf8)
-        .alias("pet_tracer_normalized")
-    )
+    df, distinct = _map_distinct(df, "radiopharmaceutical", _normalize_pet_tracer, "pet_tracer_normalized", cache)
     
     if log_callback:
-        log_callback("  - Normalized PET tracer")
+        log_callback(f"  - Normalized PET tracer ({distinct:,} distinct)")
     
     # =========================================================================
     # Compute FOV from pixel_spacing, rows, columns
@@ -594,39 +848,22 @@ def transform_fingerprints(
         log_callback("  - Computed FOV")
     
     # =========================================================================
-    # Build text search blob using struct + map_elements
+    # Build text search blob: join the text fields vectorized, then run the
+    # semantic normalizer once per distinct joined text (same result as
+    # _build_text_blob)
     # =========================================================================
-    df = df.with_columns(
-        pl.struct([
-            "series_description",
-            "protocol_name",
-            "sequence_name",
-            "body_part_examined",
-            "series_comments",
-            "image_comments",
-        ])
-        .map_elements(
-            lambda s: _build_text_blob(
-                s["series_description"],
-                s["protocol_name"],
-                s["sequence_name"],
-                s["body_part_examined"],
-                s["series_comments"],
-                s["image_comments"],
-            ),
-            return_dtype=pl.Utf8,
-        )
-        .alias("text_search_blob")
-    )
+    df = df.with_columns(_raw_text_blob_expr().alias("_raw_text_blob"))
+    df, distinct = _map_distinct(df, "_raw_text_blob", normalize_text_blob, "text_search_blob", cache, "text_blob")
     
     if log_callback:
-        log_callback("  - Built text search blobs")
+        log_callback(f"  - Built text search blobs ({distinct:,} distinct texts)")
     
     # =========================================================================
-    # Build contrast search blob
+    # Build contrast search blob (once per distinct contrast field combination)
     # =========================================================================
-    df = df.with_columns(
-        pl.struct([
+    df, _ = _map_distinct_rows(
+        df,
+        [
             "contrast_bolus_agent",
             "contrast_bolus_route",
             "contrast_bolus_total_dose",
@@ -634,20 +871,9 @@ def transform_fingerprints(
             "contrast_bolus_volume",
             "contrast_flow_rate",
             "contrast_flow_duration",
-        ])
-        .map_elements(
-            lambda s: _build_contrast_blob(
-                s["contrast_bolus_agent"],
-                s["contrast_bolus_route"],
-                s["contrast_bolus_total_dose"],
-                s["contrast_bolus_start_time"],
-                s["contrast_bolus_volume"],
-                s["contrast_flow_rate"],
-                s["contrast_flow_duration"],
-            ),
-            return_dtype=pl.Utf8,
-        )
-        .alias("contrast_search_blob")
+        ],
+        _build_contrast_blob,
+        "contrast_search_blob",
     )
     
     if log_callback:
@@ -740,14 +966,103 @@ def transform_fingerprints(
         pl.col("radionuclide_total_dose").alias("pet_radionuclide_total_dose"),
         pl.col("radionuclide_half_life").alias("pet_radionuclide_half_life"),
         pl.col("stack_n_instances"),
+        pl.col("source_hash"),
     ])
+    result = result.with_columns(pl.Series("fingerprint_hash", fingerprint_hashes(result), dtype=pl.Utf8))
     
     if log_callback:
-        log_callback(f"Transformation complete: {result.height:,} fingerprints")
+        stats = cache.stats()
+        log_callback(
+            f"Transformation complete: {result.height:,} fingerprints "
+            f"(normalizer calls: {stats['misses']:,}, cached: {stats['hits']:,})"
+        )
     
     return result
 
 
+def fingerprint_hashes(df: pl.DataFrame) -> list[str]:
+    """
+    SHA-1 of each fingerprint row's content.
+    
+    Covers every output column except the stack id and the hash itself, with
+    NULL kept distinct from the empty string, so two runs over unchanged
+    source data produce the same hash.
+    """
+    columns = [name for name in FINGERPRINT_OUTPUT_SCHEMA if name not in _HASH_EXCLUDED_COLUMNS]
+    payload = df.select(
+        pl.concat_str(
+            [pl.col(name).cast(pl.Utf8).fill_null("\x00") for name in columns],
+            separator="\x1f",
+        )
+    ).to_series()
+    return [hashlib.sha1(row.encode("utf-8")).hexdigest() for row in payload.to_list()]
+
+
+def source_hashes(df: pl.DataFrame, version: str | None = None) -> list[str]:
+    """
+    SHA-1 of each source row, salted with the normalization version.
+    
+    Covers every source column except the stack id, with NULL kept distinct
+    from the empty string. A stack whose source row and normalization version
+    are unchanged would get the same fingerprint, so "changed" mode skips its
+    transform. Pass *version* to reuse an already computed normalization_version().
+    """
+    columns = [name for name in df.columns if name not in ("series_stack_id", "source_hash")]
+    salt = (version or normalization_version()) + "\x1e"
+    payload = df.select(
+        pl.concat_str(
+            [pl.col(name).cast(pl.Utf8).fill_null("\x00") for name in columns],
+            separator="\x1f",
+        )
+    ).to_series()
+    return [hashlib.sha1((salt + row).encode("utf-8")).hexdigest() for row in payload.to_list()]
+
+
+def load_source_hashes(conn: Connection, series_stack_ids: list[int]) -> dict[int, str | None]:
+    """Stored source_hash per stack (stacks without a fingerprint are absent)."""
+    table = StackFingerprint
+    stored: dict[int, str | None] = {}
+    for start in range(0, len(series_stack_ids), _HASH_LOOKUP_CHUNK):
+        stmt = select(table.series_stack_id, table.source_hash).where(
+            table.series_stack_id.in_(series_stack_ids[start:start + _HASH_LOOKUP_CHUNK])
+        )
+        stored.update((row.series_stack_id, row.source_hash) for row in conn.execute(stmt))
+    return stored
+
+
+def find_dirty_stacks(
+    conn: Connection,
+    series_stack_ids: list[int],
+    rules_version: str,
+) -> list[tuple[int, int]]:
+    """
+    Stacks whose classification is missing or out of date.
+    
+    A stack is dirty when it has no series_classification_cache row, when the
+    row was classified from a different fingerprint_hash, or when it was
+    classified with different detection rules (rules_version).
+    
+    Returns:
+        (fingerprint_id, series_stack_id) pairs of the dirty stacks
+    """
+    fp = StackFingerprint
+    scc = SeriesClassificationCache
+    dirty: list[tuple[int, int]] = []
+    for start in range(0, len(series_stack_ids), _HASH_LOOKUP_CHUNK):
+        stmt = (
+            select(fp.fingerprint_id, fp.series_stack_id)
+            .outerjoin(scc, scc.series_stack_id == fp.series_stack_id)
+            .where(fp.series_stack_id.in_(series_stack_ids[start:start + _HASH_LOOKUP_CHUNK]))
+            .where(
+                scc.series_stack_id.is_(None)
+                | scc.fingerprint_hash.is_distinct_from(fp.fingerprint_hash)
+                | scc.rules_version.is_distinct_from(rules_version)
+            )
+        )
+        dirty.extend((row.fingerprint_id, row.series_stack_id) for row in conn.execute(stmt))
+    return dirty
+
+
 def compute_metrics_from_dataframe(df: pl.DataFrame) -> dict[str, Any]:
     """
     Compute Step 2 metrics from the transformed DataFrame.
@@ -812,6 +1127,18 @@ def compute_metrics_from_dataframe(df: pl.DataFrame) -> dict[str, Any]:
     }
 
 
+def merge_fingerprint_metrics(total: dict[str, Any], chunk: dict[str, Any]) -> dict[str, Any]:
+    """Add the metrics of one chunk (from compute_metrics_from_dataframe) into *total*."""
+    for key, value in chunk.items():
+        if isinstance(value, dict):
+            merged = total.setdefault(key, {})
+            for name, count in value.items():
+                merged[name] = merged.get(name, 0) + count
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+
 def bulk_upsert_fingerprints(
     conn: Connection,
     df: pl.DataFrame,
@@ -849,14 +1176,6 @@ def bulk_upsert_fingerprints(
     raw = conn.connection
     dbapi_conn = getattr(raw, "driver_connection", raw)
     
-    # Column list for COPY (exclude auto-generated fingerprint_id)
-    columns = df.columns
-    columns_str = ", ".join(columns)
-    
-    # Update columns for ON CONFLICT (all except series_stack_id)
-    update_columns = [c for c in columns if c != "series_stack_id"]
-    update_set = ", ".join([f"{c} = EXCLUDED.{c}" for c in update_columns])
-    
     # Process in batches
     num_batches = (total_rows + batch_size - 1) // batch_size
     
@@ -868,60 +1187,185 @@ def bulk_upsert_fingerprints(
         if log_callback:
             log_callback(f"Processing batch {batch_idx + 1}/{num_batches} ({batch_df.height:,} rows)")
         
-        # Write batch to CSV in memory
-        csv_buffer = StringIO()
-        batch_df.write_csv(csv_buffer, include_header=False, null_value="")
-        csv_buffer.seek(0)
+        _upsert_fingerprint_chunk(dbapi_conn, batch_df, f"fingerprint_staging_{batch_idx}")
+        processed += batch_df.height
         
-        cursor = dbapi_conn.cursor()
-        try:
-            # Create temp table
-            temp_table = f"fingerprint_staging_{batch_idx}"
-            cursor.execute(f"""
-                CREATE TEMP TABLE {temp_table} (LIKE stack_fingerprint INCLUDING DEFAULTS)
-                ON COMMIT DROP
-            """)
-            
-            # COPY data into temp table
-            copy_sql = f"""
-                COPY {temp_table} ({columns_str})
-                FROM STDIN
-                WITH (FORMAT CSV, NULL '')
-            """
-            
-            # Use psycopg3-style copy
-            with cursor.copy(copy_sql) as copy:
-                while data := csv_buffer.read(8192):
-                    copy.write(data)
-            
-            # UPSERT from temp to real table
-            upsert_sql = f"""
-                INSERT INTO stack_fingerprint ({columns_str})
-                SELECT {columns_str} FROM {temp_table}
-                ON CONFLICT (series_stack_id)
-                DO UPDATE SET {update_set}, updated_at = CURRENT_TIMESTAMP
-            """
-            cursor.execute(upsert_sql)
+        if progress_callback:
+            progress_callback(processed, total_rows)
+        
+        if log_callback:
+            log_callback(f"  Batch {batch_idx + 1} committed: {processed:,}/{total_rows:,} total")
+    
+    if log_callback:
+        log_callback(f"Bulk UPSERT complete: {processed:,} fingerprints")
+    
+    return processed
+
+
+def _upsert_fingerprint_chunk(dbapi_conn, df: pl.DataFrame, temp_table: str) -> None:
+    """COPY one chunk into a temp table, UPSERT it into stack_fingerprint and commit."""
+    # Column list for COPY (exclude auto-generated fingerprint_id)
+    columns = df.columns
+    columns_str = ", ".join(columns)
+    
+    # Update columns for ON CONFLICT (all except series_stack_id)
+    update_columns = [c for c in columns if c != "series_stack_id"]
+    update_set = ", ".join([f"{c} = EXCLUDED.{c}" for c in update_columns])
+    
+    # Polars writes the CSV in native code straight into bytes
+    csv_buffer = BytesIO()
+    df.write_csv(csv_buffer, include_header=False, null_value="")
+    
+    cursor = dbapi_conn.cursor()
+    try:
+        # Create temp table
+        cursor.execute(f"""
+            CREATE TEMP TABLE {temp_table} (LIKE stack_fingerprint INCLUDING DEFAULTS)
+            ON COMMIT DROP
+        """)
+        
+        # COPY data into temp table
+        copy_sql = f"""
+            COPY {temp_table} ({columns_str})
+            FROM STDIN
+            WITH (FORMAT CSV, NULL '')
+        """
+        
+        # Use psycopg3-style copy
+        with cursor.copy(copy_sql) as copy:
+            copy.write(csv_buffer.getbuffer())
+        csv_buffer = None
+        
+        # UPSERT from temp to real table
+        upsert_sql = f"""
+            INSERT INTO stack_fingerprint ({columns_str})
+            SELECT {columns_str} FROM {temp_table}
+            ON CONFLICT (series_stack_id)
+            DO UPDATE SET {update_set}, updated_at = CURRENT_TIMESTAMP
+        """
+        cursor.execute(upsert_sql)
+        
+        # Commit this batch to release memory
+        dbapi_conn.commit()
+    except Exception as e:
+        dbapi_conn.rollback()
+        logger.error("Fingerprint chunk %s failed: %s", temp_table, e)
+        raise
+    finally:
+        cursor.close()
+
+
+def stream_fingerprints(
+    conn: Connection,
+    series_stack_ids: list[int],
+    chunk_size: int = FINGERPRINT_CHUNK_SIZE,
+    normalization_cache: NormalizationCache | None = None,
+    log_callback: Callable[[str], None] | None = None,
+    progress_callback: Callable[[int, int], None] | None = None,
+    skip_unchanged: bool = False,
+) -> dict[str, Any]:
+    """
+    Load, transform and UPSERT fingerprints chunk by chunk.
+    
+    Each chunk of ``chunk_size`` stack ids is queried, transformed and written
+    with COPY + UPSERT before it is dropped, so peak memory is bounded by the
+    chunk size instead of the cohort size. On PostgreSQL the next chunk is
+    loaded on a second connection while the current one is transformed and
+    written; the caller's pending changes are committed first so that
+    connection sees them (each chunk commits anyway).
+    
+    Args:
+        conn: SQLAlchemy connection used for the writes
+        series_stack_ids: Stacks to fingerprint
+        chunk_size: Stacks per chunk
+        normalization_cache: Shared across chunks so every distinct value is
+            normalized once per run
+        log_callback: Optional callback for logging
+        progress_callback: Optional callback (processed, total) for progress
+        skip_unchanged: Only transform and write stacks whose source hash
+            differs from the stored one (new stacks included)
+        
+    Returns:
+        Step 2 metrics merged over the fingerprints written (see
+        compute_metrics_from_dataframe); with skip_unchanged also
+        "fingerprints_unchanged", the stacks not transformed or rewritten
+    """
+    metrics = compute_metrics_from_dataframe(pl.DataFrame(schema=FINGERPRINT_OUTPUT_SCHEMA))
+    total = len(series_stack_ids)
+    if total == 0:
+        if log_callback:
+            log_callback("No fingerprints to insert")
+        return metrics
+    
+    cache = normalization_cache if normalization_cache is not None else NormalizationCache()
+    chunks = [series_stack_ids[i:i + chunk_size] for i in range(0, total, chunk_size)]
+    raw = conn.connection
+    dbapi_conn = getattr(raw, "driver_connection", raw)
+    
+    if log_callback:
+        log_callback(f"Streaming {total:,} stacks in {len(chunks)} chunk(s) of up to {chunk_size:,}")
+    
+    reader = None
+    executor = None
+    if len(chunks) > 1 and conn.dialect.name == "postgresql":
+        conn.commit()
+        reader = conn.engine.connect()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fingerprint-load")
+    
+    processed = 0
+    unchanged = 0
+    try:
+        pending = executor.submit(_load_source_chunk, reader, chunks[0]) if executor else None
+        for index, chunk_ids in enumerate(chunks):
+            if executor:
+                source_df = pending.result()
+                if index + 1 < len(chunks):
+                    pending = executor.submit(_load_source_chunk, reader, chunks[index + 1])
+            else:
+                source_df = _load_source_chunk(conn, chunk_ids)
             
-            # Commit this batch to release memory
-            dbapi_conn.commit()
+            processed += source_df.height
+            if skip_unchanged and source_df.height:
+                # Narrow the chunk to new or changed source rows before the transform
+                source_df = source_df.with_columns(
+                    pl.Series("source_hash", source_hashes(source_df, cache.version), dtype=pl.Utf8)
+                )
+                stored = load_source_hashes(conn, chunk_ids)
+                changed = [
+                    stored.get(stack_id) != digest
+                    for stack_id, digest in zip(
+                        source_df.get_column("series_stack_id").to_list(),
+                        source_df.get_column("source_hash").to_list(),
+                    )
+                ]
+                loaded = source_df.height
+                source_df = source_df.filter(pl.Series(changed, dtype=pl.Boolean))
+                unchanged += loaded - source_df.height
             
-            processed += batch_df.height
+            fingerprint_df = transform_fingerprints(source_df, normalization_cache=cache)
+            del source_df
+            if fingerprint_df.height:
+                _upsert_fingerprint_chunk(dbapi_conn, fingerprint_df, f"fingerprint_staging_{index}")
+            merge_fingerprint_metrics(metrics, compute_metrics_from_dataframe(fingerprint_df))
             
             if progress_callback:
-                progress_callback(processed, total_rows)
-            
+                progress_callback(processed, total)
             if log_callback:
-                log_callback(f"  Batch {batch_idx + 1} committed: {processed:,}/{total_rows:,} total")
-                
-        except Exception as e:
-            dbapi_conn.rollback()
-            logger.error("Batch %d failed: %s", batch_idx + 1, e)
-            raise
-        finally:
-            cursor.close()
+                log_callback(f"  Chunk {index + 1}/{len(chunks)} committed: {processed:,}/{total:,} fingerprints")
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if reader is not None:
+            reader.close()
     
     if log_callback:
-        log_callback(f"Bulk UPSERT complete: {processed:,} fingerprints")
-    
-    return processed
+        stats = cache.stats()
+        log_callback(
+            f"Streaming UPSERT complete: {processed:,} fingerprints "
+            f"(normalizer calls: {stats['misses']:,}, cached: {stats['hits']:,})"
+        )
+        if skip_unchanged:
+            log_callback(f"  {unchanged:,} fingerprints unchanged since the last run (not rewritten)")
+    if skip_unchanged:
+        metrics["fingerprints_unchanged"] = unchanged
+    return metrics
@@ -11,8 +11,11 @@ from __future__ import annotations
 
 import math
 from collections import Counter
-from dataclasses import dataclass
-from typing import Any, Optional
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+import numpy as np
 
 
 # =============================================================================
@@ -49,6 +52,12 @@ ORIENTATION_CONFIDENCE_THRESHOLD = 0.85
 # Minimum matches required for similarity-based filling
 MIN_SIMILARITY_MATCHES = 2
 
+# Bin width per PhysicsKey dimension (tr, te, ti, fa, slices)
+PHYSICS_BIN_STEPS = (100, 5, 100, 5, 20)
+
+# Query keys per vectorized neighbour search pass (bounds the candidate arrays)
+NEIGHBOUR_SEARCH_CHUNK = 4096
+
 
 # =============================================================================
 # Physics Binning
@@ -293,6 +302,67 @@ def get_relaxed_ti_keys(
     return adjacent
 
 
+def _single_dim_offsets(distance: int) -> list[tuple[int, ...]]:
+    """Bin offsets of get_adjacent_keys, in the same order."""
+    offsets = []
+    for dim in range(len(PHYSICS_BIN_STEPS)):
+        for delta in range(-distance, distance + 1):
+            if delta != 0:
+                offsets.append(tuple(delta if d == dim else 0 for d in range(len(PHYSICS_BIN_STEPS))))
+    return offsets
+
+
+def _multi_dim_offsets(distance: int) -> list[tuple[int, ...]]:
+    """Bin offsets of get_multi_dim_adjacent_keys (TE+TI, TR+FA), in the same order."""
+    offsets = []
+    for dim1, dim2 in ((1, 2), (0, 3)):
+        for delta1 in range(-distance, distance + 1):
+            for delta2 in range(-distance, distance + 1):
+                if delta1 == 0 or delta2 == 0:
+                    continue
+                offset = [0] * len(PHYSICS_BIN_STEPS)
+                offset[dim1], offset[dim2] = delta1, delta2
+                offsets.append(tuple(offset))
+    return offsets
+
+
+def _relaxed_ti_offsets(max_ti_distance: int = 6, max_te_distance: int = 4) -> list[tuple[int, ...]]:
+    """Bin offsets of get_relaxed_ti_keys, in the same order."""
+    return [
+        (0, te_delta, ti_delta, 0, 0)
+        for ti_delta in range(-max_ti_distance, max_ti_distance + 1) if ti_delta != 0
+        for te_delta in range(-max_te_distance, max_te_distance + 1)
+    ]
+
+
+@lru_cache(maxsize=None)
+def _search_levels(max_distance: int) -> tuple[tuple[str, np.ndarray], ...]:
+    """
+    (method, offsets) per step of the get_expanded_matches search, in order.
+
+    An offset applies to a key when every dimension it moves is set and stays
+    non-negative, which reproduces the skips of the key generators above
+    (a relaxed TI offset that moves an unset TE collapses onto the TE-fixed one).
+    """
+    levels = [("exact_bin", [(0, 0, 0, 0, 0)])]
+    for distance in range(1, max_distance + 1):
+        levels.append(("expanded_single", _single_dim_offsets(distance)))
+        levels.append(("expanded_multi", _multi_dim_offsets(distance)))
+    levels.append(("expanded_relaxed_ti", _relaxed_ti_offsets()))
+    return tuple((method, np.array(offsets, dtype=np.int64)) for method, offsets in levels)
+
+
+def _key_units(keys: Sequence[PhysicsKey]) -> tuple[np.ndarray, np.ndarray]:
+    """Key bins in bin-width units, and a mask of the dimensions that are set."""
+    bins = np.array(
+        [(key.tr_bin, key.te_bin, key.ti_bin, key.fa_bin, key.slices_bin) for key in keys],
+        dtype=object,
+    ).reshape(-1, 5)
+    present = bins != None  # noqa: E711 (element-wise)
+    units = np.where(present, bins, 0).astype(np.int64) // np.array(PHYSICS_BIN_STEPS, dtype=np.int64)
+    return units, present
+
+
 # =============================================================================
 # Reference Database
 # =============================================================================
@@ -310,16 +380,114 @@ class ReferenceStack:
     n_instances: Optional[int]
 
 
+class PhysicsIndex:
+    """
+    Sorted index over the occupied physics bins of a ReferenceDatabase.
+
+    Each bin is packed into one integer: per dimension, the rank of its value
+    among the reference values (0 for unset). A neighbour search then builds
+    the candidate bins of many keys at once as NumPy arrays and resolves them
+    with one searchsorted over the packed bins. The (base, technique) histogram
+    of a bin is counted once, on first use and in first-seen order, so merged
+    histograms break ties exactly like a Counter over the matched stacks.
+    """
+
+    def __init__(self, by_key: dict[PhysicsKey, list["ReferenceStack"]]):
+        keys = list(by_key)
+        units, present = _key_units(keys)
+        self._values = [np.unique(units[present[:, dim], dim]) for dim in range(5)]
+
+        # Mixed-radix multipliers; fall back to Python ints if the space overflows int64
+        multipliers = [1] * 5
+        for dim in range(3, -1, -1):
+            multipliers[dim] = multipliers[dim + 1] * (len(self._values[dim + 1]) + 1)
+        space = multipliers[0] * (len(self._values[0]) + 1)
+        self._dtype = np.int64 if space < 2**63 else object
+        self._multipliers = np.array(multipliers, dtype=self._dtype)
+
+        packed = self._pack(self._codes(units, present))
+        order = np.argsort(packed, kind="stable")
+        self._packed = packed[order]
+        self.keys = [keys[i] for i in order]
+        self.sizes = [len(by_key[key]) for key in self.keys]
+        self._by_key = by_key
+        self._histograms: dict[int, Counter] = {}
+
+    def histogram(self, position: int) -> Counter:
+        """(base, technique) counts of the bin at *position*, counted on first use."""
+        histogram = self._histograms.get(position)
+        if histogram is None:
+            stacks = self._by_key[self.keys[position]]
+            histogram = self._histograms[position] = Counter((m.base, m.technique) for m in stacks)
+        return histogram
+
+    def _codes(self, units: np.ndarray, present: np.ndarray) -> np.ndarray:
+        """Per-dimension value ranks (1-based, 0 for unset, -1 for values no bin has)."""
+        codes = np.zeros(units.shape, dtype=np.int64)
+        for dim, values in enumerate(self._values):
+            column = units[..., dim]
+            idx = np.searchsorted(values, column)
+            found = values[np.minimum(idx, len(values) - 1)] == column if len(values) else np.zeros(column.shape, bool)
+            codes[..., dim] = np.where(present[..., dim], np.where(found, idx + 1, -1), 0)
+        return codes
+
+    def _pack(self, codes: np.ndarray) -> np.ndarray:
+        return (codes.astype(self._dtype) * self._multipliers).sum(axis=-1)
+
+    def search(self, keys: Sequence[PhysicsKey], max_distance: int = 2) -> list[tuple[list[int], str]]:
+        """
+        Run the get_expanded_matches search for many keys at once.
+
+        Returns:
+            Per key, (bin positions in search order, method); ([], "no_match")
+            when no bin is found
+        """
+        results: list[tuple[list[int], str]] = [([], "no_match")] * len(keys)
+        if not keys or not self.keys:
+            return results
+        for start in range(0, len(keys), NEIGHBOUR_SEARCH_CHUNK):
+            units, present = _key_units(keys[start:start + NEIGHBOUR_SEARCH_CHUNK])
+            pending = np.arange(len(units))
+            for method, offsets in _search_levels(max_distance):
+                if not len(pending):
+                    break
+                found, positions = self._lookup(units[pending], present[pending], offsets)
+                matched = found.any(axis=1)
+                for row in np.flatnonzero(matched):
+                    results[start + pending[row]] = (positions[row][found[row]].tolist(), method)
+                pending = pending[~matched]
+        return results
+
+    def _lookup(
+        self,
+        units: np.ndarray,
+        present: np.ndarray,
+        offsets: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Mask (keys x offsets) of the candidate bins that exist, and their bin positions."""
+        moved = offsets != 0
+        candidates = units[:, None, :] + offsets[None, :, :]
+        valid = ~((moved & ~present[:, None, :]) | (moved & (candidates < 0))).any(axis=2)
+        codes = self._codes(candidates, np.broadcast_to(present[:, None, :], candidates.shape))
+        valid &= (codes >= 0).all(axis=2)
+        packed = self._pack(codes)
+        positions = np.searchsorted(self._packed, packed)
+        positions = np.minimum(positions, len(self._packed) - 1)
+        return valid & (self._packed[positions] == packed), positions
+
+
 class ReferenceDatabase:
     """
     In-memory database of classified stacks for similarity matching.
     
-    Groups stacks by physics key for efficient lookup.
+    Groups stacks by physics key for efficient lookup. Neighbour searches
+    go through a PhysicsIndex built on first use.
     """
     
     def __init__(self):
         self._by_key: dict[PhysicsKey, list[ReferenceStack]] = {}
         self._total_count = 0
+        self._index: PhysicsIndex | None = None
     
     def add(self, stack: ReferenceStack) -> None:
         """Add a reference stack to the database."""
@@ -330,6 +498,7 @@ class ReferenceDatabase:
             self._by_key[key] = []
         self._by_key[key].append(stack)
         self._total_count += 1
+        self._index = None
     
     def get_matches(self, key: PhysicsKey) -> list[ReferenceStack]:
         """Get all stacks matching the exact physics key."""
@@ -350,6 +519,9 @@ class ReferenceDatabase:
         4. Repeat steps 2-3 with distance=2 if still no matches
         5. For IR sequences (TI present): try relaxed TI search (±6 bins = ±600ms)
 
+        The bins come from the PhysicsIndex; the neighbour key generators
+        above define the same search one key at a time.
+
         Returns:
             Tuple of (matches, method) where method is:
             - "exact_bin": Exact physics match
@@ -358,41 +530,20 @@ class ReferenceDatabase:
             - "expanded_relaxed_ti": Relaxed TI search for IR sequences
             - "no_match": No matches found
         """
-        # Try exact match first
-        matches = self.get_matches(key)
-        if matches:
-            return matches, "exact_bin"
-
-        # Expand search progressively
-        for distance in range(1, max_distance + 1):
-            # First try single-dimension expansion
-            adjacent_keys = get_adjacent_keys(key, distance)
-            for adj_key in adjacent_keys:
-                matches.extend(self.get_matches(adj_key))
-
-            if matches:
-                return matches, "expanded_single"
-
-            # Then try multi-dimension expansion (TE+TI, TR+FA pairs)
-            multi_dim_keys = get_multi_dim_adjacent_keys(key, distance)
-            for adj_key in multi_dim_keys:
-                matches.extend(self.get_matches(adj_key))
-
-            if matches:
-                return matches, "expanded_multi"
-
-        # Last resort for IR sequences: relaxed TI search
-        # FLAIR/STIR sequences can have TI ranging from 1800-3000ms across vendors
-        # Try wider TI range while keeping other params fixed
-        if key.ti_bin is not None:
-            relaxed_ti_keys = get_relaxed_ti_keys(key, max_ti_distance=6)
-            for adj_key in relaxed_ti_keys:
-                matches.extend(self.get_matches(adj_key))
-
-            if matches:
-                return matches, "expanded_relaxed_ti"
-
-        return [], "no_match"
+        bins, method = self.index.search([key], max_distance)[0]
+        if len(bins) == 1:
+            return self.get_matches(self.index.keys[bins[0]]), method
+        matches: list[ReferenceStack] = []
+        for position in bins:
+            matches.extend(self.get_matches(self.index.keys[position]))
+        return matches, method
+
+    @property
+    def index(self) -> PhysicsIndex:
+        """Neighbour search index over the bins, rebuilt after stacks are added."""
+        if self._index is None:
+            self._index = PhysicsIndex(self._by_key)
+        return self._index
     
     @property
     def total_count(self) -> int:
@@ -583,15 +734,79 @@ def find_best_match(
     Returns:
         SimilarityResult with best match or no_match
     """
-    key = compute_physics_key(tr, te, ti, fa, n_instances)
+    return find_best_matches(ref_db, [{
+        "mr_tr": tr,
+        "mr_te": te,
+        "mr_ti": ti,
+        "mr_flip_angle": fa,
+        "stack_n_instances": n_instances,
+        "scanning_sequence": scanning_sequence,
+    }])[0]
 
-    matches, method = ref_db.get_expanded_matches(key, max_distance=2)
 
-    if not matches:
+def find_best_matches(
+    ref_db: ReferenceDatabase,
+    stacks: Sequence[dict[str, Any]],
+) -> list[SimilarityResult]:
+    """
+    Run find_best_match for many stacks in one indexed neighbour search.
+
+    Stacks sharing a physics key are searched once, and the (base, technique)
+    counts come from the per-bin histograms of the index instead of the
+    matched stacks.
+
+    Args:
+        ref_db: Reference database of classified stacks
+        stacks: Dicts with mr_tr, mr_te, mr_ti, mr_flip_angle,
+            stack_n_instances and (optionally) scanning_sequence
+
+    Returns:
+        One SimilarityResult per stack, in input order
+    """
+    keys = [
+        compute_physics_key(
+            stack.get("mr_tr"),
+            stack.get("mr_te"),
+            stack.get("mr_ti"),
+            stack.get("mr_flip_angle"),
+            stack.get("stack_n_instances"),
+        )
+        for stack in stacks
+    ]
+    index = ref_db.index
+    unique_keys = list(dict.fromkeys(keys))
+    found = dict(zip(unique_keys, index.search(unique_keys, max_distance=2)))
+
+    results = []
+    memo: dict[tuple[PhysicsKey, Any], SimilarityResult] = {}
+    for key, stack in zip(keys, stacks):
+        scanning_sequence = stack.get("scanning_sequence")
+        result = memo.get((key, scanning_sequence))
+        if result is None:
+            bins, method = found[key]
+            result = memo[(key, scanning_sequence)] = _select_pair(index, bins, method, scanning_sequence)
+        results.append(replace(result))
+    return results
+
+
+def _select_pair(
+    index: PhysicsIndex,
+    bins: list[int],
+    method: str,
+    scanning_sequence: Optional[str],
+) -> SimilarityResult:
+    """Pick the most frequent compatible (base, technique) pair over the matched bins."""
+    if not bins:
         return SimilarityResult(method="no_match")
 
     # Count (base, technique) pairs
-    pair_counts = Counter((m.base, m.technique) for m in matches)
+    if len(bins) == 1:
+        pair_counts = index.histogram(bins[0])
+    else:
+        pair_counts = Counter()
+        for position in bins:
+            pair_counts.update(index.histogram(position))
+    total = sum(index.sizes[position] for position in bins)
 
     # Find best compatible pair
     for (best_base, best_technique), count in pair_counts.most_common():
@@ -604,7 +819,7 @@ def find_best_match(
             return SimilarityResult(
                 method="insufficient_matches",
                 match_count=count,
-                total_in_bin=len(matches),
+                total_in_bin=total,
             )
 
         return SimilarityResult(
@@ -612,14 +827,14 @@ def find_best_match(
             technique=best_technique,
             method=method,
             match_count=count,
-            total_in_bin=len(matches),
+            total_in_bin=total,
         )
 
     # No compatible technique found
     return SimilarityResult(
         method="no_compatible_match",
         match_count=0,
-        total_in_bin=len(matches),
+        total_in_bin=total,
     )
 
 
@@ -38,6 +38,15 @@ class SortingConfig(BaseModel):
     force_reprocess: bool = Field(default=False, alias="forceReprocess")
     profile: str = Field(default="standard")
     selected_modalities: list[str] = Field(default=["MR", "CT", "PT"], alias="selectedModalities")
+    # Reuse Step 2 normalization outputs (manufacturer, tracer, text blob) stored by earlier runs
+    normalization_cache: bool = Field(default=False, alias="normalizationCache")
+    # Step 3 worker processes (None = one per CPU core minus one, capped at 16; 1 = in-process)
+    classification_workers: int | None = Field(default=None, ge=1, le=64, alias="classificationWorkers")
+    # Reuse Step 3 results stored by earlier runs for identical classification inputs
+    classification_cache: bool = Field(default=False, alias="classificationCache")
+    # Re-run Steps 3-4 only for stacks whose fingerprint or detection rules changed
+    # since they were last classified (takes precedence over skip_classified)
+    reclassify_changed: bool = Field(default=False, alias="reclassifyChanged")
 
     class Config:
         populate_by_name = True
@@ -135,7 +144,7 @@ class Step1Handover:
     # ═══════════════════════════════════════════════════════════════════
     cohort_id: int
     cohort_name: str
-    processing_mode: str  # "incremental" | "full_reprocess"
+    processing_mode: str  # "incremental" | "full_reprocess" | "changed"
 
     # ═══════════════════════════════════════════════════════════════════
     # METRICS: For UI display and logging (not used by Step 2)
@@ -226,6 +235,11 @@ class Step2Metrics:
     series_with_single_stack: int = 0
     max_stacks_per_series: int = 0
 
+    # Incremental sorting ("changed" mode): stacks whose fingerprint hash is
+    # unchanged are not rewritten; dirty stacks are handed to Step 3
+    stacks_unchanged: int = 0
+    stacks_dirty: int | None = None
+
     # Orientation confidence metrics
     stacks_with_low_confidence: int = 0  # Confidence < 0.85 (oblique orientations)
     avg_orientation_confidence: float | None = None
@@ -253,6 +267,8 @@ class Step2Metrics:
             "series_with_multiple_stacks": self.series_with_multiple_stacks,
             "series_with_single_stack": self.series_with_single_stack,
             "max_stacks_per_series": self.max_stacks_per_series,
+            "stacks_unchanged": self.stacks_unchanged,
+            "stacks_dirty": self.stacks_dirty,
             "stacks_with_low_confidence": self.stacks_with_low_confidence,
             "avg_orientation_confidence": self.avg_orientation_confidence,
             "min_orientation_confidence": self.min_orientation_confidence,
@@ -277,6 +293,10 @@ class Step2Handover:
     cohort_name: str = ""
     processing_mode: str = ""
 
+    # Detection rules version the dirty stacks were selected against; Step 3
+    # caches and records its results under the same version
+    rules_version: str = ""
+
     # Summary metrics
     fingerprints_created: int = 0
     stacks_processed: int = 0
@@ -294,6 +314,7 @@ class Step2Handover:
             "cohort_id": self.cohort_id,
             "cohort_name": self.cohort_name,
             "processing_mode": self.processing_mode,
+            "rules_version": self.rules_version,
             "fingerprints_created": self.fingerprints_created,
             "stacks_processed": self.stacks_processed,
             "series_with_multiple_stacks": self.series_with_multiple_stacks,
@@ -328,6 +349,11 @@ class Step3Metrics:
     post_contrast_count: int = 0
     localizer_count: int = 0
 
+    # Signature deduplication
+    unique_signatures: int = 0  # Distinct classification inputs among the stacks
+    signatures_from_cache: int = 0  # Signatures answered by the persistent result cache
+    db_seconds: float = 0.0  # Time spent loading and writing rows
+
     # Status
     warnings: list[str] = field(default_factory=list)
     errors: list[str] = field(default_factory=list)
@@ -347,6 +373,9 @@ class Step3Metrics:
             "spine_detected_count": self.spine_detected_count,
             "post_contrast_count": self.post_contrast_count,
             "localizer_count": self.localizer_count,
+            "unique_signatures": self.unique_signatures,
+            "signatures_from_cache": self.signatures_from_cache,
+            "db_seconds": round(self.db_seconds, 3),
             "warnings": self.warnings,
             "errors": self.errors,
         }
@@ -429,6 +458,9 @@ class Step4Metrics:
     stacks_newly_flagged: int = 0
     new_review_reasons: dict[str, int] = field(default_factory=dict)
 
+    # Time spent loading and writing rows
+    db_seconds: float = 0.0
+
     # Status
     warnings: list[str] = field(default_factory=list)
     errors: list[str] = field(default_factory=list)
@@ -452,6 +484,7 @@ class Step4Metrics:
             "contrast_conflict_count": self.contrast_conflict_count,
             "stacks_newly_flagged": self.stacks_newly_flagged,
             "new_review_reasons": self.new_review_reasons,
+            "db_seconds": round(self.db_seconds, 3),
             "warnings": self.warnings,
             "errors": self.errors,
         }
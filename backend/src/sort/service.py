@@ -130,6 +130,7 @@ def reconstruct_handover(step_id: str, handover_data: dict[str, Any], conn) -> A
             cohort_id=handover_data.get('cohort_id'),
             cohort_name=handover_data.get('cohort_name', ''),
             processing_mode=handover_data.get('processing_mode', 'incremental'),
+            rules_version=handover_data.get('rules_version', ''),
             fingerprints_created=handover_data.get('fingerprints_created', 0),
             stacks_processed=handover_data.get('stacks_processed', 0),
             series_with_multiple_stacks=handover_data.get('series_with_multiple_stacks', 0),
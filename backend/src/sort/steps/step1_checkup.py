@@ -44,6 +44,7 @@ class Step1Checkup(BaseStep):
     - Validate required fields (especially study dates)
     - Repair missing dates from alternative sources
     - Filter already-classified series if skip_classified=True
+      (reclassify_changed keeps them all; Step 2 picks the dirty stacks)
 
     Output:
     - Step1Handover containing the list of SeriesForProcessing
@@ -242,7 +243,7 @@ class Step1Checkup(BaseStep):
                 )
                 
                 # Build empty handover when no series match
-                processing_mode = "incremental" if context.config.skip_classified else "full_reprocess"
+                processing_mode = self._processing_mode(context.config)
                 handover = Step1Handover(
                     series_to_process=[],
                     series_ids=set(),
@@ -278,17 +279,18 @@ class Step1Checkup(BaseStep):
                 current_action="Checking series_classification_cache",
             )
 
+            # "changed" mode keeps every series; Step 2 narrows it to the dirty stacks
+            processing_mode = self._processing_mode(context.config)
+            skip_classified = processing_mode == "incremental"
             series_to_process, skipped_series = await self._filter_by_classification(
-                conn, series_rows, context.config.skip_classified
+                conn, series_rows, skip_classified
             )
 
             metrics.series_already_classified = len(skipped_series)
             metrics.series_to_process_count = len(series_to_process)
             metrics.skipped_series_uids = [s.series_instance_uid for s in skipped_series]
 
-            processing_mode = "incremental" if context.config.skip_classified else "full_reprocess"
-
-            if context.config.skip_classified and skipped_series:
+            if skip_classified and skipped_series:
                 metrics.warnings.append(
                     f"{len(skipped_series)} series skipped (already classified)"
                 )
@@ -297,7 +299,7 @@ class Step1Checkup(BaseStep):
                     len(skipped_series),
                 )
 
-            if not series_to_process and context.config.skip_classified:
+            if not series_to_process and skip_classified:
                 # All series already classified - this is OK, just nothing to do
                 metrics.warnings.append("All series already classified - nothing to process")
                 logger.info("Step 1.5: All series already classified, nothing to process")
@@ -363,6 +365,13 @@ class Step1Checkup(BaseStep):
                 metrics=metrics.to_dict(),
             )
 
+    @staticmethod
+    def _processing_mode(config: Any) -> str:
+        """Return "changed", "incremental" or "full_reprocess" for the sorting config."""
+        if config.reclassify_changed:
+            return "changed"
+        return "incremental" if config.skip_classified else "full_reprocess"
+
     async def _validate_study_dates(
         self,
         conn: Any,
@@ -9,7 +9,11 @@ Key improvements over the original implementation:
 - Vectorized transformations using Polars (10-100x faster)
 - Bulk COPY + UPSERT instead of individual INSERT statements
 - Batched commits to prevent PostgreSQL OOM
+- Chunked load → transform → COPY so memory is bounded by the chunk size
 - Log streaming to frontend for real-time status visibility
+- "changed" mode: only stacks whose source rows changed are transformed and
+  rewritten, and only dirty stacks (new fingerprint or rules version) are
+  handed to Step 3
 
 Performance: ~45-60 seconds for 450K stacks (vs OOM with old approach)
 """
@@ -33,11 +37,14 @@ from ..queries import (
     StackForFinalization,
 )
 from ..stack_key import generate_stack_key_from_db
+from ..classification_engine import DETECTION_YAML_DIR, classification_cache_version
 from ..fingerprint_polars import (
-    load_fingerprint_source_data,
-    transform_fingerprints,
-    compute_metrics_from_dataframe,
-    bulk_upsert_fingerprints,
+    FINGERPRINT_CHUNK_SIZE,
+    NormalizationCache,
+    find_dirty_stacks,
+    load_normalization_cache,
+    save_normalization_cache,
+    stream_fingerprints,
 )
 
 logger = logging.getLogger(__name__)
@@ -181,122 +188,70 @@ class Step2StackFingerprint(BaseStep):
             self.log(f"Computed stack_key for {multi_stack_count:,} multi-stack series")
 
             # ═══════════════════════════════════════════════════════════
-            # PHASE 5: LOAD SOURCE DATA WITH POLARS
+            # PHASE 5: STREAM LOAD → TRANSFORM → COPY IN CHUNKS
             # ═══════════════════════════════════════════════════════════
-            self.log("Loading fingerprint source data (single JOIN query)...")
+            self.log("Streaming fingerprints (chunked JOIN query → Polars → COPY + UPSERT)...")
             await self.emit_progress(
-                25, "Loading fingerprint source data...",
-                current_action="Single JOIN query"
+                25, "Generating fingerprints...",
+                current_action="Chunked load, transform and COPY"
             )
 
-            # Use log callback to stream logs to frontend
             loop = asyncio.get_running_loop()
 
             def log_cb(msg: str) -> None:
                 # This runs in a worker thread, so we must schedule the update
                 # on the main event loop
                 asyncio.run_coroutine_threadsafe(
-                    self._safe_log_and_emit(msg, 25, "Loading fingerprint source data..."),
+                    self._safe_log_and_emit(msg, 25, "Generating fingerprints..."),
                     loop
                 )
 
-            # Run blocking DB query in executor
-            source_df = await loop.run_in_executor(
-                None,
-                functools.partial(
-                    load_fingerprint_source_data,
-                    conn,
-                    stack_ids,
-                    log_callback=log_cb
-                )
-            )
-
-            self.log(f"Loaded {source_df.height:,} rows from database")
-            await self.emit_progress(
-                35, f"Loaded {source_df.height:,} rows",
-                current_action="Data loaded"
-            )
-
-            # ═══════════════════════════════════════════════════════════
-            # PHASE 6: TRANSFORM DATA WITH POLARS
-            # ═══════════════════════════════════════════════════════════
-            self.log("Transforming fingerprints (vectorized Polars operations)...")
-            await self.emit_progress(
-                40, "Transforming fingerprints...",
-                current_action="Vectorized transformations"
-            )
-
-            # Update log callback for transformation phase
-            def log_cb_transform(msg: str) -> None:
-                asyncio.run_coroutine_threadsafe(
-                    self._safe_log_and_emit(msg, 40, "Transforming fingerprints..."),
-                    loop
-                )
-
-            fingerprint_df = await loop.run_in_executor(
-                None,
-                functools.partial(
-                    transform_fingerprints,
-                    source_df,
-                    log_callback=log_cb_transform
-                )
-            )
-
-            self.log(f"Transformed {fingerprint_df.height:,} fingerprints")
-            await self.emit_progress(
-                55, f"Transformed {fingerprint_df.height:,} fingerprints",
-                current_action="Transformations complete"
-            )
-
-            # ═══════════════════════════════════════════════════════════
-            # PHASE 7: BULK UPSERT WITH BATCHED COMMITS
-            # ═══════════════════════════════════════════════════════════
-            self.log("Starting bulk UPSERT (batched COPY + temp table)...")
-            await self.emit_progress(
-                60, "Inserting fingerprints...",
-                current_action="Bulk COPY + UPSERT"
-            )
-
-            total_stacks = fingerprint_df.height
-
-            # Sync wrapper for progress callback
             def progress_cb(processed: int, total: int) -> None:
-                # Calculate progress percentage
-                pct = 60 + int((processed / total) * 30)  # 60-90%
-                msg = f"Inserted {processed:,}/{total:,} fingerprints..."
-                action = f"Batch {processed // 50_000 + 1}"
-                
-                # Schedule update on main loop
+                pct = 25 + int((processed / total) * 65)  # 25-90%
                 asyncio.run_coroutine_threadsafe(
-                    self.emit_progress(pct, msg, current_action=action),
+                    self.emit_progress(
+                        pct,
+                        f"Fingerprinted {processed:,}/{total:,} stacks...",
+                        current_action=f"Chunk {(processed - 1) // FINGERPRINT_CHUNK_SIZE + 1}",
+                    ),
                     loop
                 )
-                # Also log locally (optional, might be too verbose)
-                # self.log(f"Progress: {processed:,}/{total:,} fingerprints inserted")
 
-            # Update log callback for insert phase
-            def log_cb_insert(msg: str) -> None:
-                asyncio.run_coroutine_threadsafe(
-                    self._safe_log_and_emit(msg, 60, "Inserting fingerprints..."),
-                    loop
+            if context.config.normalization_cache:
+                normalization_cache = await loop.run_in_executor(
+                    None,
+                    functools.partial(load_normalization_cache, conn, log_callback=log_cb)
                 )
+            else:
+                normalization_cache = NormalizationCache()
 
-            rows_inserted = await loop.run_in_executor(
+            # "changed" mode: unchanged fingerprints are not rewritten
+            changed_mode = step1_handover.processing_mode == "changed"
+
+            df_metrics = await loop.run_in_executor(
                 None,
                 functools.partial(
-                    bulk_upsert_fingerprints,
+                    stream_fingerprints,
                     conn,
-                    fingerprint_df,
-                    batch_size=50_000,
-                    log_callback=log_cb_insert,
+                    stack_ids,
+                    chunk_size=FINGERPRINT_CHUNK_SIZE,
+                    normalization_cache=normalization_cache,
+                    log_callback=log_cb,
                     progress_callback=progress_cb,
+                    skip_unchanged=changed_mode,
                 )
             )
 
-            self.log(f"Bulk UPSERT complete: {rows_inserted:,} fingerprints")
+            if context.config.normalization_cache:
+                await loop.run_in_executor(
+                    None,
+                    functools.partial(save_normalization_cache, conn, normalization_cache, log_callback=log_cb)
+                )
+
+            self.log(f"Fingerprint streaming complete: {df_metrics['total_fingerprints_created']:,} fingerprints")
 
             # ═══════════════════════════════════════════════════════════
-            # PHASE 8: COMPUTE METRICS FROM DATAFRAME
+            # PHASE 6: COLLECT METRICS
             # ═══════════════════════════════════════════════════════════
             self.log("Computing final metrics...")
             await self.emit_progress(
@@ -304,8 +259,6 @@ class Step2StackFingerprint(BaseStep):
                 current_action="Analyzing results"
             )
 
-            df_metrics = compute_metrics_from_dataframe(fingerprint_df)
-            
             # Update metrics object
             metrics.total_fingerprints_created = df_metrics["total_fingerprints_created"]
             metrics.stacks_processed = df_metrics["stacks_processed"]
@@ -317,12 +270,13 @@ class Step2StackFingerprint(BaseStep):
             metrics.mr_stacks_with_diffusion = df_metrics.get("mr_stacks_with_diffusion", 0)
             metrics.ct_stacks_calcium_score = df_metrics.get("ct_stacks_calcium_score", 0)
             metrics.pet_stacks_attn_corrected = df_metrics.get("pet_stacks_attn_corrected", 0)
+            metrics.stacks_unchanged = df_metrics.get("fingerprints_unchanged", 0)
 
             # Calculate stack analysis metrics from stacks list
             self._calculate_stack_metrics(stacks, stacks_by_series, metrics)
 
             # ═══════════════════════════════════════════════════════════
-            # PHASE 9: BUILD HANDOVER
+            # PHASE 7: BUILD HANDOVER
             # ═══════════════════════════════════════════════════════════
             self.log("Building handover for next step...")
             await self.emit_progress(
@@ -330,13 +284,27 @@ class Step2StackFingerprint(BaseStep):
                 current_action="Preparing for next step"
             )
 
-            # Get fingerprint_ids from DB (we need them for handover)
-            fp_result = conn.execute(text("""
-                SELECT fingerprint_id 
-                FROM stack_fingerprint 
-                WHERE series_stack_id = ANY(:stack_ids)
-            """), {"stack_ids": stack_ids})
-            fingerprint_ids = [row.fingerprint_id for row in fp_result]
+            # Computed once from Step 3's YAML dir and handed over with the stacks
+            rules_version = classification_cache_version(str(DETECTION_YAML_DIR))
+            if changed_mode:
+                # Only stacks never classified, or classified from another
+                # fingerprint or rules version, go on to Steps 3-4
+                dirty = find_dirty_stacks(conn, stack_ids, rules_version)
+                fingerprint_ids = [fingerprint_id for fingerprint_id, _ in dirty]
+                stack_ids = [stack_id for _, stack_id in dirty]
+                metrics.stacks_dirty = len(dirty)
+                self.log(
+                    f"Incremental: {metrics.stacks_unchanged:,} fingerprints unchanged, "
+                    f"{len(dirty):,} stacks need (re)classification"
+                )
+            else:
+                # Get fingerprint_ids from DB (we need them for handover)
+                fp_result = conn.execute(text("""
+                    SELECT fingerprint_id 
+                    FROM stack_fingerprint 
+                    WHERE series_stack_id = ANY(:stack_ids)
+                """), {"stack_ids": stack_ids})
+                fingerprint_ids = [row.fingerprint_id for row in fp_result]
 
             handover = Step2Handover(
                 fingerprint_ids=fingerprint_ids,
@@ -344,6 +312,7 @@ class Step2StackFingerprint(BaseStep):
                 cohort_id=step1_handover.cohort_id,
                 cohort_name=step1_handover.cohort_name,
                 processing_mode=step1_handover.processing_mode,
+                rules_version=rules_version,
                 fingerprints_created=len(fingerprint_ids),
                 stacks_processed=len(stack_ids),
                 series_with_multiple_stacks=metrics.series_with_multiple_stacks,
@@ -6,27 +6,42 @@ and populates the series_classification_cache table.
 
 Key features:
 - Batch processing for memory efficiency
+- Multi-process classification (results stream back in batch order)
+- Each unique classification signature is classified once, optionally
+  reusing results persisted by earlier runs
 - Progress streaming to frontend
-- Bulk upsert for performance
+- COPY + UPSERT of the results, built column-wise
 - Comprehensive metrics tracking
 """
 
 from __future__ import annotations
 
 import asyncio
-import functools
 import logging
+import time
 from collections import Counter
 from typing import Any
 
+import polars as pl
 from sqlalchemy import text
 
 from .base import BaseStep, StepContext, StepResult
+from ..bulk_writes import copy_upsert
+from ..classification_engine import (
+    DETECTION_YAML_DIR,
+    ClassificationEngine,
+    classification_cache_version,
+    deduplicate_rows,
+    fingerprint_row,
+    load_result_cache,
+    result_from_row,
+    save_result_cache,
+    signature_hash,
+)
 from ..models import Step3Handover, Step3Metrics
 
 # Import classification pipeline
 from classification.pipeline import ClassificationPipeline
-from classification.core.context import ClassificationContext
 from classification.core.output import ClassificationResult
 
 logger = logging.getLogger(__name__)
@@ -55,7 +70,7 @@ class Step3Classification(BaseStep):
     def __init__(self, progress_callback=None):
         super().__init__(progress_callback)
         # Initialize the classification pipeline once
-        self._pipeline = ClassificationPipeline()
+        self._pipeline = ClassificationPipeline(str(DETECTION_YAML_DIR))
 
     async def execute(self, context: StepContext) -> StepResult:
         """Execute Step 3: Classification."""
@@ -109,7 +124,9 @@ class Step3Classification(BaseStep):
             )
 
             # Load all fingerprints (we need full data for classification)
+            started = time.perf_counter()
             fingerprints = self._load_fingerprints(conn, fingerprint_ids)
+            metrics.db_seconds += time.perf_counter() - started
             self.log(f"Loaded {len(fingerprints):,} fingerprints")
 
             if not fingerprints:
@@ -129,33 +146,86 @@ class Step3Classification(BaseStep):
             total_fingerprints = len(fingerprints)
             classification_results: list[tuple[dict, ClassificationResult]] = []
             
-            # Process in batches for memory efficiency and progress updates
-            batch_count = (total_fingerprints + CLASSIFICATION_BATCH_SIZE - 1) // CLASSIFICATION_BATCH_SIZE
-            
-            loop = asyncio.get_running_loop()
+            # Stacks with identical classification inputs share one result
+            rows = [fingerprint_row(fp) for fp in fingerprints]
+            unique_rows, slots = deduplicate_rows(rows)
+            del rows
+            unique_results: list[tuple | None] = [None] * len(unique_rows)
+            metrics.unique_signatures = len(unique_rows)
+            self.log(f"{total_fingerprints:,} stacks share {len(unique_rows):,} unique classification signatures")
+
+            # Step 2 selected the dirty stacks against this version
+            rules_version = step2_handover.rules_version or classification_cache_version(
+                str(self._pipeline.yaml_dir)
+            )
+            result_cache = None
+            hashes: list[str] = []
+            if context.config.classification_cache:
+                hashes = [signature_hash(row) for row in unique_rows]
+                started = time.perf_counter()
+                result_cache = load_result_cache(conn, rules_version, hashes)
+                metrics.db_seconds += time.perf_counter() - started
+                for idx, key in enumerate(hashes):
+                    unique_results[idx] = result_cache.get(key)
+                metrics.signatures_from_cache = len(unique_rows) - unique_results.count(None)
+                self.log(f"Reused {metrics.signatures_from_cache:,} cached classification results")
 
-            for batch_idx in range(batch_count):
-                start_idx = batch_idx * CLASSIFICATION_BATCH_SIZE
-                end_idx = min(start_idx + CLASSIFICATION_BATCH_SIZE, total_fingerprints)
-                batch = fingerprints[start_idx:end_idx]
+            # Process in batches for memory efficiency and progress updates
+            pending = [idx for idx, result in enumerate(unique_results) if result is None]
+            batches = [
+                pending[start:start + CLASSIFICATION_BATCH_SIZE]
+                for start in range(0, len(pending), CLASSIFICATION_BATCH_SIZE)
+            ]
+            batch_count = len(batches)
 
-                # Run classification in executor (blocking operation)
-                batch_results = await loop.run_in_executor(
-                    None,
-                    functools.partial(self._classify_batch, batch)
-                )
-                classification_results.extend(batch_results)
+            engine = ClassificationEngine(
+                context.config.classification_workers,
+                pipeline=self._pipeline,
+                detection_yaml_dir=str(self._pipeline.yaml_dir),
+            )
+            if engine.workers > 1 and batch_count > 1:
+                self.log(f"Classifying on {min(engine.workers, batch_count)} worker processes")
+
+            # Workers get compact rows and return compact result rows, in batch order
+            row_batches = [[unique_rows[idx] for idx in batch] for batch in batches]
+            batch_idx = 0
+            done = 0
+            async for result_rows in engine.classify_batches(row_batches):
+                batch = batches[batch_idx]
+                for idx, row in zip(batch, result_rows):
+                    unique_results[idx] = row
+                    if result_cache is not None:
+                        result_cache.add(hashes[idx], row)
+                batch_idx += 1
+                done += len(batch)
 
                 # Calculate progress (10-80%)
-                progress = 10 + int((end_idx / total_fingerprints) * 70)
+                progress = 10 + int((done / len(pending)) * 70)
                 await self.emit_progress(
                     progress,
-                    f"Classified {end_idx:,}/{total_fingerprints:,} stacks...",
-                    current_action=f"Batch {batch_idx + 1}/{batch_count}"
+                    f"Classified {done:,}/{len(pending):,} unique signatures...",
+                    current_action=f"Batch {batch_idx}/{batch_count}"
                 )
-                self.log(f"Batch {batch_idx + 1}/{batch_count}: classified {len(batch)} stacks")
+                self.log(f"Batch {batch_idx}/{batch_count}: classified {len(batch)} signatures")
+
+            if result_cache is not None:
+                started = time.perf_counter()
+                stored = save_result_cache(conn, result_cache)
+                metrics.db_seconds += time.perf_counter() - started
+                if stored:
+                    self.log(f"Stored {stored:,} new classification results in the cache")
+
+            # Fan the signature results out to every stack
+            classification_results.extend(
+                (fp, result_from_row(unique_results[slot])) for fp, slot in zip(fingerprints, slots)
+            )
 
             self.log(f"Classification complete: {len(classification_results):,} results")
+            for name, stats in engine.parser_cache_stats().items():
+                self.log(
+                    f"{name} cache: {stats['hit_rate']:.1%} hits "
+                    f"({stats['hits']:,} hits, {stats['misses']:,} misses)"
+                )
 
             # ═══════════════════════════════════════════════════════════
             # PHASE 4: BULK UPSERT TO DATABASE
@@ -166,17 +236,22 @@ class Step3Classification(BaseStep):
                 current_action="Bulk upsert to series_classification_cache"
             )
 
-            # Prepare values for upsert (CPU-bound, can run in executor)
-            values = self._prepare_upsert_values(
+            # Build the rows column-wise (CPU-bound, no DB access)
+            frame = self._build_upsert_frame(
                 classification_results,
-                step2_handover.cohort_name
+                step2_handover.cohort_name,
+                rules_version,
             )
 
-            # Insert in batches, yielding control between batches
+            # COPY + UPSERT in batches, yielding control between batches
             # This keeps the event loop responsive for health checks and progress updates
-            rows_inserted = await self._async_batch_upsert(conn, values)
+            started = time.perf_counter()
+            rows_inserted = await self._async_batch_upsert(conn, frame)
+            upsert_seconds = time.perf_counter() - started
+            metrics.db_seconds += upsert_seconds
+            del frame
 
-            self.log(f"Inserted {rows_inserted:,} classification records")
+            self.log(f"Inserted {rows_inserted:,} classification records in {upsert_seconds:.2f}s")
 
             # ═══════════════════════════════════════════════════════════
             # PHASE 5: COMPUTE METRICS
@@ -223,11 +298,12 @@ class Step3Classification(BaseStep):
 
             self.log(
                 f"Step 3 complete: {len(classified_stack_ids):,} classified, "
-                f"{len(stacks_requiring_review):,} requiring review"
+                f"{len(stacks_requiring_review):,} requiring review "
+                f"({metrics.db_seconds:.2f}s in the database)"
             )
             logger.info(
-                "Step 3 complete: %d classified, %d requiring review",
-                len(classified_stack_ids), len(stacks_requiring_review)
+                "Step 3 complete: %d classified, %d requiring review, %.2fs in the database",
+                len(classified_stack_ids), len(stacks_requiring_review), metrics.db_seconds
             )
 
             return StepResult(success=True, handover=handover, metrics=metrics.to_dict())
@@ -279,6 +355,7 @@ class Step3Classification(BaseStep):
                 fp.mr_acquisition_type,
                 fp.mr_diffusion_b_value,
                 fp.stack_n_instances,
+                fp.fingerprint_hash,
                 -- Get series info for cache table
                 ss.series_id,
                 s.series_instance_uid,
@@ -293,134 +370,85 @@ class Step3Classification(BaseStep):
 
         return [dict(row._mapping) for row in result]
 
-    def _classify_batch(
-        self,
-        fingerprints: list[dict]
-    ) -> list[tuple[dict, ClassificationResult]]:
-        """Classify a batch of fingerprints.
-
-        Args:
-            fingerprints: List of fingerprint dicts
-
-        Returns:
-            List of (fingerprint, ClassificationResult) tuples
-        """
-        results = []
-        for fp in fingerprints:
-            try:
-                # Create context from fingerprint
-                ctx = ClassificationContext.from_fingerprint(fp)
-                
-                # Run classification
-                result = self._pipeline.classify(ctx)
-                results.append((fp, result))
-            except Exception as e:
-                # Log error but continue with other fingerprints
-                logger.warning(
-                    "Failed to classify fingerprint %s: %s",
-                    fp.get("fingerprint_id"), str(e)
-                )
-                # Create a minimal error result
-                result = ClassificationResult(
-                    directory_type="misc",
-                    manual_review_required=1,
-                )
-                result.add_review_reason("classification:error")
-                results.append((fp, result))
-
-        return results
-
-    # Batch size for bulk inserts to avoid PostgreSQL OOM
-    UPSERT_BATCH_SIZE = 10000
-
-    # SQL for upserting classification results
-    UPSERT_SQL = text("""
-        INSERT INTO series_classification_cache (
-            series_stack_id, series_id, series_instance_uid,
-            subject_id, study_id, dicom_origin_cohort,
-            directory_type, base, technique, modifier_csv, construct_csv,
-            provenance, acceleration_csv, post_contrast, localizer,
-            spinal_cord, manual_review_required, manual_review_reasons_csv,
-            fov_x_mm, fov_y_mm, slices_count, orientation_patient, echo_number
-        ) VALUES (
-            :series_stack_id, :series_id, :series_instance_uid,
-            :subject_id, :study_id, :dicom_origin_cohort,
-            :directory_type, :base, :technique, :modifier_csv, :construct_csv,
-            :provenance, :acceleration_csv, :post_contrast, :localizer,
-            :spinal_cord, :manual_review_required, :manual_review_reasons_csv,
-            :fov_x_mm, :fov_y_mm, :slices_count, :orientation_patient, :echo_number
-        )
-        ON CONFLICT (series_stack_id) DO UPDATE SET
-            series_id = EXCLUDED.series_id,
-            series_instance_uid = EXCLUDED.series_instance_uid,
-            subject_id = EXCLUDED.subject_id,
-            study_id = EXCLUDED.study_id,
-            dicom_origin_cohort = EXCLUDED.dicom_origin_cohort,
-            directory_type = EXCLUDED.directory_type,
-            base = EXCLUDED.base,
-            technique = EXCLUDED.technique,
-            modifier_csv = EXCLUDED.modifier_csv,
-            construct_csv = EXCLUDED.construct_csv,
-            provenance = EXCLUDED.provenance,
-            acceleration_csv = EXCLUDED.acceleration_csv,
-            post_contrast = EXCLUDED.post_contrast,
-            localizer = EXCLUDED.localizer,
-            spinal_cord = EXCLUDED.spinal_cord,
-            manual_review_required = EXCLUDED.manual_review_required,
-            manual_review_reasons_csv = EXCLUDED.manual_review_reasons_csv,
-            fov_x_mm = EXCLUDED.fov_x_mm,
-            fov_y_mm = EXCLUDED.fov_y_mm,
-            slices_count = EXCLUDED.slices_count,
-            orientation_patient = EXCLUDED.orientation_patient,
-            echo_number = EXCLUDED.echo_number
-    """)
-
-    def _prepare_upsert_values(
+    # Rows per COPY + UPSERT round trip (bounds the staging CSV size)
+    UPSERT_BATCH_SIZE = 50000
+
+    # series_classification_cache columns written by this step, with their types
+    UPSERT_SCHEMA = {
+        "series_stack_id": pl.Int64,
+        "series_id": pl.Int64,
+        "series_instance_uid": pl.String,
+        "subject_id": pl.Int64,
+        "study_id": pl.Int64,
+        "dicom_origin_cohort": pl.String,
+        "directory_type": pl.String,
+        "base": pl.String,
+        "technique": pl.String,
+        "modifier_csv": pl.String,
+        "construct_csv": pl.String,
+        "provenance": pl.String,
+        "acceleration_csv": pl.String,
+        "post_contrast": pl.Int64,
+        "localizer": pl.Int64,
+        "spinal_cord": pl.Int64,
+        "manual_review_required": pl.Int64,
+        "manual_review_reasons_csv": pl.String,
+        "fov_x_mm": pl.Float64,
+        "fov_y_mm": pl.Float64,
+        "slices_count": pl.Int64,
+        "orientation_patient": pl.String,
+        "echo_number": pl.Int64,
+        # Inputs the row was classified from (incremental sorting)
+        "fingerprint_hash": pl.String,
+        "rules_version": pl.String,
+    }
+
+    # ClassificationResult attributes copied into same-named columns
+    RESULT_COLUMNS = (
+        "directory_type", "base", "technique", "modifier_csv", "construct_csv",
+        "provenance", "acceleration_csv", "post_contrast", "localizer",
+        "spinal_cord", "manual_review_required", "manual_review_reasons_csv",
+    )
+
+    def _build_upsert_frame(
         self,
         results: list[tuple[dict, ClassificationResult]],
-        cohort_name: str = ""
-    ) -> list[dict]:
-        """Prepare values for bulk upsert (CPU-bound, no DB access).
+        cohort_name: str = "",
+        rules_version: str | None = None,
+    ) -> pl.DataFrame:
+        """Build the rows to upsert as one column per field (CPU-bound, no DB access).
 
         Args:
             results: List of (fingerprint, ClassificationResult) tuples
             cohort_name: Name of the cohort being processed
+            rules_version: Detection rules version the results were produced with
 
         Returns:
-            List of value dictionaries ready for SQL execution
+            DataFrame with the UPSERT_SCHEMA columns, one row per result
         """
-        values = []
-        for fp, result in results:
-            values.append({
-                "series_stack_id": fp["series_stack_id"],
-                "series_id": fp["series_id"],
-                "series_instance_uid": fp["series_instance_uid"],
-                "subject_id": fp.get("subject_id"),
-                "study_id": fp.get("study_id"),
-                "dicom_origin_cohort": cohort_name or None,
-                "directory_type": result.directory_type,
-                "base": result.base,
-                "technique": result.technique,
-                "modifier_csv": result.modifier_csv,
-                "construct_csv": result.construct_csv,
-                "provenance": result.provenance,
-                "acceleration_csv": result.acceleration_csv,
-                "post_contrast": result.post_contrast,
-                "localizer": result.localizer,
-                "spinal_cord": result.spinal_cord,
-                "manual_review_required": result.manual_review_required,
-                "manual_review_reasons_csv": result.manual_review_reasons_csv,
-                # Geometry from fingerprint
-                "fov_x_mm": fp.get("fov_x"),
-                "fov_y_mm": fp.get("fov_y"),
-                "slices_count": fp.get("stack_n_instances"),
-                "orientation_patient": fp.get("stack_orientation"),
-                "echo_number": self._parse_echo_number(fp.get("mr_echo_number")),
-            })
-        return values
-
-    async def _async_batch_upsert(self, conn, values: list[dict]) -> int:
-        """Insert values in batches, yielding control between batches.
+        fps = [fp for fp, _ in results]
+        columns: dict[str, list] = {
+            "series_stack_id": [fp["series_stack_id"] for fp in fps],
+            "series_id": [fp["series_id"] for fp in fps],
+            "series_instance_uid": [fp["series_instance_uid"] for fp in fps],
+            "subject_id": [fp.get("subject_id") for fp in fps],
+            "study_id": [fp.get("study_id") for fp in fps],
+            "dicom_origin_cohort": [cohort_name or None] * len(fps),
+        }
+        for name in self.RESULT_COLUMNS:
+            columns[name] = [getattr(result, name) for _, result in results]
+        # Geometry from fingerprint
+        columns["fov_x_mm"] = [fp.get("fov_x") for fp in fps]
+        columns["fov_y_mm"] = [fp.get("fov_y") for fp in fps]
+        columns["slices_count"] = [fp.get("stack_n_instances") for fp in fps]
+        columns["orientation_patient"] = [fp.get("stack_orientation") for fp in fps]
+        columns["echo_number"] = [self._parse_echo_number(fp.get("mr_echo_number")) for fp in fps]
+        columns["fingerprint_hash"] = [fp.get("fingerprint_hash") for fp in fps]
+        columns["rules_version"] = [rules_version] * len(fps)
+        return pl.DataFrame(columns, schema=self.UPSERT_SCHEMA)
+
+    async def _async_batch_upsert(self, conn, frame: pl.DataFrame) -> int:
+        """COPY + UPSERT the rows in batches, yielding control between batches.
 
         This approach:
         1. Runs DB operations synchronously (required - connections aren't thread-safe)
@@ -429,31 +457,25 @@ class Step3Classification(BaseStep):
 
         Args:
             conn: Database connection
-            values: List of value dictionaries to insert
+            frame: Rows built by _build_upsert_frame
 
         Returns:
             Number of rows inserted/updated
         """
-        if not values:
+        if frame.height == 0:
             return 0
 
-        total_rows = len(values)
-        batch_count = (total_rows + self.UPSERT_BATCH_SIZE - 1) // self.UPSERT_BATCH_SIZE
-
-        for batch_idx in range(batch_count):
-            start = batch_idx * self.UPSERT_BATCH_SIZE
-            end = min(start + self.UPSERT_BATCH_SIZE, total_rows)
-            batch = values[start:end]
-
+        batch_count = (frame.height + self.UPSERT_BATCH_SIZE - 1) // self.UPSERT_BATCH_SIZE
+        for batch_idx, batch in enumerate(frame.iter_slices(self.UPSERT_BATCH_SIZE)):
             # Execute batch synchronously (connection not thread-safe)
-            conn.execute(self.UPSERT_SQL, batch)
+            copy_upsert(conn, "series_classification_cache", batch, "series_stack_id")
 
             # Yield control to event loop between batches
             # This allows health checks and other tasks to run
             if batch_idx < batch_count - 1:
                 await asyncio.sleep(0)
 
-        return total_rows
+        return frame.height
 
     def _parse_echo_number(self, echo_number_str: str | None) -> int | None:
         """Parse echo number from string (could be comma-separated)."""
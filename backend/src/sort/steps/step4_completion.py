@@ -19,19 +19,22 @@ from __future__ import annotations
 import asyncio
 import functools
 import logging
+import time
 from collections import Counter
 from typing import Any
 
+import polars as pl
 from sqlalchemy import text
 
 from .base import BaseStep, StepContext, StepResult
+from ..bulk_writes import copy_update
 from ..models import Step4Handover, Step4Metrics
 from ..gap_filling import (
     ORIENTATION_CONFIDENCE_THRESHOLD,
     ReferenceDatabase,
     build_reference_database,
     compute_physics_key,
-    find_best_match,
+    find_best_matches,
     infer_acquisition_type,
     synthesize_directory_type,
     add_review_reason,
@@ -166,7 +169,9 @@ class Step4Completion(BaseStep):
 
             # Load stack data for processing
             logger.info("Step 4: Loading stack data for %d stacks...", len(classified_stack_ids))
+            started = time.perf_counter()
             stacks = self._load_stacks_for_completion(conn, classified_stack_ids)
+            metrics.db_seconds += time.perf_counter() - started
             metrics.total_processed = len(stacks)
             self.log(f"Loaded {len(stacks):,} stacks for completion")
             logger.info("Step 4: Loaded %d stacks for completion", len(stacks))
@@ -186,10 +191,12 @@ class Step4Completion(BaseStep):
                 current_action="Phase 0: Field strength"
             )
 
+            started = time.perf_counter()
             field_strength_updates = await loop.run_in_executor(
                 None,
                 functools.partial(self._normalize_field_strength, conn)
             )
+            metrics.db_seconds += time.perf_counter() - started
             metrics.field_strength_normalized_count = field_strength_updates
             self.log(f"Phase 0 complete: {field_strength_updates} series normalized")
 
@@ -266,7 +273,9 @@ class Step4Completion(BaseStep):
 
             # Build reference database from entire metadata DB
             logger.info("Step 4: Loading reference database...")
+            started = time.perf_counter()
             ref_rows = self._load_reference_stacks(conn)
+            metrics.db_seconds += time.perf_counter() - started
             logger.info("Step 4: Loaded %d reference rows, building database...", len(ref_rows))
             self._reference_db = build_reference_database(ref_rows)
             self.log(f"Reference database: {self._reference_db.total_count:,} stacks in {self._reference_db.bin_count:,} bins")
@@ -293,20 +302,27 @@ class Step4Completion(BaseStep):
             self.log(f"Phase 3: {len(stacks_needing_fill)} stacks need base/technique filling")
             logger.info("Step 4: Phase 3 starting - %d stacks need base/technique filling", len(stacks_needing_fill))
 
-            # Process in batches - use larger batch size for efficiency
-            batch_size = 5000  # Larger batch for faster processing
+            # Build the neighbour search index once (CPU-bound, off the event loop);
+            # every batch below reuses it and its per-bin histograms
+            started = time.perf_counter()
+            await loop.run_in_executor(None, lambda: self._reference_db.index)
+            logger.info("Step 4: Physics index built in %.2fs", time.perf_counter() - started)
+
+            # Indexed neighbour search in batches so progress keeps moving
+            batch_size = 5000
             fill_results = []
             total_to_fill = len(stacks_needing_fill)
-            
+            started = time.perf_counter()
+
             for i in range(0, total_to_fill, batch_size):
                 batch = stacks_needing_fill[i:i + batch_size]
-                
+
                 batch_results = await loop.run_in_executor(
                     None,
                     functools.partial(self._fill_base_technique_batch, batch)
                 )
                 fill_results.extend(batch_results)
-                
+
                 processed = min(i + batch_size, total_to_fill)
                 progress = 35 + int((processed / max(total_to_fill, 1)) * 35)
                 self.log(f"Processed {processed:,}/{total_to_fill:,} stacks")
@@ -317,6 +333,8 @@ class Step4Completion(BaseStep):
                     current_action="Phase 3: Similarity matching"
                 )
 
+            self.log(f"Matched {total_to_fill:,} stacks in {time.perf_counter() - started:.2f}s")
+
             # Apply fill results - use dict for O(1) lookup instead of O(n) search
             logger.info("Step 4: Applying %d fill results to %d stacks...", len(fill_results), len(stacks))
             stacks_by_id = {s["series_stack_id"]: s for s in stacks}
@@ -493,6 +511,7 @@ class Step4Completion(BaseStep):
                 if s["series_stack_id"] in new_review_stacks
             ]
             
+            started = time.perf_counter()
             logger.info("Step 4: Persisting %d classification updates...", len(classification_updates))
             self._persist_classification_updates(conn, classification_updates, orientation_flagged)
             logger.info("Step 4: Classification updates persisted")
@@ -505,9 +524,14 @@ class Step4Completion(BaseStep):
 
             # Commit all updates in a single transaction
             conn.commit()
+            persist_seconds = time.perf_counter() - started
+            metrics.db_seconds += persist_seconds
             logger.info("Step 4: All updates committed")
 
-            self.log(f"Phase 5 complete: {len(classification_updates)} classification updates persisted")
+            self.log(
+                f"Phase 5 complete: {len(classification_updates)} classification updates "
+                f"persisted in {persist_seconds:.2f}s"
+            )
 
             await self.emit_progress(
                 95, f"Persisted {len(classification_updates)} updates",
@@ -545,11 +569,13 @@ class Step4Completion(BaseStep):
             self.log(
                 f"Step 4 complete: {handover.total_completed:,} stacks, "
                 f"{handover.gaps_filled} gaps filled, "
-                f"{handover.review_required_count:,} requiring review"
+                f"{handover.review_required_count:,} requiring review "
+                f"({metrics.db_seconds:.2f}s in the database)"
             )
             logger.info(
-                "Step 4 complete: %d stacks, %d gaps filled, %d requiring review",
-                handover.total_completed, handover.gaps_filled, handover.review_required_count
+                "Step 4 complete: %d stacks, %d gaps filled, %d requiring review, %.2fs in the database",
+                handover.total_completed, handover.gaps_filled, handover.review_required_count,
+                metrics.db_seconds
             )
 
             return StepResult(success=True, handover=handover, metrics=metrics.to_dict())
@@ -780,16 +806,7 @@ class Step4Completion(BaseStep):
         """
         results = []
         
-        for stack in stacks:
-            result = find_best_match(
-                ref_db=self._reference_db,
-                tr=stack.get("mr_tr"),
-                te=stack.get("mr_te"),
-                ti=stack.get("mr_ti"),
-                fa=stack.get("mr_flip_angle"),
-                n_instances=stack.get("stack_n_instances"),
-                scanning_sequence=stack.get("scanning_sequence"),
-            )
+        for stack, result in zip(stacks, find_best_matches(self._reference_db, stacks)):
 
             # Only fill if we got a match
             current_base = stack.get("base")
@@ -936,40 +953,43 @@ class Step4Completion(BaseStep):
         stacks: list[dict[str, Any]],
         orientation_flagged: list[int],
     ) -> None:
-        """Persist updates to series_classification_cache."""
+        """Persist updates to series_classification_cache (one COPY + UPDATE ... FROM)."""
         if not stacks:
             return
 
+        flagged = set(orientation_flagged)
+        reasons = []
         for stack in stacks:
-            stack_id = stack["series_stack_id"]
-            
-            # Build updated review reasons
             existing_reasons = stack.get("manual_review_reasons_csv") or ""
-            
             # Add orientation flag if needed
-            if stack_id in orientation_flagged:
+            if stack["series_stack_id"] in flagged:
                 existing_reasons = add_review_reason(existing_reasons, "orientation:low_confidence")
-            
-            # Update the row
-            conn.execute(text("""
-                UPDATE series_classification_cache
-                SET base = :base,
-                    technique = :technique,
-                    construct_csv = :construct_csv,
-                    provenance = :provenance,
-                    directory_type = :directory_type,
-                    manual_review_required = 1,
-                    manual_review_reasons_csv = :reasons
-                WHERE series_stack_id = :stack_id
-            """), {
-                "stack_id": stack_id,
-                "base": stack.get("base"),
-                "technique": stack.get("technique"),
-                "construct_csv": stack.get("construct_csv"),
-                "provenance": stack.get("provenance"),
-                "directory_type": stack.get("directory_type"),
-                "reasons": existing_reasons,
-            })
+            reasons.append(existing_reasons)
+
+        frame = pl.DataFrame(
+            {
+                "series_stack_id": [s["series_stack_id"] for s in stacks],
+                "base": [s.get("base") for s in stacks],
+                "technique": [s.get("technique") for s in stacks],
+                "construct_csv": [s.get("construct_csv") for s in stacks],
+                "provenance": [s.get("provenance") for s in stacks],
+                "directory_type": [s.get("directory_type") for s in stacks],
+                "manual_review_reasons_csv": reasons,
+            },
+            schema={
+                "series_stack_id": pl.Int64,
+                "base": pl.String,
+                "technique": pl.String,
+                "construct_csv": pl.String,
+                "provenance": pl.String,
+                "directory_type": pl.String,
+                "manual_review_reasons_csv": pl.String,
+            },
+        )
+        copy_update(
+            conn, "series_classification_cache", frame, "series_stack_id",
+            constants={"manual_review_required": "1"},
+        )
         # NOTE: Do NOT commit here - let caller manage transaction
 
     def _persist_fingerprint_updates(
@@ -977,17 +997,16 @@ class Step4Completion(BaseStep):
         conn,
         updates: list[tuple[int, str, str]],
     ) -> None:
-        """Persist mr_acquisition_type updates to stack_fingerprint."""
+        """Persist mr_acquisition_type updates to stack_fingerprint (one COPY + UPDATE ... FROM)."""
         if not updates:
             return
 
-        for stack_id, new_value, _ in updates:
-            conn.execute(text("""
-                UPDATE stack_fingerprint
-                SET mr_acquisition_type = :value
-                WHERE series_stack_id = :stack_id
-            """), {
-                "stack_id": stack_id,
-                "value": new_value,
-            })
+        frame = pl.DataFrame(
+            {
+                "series_stack_id": [stack_id for stack_id, _, _ in updates],
+                "mr_acquisition_type": [value for _, value, _ in updates],
+            },
+            schema={"series_stack_id": pl.Int64, "mr_acquisition_type": pl.String},
+        )
+        copy_update(conn, "stack_fingerprint", frame, "series_stack_id")
         # NOTE: Do NOT commit here - let caller manage transaction
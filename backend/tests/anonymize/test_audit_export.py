@@ -1,6 +1,8 @@
 from pathlib import Path
 
-from anonymize.exporter import process_and_aggregate_audit
+import polars as pl
+
+from anonymize.exporter import AUDIT_EVENT_SCHEMA, StudyAuditAggregator, process_and_aggregate_audit
 
 
 def test_process_and_aggregate_audit_creates_reference_columns(tmp_path: Path):
@@ -93,3 +95,94 @@ def test_process_and_aggregate_audit_handles_late_non_null_values(tmp_path: Path
     assert not df.is_empty()
     rows = df.to_dicts()
     assert any(row.get("Station_Name_0008_1010") == "Intera" for row in rows)
+
+
+def test_add_frame_matches_event_dicts(tmp_path: Path):
+    events = [
+        {
+            "rel_path": f"sub-001/session1/{index}.dcm",
+            "study_uid": "1.2.3",
+            "tag": "(0010,0010)",
+            "tag_name": "PatientName",
+            "action": "removed",
+            "old_value": "John^Doe",
+            "new_value": "",
+        }
+        for index in range(3)
+    ] + [
+        {
+            "rel_path": "sub-002/session1/1.dcm",
+            "study_uid": "4.5.6",
+            "tag": "(0010,0020)",
+            "tag_name": "Patient ID",
+            "action": "replaced",
+            "old_value": "PAT002",
+            "new_value": "ALS0002",
+        }
+    ]
+
+    from_dicts = StudyAuditAggregator(tmp_path, "cohort-test")
+    from_dicts.add_events(events)
+    from_frame = StudyAuditAggregator(tmp_path, "cohort-test")
+    from_frame.add_frame(pl.DataFrame(events, schema=AUDIT_EVENT_SCHEMA))
+
+    assert from_frame.build_dataframe().equals(from_dicts.build_dataframe())
+
+
+def test_add_frame_groups_like_event_dicts(tmp_path: Path):
+    base = {"rel_path": "sub-003/session1/1.dcm", "study_uid": "7.8.9", "tag": "(0008,0020)"}
+    events = [
+        {**base, "tag_name": "Study Date", "action": "retained", "old_value": "  ", "new_value": None},
+        {**base, "tag_name": "", "action": "replaced", "old_value": "20240101\n", "new_value": "M00"},
+        {**base, "tag_name": "Study Date", "action": "replaced", "old_value": "20240102", "new_value": "M06"},
+        {**base, "tag_name": "Study Date", "action": "unknown", "old_value": "ignored", "new_value": "ignored"},
+        {**base, "tag": "", "tag_name": "Dropped", "action": "removed", "old_value": "x", "new_value": None},
+        {
+            "rel_path": "sub-004/session1/1.dcm",
+            "study_uid": None,
+            "tag": "(0008,1010)",
+            "tag_name": "Station Name",
+            "action": "removed",
+            "old_value": "line one\r\nline two",
+            "new_value": "",
+        },
+    ]
+    later = [{**base, "tag_name": "Study Date", "action": "added", "old_value": "", "new_value": "M12"}]
+
+    from_dicts = StudyAuditAggregator(tmp_path, "cohort-test")
+    from_dicts.add_events(events + later)
+    from_frame = StudyAuditAggregator(tmp_path, "cohort-test")
+    from_frame.add_frame(pl.DataFrame(events, schema=AUDIT_EVENT_SCHEMA))
+    from_frame.add_frame(pl.DataFrame(later, schema=AUDIT_EVENT_SCHEMA))
+
+    assert from_frame.build_dataframe().equals(from_dicts.build_dataframe())
+    assert from_frame.build_dataframe().to_dicts()[0]["Study_Date_0008_0020_new_value"] == "M12"
+
+
+def test_add_frame_labels_tags_by_first_non_empty_name(tmp_path: Path):
+    events = [
+        {"rel_path": "a/b/1.dcm", "study_uid": "1.2", "tag": "(0008,0080)", "tag_name": name,
+         "action": "removed", "old_value": "Hospital", "new_value": None}
+        for name in ("", "InstitutionName")
+    ]
+    aggregator = StudyAuditAggregator(tmp_path, "cohort-test")
+    aggregator.add_frame(pl.DataFrame(events, schema=AUDIT_EVENT_SCHEMA))
+
+    assert aggregator.build_dataframe()["InstitutionName_0008_0080"].to_list() == ["Hospital"]
+
+
+def test_both_paths_label_tags_by_first_non_empty_name(tmp_path: Path):
+    def event(study_uid, tag_name):
+        return {"rel_path": f"{study_uid}/1.dcm", "study_uid": study_uid, "tag": "(0008,0080)",
+                "tag_name": tag_name, "action": "removed", "old_value": "Hospital", "new_value": None}
+
+    events = [event("1.2", ""), event("3.4", "InstitutionName"), event("1.2", "Institution Name")]
+    from_dicts = StudyAuditAggregator(tmp_path, "cohort-test")
+    from_dicts.add_events(events)
+    from_frame = StudyAuditAggregator(tmp_path, "cohort-test")
+    from_frame.add_frame(pl.DataFrame(events, schema=AUDIT_EVENT_SCHEMA))
+
+    expected = from_dicts.build_dataframe()
+    assert from_frame.build_dataframe().equals(expected)
+    assert expected.columns[-1] == "InstitutionName_0008_0080"
+    assert expected["InstitutionName_0008_0080"].to_list() == ["Hospital", "Hospital"]
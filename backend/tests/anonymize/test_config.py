@@ -72,7 +72,7 @@ def test_folder_strategy_falls_back_when_regex_missing(tmp_path: Path):
         worker_threads=1,
     )
 
-    strategy = _build_id_strategy(config, [file_path])
+    strategy = _build_id_strategy(config)
     new_id = strategy.map("SubjectA", file_path)
     assert new_id != "SubjectA"
     assert new_id.startswith("COHORT")
@@ -105,7 +105,7 @@ def test_folder_strategy_literal_segment(tmp_path: Path):
         worker_threads=1,
     )
 
-    strategy = _build_id_strategy(config, [file_path])
+    strategy = _build_id_strategy(config)
     new_id = strategy.map("SubjectA", file_path)
     assert new_id == "SubjectA"
 
@@ -235,7 +235,7 @@ def test_csv_hash_mapping_skips_discovery(tmp_path: Path, monkeypatch):
         worker_threads=1,
     )
 
-    strategy = _build_id_strategy(config, [])
+    strategy = _build_id_strategy(config)
     assert strategy.map("A001", Path("dummy")) == "B001"
 
 
@@ -0,0 +1,68 @@
+from datetime import datetime
+from pathlib import Path
+
+import pydicom
+from pydicom.dataset import FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+from anonymize import core
+
+
+def _write(path: Path, patient_id: str, study_uid: str, study_date: str) -> Path:
+    ds = pydicom.Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.PatientID = patient_id
+    ds.StudyInstanceUID = study_uid
+    ds.StudyDate = study_date
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ds.save_as(str(path), enforce_file_format=True)
+    return path
+
+
+def _tree(root: Path) -> None:
+    _write(root / "B" / "s1" / "1.dcm", "PB", "1.1", "20200301")
+    _write(root / "B" / "s1" / "2.dcm", "PB", "1.1", "20200301")
+    _write(root / "A" / "s1" / "1.dcm", "PA", "2.1", "20210101")
+    _write(root / "A" / "s2" / "1.dcm", "PA", "2.2", "20190615")
+    (root / "A" / "s2" / "notes").write_text("not dicom")
+
+
+def test_header_index_serves_discovery_and_timepoints(tmp_path: Path):
+    _tree(tmp_path)
+    index = core._HeaderIndex.build(tmp_path, max_workers=2)
+
+    assert len(index) == 5
+    assert index.pids_all() == ["PA", "PB"]
+    assert index.pids_by_top_folder(tmp_path) == ["PA", "PB"]
+    assert sorted(index.pids_one_per_study()) == ["PA", "PB"]
+    assert index.first_dates() == {"PA": datetime(2019, 6, 15), "PB": datetime(2020, 3, 1)}
+
+
+def test_header_index_groups_records_by_top_folder(tmp_path: Path):
+    _tree(tmp_path)
+    grouped = core._HeaderIndex.build(tmp_path, max_workers=2).by_top_folder(tmp_path)
+
+    assert sorted(grouped) == ["A", "B"]
+    assert {record.study_uid for record in grouped["A"]} == {"2.1", "2.2", None}
+    assert all(record.size > 0 for record in grouped["B"])
+
+
+def test_leaf_work_units_split_patients_and_run_largest_first(tmp_path: Path):
+    _tree(tmp_path)
+    (tmp_path / "C").mkdir()
+    index = core._HeaderIndex.build(tmp_path, max_workers=2)
+
+    units, units_per_patient, unassigned = core._plan_leaf_work_units(tmp_path, index)
+
+    assert units_per_patient == {"A": 2, "B": 1, "C": 0}
+    assert unassigned == 1
+    assert [(unit.patient, unit.study_uid) for unit in units][0] == ("B", "1.1")
+    assert sorted((unit.patient, unit.study_uid, len(unit.files)) for unit in units) == [
+        ("A", "2.1", 1),
+        ("A", "2.2", 1),
+        ("B", "1.1", 2),
+    ]
+    assert [unit.size for unit in units] == sorted((unit.size for unit in units), reverse=True)
@@ -0,0 +1,98 @@
+import errno
+import shutil
+from pathlib import Path
+
+import pydicom
+import pytest
+from pydicom.data import get_testdata_file
+from pydicom.tag import Tag
+
+from anonymize import core
+
+
+SAMPLES = [
+    "CT_small.dcm",
+    "MR_small.dcm",
+    "MR_small_implicit.dcm",
+    "MR_small_bigendian.dcm",
+    "JPEG2000.dcm",
+    "SC_rgb_small_odd.dcm",
+]
+
+
+class MappingStrategy(core.IDStrategy):
+    def map(self, old_id: str, filepath: Path) -> str:
+        return f"ANON-{old_id}"
+
+
+def _options(source_root: Path, output_root: Path, header_only: bool) -> core._Options:
+    return core._Options(
+        source_root=source_root,
+        output_root=output_root,
+        scrub_tags=[Tag(0x0010, 0x0010), Tag(0x0010, 0x0030), Tag(0x0008, 0x0080)],
+        exclude_tags=set(),
+        anonymize_patient_id=True,
+        map_timepoints=False,
+        preserve_uids=True,
+        rename_patient_folders=False,
+        header_only_rewrite=header_only,
+    )
+
+
+def _sample(tmp_path: Path, name: str) -> Path:
+    path = get_testdata_file(name)
+    if path is None:
+        pytest.skip(f"{name} not available")
+    source = tmp_path / "source" / "sub-01" / name
+    source.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(path, source)
+    return source
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_header_only_output_matches_full_rewrite(tmp_path: Path, name: str):
+    source = _sample(tmp_path, name)
+    results = {}
+    for header_only in (False, True):
+        output_root = tmp_path / f"out-{header_only}"
+        options = _options(tmp_path / "source", output_root, header_only)
+        result = core._process_single_file(source, options, MappingStrategy(), {})
+        assert result["error"] is None and result["wrote_output"]
+        results[header_only] = (result, (output_root / "sub-01" / name).read_bytes())
+
+    (full_result, full_bytes), (header_result, header_bytes) = results[False], results[True]
+    assert header_bytes == full_bytes
+    assert header_result["audit_events"] == full_result["audit_events"]
+    assert pydicom.dcmread(pydicom.filebase.DicomBytesIO(header_bytes)).PatientID.startswith("ANON-")
+
+
+def test_read_header_stops_before_pixel_data():
+    path = Path(get_testdata_file("CT_small.dcm"))
+    ds, offset = core._read_header(path)
+    assert "PixelData" not in ds
+    with open(path, "rb") as fp:
+        fp.seek(offset)
+        assert fp.read(4) == b"\xe0\x7f\x10\x00"
+
+
+def test_read_header_falls_back_for_deflated_files():
+    ds, offset = core._read_header(Path(get_testdata_file("image_dfl.dcm")))
+    assert offset is None
+    assert "PixelData" in ds
+
+
+def test_copy_file_tail_without_kernel_copy(tmp_path: Path, monkeypatch):
+    source = tmp_path / "source.bin"
+    source.write_bytes(bytes(range(256)) * 8192)
+
+    def unsupported(*args):
+        raise OSError(errno.ENOSYS, "unsupported")
+
+    monkeypatch.setattr(core, "_kernel_copy", unsupported)
+    target = tmp_path / "target.bin"
+    with open(target, "wb") as out:
+        out.write(b"header")
+        out.flush()
+        core._copy_file_tail(source, out.fileno(), 1000)
+
+    assert target.read_bytes() == b"header" + source.read_bytes()[1000:]
@@ -108,6 +108,59 @@ def test_leaf_summary_upsert(anonymize_modules):
         assert row.summary["audit"]["anchor_rel_path"] == "sub-01/file2.dcm"
 
 
+def test_completed_leaves_are_bulk_recorded_and_loaded(anonymize_modules):
+    store, _ = anonymize_modules
+
+    def _leaf(uid: str, files_written: int) -> dict:
+        return {
+            "study_uid": uid,
+            "cohort_name": "ALS",
+            "leaf_rel_path": f"sub-01/{uid}",
+            "files_total": 2,
+            "files_written": files_written,
+            "files_reused": 0,
+            "files_with_errors": 0,
+            "patient_id_original": "PAT001",
+            "patient_id_updated": "ALS0001",
+            "errors": [],
+            "audit_payload": {"anchor_rel_path": f"sub-01/{uid}/1.dcm", "tags": []},
+        }
+
+    store.mark_study_audit_complete("1.1", leaf_rel_path="earlier", cohort_name="ALS")
+    assert store.record_completed_leaves([_leaf("1.1", 1), _leaf("1.2", 2)]) == 2
+    assert store.record_completed_leaves([_leaf("1.2", 0)]) == 1
+
+    assert store.load_completed_study_uids(["1.1", "1.2", "1.3"]) == {"1.1", "1.2"}
+    rows = {row["study_uid"]: row for row in store.load_leaf_summaries_for_cohort("ALS")}
+    assert set(rows) == {"1.1", "1.2"}
+    assert rows["1.2"]["summary"]["audit"]["anchor_rel_path"] == "sub-01/1.2/1.dcm"
+
+    from db.session import session_scope
+
+    with session_scope() as session:
+        marker = session.query(store.AnonymizeStudyAudit).filter_by(study_instance_uid="1.1").one()
+        summary = session.query(store.AnonymizeLeafSummary).filter_by(study_instance_uid="1.2").one()
+        assert marker.leaf_rel_path == "earlier"
+        assert summary.files_written == 0
+
+
+def test_leaf_audit_buffer_flushes_in_batches(monkeypatch, anonymize_modules):
+    _, core = anonymize_modules
+
+    batches: list[list[dict]] = []
+    monkeypatch.setattr(core, "record_completed_leaves", lambda records: batches.append(records) or len(records))
+
+    buffer = core._LeafAuditBuffer(max_leaves=2, max_seconds=3600)
+    for uid in ("1", "2", "3"):
+        buffer.add({"study_uid": uid})
+    assert [len(batch) for batch in batches] == [2]
+
+    buffer.flush()
+    buffer.flush()
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert buffer.flushed == 3
+
+
 def test_leaf_summary_loader_returns_one_row_per_leaf(anonymize_modules):
     store, _ = anonymize_modules
 
@@ -310,3 +363,47 @@ def test_events_from_summaries_recreate_audit_rows(anonymize_modules):
     assert len(events) == 1
     assert events[0]["rel_path"] == "sub-01/file1.dcm"
     assert events[0]["tag_name"] == "PatientName"
+
+
+def test_leaf_audit_accumulator_keeps_first_event_per_tag(anonymize_modules):
+    _, core = anonymize_modules
+
+    def _result(index: int, old_value: str) -> dict:
+        return {
+            "error": None,
+            "wrote_output": index > 0,
+            "output_preexisting": index == 0,
+            "rel_path": f"sub-01/ses/{index}.dcm",
+            "patient_id_original": "PAT001",
+            "patient_id_updated": "ALS0001",
+            "audit_events": [
+                {"tag": "(0010,0010)", "tag_name": "PatientName", "action": "removed", "old_value": old_value, "new_value": ""}
+            ],
+        }
+
+    accumulator = core._LeafAuditAccumulator("1.2.3")
+    accumulator.add_result(Path("a.dcm"), _result(0, "Foo"))
+    accumulator.add_result(Path("b.dcm"), _result(1, "Bar"))
+    accumulator.add_result(Path("c.dcm"), {"error": "broken"})
+    accumulator.add_error(Path("d.dcm"), ValueError("unreadable"))
+
+    options = core._Options(
+        source_root=Path("/tmp/src"),
+        output_root=Path("/tmp/out"),
+        scrub_tags=[],
+        exclude_tags=set(),
+        anonymize_patient_id=False,
+        map_timepoints=False,
+        preserve_uids=True,
+        rename_patient_folders=False,
+        cohort_name="ALS",
+    )
+    files = [Path("/tmp/src/sub-01/ses") / name for name in ("a.dcm", "b.dcm", "c.dcm", "d.dcm")]
+    record = accumulator.record(files, options)
+
+    assert accumulator.success_count == 2
+    assert record["leaf_rel_path"] == "sub-01/ses"
+    assert (record["files_total"], record["files_written"], record["files_reused"], record["files_with_errors"]) == (4, 1, 1, 1)
+    assert record["errors"] == ["c.dcm: broken", "d.dcm: unreadable"]
+    assert record["audit_payload"]["anchor_rel_path"] == "sub-01/ses/0.dcm"
+    assert [tag["old_value"] for tag in record["audit_payload"]["tags"]] == ["Foo"]
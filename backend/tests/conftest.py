@@ -1,7 +1,34 @@
+import os
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    """URL of a scratch PostgreSQL database for tests of PostgreSQL-only paths.
+
+    Uses ``TEST_POSTGRES_URL`` when set, otherwise starts a testcontainers
+    PostgreSQL; the test is skipped when neither is available.
+    """
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if url:
+        yield url
+        return
+    try:
+        from testcontainers.postgres import PostgresContainer
+
+        container = PostgresContainer("postgres:16-alpine", driver="psycopg")
+        container.start()
+    except Exception as exc:  # Docker missing or unreachable
+        pytest.skip(f"PostgreSQL not available: {exc}")
+    try:
+        yield container.get_connection_url()
+    finally:
+        container.stop()
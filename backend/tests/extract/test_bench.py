@@ -0,0 +1,89 @@
+"""Tests for the extraction benchmark harness."""
+
+from __future__ import annotations
+
+import json
+
+import pydicom
+import pytest
+
+from extract.bench import ArchiveSpec, expand_runs, generate_archive, prepare_archive, run_benchmark, save_report
+
+
+def _small_spec(**overrides) -> ArchiveSpec:
+    values = dict(
+        subjects=2,
+        studies_per_subject=1,
+        series_per_study=3,
+        instances_per_series=3,
+        enhanced_series_per_study=1,
+        frames_per_enhanced=4,
+        junk_files_per_series=1,
+        private_tags=2,
+        rows=8,
+        columns=8,
+    )
+    values.update(overrides)
+    return ArchiveSpec(**values)
+
+
+def test_generate_archive_layout(tmp_path):
+    spec = _small_spec()
+    stats = generate_archive(tmp_path / "raw", spec)
+
+    # 3 regular series of 3 instances plus one enhanced instance per study
+    assert stats["instances"] == 2 * (3 * 3 + 1)
+    assert stats["junk_files"] == 2 * 4
+    assert stats["files"] == stats["instances"] + stats["junk_files"]
+
+    modalities = set()
+    enhanced_frames = []
+    for path in sorted((tmp_path / "raw").rglob("*.dcm")):
+        try:
+            ds = pydicom.dcmread(path, stop_before_pixels=True)
+        except Exception:
+            continue
+        if "SOPInstanceUID" not in ds:
+            continue
+        modalities.add(ds.Modality)
+        if path.name == "ENHANCED.dcm":
+            enhanced_frames.append(int(ds.NumberOfFrames))
+    assert modalities == {"MR", "CT", "PT"}
+    assert enhanced_frames == [4, 4]
+
+
+def test_prepare_archive_reuses_matching_archive(tmp_path):
+    spec = _small_spec(enhanced_series_per_study=0)
+    root, stats = prepare_archive(tmp_path, spec)
+    marker = root / "marker.txt"
+    marker.write_text("kept")
+
+    again_root, again_stats = prepare_archive(tmp_path, spec)
+    assert again_root == root
+    assert again_stats == stats
+    assert marker.exists()
+
+
+def test_archive_spec_rejects_unknown_modality():
+    with pytest.raises(ValueError):
+        ArchiveSpec(modalities=("MR", "XX"))
+
+
+def test_run_benchmark_on_sqlite(tmp_path):
+    spec = _small_spec(subjects=1)
+    runs = expand_runs([1], [1], [10, 20])
+    report = run_benchmark(tmp_path, spec, runs)
+
+    assert report["database"] == "sqlite"
+    assert report["archive"]["instances"] == 10
+    assert [run["config"]["batch_size"] for run in report["runs"]] == [10, 20]
+    for run in report["runs"]:
+        assert run["instances"] == report["archive"]["instances"]
+        assert run["files_per_second"] > 0
+        assert run["peak_rss_mb"] > 0
+        assert run["db_size_bytes"] > 0
+        assert set(run["timings"]) >= {"parse_seconds", "write_seconds", "queue_put_seconds"}
+
+    path = tmp_path / "out" / "report.json"
+    save_report(report, path)
+    assert json.loads(path.read_text())["runs"][0]["label"] == runs[0].label()
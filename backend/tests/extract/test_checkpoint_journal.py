@@ -0,0 +1,159 @@
+"""Tests for the extraction checkpoint journal."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pydicom
+import pytest
+from pydicom.dataset import FileDataset, FileMetaDataset
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import extract.checkpoint_journal as checkpoint_journal
+from extract.checkpoint_journal import CheckpointJournal, default_journal_dir
+from extract.config import ExtractionConfig
+from extract.core import _run_async_process_pool
+
+
+def _setup_metadata_db(monkeypatch):
+    """Set up in-memory SQLite database for testing."""
+    import metadata_db.lifecycle as lifecycle_module
+    import metadata_db.session as session_module
+    import extract.resume_index as resume_index_module
+    import extract.writer as writer_module
+
+    def mock_bootstrap(auto_restore=None):
+        return None
+
+    monkeypatch.setattr(lifecycle_module, "bootstrap", mock_bootstrap, raising=False)
+    monkeypatch.setattr(writer_module, "bootstrap", mock_bootstrap, raising=False)
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    from metadata_db import schema
+
+    schema.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+    monkeypatch.setattr(session_module, "SessionLocal", Session, raising=False)
+    monkeypatch.setattr(writer_module, "SessionLocal", Session, raising=False)
+    monkeypatch.setattr(resume_index_module, "SessionLocal", Session, raising=False)
+
+    return Session
+
+
+@pytest.fixture(autouse=True)
+def journal_root(tmp_path, monkeypatch):
+    root = tmp_path / "journal-root"
+    monkeypatch.setattr(checkpoint_journal, "CHECKPOINT_JOURNAL_ROOT", root)
+    return root
+
+
+def _create_minimal_dicom(path: Path, uid_suffix: str, subject_index: int) -> None:
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+    file_meta.MediaStorageSOPInstanceUID = f"1.2.826.0.1.3680043.2.1125.{uid_suffix}"
+    file_meta.TransferSyntaxUID = pydicom.uid.ImplicitVRLittleEndian
+
+    ds = FileDataset(str(path), {}, file_meta=file_meta, preamble=b"\0" * 128)
+    ds.is_little_endian = True
+    ds.is_implicit_VR = True
+
+    ds.PatientID = f"PAT{subject_index}"
+    ds.StudyInstanceUID = f"1.2.3.4.5.{subject_index}"
+    ds.SeriesInstanceUID = f"1.2.3.4.5.6.{subject_index}"
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.Modality = "MR"
+    ds.SOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+
+    ds.save_as(path)
+
+
+def test_journal_rebuilds_index_and_skips_torn_lines(tmp_path: Path):
+    journal = CheckpointJournal(tmp_path / "journal", fsync=False)
+    assert journal.is_empty()
+    journal.append_paths(["sub1/study/a.dcm", "sub1/study/b.dcm", "sub2/c.dcm"])
+    journal.close()
+
+    # Simulate a crash in the middle of a write
+    segment = next((tmp_path / "journal").iterdir())
+    with segment.open("ab") as handle:
+        handle.write(b'0badc0de {"s":"sub3","d":{"x"')
+
+    journal = CheckpointJournal(tmp_path / "journal", fsync=False)
+    journal.append_paths(["sub2/d.dcm"])
+    index = journal.build_index()
+
+    assert journal.corrupt_records == 1
+    assert index.should_skip("sub1", "study/a.dcm")
+    assert index.should_skip("sub2", "c.dcm")
+    assert index.should_skip("sub2", "d.dcm")
+    assert not index.should_skip("sub3", "x")
+    assert journal.build_index(["sub2"]).entry_for("sub1") is None
+
+
+def test_journal_rotates_and_compacts(tmp_path: Path):
+    journal = CheckpointJournal(tmp_path / "journal", segment_bytes=64, fsync=False)
+    for i in range(5):
+        journal.append_paths([f"sub1/series/file{i}.dcm", "sub1/series/file0.dcm"])
+    journal.close()
+    assert len(list((tmp_path / "journal").iterdir())) == 5
+
+    stats = journal.compact()
+
+    assert stats == {"segments_before": 5, "subjects": 1, "files": 5}
+    assert len(list((tmp_path / "journal").iterdir())) == 1
+    assert journal.subject_counts() == {"sub1": 5}
+
+
+def test_extraction_journal_replaces_database_resume_scan(tmp_path: Path, monkeypatch):
+    _setup_metadata_db(monkeypatch)
+
+    root = tmp_path / "cohort"
+    for s in range(2):
+        for f in range(4):
+            path = root / f"subject{s}" / "series" / f"file{f}.dcm"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _create_minimal_dicom(path, f"{s}.{f}", s)
+
+    config = ExtractionConfig(
+        cohort_id=1,
+        cohort_name="JOURNAL",
+        raw_root=root,
+        max_workers=2,
+        batch_size=10,
+        resume_by_path=True,
+        use_checkpoint_journal=True,
+    )
+    asyncio.run(_run_async_process_pool(config, None, None, None))
+
+    journal = CheckpointJournal(default_journal_dir(1))
+    assert journal.directory.is_relative_to(checkpoint_journal.CHECKPOINT_JOURNAL_ROOT)
+    assert not any(path.name.startswith(".nils_") for path in root.iterdir())
+    assert journal.subject_counts() == {"subject0": 4, "subject1": 4}
+    check = journal.check_against_db(1)
+    assert check.consistent and check.db_files == 8
+
+    import extract.core as core_module
+
+    def _no_db_scan(*args, **kwargs):
+        raise AssertionError("resume index should come from the journal")
+
+    monkeypatch.setattr(core_module, "build_existing_path_index", _no_db_scan)
+    parsed: list[str] = []
+    real_dcmread = pydicom.dcmread
+
+    def _tracking_dcmread(path, *args, **kwargs):
+        parsed.append(str(path))
+        return real_dcmread(path, *args, **kwargs)
+
+    monkeypatch.setattr(pydicom, "dcmread", _tracking_dcmread)
+    asyncio.run(_run_async_process_pool(config, None, None, None))
+    assert parsed == []
@@ -0,0 +1,233 @@
+"""Tests for the staged COPY ingest path of the extraction writer."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from extract.batching import BatchSizeController, BatchSizeSettings
+from extract.config import ExtractionConfig
+from extract.copy_ingest import (
+    build_staged_insert_sql,
+    collect_columns,
+    copy_insert_rows,
+    group_rows_by_columns,
+    staging_table_name,
+)
+from extract.worker import InstancePayload
+from extract.writer import Writer
+from metadata_db import schema
+
+
+def _setup_metadata_db(monkeypatch):
+    import metadata_db.lifecycle as lifecycle_module
+    import metadata_db.session as session_module
+    import extract.writer as writer_module
+
+    def mock_bootstrap(auto_restore=None):
+        return None
+
+    monkeypatch.setattr(lifecycle_module, "bootstrap", mock_bootstrap, raising=False)
+    monkeypatch.setattr(writer_module, "bootstrap", mock_bootstrap, raising=False)
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    schema.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+    monkeypatch.setattr(session_module, "SessionLocal", Session, raising=False)
+    monkeypatch.setattr(writer_module, "SessionLocal", Session, raising=False)
+
+    return Session
+
+
+def test_collect_columns_preserves_first_seen_order():
+    rows = [{"b": 1, "a": 2}, {"a": 3, "c": 4}]
+    assert collect_columns(rows) == ["b", "a", "c"]
+
+
+def test_group_rows_by_columns_splits_on_key_sets():
+    rows = [{"a": 1, "b": 2}, {"a": 3}, {"b": 4, "a": 5}]
+    assert group_rows_by_columns(rows) == [(["a", "b"], [rows[0], rows[2]]), (["a"], [rows[1]])]
+
+
+def test_staged_insert_sql_do_nothing_with_returning():
+    sql = build_staged_insert_sql(
+        "study",
+        ["study_instance_uid", "subject_id"],
+        returning=["study_instance_uid", "study_id"],
+    )
+    assert sql == (
+        'INSERT INTO study ("study_instance_uid", "subject_id") '
+        f'SELECT "study_instance_uid", "subject_id" FROM {staging_table_name("study")} '
+        'ON CONFLICT DO NOTHING RETURNING "study_instance_uid", "study_id"'
+    )
+
+
+def test_staged_insert_sql_overwrite_updates_from_excluded():
+    sql = build_staged_insert_sql(
+        "instance",
+        ["sop_instance_uid", "rows"],
+        conflict_columns=["sop_instance_uid"],
+        update_columns=["sop_instance_uid", "rows"],
+    )
+    assert 'ON CONFLICT ("sop_instance_uid") DO UPDATE SET' in sql
+    assert '"rows" = EXCLUDED."rows"' in sql
+    assert "RETURNING" not in sql
+
+
+def test_staged_insert_sql_update_requires_conflict_target():
+    with pytest.raises(ValueError):
+        build_staged_insert_sql("instance", ["sop_instance_uid"], update_columns=["sop_instance_uid"])
+
+
+def test_copy_ingest_falls_back_on_sqlite(tmp_path, monkeypatch):
+    Session = _setup_metadata_db(monkeypatch)
+
+    config = ExtractionConfig(
+        cohort_id=1,
+        cohort_name="TEST",
+        raw_root=tmp_path,
+        batch_size=10,
+        use_copy_ingest=True,
+    )
+    controller = BatchSizeController(BatchSizeSettings(initial=10, minimum=10, maximum=10, target_ms=200, enabled=False))
+    batch = [
+        InstancePayload(
+            subject_key="subject1",
+            subject_code="subj1",
+            study_uid="study1",
+            series_uid="series1",
+            sop_uid=f"instance{i}",
+            modality="MR",
+            file_path=f"subject1/file{i}.dcm",
+            study_fields={},
+            series_fields={"modality": "MR"},
+            instance_fields={},
+            mri_fields={},
+            ct_fields={},
+            pet_fields={},
+            patient_id="PATIENT1",
+            patient_name="Test^Patient",
+            subject_resolution_source="hash",
+        )
+        for i in range(3)
+    ]
+
+    async def _run() -> bool:
+        async with Writer(
+            config=config,
+            queue=asyncio.Queue(),
+            job_id=None,
+            progress_cb=None,
+            batch_controller=controller,
+        ) as writer:
+            writer._write_batch(writer._session, batch)
+            writer._session.commit()
+            return writer._copy_ingest
+
+    assert asyncio.run(_run()) is False
+    with Session() as session:
+        assert session.scalar(select(func.count()).select_from(schema.Instance)) == 3
+
+
+def test_copy_insert_rows_round_trips_awkward_values_on_postgres(postgres_url):
+    engine = create_engine(postgres_url, future=True)
+    metadata = MetaData()
+    probe = Table(
+        "copy_ingest_probe",
+        metadata,
+        Column("probe_id", Integer, primary_key=True, autoincrement=True),
+        Column("uid", String(64), nullable=False, unique=True),
+        Column("value", Text),
+        Column("rows", Integer),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, future=True)
+
+    values = {
+        "null": None,
+        "empty": "",
+        "tab": "a\tb",
+        "newline": "line1\nline2\r\n",
+        "backslash": "C:\\dicom\\N",
+        "literal_null_marker": "\\N",
+    }
+    rows = [{"uid": uid, "value": value, "rows": None if uid == "null" else 512} for uid, value in values.items()]
+    try:
+        with Session.begin() as session:
+            returned = copy_insert_rows(
+                session,
+                "copy_ingest_probe",
+                rows,
+                conflict_columns=["uid"],
+                returning=["uid", "probe_id"],
+            )
+        assert sorted(uid for uid, _ in returned) == sorted(values)
+
+        with Session.begin() as session:
+            copy_insert_rows(
+                session,
+                "copy_ingest_probe",
+                [{"uid": "empty", "value": "updated", "rows": 1}],
+                conflict_columns=["uid"],
+                update_columns=["value", "rows"],
+            )
+
+        with Session() as session:
+            stored = {uid: (value, rows) for uid, value, rows in session.execute(select(probe.c.uid, probe.c.value, probe.c.rows))}
+        assert stored.pop("empty") == ("updated", 1)
+        assert stored == {uid: (value, None if uid == "null" else 512) for uid, value in values.items() if uid != "empty"}
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+
+
+def test_copy_insert_rows_keeps_server_defaults_for_omitted_columns(postgres_url):
+    engine = create_engine(postgres_url, future=True)
+    metadata = MetaData()
+    probe = Table(
+        "copy_ingest_default_probe",
+        metadata,
+        Column("probe_id", Integer, primary_key=True, autoincrement=True),
+        Column("uid", String(64), nullable=False, unique=True),
+        Column("status", Text, server_default=text("'pending'")),
+        Column("rows", Integer),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, future=True)
+
+    rows = [
+        {"uid": "explicit", "status": "done", "rows": 1},
+        {"uid": "omitted", "rows": 2},
+        {"uid": "explicit_null", "status": None, "rows": 3},
+    ]
+    try:
+        with Session.begin() as session:
+            returned = copy_insert_rows(session, "copy_ingest_default_probe", rows, returning=["uid"])
+        assert sorted(uid for (uid,) in returned) == ["explicit", "explicit_null", "omitted"]
+
+        with Session.begin() as session:
+            copy_insert_rows(
+                session,
+                "copy_ingest_default_probe",
+                [{"uid": "explicit", "rows": 10}],
+                conflict_columns=["uid"],
+                update_columns=["uid", "status", "rows"],
+            )
+
+        with Session() as session:
+            stored = {uid: (status, count) for uid, status, count in session.execute(select(probe.c.uid, probe.c.status, probe.c.rows))}
+        assert stored == {"explicit": ("done", 10), "omitted": ("pending", 2), "explicit_null": (None, 3)}
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
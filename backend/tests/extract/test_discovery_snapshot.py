@@ -0,0 +1,198 @@
+"""Tests for incremental discovery with a persisted directory snapshot."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+import pydicom
+import pytest
+from pydicom.dataset import FileDataset, FileMetaDataset
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from extract.config import ExtractionConfig
+from extract.core import _run_async_process_pool
+import extract.discovery_snapshot as discovery_snapshot
+from extract.discovery_snapshot import DirectorySnapshot, default_snapshot_path, scan_incremental
+from extract.scanner import subjects_from_delta
+from metadata_db.schema import Instance
+
+_OLD_NS = 1_600_000_000 * 1_000_000_000
+
+
+@pytest.fixture(autouse=True)
+def snapshot_root(tmp_path, monkeypatch):
+    root = tmp_path / "snapshot-root"
+    monkeypatch.setattr(discovery_snapshot, "DISCOVERY_SNAPSHOT_ROOT", root)
+    return root
+
+
+def _setup_metadata_db(monkeypatch):
+    """Set up in-memory SQLite database for testing."""
+    import metadata_db.lifecycle as lifecycle_module
+    import metadata_db.session as session_module
+    import extract.writer as writer_module
+
+    def mock_bootstrap(auto_restore=None):
+        return None
+
+    monkeypatch.setattr(lifecycle_module, "bootstrap", mock_bootstrap, raising=False)
+    monkeypatch.setattr(writer_module, "bootstrap", mock_bootstrap, raising=False)
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    from metadata_db import schema
+
+    schema.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+    monkeypatch.setattr(session_module, "SessionLocal", Session, raising=False)
+    monkeypatch.setattr(writer_module, "SessionLocal", Session, raising=False)
+
+    return Session
+
+
+def _create_minimal_dicom(path: Path, uid_suffix: str, subject_index: int) -> None:
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+    file_meta.MediaStorageSOPInstanceUID = f"1.2.826.0.1.3680043.2.1125.{uid_suffix}"
+    file_meta.TransferSyntaxUID = pydicom.uid.ImplicitVRLittleEndian
+
+    ds = FileDataset(str(path), {}, file_meta=file_meta, preamble=b"\0" * 128)
+    ds.is_little_endian = True
+    ds.is_implicit_VR = True
+
+    ds.PatientID = f"PAT{subject_index}"
+    ds.StudyInstanceUID = f"1.2.3.4.5.{subject_index}"
+    ds.SeriesInstanceUID = f"1.2.3.4.5.6.{subject_index}"
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.Modality = "MR"
+    ds.SOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+
+    ds.save_as(path)
+
+
+def _age_tree(root: Path) -> None:
+    """Move directory mtimes out of the racy window so the snapshot trusts them."""
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, ns=(_OLD_NS, _OLD_NS))
+
+
+def _write(path: Path, content: bytes = b"x") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def test_incremental_scan_reports_new_changed_and_removed(tmp_path: Path):
+    root = tmp_path / "raw"
+    _write(root / "sub1" / "study" / "a.dcm")
+    _write(root / "sub1" / "study" / "b.dcm")
+    _write(root / "sub2" / "c.dcm")
+    _write(root / "sub3" / "d.dcm")
+    _age_tree(root)
+
+    snapshot, delta = scan_incremental(root)
+    assert delta.new == ["sub1/study/a.dcm", "sub1/study/b.dcm", "sub2/c.dcm", "sub3/d.dcm"]
+    snapshot_path = tmp_path / "snapshot.parquet"
+    assert snapshot.save(snapshot_path)
+
+    # Nothing changed: every directory is stat()ed but none is listed
+    previous = DirectorySnapshot.load(snapshot_path)
+    assert previous is not None and previous.file_count == 4
+    _, delta = scan_incremental(root, previous)
+    assert (delta.new, delta.changed, delta.removed) == ([], [], [])
+    assert delta.dirs_listed == 0
+    assert delta.dirs_reused == len(previous)
+
+    _write(root / "sub1" / "study" / "e.dcm")
+    (root / "sub1" / "study" / "b.dcm").unlink()
+    _write(root / "sub1" / "study" / "a.dcm", b"rewritten")
+    for path in (root / "sub3" / "d.dcm", root / "sub3"):
+        os.unlink(path) if path.is_file() else path.rmdir()
+
+    _, delta = scan_incremental(root, previous)
+    assert delta.new == ["sub1/study/e.dcm"]
+    assert delta.changed == ["sub1/study/a.dcm"]
+    assert delta.removed == ["sub1/study/b.dcm", "sub3/d.dcm"]
+    # Only the root (sub3 removed) and sub1/study were re-listed
+    assert delta.dirs_listed == 2
+
+
+def test_snapshot_round_trip_keeps_empty_dirs_and_forgets_subtrees(tmp_path: Path):
+    root = tmp_path / "raw"
+    _write(root / "sub1" / "study" / "a.dcm")
+    _write(root / "sub2" / "b.dcm")
+    (root / "empty").mkdir()
+    _age_tree(root)
+
+    snapshot, _ = scan_incremental(root)
+    snapshot.forget_subtree("sub1")
+    snapshot_path = tmp_path / "snapshot.parquet"
+    assert snapshot.save(snapshot_path)
+
+    loaded = DirectorySnapshot.load(snapshot_path)
+    assert loaded is not None
+    assert sorted(loaded.directories) == ["", "empty", "sub2"]
+    assert loaded.get("empty").file_count == 0
+    assert loaded.files.select("rel_dir", "name").rows() == [("sub2", "b.dcm")]
+
+    # The forgotten subject is listed again and reported as new
+    _, delta = scan_incremental(root, loaded)
+    assert delta.new == ["sub1/study/a.dcm"]
+    assert (delta.changed, delta.removed) == ([], [])
+
+
+def test_subjects_from_delta_groups_and_filters(tmp_path: Path):
+    root = tmp_path / "raw"
+    _write(root / "sub1" / "s" / "a.dcm")
+    _write(root / "sub1" / "notes.txt")
+    _write(root / "sub2" / "readme.txt")
+    _write(root / "top.dcm")
+
+    _, delta = scan_incremental(root)
+    subjects = subjects_from_delta(root, delta, lambda name: name.endswith(".dcm"))
+
+    assert [subject.subject_key for subject in subjects] == ["sub1"]
+    assert subjects[0].files == ("s/a.dcm",)
+    assert subjects[0].path == root.resolve() / "sub1"
+
+
+def test_incremental_extraction_only_processes_new_files(tmp_path: Path, monkeypatch):
+    Session = _setup_metadata_db(monkeypatch)
+
+    root = tmp_path / "cohort"
+    for s in range(2):
+        for f in range(3):
+            path = root / f"subject{s}" / f"file{f}.dcm"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _create_minimal_dicom(path, f"{s}.{f}", s)
+
+    config = ExtractionConfig(
+        cohort_id=7,
+        cohort_name="INCREMENTAL",
+        raw_root=root,
+        max_workers=2,
+        batch_size=10,
+        incremental_discovery=True,
+    )
+
+    first = asyncio.run(_run_async_process_pool(config, None, None, None))
+    assert first.total_subjects == 2
+    assert first.metrics["discovery"]["new_files"] == 6
+    assert default_snapshot_path(root, 7).is_file()
+    assert not any(path.name.startswith(".nils_") for path in root.iterdir())
+
+    _create_minimal_dicom(root / "subject1" / "file9.dcm", "1.9", 1)
+    second = asyncio.run(_run_async_process_pool(config, None, None, None))
+
+    assert second.total_subjects == 1
+    assert second.metrics["discovery"]["new_files"] == 1
+    with Session() as session:
+        assert session.scalar(select(func.count()).select_from(Instance)) == 7
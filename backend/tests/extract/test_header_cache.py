@@ -0,0 +1,148 @@
+"""Tests for the persistent per-subject DICOM header cache."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pydicom
+import pytest
+from pydicom.dataset import FileDataset, FileMetaDataset
+
+import extract.header_cache as header_cache
+import extract.process_pool as process_pool
+from extract.config import ExtractionConfig
+from extract.header_cache import CACHE_FILE_NAME, SubjectHeaderCache, default_cache_dir
+from extract.scanner import SubjectFolder
+
+
+def _create_dicom(path: Path, uid_suffix: str, sop_class_uid: str = "1.2.840.10008.5.1.4.1.1.4") -> None:
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = sop_class_uid
+    file_meta.MediaStorageSOPInstanceUID = f"1.2.826.0.1.3680043.2.1125.{uid_suffix}"
+    file_meta.TransferSyntaxUID = pydicom.uid.ImplicitVRLittleEndian
+
+    ds = FileDataset(str(path), {}, file_meta=file_meta, preamble=b"\0" * 128)
+    ds.is_little_endian = True
+    ds.is_implicit_VR = True
+
+    ds.PatientID = "PATIENT1"
+    ds.PatientName = "Test^Patient"
+    ds.StudyInstanceUID = "1.2.3.4.5"
+    ds.SeriesInstanceUID = "1.2.3.4.5.6"
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.SOPClassUID = sop_class_uid
+    ds.Modality = "MR"
+    ds.StudyDate = "20240101"
+    ds.EchoTime = 4.5
+    ds.InstanceNumber = int(uid_suffix)
+
+    ds.save_as(path)
+
+
+def _extract(subject: SubjectFolder, config: ExtractionConfig) -> list:
+    process_pool._worker_init(config, None, config.batch_size)
+    errors: list[str] = []
+    payloads = [
+        payload
+        for batch, _ in process_pool._iter_subject_worker_batches(subject, None, None, errors)
+        for payload in batch
+    ]
+    assert errors == []
+    return payloads
+
+
+@pytest.fixture(autouse=True)
+def cache_root(tmp_path: Path, monkeypatch) -> Path:
+    root = tmp_path / "cache-root"
+    monkeypatch.setattr(header_cache, "HEADER_CACHE_ROOT", root)
+    return root
+
+
+@pytest.fixture
+def subject(tmp_path: Path) -> SubjectFolder:
+    subject_dir = tmp_path / "dcm-raw" / "subject1"
+    subject_dir.mkdir(parents=True)
+    for i in range(1, 4):
+        _create_dicom(subject_dir / f"file{i}.dcm", str(i))
+    # Non-image SOP class: rejected, but still cached so it is not re-read
+    _create_dicom(subject_dir / "report.dcm", "99", sop_class_uid="1.2.840.10008.5.1.4.1.1.88.11")
+    return SubjectFolder(subject_key="subject1", path=subject_dir)
+
+
+def _config(subject: SubjectFolder, **overrides) -> ExtractionConfig:
+    return ExtractionConfig(
+        cohort_id=1,
+        cohort_name="TEST",
+        raw_root=subject.path.parent,
+        batch_size=10,
+        use_header_cache=True,
+        **overrides,
+    )
+
+
+def test_unchanged_files_are_served_from_cache(subject, monkeypatch):
+    config = _config(subject)
+    subject_mtime = subject.path.stat().st_mtime_ns
+    first = _extract(subject, config)
+    assert len(first) == 3
+    assert (default_cache_dir(1) / "subject1" / CACHE_FILE_NAME).is_file()
+    # The archive is untouched, so the discovery snapshot still matches
+    assert not (subject.path / CACHE_FILE_NAME).exists()
+    assert subject.path.stat().st_mtime_ns == subject_mtime
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("unchanged file was parsed again")
+
+    monkeypatch.setattr(pydicom, "dcmread", _fail)
+    second = _extract(subject, config)
+
+    assert [p.sop_uid for p in second] == [p.sop_uid for p in first]
+    assert [p.instance_fields for p in second] == [p.instance_fields for p in first]
+    assert [p.mri_fields for p in second] == [p.mri_fields for p in first]
+    assert [p.file_path for p in second] == [p.file_path for p in first]
+
+
+def test_changed_and_removed_files_invalidate_entries(subject, monkeypatch):
+    config = _config(subject)
+    _extract(subject, config)
+
+    changed = subject.path / "file2.dcm"
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    (subject.path / "file3.dcm").unlink()
+
+    parsed: list[str] = []
+    real_dcmread = pydicom.dcmread
+
+    def _tracking_dcmread(path, *args, **kwargs):
+        parsed.append(Path(path).name)
+        return real_dcmread(path, *args, **kwargs)
+
+    monkeypatch.setattr(pydicom, "dcmread", _tracking_dcmread)
+    payloads = _extract(subject, config)
+
+    assert parsed == ["file2.dcm"]
+    assert len(payloads) == 2
+    cache = SubjectHeaderCache.for_subject(subject.subject_key, default_cache_dir(1))
+    assert len(cache) == 3  # file1, file2 and the rejected report
+
+
+def test_cache_dir_keeps_archive_untouched(subject, tmp_path):
+    cache_dir = tmp_path / "header-cache"
+    _extract(subject, _config(subject, header_cache_dir=cache_dir))
+
+    assert not (subject.path / CACHE_FILE_NAME).exists()
+    assert (cache_dir / "subject1" / CACHE_FILE_NAME).is_file()
+
+
+def test_work_units_get_distinct_cache_paths(tmp_path):
+    cache_dir = tmp_path / "header-cache"
+    paths = {
+        unit: SubjectHeaderCache.for_subject("subject1", cache_dir, unit).cache_path
+        for unit in (None, "", "root-files", "study1", "study1/series1")
+    }
+
+    assert paths[None] == cache_dir / "subject1" / CACHE_FILE_NAME
+    assert len(set(paths.values())) == len(paths)
+    assert all(path.is_relative_to(cache_dir / "subject1") for path in paths.values())
@@ -0,0 +1,163 @@
+"""Tests for the header-prefix fast-path DICOM reader."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pydicom
+import pytest
+from pydicom.dataset import Dataset, FileDataset, FileMetaDataset
+from pydicom.sequence import Sequence
+
+import extract.prefix_reader as prefix_reader
+from extract.dicom_mappings import (
+    CT_SERIES_FIELD_MAP,
+    INSTANCE_FIELD_MAP,
+    MRI_SERIES_FIELD_MAP,
+    SERIES_FIELD_MAP,
+    STUDY_FIELD_MAP,
+    extract_fields,
+)
+from extract.prefix_reader import read_extraction_header, read_header_prefix
+
+_FIELD_MAPS = (STUDY_FIELD_MAP, SERIES_FIELD_MAP, INSTANCE_FIELD_MAP, MRI_SERIES_FIELD_MAP, CT_SERIES_FIELD_MAP)
+
+
+def _base_dataset(path: Path, sop_class_uid: str, transfer_syntax) -> FileDataset:
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = sop_class_uid
+    file_meta.MediaStorageSOPInstanceUID = "1.2.826.0.1.3680043.2.1125.1"
+    file_meta.TransferSyntaxUID = transfer_syntax
+
+    ds = FileDataset(str(path), {}, file_meta=file_meta, preamble=b"\0" * 128)
+    ds.PatientID = "TEST001"
+    ds.PatientName = "Test^Patient"
+    ds.StudyInstanceUID = "1.2.3.4.5"
+    ds.SeriesInstanceUID = "1.2.3.4.5.6"
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.SOPClassUID = sop_class_uid
+    ds.StudyDate = "20240101"
+    ds.SeriesDescription = "test"
+    ds.Manufacturer = "SIEMENS"
+    ds.InstanceNumber = 1
+    ds.Rows = 64
+    ds.Columns = 64
+    return ds
+
+
+def _enhanced_mr(path: Path, frames: int = 200) -> None:
+    ds = _base_dataset(path, "1.2.840.10008.5.1.4.1.1.4.1", pydicom.uid.ExplicitVRLittleEndian)
+    ds.Modality = "MR"
+    ds.ImageType = ["ORIGINAL", "PRIMARY", "M", "NONE"]
+    ds.MagneticFieldStrength = 3.0
+    ds.RepetitionTime = 2000.0
+    ds.EchoTime = 30.0
+    ds.NumberOfFrames = frames
+    # Large private vendor block, like a Siemens CSA header
+    ds.add_new(0x00290010, "LO", "SIEMENS CSA HEADER")
+    ds.add_new(0x00291010, "OB", b"\x01" * 100_000)
+
+    items = []
+    for index in range(frames):
+        position = Dataset()
+        position.ImagePositionPatient = [0.0, 0.0, float(index)]
+        item = Dataset()
+        item.PlanePositionSequence = Sequence([position])
+        items.append(item)
+    ds.PerFrameFunctionalGroupsSequence = Sequence(items)
+    ds["PerFrameFunctionalGroupsSequence"].is_undefined_length = True
+    ds.PixelData = b"\0" * (64 * 64 * 2 * 4)
+    ds.save_as(path, enforce_file_format=True)
+
+
+def _classic_ct(path: Path) -> None:
+    ds = _base_dataset(path, "1.2.840.10008.5.1.4.1.1.2", pydicom.uid.ImplicitVRLittleEndian)
+    ds.Modality = "CT"
+    ds.ImageType = ["ORIGINAL", "PRIMARY", "AXIAL"]
+    ds.KVP = 120
+    ds.ConvolutionKernel = "B30f"
+    ds.SliceThickness = 1.0
+    ds.PixelData = b"\0" * (64 * 64 * 2)
+    ds.save_as(path, enforce_file_format=True)
+
+
+def _fields(dataset) -> list[dict]:
+    return [extract_fields(dataset, mapping) for mapping in _FIELD_MAPS]
+
+
+@pytest.mark.parametrize("builder", [_enhanced_mr, _classic_ct])
+@pytest.mark.parametrize("prefix_bytes", [4096, 64 * 1024])
+def test_prefix_reader_matches_dcmread_fields(tmp_path: Path, builder, prefix_bytes: int):
+    path = tmp_path / "image.dcm"
+    builder(path)
+
+    regular = read_extraction_header(path)
+    fast = read_header_prefix(path, prefix_bytes)
+
+    assert _fields(fast) == _fields(regular)
+    assert fast.file_meta.MediaStorageSOPClassUID == regular.file_meta.MediaStorageSOPClassUID
+    assert "PixelData" not in fast
+
+
+def test_prefix_reader_stops_before_functional_groups(tmp_path: Path, monkeypatch):
+    path = tmp_path / "enhanced.dcm"
+    _enhanced_mr(path, frames=2000)
+
+    bytes_read: list[int] = []
+    real_read = os.read
+
+    def _counting_read(fd, size):
+        data = real_read(fd, size)
+        bytes_read.append(len(data))
+        return data
+
+    def _no_fallback(*args, **kwargs):
+        raise AssertionError("prefix reader fell back to dcmread")
+
+    monkeypatch.setattr(prefix_reader.os, "read", _counting_read)
+    monkeypatch.setattr(prefix_reader.pydicom, "dcmread", _no_fallback)
+    dataset = read_header_prefix(path, 64 * 1024)
+
+    # The CSA block is read, the per-frame functional groups are not
+    assert sum(bytes_read) < path.stat().st_size
+    assert "PerFrameFunctionalGroupsSequence" not in dataset
+    assert dataset.EchoTime == 30.0
+
+
+def test_prefix_reader_handles_files_without_pixel_data(tmp_path: Path):
+    path = tmp_path / "small.dcm"
+    ds = _base_dataset(path, "1.2.840.10008.5.1.4.1.1.4", pydicom.uid.ImplicitVRLittleEndian)
+    ds.Modality = "MR"
+    ds.save_as(path, enforce_file_format=True)
+
+    dataset = read_header_prefix(path, 4096)
+    assert dataset.SOPInstanceUID == ds.SOPInstanceUID
+    assert dataset.Modality == "MR"
+
+
+def test_prefix_reader_bounds_growth_on_large_junk_file(tmp_path: Path, monkeypatch):
+    path = tmp_path / "junk.bin"
+    # Zero bytes parse as an endless run of low tags, so the stop tag is never reached
+    path.write_bytes(bytes(8 * 1024 * 1024))
+
+    bytes_read: list[int] = []
+    real_read = os.read
+    fallback_calls: list[dict] = []
+
+    def _counting_read(fd, size):
+        data = real_read(fd, size)
+        bytes_read.append(len(data))
+        return data
+
+    def _fallback(*args, **kwargs):
+        fallback_calls.append(kwargs)
+        return Dataset()
+
+    monkeypatch.setattr(prefix_reader.os, "read", _counting_read)
+    monkeypatch.setattr(prefix_reader.pydicom, "dcmread", _fallback)
+    read_header_prefix(path, 4096)
+
+    assert sum(bytes_read) <= 4096 * 2**prefix_reader.MAX_PREFIX_GROWTHS
+    assert len(bytes_read) <= prefix_reader.MAX_PREFIX_GROWTHS + 1
+    assert fallback_calls and fallback_calls[0]["stop_before_pixels"] is True
@@ -0,0 +1,205 @@
+"""Tests for streaming per-batch results from the extraction process pool."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pydicom
+from pydicom.dataset import FileDataset, FileMetaDataset
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from extract.config import ExtractionConfig
+from extract.core import _run_async_process_pool
+from extract.process_pool import extract_subjects_streaming, plan_work_units
+from extract.scanner import SubjectFolder, discover_subjects
+from metadata_db.schema import Instance, Subject
+
+
+def _setup_metadata_db(monkeypatch):
+    """Set up in-memory SQLite database for testing."""
+    import metadata_db.lifecycle as lifecycle_module
+    import metadata_db.session as session_module
+    import extract.writer as writer_module
+
+    def mock_bootstrap(auto_restore=None):
+        return None
+
+    monkeypatch.setattr(lifecycle_module, "bootstrap", mock_bootstrap, raising=False)
+    monkeypatch.setattr(writer_module, "bootstrap", mock_bootstrap, raising=False)
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    from metadata_db import schema
+
+    schema.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+    monkeypatch.setattr(session_module, "SessionLocal", Session, raising=False)
+    monkeypatch.setattr(writer_module, "SessionLocal", Session, raising=False)
+
+    return Session
+
+
+def _create_minimal_dicom(path: Path, uid_suffix: str, subject_index: int) -> None:
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+    file_meta.MediaStorageSOPInstanceUID = f"1.2.826.0.1.3680043.2.1125.{uid_suffix}"
+    file_meta.TransferSyntaxUID = pydicom.uid.ImplicitVRLittleEndian
+
+    ds = FileDataset(str(path), {}, file_meta=file_meta, preamble=b"\0" * 128)
+    ds.is_little_endian = True
+    ds.is_implicit_VR = True
+
+    ds.PatientID = f"PAT{subject_index}"
+    ds.StudyInstanceUID = f"1.2.3.4.5.{subject_index}"
+    ds.SeriesInstanceUID = f"1.2.3.4.5.6.{subject_index}"
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.Modality = "MR"
+    ds.SOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+
+    ds.save_as(path)
+
+
+def _build_cohort(root: Path, subjects: int, files_per_subject: int) -> None:
+    for s in range(subjects):
+        subject_dir = root / f"subject{s}"
+        subject_dir.mkdir(parents=True)
+        for f in range(files_per_subject):
+            _create_minimal_dicom(subject_dir / f"file{f}.dcm", f"{s}.{f}", s)
+
+
+def test_streaming_yields_batches_before_subject_completion(tmp_path: Path):
+    root = tmp_path / "cohort"
+    _build_cohort(root, subjects=2, files_per_subject=25)
+
+    config = ExtractionConfig(cohort_id=1, cohort_name="STREAM", raw_root=root, batch_size=10)
+    subjects = list(discover_subjects(root))
+
+    events = list(
+        extract_subjects_streaming(
+            subjects=subjects,
+            config=config,
+            resolver=None,
+            max_workers=2,
+            max_pending_batches=1,
+        )
+    )
+
+    for subject in subjects:
+        subject_events = [event for event in events if event.subject_key == subject.subject_key]
+        # 25 files at batch_size=10 -> three batches, then exactly one completion event
+        assert [len(event.batch) for event in subject_events[:-1]] == [10, 10, 5]
+        assert subject_events[-1].completed
+        assert subject_events[-1].files_processed == 25
+        assert subject_events[-1].errors == []
+
+
+def test_streaming_generator_close_stops_workers(tmp_path: Path):
+    root = tmp_path / "cohort"
+    _build_cohort(root, subjects=3, files_per_subject=30)
+
+    config = ExtractionConfig(cohort_id=1, cohort_name="STREAM", raw_root=root, batch_size=10)
+    events = extract_subjects_streaming(
+        subjects=list(discover_subjects(root)),
+        config=config,
+        resolver=None,
+        max_workers=2,
+        max_pending_batches=1,
+    )
+
+    first = next(events)
+    assert first.batch
+    # Closing early must not hang on workers blocked on the full queue
+    events.close()
+
+
+def test_process_pool_streaming_writes_all_instances(tmp_path: Path, monkeypatch):
+    Session = _setup_metadata_db(monkeypatch)
+
+    root = tmp_path / "cohort"
+    _build_cohort(root, subjects=3, files_per_subject=12)
+
+    config = ExtractionConfig(
+        cohort_id=1,
+        cohort_name="STREAM_COHORT",
+        raw_root=root,
+        max_workers=2,
+        batch_size=10,
+        queue_size=2,
+        worker_stream_queue_size=2,
+    )
+
+    progress_calls: list[int] = []
+
+    async def progress_callback(current: int, total: int) -> None:
+        progress_calls.append(current)
+
+    result = asyncio.run(_run_async_process_pool(config, progress_callback, None, None))
+
+    assert result.completed_total == 3
+    assert progress_calls[-1] == 3
+    with Session() as session:
+        assert session.scalar(select(func.count()).select_from(Instance)) == 36
+        assert session.scalar(select(func.count()).select_from(Subject)) == 3
+
+
+def _build_nested_subject(subject_dir: Path, studies: int, files_per_study: int, subject_index: int) -> None:
+    for study in range(studies):
+        study_dir = subject_dir / f"study{study}"
+        study_dir.mkdir(parents=True)
+        for f in range(files_per_study):
+            _create_minimal_dicom(study_dir / f"file{f}.dcm", f"{subject_index}.{study}.{f}", subject_index)
+
+
+def test_plan_work_units_splits_at_depth(tmp_path: Path):
+    subject_dir = tmp_path / "cohort" / "subject0"
+    _build_nested_subject(subject_dir, studies=3, files_per_study=1, subject_index=0)
+    _create_minimal_dicom(subject_dir / "loose.dcm", "0.9", 0)
+    subject = next(iter(discover_subjects(tmp_path / "cohort")))
+
+    units = plan_work_units(subject, "all", depth=1)
+
+    assert [unit.unit for unit in units] == ["study0", "study1", "study2", ""]
+    assert units[-1].files == ("loose.dcm",)
+    assert all(unit.files is None for unit in units[:-1])
+    assert plan_work_units(subject, "all", depth=0) == [subject]
+
+    listed = SubjectFolder(subject.subject_key, subject.path, files=("study0/file0.dcm", "study2/file0.dcm"))
+    assert [unit.files for unit in plan_work_units(listed, "all", depth=1)] == [
+        ("study0/file0.dcm",),
+        ("study2/file0.dcm",),
+    ]
+
+
+def test_streaming_work_units_complete_subject_once(tmp_path: Path):
+    root = tmp_path / "cohort"
+    _build_nested_subject(root / "subject0", studies=4, files_per_study=15, subject_index=0)
+    _build_nested_subject(root / "subject1", studies=1, files_per_study=5, subject_index=1)
+
+    config = ExtractionConfig(cohort_id=1, cohort_name="STREAM", raw_root=root, batch_size=10, work_unit_depth=1)
+    events = list(
+        extract_subjects_streaming(
+            subjects=list(discover_subjects(root)),
+            config=config,
+            resolver=None,
+            max_workers=3,
+            max_pending_batches=2,
+        )
+    )
+
+    for key, expected in (("subject0", 60), ("subject1", 5)):
+        subject_events = [event for event in events if event.subject_key == key]
+        assert [event.completed for event in subject_events].count(True) == 1
+        assert subject_events[-1].completed
+        assert subject_events[-1].files_processed == expected
+        assert sum(len(event.batch) for event in subject_events[:-1]) == expected
+        sop_uids = [payload.sop_uid for event in subject_events[:-1] for payload in event.batch]
+        assert len(set(sop_uids)) == expected
+        assert all(payload.file_path.startswith(f"{key}/study") for event in subject_events[:-1] for payload in event.batch)
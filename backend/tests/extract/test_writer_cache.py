@@ -0,0 +1,206 @@
+"""Tests for the writer's bounded, subject-scoped ID caches."""
+
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from extract.batching import BatchSizeController, BatchSizeSettings
+from extract.config import ExtractionConfig
+from extract.profiler import ExtractionProfiler, set_global_profiler
+from extract.worker import InstancePayload
+from extract.writer import Writer
+from extract.writer_cache import WriterCaches
+from metadata_db import schema
+
+
+def _setup_metadata_db(monkeypatch) -> sessionmaker:
+    """Set up an in-memory SQLite database for testing."""
+    import metadata_db.lifecycle as lifecycle_module
+    import metadata_db.session as session_module
+    import extract.writer as writer_module
+
+    def mock_bootstrap(auto_restore=None):
+        return None
+
+    monkeypatch.setattr(lifecycle_module, "bootstrap", mock_bootstrap, raising=False)
+    monkeypatch.setattr(writer_module, "bootstrap", mock_bootstrap, raising=False)
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    schema.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+    monkeypatch.setattr(session_module, "SessionLocal", Session, raising=False)
+    monkeypatch.setattr(writer_module, "SessionLocal", Session, raising=False)
+
+    return Session
+
+
+def _make_payload(
+    subject_key: str = "subject1",
+    study_uid: str = "study1",
+    series_uid: str = "series1",
+    sop_uid: str = "instance1",
+    modality: str = "MR",
+    patient_id: str = "PATIENT1",
+) -> InstancePayload:
+    """Create a test InstancePayload."""
+    return InstancePayload(
+        subject_key=subject_key,
+        subject_code=f"subj_{subject_key}",
+        study_uid=study_uid,
+        series_uid=series_uid,
+        sop_uid=sop_uid,
+        modality=modality,
+        file_path=f"{subject_key}/{study_uid}/{series_uid}/{sop_uid}.dcm",
+        study_fields={},
+        series_fields={"modality": modality},
+        instance_fields={},
+        mri_fields={},
+        ct_fields={},
+        pet_fields={},
+        patient_id=patient_id,
+        patient_name="Test^Patient",
+        subject_resolution_source="hash",
+    )
+
+
+def test_lru_counts_hits_misses_and_evicts_least_recent():
+    caches = WriterCaches(max_entries=2)
+    cache = caches["studies"]
+    caches.current_subject = "s1"
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache.get("a") == 1  # "b" is now least recent
+    cache["c"] = 3
+
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.stats() == {
+        "size": 2,
+        "max_entries": 2,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 1,
+        "finished_evictions": 0,
+    }
+
+
+def test_finished_subjects_are_evicted_first():
+    caches = WriterCaches(max_entries=3)
+    cache = caches["series"]
+    caches.current_subject = "s1"
+    cache["s1-a"] = 1
+    cache["s1-b"] = 2
+    caches.current_subject = "s2"
+    cache["s2-a"] = 3
+    # s1-a is used by s2 before s1 finishes, so it now belongs to s2
+    assert cache.get("s1-a") == 1
+    caches.finish_subject("s1")
+
+    caches.current_subject = "s3"
+    cache["s3-a"] = 4
+
+    assert set(cache._data) == {"s1-a", "s2-a", "s3-a"}
+    assert cache.stats()["finished_evictions"] == 1
+    assert caches.current_subject == "s3"
+
+
+def test_writer_stays_within_cache_bounds_across_subjects(tmp_path, monkeypatch):
+    Session = _setup_metadata_db(monkeypatch)
+    config = ExtractionConfig(
+        cohort_id=1,
+        cohort_name="TEST",
+        raw_root=tmp_path,
+        batch_size=10,
+        writer_cache_max_entries=2,
+    )
+    controller = BatchSizeController(BatchSizeSettings(initial=10, minimum=10, maximum=10, target_ms=200, enabled=False))
+    profiler = ExtractionProfiler()
+    set_global_profiler(profiler)
+
+    def subject_batch(index: int, sop_offset: int = 0) -> list:
+        key = f"subject{index}"
+        return [
+            _make_payload(
+                subject_key=key,
+                patient_id=f"PATIENT{index}",
+                study_uid=f"study{index}",
+                series_uid=f"series{index}",
+                sop_uid=f"{key}-{sop_offset + n}",
+            )
+            for n in range(3)
+        ]
+
+    async def _run():
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(5):
+            queue.put_nowait((f"subject{index}", None, subject_batch(index), None, False))
+            queue.put_nowait((f"subject{index}", None, subject_batch(index, 3), None, True))
+        queue.put_nowait(None)
+        async with Writer(
+            config=config,
+            queue=queue,
+            job_id=None,
+            progress_cb=None,
+            batch_controller=controller,
+        ) as writer:
+            await writer.consume(total_subjects=5)
+            return writer.snapshot_metrics()
+
+    try:
+        metrics = asyncio.run(_run())
+        summary = profiler.get_summary()
+    finally:
+        set_global_profiler(None)
+
+    with Session() as session:
+        assert session.execute(select(func.count()).select_from(schema.Instance)).scalar_one() == 30
+        assert session.execute(select(func.count()).select_from(schema.Series)).scalar_one() == 5
+
+    studies = metrics["caches"]["studies"]
+    assert studies["size"] <= 2
+    # The second batch of each subject is served from the cache
+    assert studies["hits"] >= 5 * 3
+    assert studies["finished_evictions"] == studies["evictions"] > 0
+    assert summary["counters"]["writer_cache.studies"]["hits"] == studies["hits"]
+
+
+def test_evicted_stack_counter_is_recovered_from_database(tmp_path, monkeypatch):
+    _setup_metadata_db(monkeypatch)
+    config = ExtractionConfig(cohort_id=1, cohort_name="TEST", raw_root=tmp_path, batch_size=10)
+    controller = BatchSizeController(BatchSizeSettings(initial=10, minimum=10, maximum=10, target_ms=200, enabled=False))
+
+    def stack_payload(sop_uid: str, echo_time: float):
+        payload = _make_payload(sop_uid=sop_uid)
+        payload.instance_fields = {"echo_time": echo_time}
+        return payload
+
+    async def _run():
+        async with Writer(
+            config=config,
+            queue=asyncio.Queue(),
+            job_id=None,
+            progress_cb=None,
+            batch_controller=controller,
+        ) as writer:
+            writer._write_batch(writer._session, [stack_payload("A", 10.0), stack_payload("B", 20.0)])
+            writer._session.commit()
+            writer._stack_cache.clear()
+            writer._series_stack_counter.clear()
+            writer._write_batch(writer._session, [stack_payload("C", 30.0)])
+            writer._session.commit()
+            return sorted(
+                writer._session.execute(select(schema.SeriesStack.stack_index)).scalars().all()
+            )
+
+    assert asyncio.run(_run()) == [0, 1, 2]
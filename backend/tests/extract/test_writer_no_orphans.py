@@ -591,3 +591,188 @@ class TestNoOrphans:
         # Instance should have correct series_id
         assert instance.series_id == series.series_id, "Instance should reference correct series"
         assert instance.series_stack_id is not None, "Instance should have stack_id set"
+
+
+def _setup_file_metadata_db(monkeypatch, tmp_path) -> sessionmaker:
+    """Set up a file-backed SQLite database that can serve two connections."""
+    import metadata_db.lifecycle as lifecycle_module
+    import metadata_db.session as session_module
+    import extract.writer as writer_module
+
+    def mock_bootstrap(auto_restore=None):
+        return None
+
+    monkeypatch.setattr(lifecycle_module, "bootstrap", mock_bootstrap, raising=False)
+    monkeypatch.setattr(writer_module, "bootstrap", mock_bootstrap, raising=False)
+
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'metadata.db'}",
+        future=True,
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+
+    schema.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+    monkeypatch.setattr(session_module, "SessionLocal", Session, raising=False)
+    monkeypatch.setattr(writer_module, "SessionLocal", Session, raising=False)
+
+    return Session
+
+
+class TestPipelinedWrites:
+    """Parent lookups for the next batch run on a second connection."""
+
+    def _run_consume(self, tmp_path, monkeypatch, pipelined: bool):
+        Session = _setup_file_metadata_db(monkeypatch, tmp_path)
+        import extract.writer as writer_module
+        from extract.parent_prefetch import prefetch_parents
+
+        prefetched_batches: list[int] = []
+
+        def _counting_prefetch(session, batch, **kwargs):
+            prefetched_batches.append(len(batch))
+            return prefetch_parents(session, batch, **kwargs)
+
+        monkeypatch.setattr(writer_module, "prefetch_parents", _counting_prefetch)
+
+        config = ExtractionConfig(
+            cohort_id=1,
+            cohort_name="TEST",
+            raw_root=tmp_path,
+            max_workers=1,
+            batch_size=10,
+            queue_size=10,
+            pipelined_writes=pipelined,
+        )
+        controller = BatchSizeController(BatchSizeSettings(initial=10, minimum=10, maximum=10, target_ms=200, enabled=False))
+        batches = [
+            [_make_payload(sop_uid=sop) for sop in ("A", "B", "C")],
+            # A was written by the batch in flight while this one was looked up
+            [_make_payload(sop_uid="A"), _make_payload(sop_uid="D")],
+            [_make_payload(sop_uid="E", series_uid="series2")],
+            # Duplicate SOP in an unseen series: series3 must not be created
+            [_make_payload(sop_uid="E", series_uid="series3"), _make_payload(sop_uid="F", series_uid="series2")],
+            [_make_payload(subject_key="subject2", patient_id="PATIENT2", study_uid="study2", series_uid="series4", sop_uid="G")],
+        ]
+
+        async def _run():
+            queue: asyncio.Queue = asyncio.Queue()
+            for index, batch in enumerate(batches):
+                queue.put_nowait(("subject1", None, batch, None, index == len(batches) - 1))
+            queue.put_nowait(None)
+            async with Writer(
+                config=config,
+                queue=queue,
+                job_id=None,
+                progress_cb=None,
+                batch_controller=controller,
+            ) as writer:
+                await writer.consume(total_subjects=1)
+
+        asyncio.run(_run())
+        with Session() as session:
+            counts = _count_records(session)
+            orphans = (_count_orphan_series(session), _count_orphan_studies(session), _count_orphan_subjects(session))
+            links = set(
+                session.execute(
+                    select(schema.Instance.sop_instance_uid, schema.Series.series_instance_uid, schema.SeriesStack.series_id)
+                    .join(schema.Series, schema.Instance.series_id == schema.Series.series_id)
+                    .join(schema.SeriesStack, schema.Instance.series_stack_id == schema.SeriesStack.series_stack_id)
+                ).all()
+            )
+            series_ids = dict(session.execute(select(schema.Series.series_instance_uid, schema.Series.series_id)).all())
+        return counts, orphans, links, series_ids, prefetched_batches
+
+    def test_pipelined_writes_match_sequential_writes(self, tmp_path, monkeypatch):
+        sequential = self._run_consume(tmp_path / "seq", monkeypatch, pipelined=False)
+        pipelined = self._run_consume(tmp_path / "pipe", monkeypatch, pipelined=True)
+
+        assert sequential[4] == []
+        assert pipelined[4] == [2, 1, 2, 1], "every batch after the first is looked up ahead"
+        for counts, orphans, links, series_ids, _ in (sequential, pipelined):
+            assert counts == {"subjects": 2, "studies": 2, "series": 3, "stacks": 3, "instances": 7}
+            assert orphans == (0, 0, 0)
+            assert "series3" not in series_ids
+            # Every instance points at its own series and a stack of that series
+            assert all(series_ids[series_uid] == stack_series_id for _, series_uid, stack_series_id in links)
+        assert pipelined[2] == sequential[2]
+
+    def test_prefetch_reports_committed_parents_only_when_links_agree(self, tmp_path, monkeypatch):
+        from extract.parent_prefetch import prefetch_parents, stack_signature
+
+        self._run_consume(tmp_path, monkeypatch, pipelined=False)
+        Session = _setup_file_metadata_db(monkeypatch, tmp_path)
+        existing = _make_payload(sop_uid="A")
+        new_same_series = _make_payload(sop_uid="Z")
+        # study1 belongs to PATIENT1; PATIENT2 claiming it must go through re-linking
+        moved_study = _make_payload(sop_uid="Y", patient_id="PATIENT2", subject_key="subject2", series_uid="series5")
+
+        with Session() as session:
+            same = prefetch_parents(session, [existing, new_same_series], cohort_name="test", subject_id_type_id=None)
+            moved = prefetch_parents(session, [moved_study], cohort_name="test", subject_id_type_id=None)
+
+        assert same.existing_sops == {"A"}
+        assert list(same.subjects) == ["PATIENT1"]
+        assert list(same.studies) == ["study1"]
+        assert list(same.series) == ["series1"]
+        assert stack_signature(new_same_series) in same.stacks
+        assert same.stack_counters == {"series1": 1}
+
+        assert moved.existing_sops == set()
+        assert list(moved.subjects) == ["PATIENT2"]
+        assert moved.studies == {} and moved.series == {} and moved.stacks == {}
+
+    def test_failed_batch_in_flight_discards_the_prefetch(self, tmp_path, monkeypatch):
+        Session = _setup_file_metadata_db(monkeypatch, tmp_path)
+        import extract.writer as writer_module
+
+        original = writer_module.Writer._write_batch_with_retry
+        calls: list[list[str]] = []
+
+        async def _drop_first_batch(self, session, batch, existing_sops=None):
+            calls.append([payload.sop_uid for payload in batch])
+            if len(calls) == 1:
+                # The batch is rolled back and dropped instead of written
+                session.rollback()
+                return False
+            return await original(self, session, batch, existing_sops)
+
+        monkeypatch.setattr(writer_module.Writer, "_write_batch_with_retry", _drop_first_batch)
+
+        config = ExtractionConfig(
+            cohort_id=1,
+            cohort_name="TEST",
+            raw_root=tmp_path,
+            max_workers=1,
+            batch_size=10,
+            queue_size=10,
+            pipelined_writes=True,
+        )
+        controller = BatchSizeController(BatchSizeSettings(initial=10, minimum=10, maximum=10, target_ms=200, enabled=False))
+        batches = [
+            [_make_payload(sop_uid=sop) for sop in ("A", "B")],
+            # Looked up while the first batch was in flight; A must still be written
+            [_make_payload(sop_uid="A"), _make_payload(sop_uid="C")],
+        ]
+
+        async def _run():
+            queue: asyncio.Queue = asyncio.Queue()
+            for index, batch in enumerate(batches):
+                queue.put_nowait(("subject1", None, batch, None, index == len(batches) - 1))
+            queue.put_nowait(None)
+            async with Writer(
+                config=config,
+                queue=queue,
+                job_id=None,
+                progress_cb=None,
+                batch_controller=controller,
+            ) as writer:
+                await writer.consume(total_subjects=1)
+
+        asyncio.run(_run())
+        assert calls == [["A", "B"], ["A", "C"]]
+        with Session() as session:
+            stored = set(session.scalars(select(schema.Instance.sop_instance_uid)))
+        assert stored == {"A", "C"}
@@ -0,0 +1,154 @@
+"""Tests for the COPY-based bulk writes of Steps 3 and 4."""
+
+import asyncio
+
+import polars as pl
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from classification.core.output import ClassificationResult
+from metadata_db import schema
+from src.sort.bulk_writes import build_update_sql, build_upsert_sql, copy_update, copy_upsert
+from src.sort.steps.step3_classification import Step3Classification
+from src.sort.steps.step4_completion import Step4Completion
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    schema.SeriesClassificationCache.__table__.create(engine)
+    schema.StackFingerprint.__table__.create(engine)
+    return engine
+
+
+def _cache_rows(conn):
+    return {
+        row.series_stack_id: row
+        for row in conn.exec_driver_sql("SELECT * FROM series_classification_cache")
+    }
+
+
+def _fingerprint(stack_id, **values):
+    return {
+        "series_stack_id": stack_id,
+        "series_id": stack_id * 10,
+        "series_instance_uid": f"1.2.{stack_id}",
+        "subject_id": 1,
+        "study_id": 2,
+        "fov_x": 240.0,
+        "fov_y": 220.0,
+        "stack_n_instances": 30,
+        "stack_orientation": "Axial",
+        "mr_echo_number": "2,3",
+        **values,
+    }
+
+
+def test_upsert_sql_from_staging_table():
+    sql = build_upsert_sql("t", ["id", "a", "b"], "id", source="stage")
+    assert sql == (
+        "INSERT INTO t (id, a, b) SELECT id, a, b FROM stage "
+        "ON CONFLICT (id) DO UPDATE SET a = EXCLUDED.a, b = EXCLUDED.b"
+    )
+
+
+def test_update_sql_from_staging_table():
+    sql = build_update_sql("t", ["id", "a"], "id", source="stage", constants={"flag": "1"})
+    assert sql == "UPDATE t SET a = s.a, flag = 1 FROM stage s WHERE t.id = s.id"
+
+
+def test_copy_upsert_inserts_and_overwrites(engine):
+    frame = pl.DataFrame({
+        "series_stack_id": [1, 2],
+        "series_instance_uid": ["1.2.1", "1.2.2"],
+        "modifier_csv": ["", None],
+    })
+    with engine.begin() as conn:
+        assert copy_upsert(conn, "series_classification_cache", frame, "series_stack_id") == 2
+        update = pl.DataFrame({"series_stack_id": [2], "series_instance_uid": ["1.2.2"], "modifier_csv": ["FS"]})
+        copy_upsert(conn, "series_classification_cache", update, "series_stack_id")
+        rows = _cache_rows(conn)
+
+    # Empty strings and NULLs stay distinct
+    assert rows[1].modifier_csv == ""
+    assert rows[2].modifier_csv == "FS"
+
+
+def test_copy_update_sets_constants(engine):
+    with engine.begin() as conn:
+        copy_upsert(conn, "series_classification_cache", pl.DataFrame({
+            "series_stack_id": [1, 2],
+            "series_instance_uid": ["1.2.1", "1.2.2"],
+            "base": ["T1", "T2"],
+        }), "series_stack_id")
+        copy_update(
+            conn, "series_classification_cache",
+            pl.DataFrame({"series_stack_id": [2], "base": ["PD"]}),
+            "series_stack_id", constants={"manual_review_required": "1"},
+        )
+        rows = _cache_rows(conn)
+
+    assert (rows[1].base, rows[1].manual_review_required) == ("T1", None)
+    assert (rows[2].base, rows[2].manual_review_required) == ("PD", 1)
+
+
+def test_copy_writes_skip_empty_frames(engine):
+    with engine.begin() as conn:
+        assert copy_upsert(conn, "series_classification_cache", pl.DataFrame(), "series_stack_id") == 0
+        assert copy_update(conn, "stack_fingerprint", pl.DataFrame(), "series_stack_id") == 0
+
+
+def test_step3_upsert_from_result_columns(engine):
+    step = Step3Classification()
+    results = [
+        (_fingerprint(1), ClassificationResult(base="T1w", technique="MPRAGE", directory_type="anat")),
+        (_fingerprint(2, mr_echo_number=None), ClassificationResult(post_contrast=1, manual_review_required=1)),
+    ]
+    frame = step._build_upsert_frame(results, "cohort")
+    assert frame.columns == list(step.UPSERT_SCHEMA)
+
+    with engine.begin() as conn:
+        assert asyncio.run(step._async_batch_upsert(conn, frame)) == 2
+        rows = _cache_rows(conn)
+
+    assert rows[1].base == "T1w"
+    assert rows[1].echo_number == 2
+    assert rows[1].dicom_origin_cohort == "cohort"
+    assert rows[1].fov_x_mm == 240.0
+    assert rows[2].echo_number is None
+    assert (rows[2].post_contrast, rows[2].manual_review_required) == (1, 1)
+
+
+def test_step4_persist_updates(engine):
+    with engine.begin() as conn:
+        copy_upsert(conn, "series_classification_cache", pl.DataFrame({
+            "series_stack_id": [1, 2],
+            "series_instance_uid": ["1.2.1", "1.2.2"],
+        }), "series_stack_id")
+        conn.exec_driver_sql(
+            "INSERT INTO stack_fingerprint (series_stack_id, modality, mr_acquisition_type) "
+            "VALUES (1, 'MR', NULL), (2, 'MR', '2D')"
+        )
+
+        step = Step4Completion()
+        stacks = [
+            {"series_stack_id": 1, "base": "T2w", "technique": "TSE", "directory_type": "anat",
+             "manual_review_reasons_csv": "base:filled"},
+            {"series_stack_id": 2, "base": None, "directory_type": "misc"},
+        ]
+        step._persist_classification_updates(conn, stacks, [2])
+        step._persist_fingerprint_updates(conn, [(1, "3D", "text_pattern")])
+        rows = _cache_rows(conn)
+        acquisition = dict(conn.exec_driver_sql(
+            "SELECT series_stack_id, mr_acquisition_type FROM stack_fingerprint"
+        ).all())
+
+    assert (rows[1].base, rows[1].technique, rows[1].manual_review_required) == ("T2w", "TSE", 1)
+    assert rows[1].manual_review_reasons_csv == "base:filled"
+    assert rows[2].manual_review_reasons_csv == "orientation:low_confidence"
+    assert acquisition == {1: "3D", 2: "2D"}
@@ -0,0 +1,258 @@
+"""Tests for the Step 3 process-pool classification engine."""
+
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from classification.core.context import ClassificationContext
+from classification.pipeline import ClassificationPipeline
+from metadata_db import schema
+from src.sort import classification_engine as engine_module
+from src.sort.classification_engine import (
+    FINGERPRINT_FIELDS,
+    RESULT_FIELDS,
+    ClassificationEngine,
+    ResultCache,
+    classification_cache_version,
+    classify_rows,
+    deduplicate_rows,
+    fingerprint_row,
+    load_result_cache,
+    result_from_row,
+    save_result_cache,
+    signature_hash,
+)
+
+
+FINGERPRINTS = [
+    {
+        "image_type": "ORIGINAL\\PRIMARY\\M\\ND",
+        "scanning_sequence": "GR\\IR",
+        "sequence_variant": "SP\\MP",
+        "scan_options": "IR",
+        "stack_sequence_name": "tfl3d1",
+        "text_search_blob": "t1 mprage sag",
+        "manufacturer": "SIEMENS",
+        "mr_tr": 2300.0,
+        "mr_te": 2.98,
+        "mr_ti": 900.0,
+        "mr_flip_angle": 9.0,
+        "mr_acquisition_type": "3D",
+        "stack_orientation": "Sagittal",
+        "stack_n_instances": 176,
+    },
+    {
+        "image_type": "ORIGINAL\\PRIMARY\\M\\ND",
+        "scanning_sequence": "SE",
+        "sequence_variant": "SK\\SP",
+        "stack_sequence_name": "tse2d1_15",
+        "text_search_blob": "t2 tse tra",
+        "manufacturer": "SIEMENS",
+        "mr_tr": 5000.0,
+        "mr_te": 98.0,
+        "mr_echo_train_length": 15,
+        "stack_orientation": "Axial",
+        "stack_n_instances": 30,
+    },
+    {
+        "image_type": "DERIVED\\PRIMARY\\DIFFUSION\\ADC",
+        "scanning_sequence": "EP",
+        "text_search_blob": "ep2d diff adc",
+        "mr_diffusion_b_value": "0,1000",
+        "stack_n_instances": 25,
+    },
+    {
+        "image_type": "ORIGINAL\\PRIMARY\\LOCALIZER",
+        "text_search_blob": "localizer",
+        "stack_n_instances": 3,
+    },
+]
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return ClassificationPipeline()
+
+
+def _expected(pipeline, fps):
+    return [pipeline.classify(ClassificationContext.from_fingerprint(fp)).to_dict() for fp in fps]
+
+
+def _run(engine, batches):
+    async def collect():
+        return [rows async for rows in engine.classify_batches(batches)]
+
+    return asyncio.run(collect())
+
+
+def test_row_roundtrip_matches_pipeline(pipeline):
+    rows = [fingerprint_row(fp) for fp in FINGERPRINTS]
+    assert all(len(row) == len(FINGERPRINT_FIELDS) for row in rows)
+
+    results = [result_from_row(row) for row in classify_rows(pipeline, rows)]
+    assert [result.to_dict() for result in results] == _expected(pipeline, FINGERPRINTS)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_engine_yields_batches_in_order(pipeline, workers):
+    fps = FINGERPRINTS * 5
+    batches = [[fingerprint_row(fp) for fp in fps[i:i + 3]] for i in range(0, len(fps), 3)]
+
+    output = _run(ClassificationEngine(workers, pipeline=pipeline), batches)
+
+    assert [len(rows) for rows in output] == [len(batch) for batch in batches]
+    flat = [result_from_row(row).to_dict() for rows in output for row in rows]
+    assert flat == _expected(pipeline, fps)
+
+
+@pytest.mark.parametrize("explicit_dir", [True, False])
+def test_workers_use_the_pipeline_yaml_dir(tmp_path, explicit_dir):
+    custom = tmp_path / "detection_yaml"
+    shutil.copytree(ClassificationPipeline().yaml_dir, custom)
+    base_yaml = custom / "base-detection.yaml"
+    base_yaml.write_text(base_yaml.read_text().replace('MPRAGE: ["T1w", 0.95]', 'MPRAGE: ["PDw", 0.95]'))
+    custom_pipeline = ClassificationPipeline(str(custom))
+    fps = FINGERPRINTS * 2
+    batches = [[fingerprint_row(fp) for fp in fps[i:i + 2]] for i in range(0, len(fps), 2)]
+
+    engine = ClassificationEngine(
+        2,
+        pipeline=custom_pipeline,
+        detection_yaml_dir=str(custom) if explicit_dir else None,
+    )
+    output = _run(engine, batches)
+
+    flat = [result_from_row(row).to_dict() for rows in output for row in rows]
+    assert flat == _expected(custom_pipeline, fps)
+    assert flat[0]["base"] == "PDw"
+
+
+def test_failing_row_gets_error_result(pipeline, monkeypatch):
+    def broken(fp):
+        raise ValueError("bad fingerprint")
+
+    monkeypatch.setattr(engine_module.ClassificationContext, "from_fingerprint", broken)
+    (row,) = classify_rows(pipeline, [fingerprint_row(FINGERPRINTS[0])])
+    result = result_from_row(row)
+    assert len(row) == len(RESULT_FIELDS)
+    assert result.manual_review_required == 1
+    assert result.get_review_reasons() == ["classification:error"]
+    assert result.directory_type == "misc"
+
+
+def test_default_worker_count_is_bounded(monkeypatch):
+    monkeypatch.setattr(engine_module.os, "cpu_count", lambda: 64)
+    assert ClassificationEngine().workers == engine_module.MAX_AUTO_WORKERS
+    monkeypatch.setattr(engine_module.os, "cpu_count", lambda: 1)
+    assert ClassificationEngine().workers == 1
+
+
+def test_deduplicate_rows_keeps_first_seen_order(pipeline):
+    fps = [FINGERPRINTS[i] for i in (1, 0, 1, 2, 0, 1)]
+    rows = [fingerprint_row(fp) for fp in fps]
+
+    unique_rows, slots = deduplicate_rows(rows)
+
+    assert unique_rows == [rows[0], rows[1], rows[3]]
+    assert slots == [0, 1, 0, 2, 1, 0]
+    unique_results = classify_rows(pipeline, unique_rows)
+    fanned = [result_from_row(unique_results[slot]).to_dict() for slot in slots]
+    assert fanned == _expected(pipeline, fps)
+
+
+def test_signature_hash_uses_exact_values():
+    row = fingerprint_row(FINGERPRINTS[0])
+    assert signature_hash(row) == signature_hash(fingerprint_row(dict(FINGERPRINTS[0])))
+    changed = dict(FINGERPRINTS[0], mr_te=2.981)
+    assert signature_hash(fingerprint_row(changed)) != signature_hash(row)
+
+
+def test_cache_version_tracks_detection_yaml(tmp_path):
+    yaml_dir = Path(ClassificationPipeline().yaml_dir)
+    copy = tmp_path / "detection_yaml"
+    shutil.copytree(yaml_dir, copy)
+
+    assert classification_cache_version(str(copy)) == classification_cache_version()
+    target = sorted(copy.glob("*.yaml"))[0]
+    target.write_text(target.read_text() + "\n# edited\n")
+    assert classification_cache_version(str(copy)) != classification_cache_version()
+
+
+@pytest.fixture
+def cache_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    schema.ClassificationResultCache.__table__.create(engine)
+    return engine
+
+
+def test_result_cache_roundtrip(cache_engine, pipeline):
+    rows = [fingerprint_row(fp) for fp in FINGERPRINTS]
+    keys = [signature_hash(row) for row in rows]
+    cache = ResultCache("v1")
+    for key, result in zip(keys, classify_rows(pipeline, rows)):
+        cache.add(key, result)
+
+    with cache_engine.begin() as conn:
+        assert save_result_cache(conn, cache) == len(rows)
+        assert save_result_cache(conn, cache) == 0
+
+    with cache_engine.connect() as conn:
+        loaded = load_result_cache(conn, "v1", keys + ["missing"])
+    assert len(loaded) == len(rows)
+    assert loaded.get("missing") is None
+    assert [result_from_row(loaded.get(key)).to_dict() for key in keys] == _expected(pipeline, FINGERPRINTS)
+
+
+def test_result_cache_drops_other_versions(cache_engine, pipeline):
+    row = fingerprint_row(FINGERPRINTS[0])
+    key = signature_hash(row)
+    (result,) = classify_rows(pipeline, [row])
+    stale = ResultCache("old")
+    stale.add(key, result)
+    with cache_engine.begin() as conn:
+        stale.save(conn)
+
+    with cache_engine.begin() as conn:
+        current = load_result_cache(conn, "new", [key])
+        assert len(current) == 0
+        current.add(key, result)
+        current.save(conn)
+        versions = conn.exec_driver_sql("SELECT pipeline_version FROM classification_result_cache").scalars().all()
+    assert versions == ["new"]
+
+
+def test_load_result_cache_without_table():
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    with engine.connect() as conn:
+        cache = load_result_cache(conn, "v1", ["abc"])
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_engine_reports_parser_cache_stats(pipeline, workers):
+    fps = FINGERPRINTS * 6
+    batches = [[fingerprint_row(fp) for fp in fps[i:i + 4]] for i in range(0, len(fps), 4)]
+    engine = ClassificationEngine(workers, pipeline=pipeline)
+
+    _run(engine, batches)
+
+    stats = engine.parser_cache_stats()
+    assert set(stats) == {
+        "parse_image_type",
+        "parse_scanning_sequence",
+        "parse_sequence_variant",
+        "parse_scan_options",
+        "parse_sequence_name",
+    }
+    image_type = stats["parse_image_type"]
+    assert image_type["hits"] + image_type["misses"] >= len(fps)
+    assert image_type["misses"] <= len(FINGERPRINTS) * workers
+    assert 0.0 < image_type["hit_rate"] <= 1.0
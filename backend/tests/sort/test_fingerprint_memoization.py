@@ -0,0 +1,186 @@
+"""Tests for distinct-value memoization in the Step 2 fingerprint transform."""
+
+import polars as pl
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from metadata_db import schema
+from src.sort import fingerprint_polars as fp
+from src.sort.fingerprint_polars import (
+    FINGERPRINT_SOURCE_SCHEMA,
+    NormalizationCache,
+    transform_fingerprints,
+)
+
+
+def _source_frame(n_rows: int = 60) -> pl.DataFrame:
+    manufacturers = ["SIEMENS", "Siemens Healthineers", "GE MEDICAL SYSTEMS", "Toshiba", "Philips", "", None, "Acme"]
+    descriptions = ["T1 MPRAGE", "t2_tse_tra", "FLAIR*", "", None, "DWI b1000"]
+    protocols = ["ep2d_diff", None, "T2*_GRE", "mpr 3d"]
+    tracers = ["FDG -- fluorodeoxyglucose", "Ga68 PSMA", None, "unknown tracer"]
+    rows = []
+    for i in range(n_rows):
+        row = {name: None for name in FINGERPRINT_SOURCE_SCHEMA}
+        row.update(
+            series_stack_id=i + 1,
+            series_id=i // 2 + 1,
+            stack_modality=["MR", "CT", "PT"][i % 3],
+            manufacturer=manufacturers[i % len(manufacturers)],
+            series_description=descriptions[i % len(descriptions)],
+            protocol_name=protocols[i % len(protocols)],
+            sequence_name="*fl3d1" if i % 5 == 0 else None,
+            image_comments="" if i % 7 == 0 else None,
+            mr_acquisition_type=["3D", "2D", "", None][i % 4],
+            angio_flag=["Y", "no", None][i % 3],
+            phase_contrast=["N", "TRUE", ""][i % 3],
+            radiopharmaceutical=tracers[i % len(tracers)],
+            contrast_bolus_agent="Gadovist" if i % 4 == 0 else None,
+            contrast_bolus_volume=[15.0, 7.5, None][i % 3],
+            pixel_spacing="0.5\\0.5",
+            rows=256,
+            columns=256,
+        )
+        rows.append(row)
+    return pl.DataFrame(rows, schema=FINGERPRINT_SOURCE_SCHEMA)
+
+
+def _per_row_reference(df: pl.DataFrame) -> dict[str, list]:
+    """Outputs of the per-row normalizers, as computed before memoization."""
+    rows = df.to_dicts()
+    return {
+        "manufacturer": [fp._normalize_manufacturer(r["manufacturer"]) for r in rows],
+        "mr_acquisition_type": [fp._normalize_mr_acquisition_type(r["mr_acquisition_type"]) for r in rows],
+        "mr_angio_flag": [fp._normalize_yes_no_flag(r["angio_flag"]) for r in rows],
+        "mr_phase_contrast": [fp._normalize_yes_no_flag(r["phase_contrast"]) for r in rows],
+        "pet_tracer": [fp._normalize_pet_tracer(r["radiopharmaceutical"]) for r in rows],
+        "text_search_blob": [
+            fp._build_text_blob(*(r[name] for name in fp.TEXT_BLOB_COLUMNS)) for r in rows
+        ],
+        "contrast_search_blob": [
+            fp._build_contrast_blob(
+                r["contrast_bolus_agent"],
+                r["contrast_bolus_route"],
+                r["contrast_bolus_total_dose"],
+                r["contrast_bolus_start_time"],
+                r["contrast_bolus_volume"],
+                r["contrast_flow_rate"],
+                r["contrast_flow_duration"],
+            )
+            for r in rows
+        ],
+    }
+
+
+def test_memoized_transform_matches_per_row_normalizers():
+    df = _source_frame()
+    result = transform_fingerprints(df)
+
+    assert result.get_column("series_stack_id").to_list() == df.get_column("series_stack_id").to_list()
+    for column, expected in _per_row_reference(df).items():
+        assert result.get_column(column).to_list() == expected, column
+
+
+def test_normalizers_run_once_per_distinct_value(monkeypatch):
+    calls: list = []
+    original = fp._normalize_manufacturer
+
+    def counting(raw):
+        calls.append(raw)
+        return original(raw)
+
+    monkeypatch.setattr(fp, "_normalize_manufacturer", counting)
+    df = _source_frame(200)
+    cache = NormalizationCache()
+    transform_fingerprints(df, normalization_cache=cache)
+
+    distinct = df.get_column("manufacturer").drop_nulls().n_unique()
+    assert sorted(calls) == sorted(set(calls))
+    assert len(calls) == distinct
+
+    # A second run with the same cache does not call the normalizer again
+    calls.clear()
+    transform_fingerprints(df, normalization_cache=cache)
+    assert calls == []
+    assert cache.stats()["hits"] > 0
+
+
+def test_empty_frame_returns_output_schema():
+    result = transform_fingerprints(pl.DataFrame(schema=FINGERPRINT_SOURCE_SCHEMA))
+    assert result.height == 0
+    assert result.schema == pl.Schema(fp.FINGERPRINT_OUTPUT_SCHEMA)
+
+
+@pytest.fixture
+def cache_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    schema.FingerprintNormalizationCache.__table__.create(engine)
+    return engine
+
+
+def test_persistent_cache_roundtrip(cache_engine, monkeypatch):
+    df = _source_frame()
+    cache = NormalizationCache()
+    expected = transform_fingerprints(df, normalization_cache=cache)
+    with cache_engine.begin() as conn:
+        written = fp.save_normalization_cache(conn, cache)
+    assert written == len(cache)
+    assert fp.save_normalization_cache(cache_engine.connect(), cache) == 0
+
+    def fail(raw):
+        raise AssertionError("normalizer should not be called for cached values")
+
+    monkeypatch.setattr(fp, "_normalize_manufacturer", fail)
+    monkeypatch.setattr(fp, "_normalize_pet_tracer", fail)
+    monkeypatch.setattr(fp, "normalize_text_blob", fail)
+    with cache_engine.connect() as conn:
+        loaded = fp.load_normalization_cache(conn)
+        assert len(loaded) == 0
+        result = transform_fingerprints(df, normalization_cache=loaded)
+    assert result.equals(expected)
+    assert len(loaded) == written
+    assert loaded.stats()["misses"] == 0
+
+
+def test_persistent_cache_reads_only_the_chunk_values(cache_engine):
+    df = _source_frame()
+    cache = NormalizationCache()
+    transform_fingerprints(df, normalization_cache=cache)
+    with cache_engine.begin() as conn:
+        fp.save_normalization_cache(conn, cache)
+
+    chunk = df.head(1)
+    with cache_engine.connect() as conn:
+        loaded = fp.load_normalization_cache(conn)
+        transform_fingerprints(chunk, normalization_cache=loaded)
+    assert loaded.misses == 0
+    assert loaded.entries["manufacturer"].keys() == set(chunk.get_column("manufacturer").drop_nulls())
+    assert len(loaded) < len(cache)
+
+
+def test_persistent_cache_ignores_other_versions(cache_engine):
+    df = _source_frame(12)
+    stale = NormalizationCache(version="stale")
+    transform_fingerprints(df, normalization_cache=stale)
+    with cache_engine.begin() as conn:
+        stale.save(conn)
+
+    with cache_engine.begin() as conn:
+        current = fp.load_normalization_cache(conn)
+        assert len(current) == 0
+        transform_fingerprints(df, normalization_cache=current)
+        current.save(conn)
+        # Saving the current version drops the stale rows
+        count = conn.exec_driver_sql("SELECT COUNT(*) FROM fingerprint_normalization_cache").scalar()
+    assert count == len(current)
+
+
+def test_load_without_table_falls_back_to_empty_cache():
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    with engine.connect() as conn:
+        cache = fp.load_normalization_cache(conn)
+    assert len(cache) == 0
@@ -0,0 +1,193 @@
+"""Tests for the chunked Step 2 load → transform → COPY pipeline."""
+
+import polars as pl
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from metadata_db import schema
+from src.sort import fingerprint_polars as fp
+from src.sort.fingerprint_polars import (
+    FINGERPRINT_SOURCE_SCHEMA,
+    NormalizationCache,
+    compute_metrics_from_dataframe,
+    find_dirty_stacks,
+    fingerprint_hashes,
+    stream_fingerprints,
+    transform_fingerprints,
+)
+
+
+def _source_frame(n_rows: int) -> pl.DataFrame:
+    rows = []
+    for i in range(n_rows):
+        row = {name: None for name in FINGERPRINT_SOURCE_SCHEMA}
+        row.update(
+            series_stack_id=i + 1,
+            series_id=i + 1,
+            stack_modality=["MR", "CT", "PT"][i % 3],
+            manufacturer=["SIEMENS", "GE MEDICAL SYSTEMS", None][i % 3],
+            series_description=["T1 MPRAGE", "FLAIR", None][i % 3],
+            mr_acquisition_type="3D" if i % 2 else "2D",
+            contrast_bolus_agent="Gadovist" if i % 4 == 0 else None,
+            calcium_scoring_mass_factor_patient=1.0 if i % 6 == 1 else None,
+            attenuation_correction_method="CT" if i % 3 == 2 else None,
+            pixel_spacing="0.5\\0.5" if i % 5 else None,
+            rows=256,
+            columns=256,
+        )
+        rows.append(row)
+    return pl.DataFrame(rows, schema=FINGERPRINT_SOURCE_SCHEMA)
+
+
+@pytest.fixture
+def sqlite_conn():
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    with engine.connect() as conn:
+        yield conn
+
+
+@pytest.fixture
+def stubbed_io(monkeypatch):
+    """Serve source chunks from a frame and capture the chunks written by COPY."""
+    source = _source_frame(23)
+    loaded: list[list[int]] = []
+    written: list[pl.DataFrame] = []
+
+    def load_chunk(conn, ids):
+        loaded.append(list(ids))
+        return source.filter(pl.col("series_stack_id").is_in(ids))
+
+    def upsert_chunk(dbapi_conn, df, temp_table):
+        written.append(df)
+
+    monkeypatch.setattr(fp, "_load_source_chunk", load_chunk)
+    monkeypatch.setattr(fp, "_upsert_fingerprint_chunk", upsert_chunk)
+    return source, loaded, written
+
+
+def test_stream_processes_bounded_chunks(sqlite_conn, stubbed_io):
+    source, loaded, written = stubbed_io
+    ids = source.get_column("series_stack_id").to_list()
+    progress = []
+
+    stream_fingerprints(sqlite_conn, ids, chunk_size=5, progress_callback=lambda done, total: progress.append(done))
+
+    assert [len(chunk) for chunk in loaded] == [5, 5, 5, 5, 3]
+    assert all(df.height <= 5 for df in written)
+    assert progress == [5, 10, 15, 20, 23]
+    combined = pl.concat(written)
+    assert combined.equals(transform_fingerprints(source))
+
+
+def test_stream_metrics_match_whole_frame(sqlite_conn, stubbed_io):
+    source, _, _ = stubbed_io
+    ids = source.get_column("series_stack_id").to_list()
+
+    metrics = stream_fingerprints(sqlite_conn, ids, chunk_size=4)
+
+    expected = compute_metrics_from_dataframe(transform_fingerprints(source))
+    assert metrics == expected
+
+
+def test_stream_shares_normalization_cache_across_chunks(sqlite_conn, stubbed_io, monkeypatch):
+    source, _, _ = stubbed_io
+    calls = []
+    original = fp._normalize_manufacturer
+
+    def counting(raw):
+        calls.append(raw)
+        return original(raw)
+
+    monkeypatch.setattr(fp, "_normalize_manufacturer", counting)
+    cache = NormalizationCache()
+    stream_fingerprints(sqlite_conn, source.get_column("series_stack_id").to_list(), chunk_size=3, normalization_cache=cache)
+
+    assert sorted(calls) == ["GE MEDICAL SYSTEMS", "SIEMENS"]
+
+
+def test_stream_without_stacks(sqlite_conn, stubbed_io):
+    _, loaded, written = stubbed_io
+    metrics = stream_fingerprints(sqlite_conn, [])
+    assert loaded == [] and written == []
+    assert metrics["total_fingerprints_created"] == 0
+
+
+def test_fingerprint_hash_tracks_content():
+    source = _source_frame(6)
+    first = transform_fingerprints(source)
+    assert first.get_column("fingerprint_hash").to_list() == fingerprint_hashes(transform_fingerprints(source))
+    assert first.get_column("fingerprint_hash").n_unique() == 6
+
+    changed = transform_fingerprints(source.with_columns(
+        pl.when(pl.col("series_stack_id") == 2).then(pl.lit("T2 TSE")).otherwise(pl.col("series_description"))
+        .alias("series_description")
+    ))
+    differs = [a != b for a, b in zip(first.get_column("fingerprint_hash"), changed.get_column("fingerprint_hash"))]
+    assert differs == [False, True, False, False, False, False]
+
+
+def test_stream_skips_unchanged_fingerprints(sqlite_conn, stubbed_io, monkeypatch):
+    source, _, written = stubbed_io
+    ids = source.get_column("series_stack_id").to_list()
+    hashes = dict(zip(ids, fp.source_hashes(source)))
+    # Stack 3 changed since the last run, stack 4 was never fingerprinted
+    hashes[3] = "stale"
+    del hashes[4]
+    monkeypatch.setattr(fp, "load_source_hashes", lambda conn, chunk: {i: hashes[i] for i in chunk if i in hashes})
+    transformed: list[int] = []
+    original = fp.transform_fingerprints
+
+    def counting(df, **kwargs):
+        transformed.extend(df.get_column("series_stack_id").to_list())
+        return original(df, **kwargs)
+
+    monkeypatch.setattr(fp, "transform_fingerprints", counting)
+
+    metrics = stream_fingerprints(sqlite_conn, ids, chunk_size=5, skip_unchanged=True)
+
+    assert transformed == [3, 4]
+    assert pl.concat(written).equals(original(source.filter(pl.col("series_stack_id").is_in([3, 4]))))
+    assert metrics["fingerprints_unchanged"] == 21
+    assert metrics["total_fingerprints_created"] == 2
+
+
+def test_source_hash_tracks_source_rows_and_version():
+    source = _source_frame(4)
+    first = fp.source_hashes(source)
+    assert first == transform_fingerprints(source).get_column("source_hash").to_list()
+    assert len(set(first)) == 4
+
+    changed = source.with_columns(
+        pl.when(pl.col("series_stack_id") == 2).then(pl.lit(9)).otherwise(pl.col("stack_n_instances"))
+        .alias("stack_n_instances")
+    )
+    differs = [a != b for a, b in zip(first, fp.source_hashes(changed))]
+    assert differs == [False, True, False, False]
+    assert set(fp.source_hashes(source, "other-version")).isdisjoint(first)
+
+
+def test_find_dirty_stacks(sqlite_conn):
+    schema.StackFingerprint.__table__.create(sqlite_conn)
+    schema.SeriesClassificationCache.__table__.create(sqlite_conn)
+    sqlite_conn.exec_driver_sql(
+        "INSERT INTO stack_fingerprint (fingerprint_id, series_stack_id, modality, fingerprint_hash) VALUES "
+        "(11, 1, 'MR', 'a'), (12, 2, 'MR', 'b'), (13, 3, 'MR', 'c'), (14, 4, 'MR', 'd'), (15, 5, 'MR', NULL)"
+    )
+    sqlite_conn.exec_driver_sql(
+        "INSERT INTO series_classification_cache (series_stack_id, series_instance_uid, fingerprint_hash, rules_version) "
+        "VALUES (1, '1', 'a', 'v1'), (2, '2', 'old', 'v1'), (3, '3', 'c', 'v0'), (5, '5', NULL, 'v1')"
+    )
+
+    # 2: fingerprint changed, 3: rules changed, 4: never classified; 1 and 5 are current
+    assert sorted(find_dirty_stacks(sqlite_conn, [1, 2, 3, 4, 5], "v1")) == [(12, 2), (13, 3), (14, 4)]
+    assert find_dirty_stacks(sqlite_conn, [1, 5], "v1") == []
+
+
+def test_rows_to_frame_uses_source_schema():
+    columns = ["series_stack_id", "manufacturer", "stack_echo_time", "rows"]
+    df = fp._rows_to_frame([(1, "GE", 2.5, 256), (2, None, None, None)], columns)
+    assert df.columns == columns
+    assert df.schema["series_stack_id"] == pl.Int64
+    assert df.schema["rows"] == pl.Int32
+    assert df.get_column("manufacturer").to_list() == ["GE", None]
@@ -0,0 +1,136 @@
+"""Tests for the indexed neighbour search of Step 4 gap filling."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from src.sort.gap_filling import (
+    ReferenceDatabase,
+    ReferenceStack,
+    SimilarityResult,
+    build_reference_database,
+    compute_physics_key,
+    find_best_match,
+    find_best_matches,
+    get_adjacent_keys,
+    get_multi_dim_adjacent_keys,
+    get_relaxed_ti_keys,
+    is_technique_compatible_with_scanning_sequence,
+    MIN_SIMILARITY_MATCHES,
+)
+
+PAIRS = [("T1w", "MPRAGE"), ("T2w", "TSE"), ("T2w", "TIRM"), ("DWI", "DWI-EPI"), ("T1w", "SE"), ("T2*w", "GRE")]
+SCANNING_SEQUENCES = [None, "SE", "GR", "EP", "IR", "RM", "SE\\IR"]
+
+
+def _physics(rng):
+    return {
+        "mr_tr": rng.choice([None, rng.uniform(300, 3000)]),
+        "mr_te": rng.choice([None, rng.uniform(2, 40)]),
+        "mr_ti": rng.choice([None, None, rng.uniform(700, 1500)]),
+        "mr_flip_angle": rng.choice([None, rng.uniform(5, 30)]),
+        "stack_n_instances": rng.choice([None, rng.randint(1, 120)]),
+    }
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(20)
+    references = []
+    for i in range(3000):
+        base, technique = rng.choice(PAIRS)
+        references.append({"series_stack_id": i, "base": base, "technique": technique, **_physics(rng)})
+    queries = [
+        {"series_stack_id": 10_000 + i, "scanning_sequence": rng.choice(SCANNING_SEQUENCES), **_physics(rng)}
+        for i in range(1500)
+    ]
+    # Repeat some reference physics so exact bins are hit as well
+    queries += [{**ref, "scanning_sequence": rng.choice(SCANNING_SEQUENCES)} for ref in references[:300]]
+    return build_reference_database(references), queries
+
+
+def _reference_search(ref_db, key, max_distance=2):
+    """The per-key expansion search, built from the neighbour key generators."""
+    matches = list(ref_db.get_matches(key))
+    if matches:
+        return matches, "exact_bin"
+    for distance in range(1, max_distance + 1):
+        for adj_key in get_adjacent_keys(key, distance):
+            matches.extend(ref_db.get_matches(adj_key))
+        if matches:
+            return matches, "expanded_single"
+        for adj_key in get_multi_dim_adjacent_keys(key, distance):
+            matches.extend(ref_db.get_matches(adj_key))
+        if matches:
+            return matches, "expanded_multi"
+    for adj_key in get_relaxed_ti_keys(key, max_ti_distance=6):
+        matches.extend(ref_db.get_matches(adj_key))
+    if matches:
+        return matches, "expanded_relaxed_ti"
+    return [], "no_match"
+
+
+def _reference_best_match(ref_db, stack):
+    key = compute_physics_key(
+        stack["mr_tr"], stack["mr_te"], stack["mr_ti"], stack["mr_flip_angle"], stack["stack_n_instances"]
+    )
+    matches, method = _reference_search(ref_db, key)
+    if not matches:
+        return SimilarityResult(method="no_match")
+    for (base, technique), count in Counter((m.base, m.technique) for m in matches).most_common():
+        if not is_technique_compatible_with_scanning_sequence(technique, stack["scanning_sequence"]):
+            continue
+        if count < MIN_SIMILARITY_MATCHES:
+            return SimilarityResult(method="insufficient_matches", match_count=count, total_in_bin=len(matches))
+        return SimilarityResult(base, technique, method, count, len(matches))
+    return SimilarityResult(method="no_compatible_match", total_in_bin=len(matches))
+
+
+def test_expanded_matches_follow_neighbour_keys(corpus):
+    ref_db, queries = corpus
+    methods = Counter()
+    for stack in queries:
+        key = compute_physics_key(
+            stack["mr_tr"], stack["mr_te"], stack["mr_ti"], stack["mr_flip_angle"], stack["stack_n_instances"]
+        )
+        matches, method = ref_db.get_expanded_matches(key)
+        expected, expected_method = _reference_search(ref_db, key)
+        assert method == expected_method
+        assert [m.series_stack_id for m in matches] == [m.series_stack_id for m in expected]
+        methods[method] += 1
+
+    # The corpus exercises every step of the search
+    assert set(methods) == {
+        "exact_bin", "expanded_single", "expanded_multi", "expanded_relaxed_ti", "no_match",
+    }
+
+
+def test_batch_matches_per_stack_search(corpus):
+    ref_db, queries = corpus
+    results = find_best_matches(ref_db, queries)
+    assert results == [_reference_best_match(ref_db, stack) for stack in queries]
+
+    stack = queries[-1]
+    assert find_best_match(
+        ref_db, stack["mr_tr"], stack["mr_te"], stack["mr_ti"], stack["mr_flip_angle"],
+        stack["stack_n_instances"], stack["scanning_sequence"],
+    ) == results[-1]
+
+
+def test_index_rebuilt_after_add():
+    ref_db = build_reference_database([
+        {"series_stack_id": 1, "base": "T1w", "technique": "SE", "mr_tr": 500.0, "mr_te": 10.0},
+    ])
+    key = compute_physics_key(600.0, 10.0, None, None, None)
+    assert ref_db.get_expanded_matches(key)[1] == "expanded_single"
+
+    ref_db.add(ReferenceStack(2, "T2w", "TSE", tr=600.0, te=10.0, ti=None, fa=None, n_instances=None))
+    matches, method = ref_db.get_expanded_matches(key)
+    assert (method, [m.series_stack_id for m in matches]) == ("exact_bin", [2])
+
+
+def test_empty_database():
+    ref_db = ReferenceDatabase()
+    assert find_best_matches(ref_db, [{"mr_tr": 500.0}]) == [SimilarityResult(method="no_match")]
+    assert find_best_matches(ref_db, []) == []